@@ -22,6 +22,7 @@
 #include "libsigrokdecode-internal.h" /* First, so we avoid a _POSIX_C_SOURCE warning. */
 #include "libsigrokdecode.h"
 #include <glib.h>
+#include <glib/gstdio.h>
 
 /**
  * @file
@@ -42,6 +43,15 @@
 /* The list of loaded protocol decoders. */
 static GSList *pd_list = NULL;
 
+/*
+ * Decoders loaded from the metadata index whose Python module wasn't
+ * imported yet, mapped to their module name.
+ */
+static GHashTable *pd_deferred = NULL;
+
+/* The decoder metadata index file, see srd_decoder_index_set(). */
+static char *index_path = NULL;
+
 /* srd.c */
 extern SRD_PRIV GSList *searchpaths;
 
@@ -162,6 +172,9 @@ static void decoder_free(struct srd_decoder *dec)
 	Py_XDECREF(dec->py_mod);
 	PyGILState_Release(gstate);
 
+	if (pd_deferred)
+		g_hash_table_remove(pd_deferred, dec);
+
 	g_slist_free_full(dec->options, &decoder_option_free);
 	g_slist_free_full(dec->binary, (GDestroyNotify)&g_strfreev);
 	g_slist_free_full(dec->annotation_rows, &annotation_row_free);
@@ -715,39 +728,17 @@ static gboolean contains_duplicate_row_ids(GSList *list1, GSList *list2)
 	return FALSE;
 }
 
-/**
- * Load a protocol decoder module into the embedded Python interpreter.
- *
- * @param module_name The module name to be loaded.
- *
- * @return SRD_OK upon success, a (negative) error code otherwise.
- *
- * @since 0.1.0
+/*
+ * Import the named decoder module, and check its Decoder class. This
+ * fills in d->py_mod and d->py_dec. Must be called with the GIL held.
  */
-SRD_API int srd_decoder_load(const char *module_name)
+static int decoder_import(struct srd_decoder *d, const char *module_name)
 {
 	PyObject *py_basedec;
-	struct srd_decoder *d;
 	long apiver;
 	int is_subclass;
 	const char *fail_txt;
-	PyGILState_STATE gstate;
-
-	if (!srd_check_init())
-		return SRD_ERR;
-
-	if (!module_name)
-		return SRD_ERR_ARG;
-
-	gstate = PyGILState_Ensure();
 
-	if (PyDict_GetItemString(PyImport_GetModuleDict(), module_name)) {
-		/* Module was already imported. */
-		PyGILState_Release(gstate);
-		return SRD_OK;
-	}
-
-	d = g_malloc0(sizeof(struct srd_decoder));
 	fail_txt = NULL;
 
 	d->py_mod = py_import_by_name(module_name);
@@ -814,6 +805,134 @@ SRD_API int srd_decoder_load(const char *module_name)
 		goto err_out;
 	}
 
+	return SRD_OK;
+
+except_out:
+	/* Don't show a message for the "common" directory, it's not a PD. */
+	if (strcmp(module_name, "common")) {
+		srd_exception_catch("Failed to load decoder %s: %s",
+				    module_name, fail_txt);
+	}
+	fail_txt = NULL;
+
+err_out:
+	if (fail_txt)
+		srd_err("Failed to load decoder %s: %s", module_name, fail_txt);
+	Py_CLEAR(d->py_dec);
+	Py_CLEAR(d->py_mod);
+
+	return SRD_ERR_PYTHON;
+}
+
+/**
+ * Import the Python module of a decoder which was loaded from the
+ * metadata index, if that hasn't happened yet.
+ *
+ * @param dec The decoder to import. Must not be NULL.
+ *
+ * @return SRD_OK upon success, a (negative) error code otherwise.
+ *
+ * @private
+ */
+SRD_PRIV int srd_decoder_import(struct srd_decoder *dec)
+{
+	const char *module_name;
+	char *id;
+	int ret;
+	PyGILState_STATE gstate;
+
+	if (dec->py_mod)
+		return SRD_OK;
+
+	module_name = pd_deferred ? g_hash_table_lookup(pd_deferred, dec) : NULL;
+	if (!module_name) {
+		srd_err("Decoder has no Python module.");
+		return SRD_ERR_ARG;
+	}
+
+	srd_dbg("Importing deferred decoder module %s.", module_name);
+
+	gstate = PyGILState_Ensure();
+
+	ret = decoder_import(dec, module_name);
+	if (ret == SRD_OK) {
+		/* The index could be stale if the module changed underneath. */
+		if (py_attr_as_str(dec->py_dec, "id", &id) != SRD_OK) {
+			ret = SRD_ERR_PYTHON;
+		} else if (strcmp(id, dec->id)) {
+			srd_err("Decoder module %s has ID %s, but the index "
+				"has %s.", module_name, id, dec->id);
+			ret = SRD_ERR_PYTHON;
+		}
+		if (ret == SRD_OK) {
+			g_hash_table_remove(pd_deferred, dec);
+		} else {
+			Py_CLEAR(dec->py_dec);
+			Py_CLEAR(dec->py_mod);
+		}
+		g_free(id);
+	}
+
+	PyGILState_Release(gstate);
+
+	return ret;
+}
+
+/* Check whether a decoder was already loaded from the named module. */
+static gboolean decoder_is_loaded(const char *module_name)
+{
+	const char *name;
+	GSList *l;
+	gboolean loaded;
+	PyGILState_STATE gstate;
+
+	gstate = PyGILState_Ensure();
+	loaded = PyDict_GetItemString(PyImport_GetModuleDict(),
+			module_name) != NULL;
+	PyGILState_Release(gstate);
+
+	for (l = pd_list; l && !loaded && pd_deferred; l = l->next) {
+		name = g_hash_table_lookup(pd_deferred, l->data);
+		if (name && !strcmp(name, module_name))
+			loaded = TRUE;
+	}
+
+	return loaded;
+}
+
+/*
+ * Load a decoder module, see srd_decoder_load(). If 'out' is not NULL,
+ * it is set to the newly loaded decoder, or NULL if the module was
+ * loaded before.
+ */
+static int decoder_load(const char *module_name, struct srd_decoder **out)
+{
+	struct srd_decoder *d;
+	const char *fail_txt;
+	PyGILState_STATE gstate;
+
+	if (out)
+		*out = NULL;
+
+	if (!srd_check_init())
+		return SRD_ERR;
+
+	if (!module_name)
+		return SRD_ERR_ARG;
+
+	if (decoder_is_loaded(module_name)) {
+		/* Module was already imported. */
+		return SRD_OK;
+	}
+
+	gstate = PyGILState_Ensure();
+
+	d = g_malloc0(sizeof(struct srd_decoder));
+	fail_txt = NULL;
+
+	if (decoder_import(d, module_name) != SRD_OK)
+		goto err_out;
+
 	/* Store required fields in newly allocated strings. */
 	if (py_attr_as_str(d->py_dec, "id", &(d->id)) != SRD_OK) {
 		fail_txt = "no 'id' attribute";
@@ -948,17 +1067,11 @@ SRD_API int srd_decoder_load(const char *module_name)
 
 	/* Append it to the list of loaded decoders. */
 	pd_list = g_slist_append(pd_list, d);
+	if (out)
+		*out = d;
 
 	return SRD_OK;
 
-except_out:
-	/* Don't show a message for the "common" directory, it's not a PD. */
-	if (strcmp(module_name, "common")) {
-		srd_exception_catch("Failed to load decoder %s: %s",
-				    module_name, fail_txt);
-	}
-	fail_txt = NULL;
-
 err_out:
 	if (fail_txt)
 		srd_err("Failed to load decoder %s: %s", module_name, fail_txt);
@@ -968,6 +1081,20 @@ err_out:
 	return SRD_ERR_PYTHON;
 }
 
+/**
+ * Load a protocol decoder module into the embedded Python interpreter.
+ *
+ * @param module_name The module name to be loaded.
+ *
+ * @return SRD_OK upon success, a (negative) error code otherwise.
+ *
+ * @since 0.1.0
+ */
+SRD_API int srd_decoder_load(const char *module_name)
+{
+	return decoder_load(module_name, NULL);
+}
+
 /**
  * Return a protocol decoder's docstring.
  *
@@ -987,7 +1114,11 @@ SRD_API char *srd_decoder_doc_get(const struct srd_decoder *dec)
 	if (!srd_check_init())
 		return NULL;
 
-	if (!dec || !dec->py_mod)
+	if (!dec)
+		return NULL;
+
+	/* The decoder is ours, importing it doesn't change its metadata. */
+	if (srd_decoder_import((struct srd_decoder *)dec) != SRD_OK)
 		return NULL;
 
 	gstate = PyGILState_Ensure();
@@ -1054,6 +1185,582 @@ SRD_API int srd_decoder_unload(struct srd_decoder *dec)
 	return SRD_OK;
 }
 
+/*
+ * Decoder metadata index.
+ *
+ * The index is a key file with one group per decoder directory. Each
+ * group holds a stamp of the directory's .py files (name, size, mtime
+ * in nanoseconds where the system has them),
+ * and the decoder's metadata as found in struct srd_decoder. Decoders
+ * with an up to date entry are loaded from the index, and their Python
+ * module is only imported when an instance is created.
+ */
+
+#define INDEX_GROUP	"libsigrokdecode"
+#define INDEX_FORMAT	"1"
+
+/* Modification time in nanoseconds, whole seconds where that's all we get. */
+static gint64 stat_mtime_ns(const GStatBuf *st)
+{
+#if defined(HAVE_STRUCT_STAT_ST_MTIM_TV_NSEC)
+	return (gint64)st->st_mtim.tv_sec * G_GINT64_CONSTANT(1000000000) +
+		st->st_mtim.tv_nsec;
+#elif defined(HAVE_STRUCT_STAT_ST_MTIMESPEC_TV_NSEC)
+	return (gint64)st->st_mtimespec.tv_sec * G_GINT64_CONSTANT(1000000000) +
+		st->st_mtimespec.tv_nsec;
+#else
+	return (gint64)st->st_mtime * G_GINT64_CONSTANT(1000000000);
+#endif
+}
+
+/* Describe the .py files of a decoder directory, NULL if there are none. */
+static char *decoder_stamp(const char *dir_path)
+{
+	GDir *dir;
+	GSList *names, *l;
+	GString *stamp;
+	GStatBuf st;
+	const gchar *direntry;
+	char *path;
+
+	if (!(dir = g_dir_open(dir_path, 0, NULL)))
+		return NULL;
+
+	names = NULL;
+	while ((direntry = g_dir_read_name(dir)) != NULL) {
+		if (g_str_has_suffix(direntry, ".py"))
+			names = g_slist_prepend(names, g_strdup(direntry));
+	}
+	g_dir_close(dir);
+
+	if (!names)
+		return NULL;
+
+	names = g_slist_sort(names, (GCompareFunc)strcmp);
+	stamp = g_string_new(NULL);
+	for (l = names; l; l = l->next) {
+		path = g_build_filename(dir_path, l->data, NULL);
+		if (g_stat(path, &st) == 0) {
+			g_string_append_printf(stamp, "%s:%" G_GINT64_FORMAT
+				":%" G_GINT64_FORMAT ";", (char *)l->data,
+				(gint64)st.st_size, stat_mtime_ns(&st));
+		}
+		g_free(path);
+	}
+	g_slist_free_full(names, g_free);
+
+	return g_string_free(stamp, FALSE);
+}
+
+static gboolean index_key_valid(const char *s)
+{
+	return *s && !strpbrk(s, "=[]\n\r");
+}
+
+static void index_strlist_set(GKeyFile *index, const char *group,
+		const char *key, const GSList *list)
+{
+	const char **strv;
+	gsize i;
+
+	if (!list)
+		return;
+
+	strv = g_malloc(sizeof(char *) * g_slist_length((GSList *)list));
+	for (i = 0; list; list = list->next)
+		strv[i++] = list->data;
+	g_key_file_set_string_list(index, group, key, strv, i);
+	g_free(strv);
+}
+
+/* Store a list of string tuples (e.g. annotation classes) as a flat list. */
+static void index_tuples_set(GKeyFile *index, const char *group,
+		const char *key, const GSList *list, gsize size)
+{
+	GPtrArray *strs;
+	char **tuple;
+	gsize i;
+
+	if (!list)
+		return;
+
+	strs = g_ptr_array_new();
+	for (; list; list = list->next) {
+		tuple = list->data;
+		for (i = 0; i < size; i++)
+			g_ptr_array_add(strs, tuple[i]);
+	}
+	g_key_file_set_string_list(index, group, key,
+		(const char * const *)strs->pdata, strs->len);
+	g_ptr_array_free(strs, TRUE);
+}
+
+static void index_channels_set(GKeyFile *index, const char *group,
+		const char *key, const GSList *list)
+{
+	const struct srd_channel *pdch;
+	GPtrArray *strs;
+
+	if (!list)
+		return;
+
+	strs = g_ptr_array_new();
+	for (; list; list = list->next) {
+		pdch = list->data;
+		g_ptr_array_add(strs, pdch->id);
+		g_ptr_array_add(strs, pdch->name);
+		g_ptr_array_add(strs, pdch->desc);
+	}
+	g_key_file_set_string_list(index, group, key,
+		(const char * const *)strs->pdata, strs->len);
+	g_ptr_array_free(strs, TRUE);
+}
+
+/* Add a decoder to the index. Returns FALSE if it can't be indexed. */
+static gboolean index_decoder_set(GKeyFile *index, const char *group,
+		const char *stamp, const struct srd_decoder *d)
+{
+	const struct srd_decoder_option *o;
+	const struct srd_decoder_annotation_row *row;
+	const GSList *l, *ll;
+	GPtrArray *strs, *values;
+	gint *classes;
+	char *key, *text;
+	gsize i;
+
+	/* Key names can't contain every character. */
+	for (l = d->options; l; l = l->next) {
+		o = l->data;
+		if (!index_key_valid(o->id))
+			return FALSE;
+	}
+	for (l = d->annotation_rows; l; l = l->next) {
+		row = l->data;
+		if (!index_key_valid(row->id))
+			return FALSE;
+	}
+
+	g_key_file_set_string(index, group, "stamp", stamp);
+	g_key_file_set_string(index, group, "id", d->id);
+	g_key_file_set_string(index, group, "name", d->name);
+	g_key_file_set_string(index, group, "longname", d->longname);
+	g_key_file_set_string(index, group, "desc", d->desc);
+	g_key_file_set_string(index, group, "license", d->license);
+	index_strlist_set(index, group, "inputs", d->inputs);
+	index_strlist_set(index, group, "outputs", d->outputs);
+	index_strlist_set(index, group, "tags", d->tags);
+	index_channels_set(index, group, "channels", d->channels);
+	index_channels_set(index, group, "optional_channels", d->opt_channels);
+	index_tuples_set(index, group, "annotations", d->annotations, 2);
+	index_tuples_set(index, group, "binary", d->binary, 2);
+
+	/* Annotation rows: IDs and descriptions, then one key per row. */
+	strs = g_ptr_array_new();
+	for (l = d->annotation_rows; l; l = l->next) {
+		row = l->data;
+		g_ptr_array_add(strs, row->id);
+		g_ptr_array_add(strs, row->desc);
+		if (!row->ann_classes)
+			continue;
+		classes = g_malloc(sizeof(gint) * g_slist_length(row->ann_classes));
+		for (i = 0, ll = row->ann_classes; ll; ll = ll->next)
+			classes[i++] = GPOINTER_TO_SIZE(ll->data);
+		key = g_strdup_printf("annotation_row.%s", row->id);
+		g_key_file_set_integer_list(index, group, key, classes, i);
+		g_free(key);
+		g_free(classes);
+	}
+	if (strs->len) {
+		g_key_file_set_string_list(index, group, "annotation_rows",
+			(const char * const *)strs->pdata, strs->len);
+	}
+	g_ptr_array_free(strs, TRUE);
+
+	/* Options: their IDs, then one key per property which is set. */
+	strs = g_ptr_array_new();
+	for (l = d->options; l; l = l->next) {
+		o = l->data;
+		g_ptr_array_add(strs, o->id);
+		if (o->desc) {
+			key = g_strdup_printf("option.%s.desc", o->id);
+			g_key_file_set_string(index, group, key, o->desc);
+			g_free(key);
+		}
+		if (o->def) {
+			key = g_strdup_printf("option.%s.default", o->id);
+			text = g_variant_print(o->def, TRUE);
+			g_key_file_set_string(index, group, key, text);
+			g_free(text);
+			g_free(key);
+		}
+		if (o->values) {
+			values = g_ptr_array_new_with_free_func(g_free);
+			for (ll = o->values; ll; ll = ll->next)
+				g_ptr_array_add(values, g_variant_print(ll->data, TRUE));
+			key = g_strdup_printf("option.%s.values", o->id);
+			g_key_file_set_string_list(index, group, key,
+				(const char * const *)values->pdata, values->len);
+			g_free(key);
+			g_ptr_array_free(values, TRUE);
+		}
+	}
+	if (strs->len) {
+		g_key_file_set_string_list(index, group, "options",
+			(const char * const *)strs->pdata, strs->len);
+	}
+	g_ptr_array_free(strs, TRUE);
+
+	return TRUE;
+}
+
+static GSList *index_strlist_get(GKeyFile *index, const char *group,
+		const char *key)
+{
+	GSList *list;
+	char **strv;
+	gsize len;
+
+	if (!(strv = g_key_file_get_string_list(index, group, key, &len, NULL)))
+		return NULL;
+
+	/* The list takes over the strings. */
+	list = NULL;
+	while (len > 0)
+		list = g_slist_prepend(list, strv[--len]);
+	g_free(strv);
+
+	return list;
+}
+
+static int index_tuples_get(GKeyFile *index, const char *group,
+		const char *key, gsize size, GSList **out)
+{
+	GSList *list;
+	char **strv, **tuple;
+	gsize len, i;
+
+	if (!(strv = g_key_file_get_string_list(index, group, key, &len, NULL)))
+		return SRD_OK;
+
+	if (len % size) {
+		g_strfreev(strv);
+		return SRD_ERR;
+	}
+
+	list = NULL;
+	while (len > 0) {
+		tuple = g_malloc0(sizeof(char *) * (size + 1));
+		len -= size;
+		for (i = 0; i < size; i++)
+			tuple[i] = strv[len + i];
+		list = g_slist_prepend(list, tuple);
+	}
+	g_free(strv);
+	*out = list;
+
+	return SRD_OK;
+}
+
+static int index_channels_get(GKeyFile *index, const char *group,
+		const char *key, GSList **out, int offset)
+{
+	struct srd_channel *pdch;
+	GSList *tuples, *l;
+	char **tuple;
+	int i;
+
+	tuples = NULL;
+	if (index_tuples_get(index, group, key, 3, &tuples) != SRD_OK)
+		return SRD_ERR;
+
+	for (l = tuples, i = 0; l; l = l->next, i++) {
+		tuple = l->data;
+		pdch = g_malloc(sizeof(struct srd_channel));
+		pdch->id = tuple[0];
+		pdch->name = tuple[1];
+		pdch->desc = tuple[2];
+		pdch->order = offset + i;
+		g_free(tuple);
+		l->data = pdch;
+	}
+	*out = tuples;
+
+	return SRD_OK;
+}
+
+static int index_annotation_rows_get(GKeyFile *index, const char *group,
+		struct srd_decoder *d)
+{
+	struct srd_decoder_annotation_row *row;
+	GSList *tuples, *l;
+	char **tuple, *key;
+	gint *classes;
+	gsize len;
+
+	tuples = NULL;
+	if (index_tuples_get(index, group, "annotation_rows", 2, &tuples) != SRD_OK)
+		return SRD_ERR;
+
+	for (l = tuples; l; l = l->next) {
+		tuple = l->data;
+		row = g_malloc0(sizeof(struct srd_decoder_annotation_row));
+		row->id = tuple[0];
+		row->desc = tuple[1];
+		g_free(tuple);
+		l->data = row;
+
+		key = g_strdup_printf("annotation_row.%s", row->id);
+		classes = g_key_file_get_integer_list(index, group, key,
+				&len, NULL);
+		g_free(key);
+		while (classes && len > 0) {
+			row->ann_classes = g_slist_prepend(row->ann_classes,
+					GSIZE_TO_POINTER(classes[--len]));
+		}
+		g_free(classes);
+	}
+	d->annotation_rows = tuples;
+
+	return SRD_OK;
+}
+
+static GVariant *index_variant_get(const char *text)
+{
+	GVariant *gvar;
+
+	if (!(gvar = g_variant_parse(NULL, text, NULL, NULL, NULL)))
+		return NULL;
+
+	return g_variant_ref_sink(gvar);
+}
+
+static int index_options_get(GKeyFile *index, const char *group,
+		struct srd_decoder *d)
+{
+	struct srd_decoder_option *o;
+	GSList *ids, *l;
+	GVariant *gvar;
+	char **values, *key, *text;
+	gsize len;
+
+	/* Turn the list of IDs into a list of options, then fill those. */
+	ids = index_strlist_get(index, group, "options");
+	for (l = ids; l; l = l->next) {
+		o = g_malloc0(sizeof(struct srd_decoder_option));
+		o->id = l->data;
+		l->data = o;
+	}
+
+	for (l = ids; l; l = l->next) {
+		o = l->data;
+
+		key = g_strdup_printf("option.%s.desc", o->id);
+		o->desc = g_key_file_get_string(index, group, key, NULL);
+		g_free(key);
+
+		key = g_strdup_printf("option.%s.default", o->id);
+		text = g_key_file_get_string(index, group, key, NULL);
+		g_free(key);
+		if (text) {
+			o->def = index_variant_get(text);
+			g_free(text);
+			if (!o->def)
+				goto err_out;
+		}
+
+		key = g_strdup_printf("option.%s.values", o->id);
+		values = g_key_file_get_string_list(index, group, key,
+				&len, NULL);
+		g_free(key);
+		while (values && len > 0) {
+			if (!(gvar = index_variant_get(values[--len]))) {
+				g_strfreev(values);
+				goto err_out;
+			}
+			o->values = g_slist_prepend(o->values, gvar);
+		}
+		g_strfreev(values);
+	}
+	d->options = ids;
+
+	return SRD_OK;
+
+err_out:
+	g_slist_free_full(ids, &decoder_option_free);
+
+	return SRD_ERR;
+}
+
+/* Create a decoder from its index entry, without importing its module. */
+static struct srd_decoder *index_decoder_get(GKeyFile *index,
+		const char *group)
+{
+	struct srd_decoder *d;
+
+	d = g_malloc0(sizeof(struct srd_decoder));
+
+	if (!(d->id = g_key_file_get_string(index, group, "id", NULL)))
+		goto err_out;
+	if (!(d->name = g_key_file_get_string(index, group, "name", NULL)))
+		goto err_out;
+	if (!(d->longname = g_key_file_get_string(index, group, "longname", NULL)))
+		goto err_out;
+	if (!(d->desc = g_key_file_get_string(index, group, "desc", NULL)))
+		goto err_out;
+	if (!(d->license = g_key_file_get_string(index, group, "license", NULL)))
+		goto err_out;
+
+	d->inputs = index_strlist_get(index, group, "inputs");
+	d->outputs = index_strlist_get(index, group, "outputs");
+	d->tags = index_strlist_get(index, group, "tags");
+
+	if (index_channels_get(index, group, "channels",
+			&d->channels, 0) != SRD_OK)
+		goto err_out;
+	if (index_channels_get(index, group, "optional_channels",
+			&d->opt_channels, g_slist_length(d->channels)) != SRD_OK)
+		goto err_out;
+	if (index_tuples_get(index, group, "annotations", 2,
+			&d->annotations) != SRD_OK)
+		goto err_out;
+	if (index_annotation_rows_get(index, group, d) != SRD_OK)
+		goto err_out;
+	if (index_tuples_get(index, group, "binary", 2, &d->binary) != SRD_OK)
+		goto err_out;
+	if (index_options_get(index, group, d) != SRD_OK)
+		goto err_out;
+
+	return d;
+
+err_out:
+	srd_dbg("Invalid index entry for %s.", group);
+	decoder_free(d);
+
+	return NULL;
+}
+
+/* Open the index, or return NULL if it's missing or out of date. */
+static GKeyFile *index_open(void)
+{
+	GKeyFile *index;
+	char *format, *version;
+	gboolean valid;
+
+	index = g_key_file_new();
+	if (!g_key_file_load_from_file(index, index_path, G_KEY_FILE_NONE, NULL)) {
+		g_key_file_free(index);
+		return NULL;
+	}
+
+	format = g_key_file_get_string(index, INDEX_GROUP, "format", NULL);
+	version = g_key_file_get_string(index, INDEX_GROUP, "version", NULL);
+	valid = format && !strcmp(format, INDEX_FORMAT)
+		&& version && !strcmp(version, SRD_PACKAGE_VERSION_STRING " " PY_VERSION);
+	g_free(format);
+	g_free(version);
+	if (!valid) {
+		srd_dbg("Ignoring out of date decoder index %s.", index_path);
+		g_key_file_free(index);
+		return NULL;
+	}
+
+	return index;
+}
+
+static GKeyFile *index_new(void)
+{
+	GKeyFile *index;
+
+	index = g_key_file_new();
+	g_key_file_set_string(index, INDEX_GROUP, "format", INDEX_FORMAT);
+	g_key_file_set_string(index, INDEX_GROUP, "version",
+		SRD_PACKAGE_VERSION_STRING " " PY_VERSION);
+
+	return index;
+}
+
+static void index_save(GKeyFile *index)
+{
+	GError *error;
+	char *data, *dir;
+	gsize len;
+
+	dir = g_path_get_dirname(index_path);
+	g_mkdir_with_parents(dir, 0755);
+	g_free(dir);
+
+	/* This replaces the file atomically, for concurrent readers. */
+	error = NULL;
+	data = g_key_file_to_data(index, &len, NULL);
+	if (!g_file_set_contents(index_path, data, len, &error)) {
+		srd_warn("Failed to write decoder index: %s", error->message);
+		g_error_free(error);
+	} else {
+		srd_dbg("Wrote decoder index %s.", index_path);
+	}
+	g_free(data);
+}
+
+/*
+ * Load a decoder from its index entry if that's up to date, otherwise
+ * import its module. Either way the decoder goes into the new index.
+ * Modules which fail to load are recorded too, so that they are only
+ * retried when their files change.
+ */
+static void decoder_load_indexed(const char *path, const char *module_name,
+		GKeyFile *old_index, GKeyFile *new_index, gboolean *changed)
+{
+	struct srd_decoder *d;
+	char *group, *stamp, *old_stamp;
+	gboolean failed;
+	int ret;
+
+	group = g_build_filename(path, module_name, NULL);
+	stamp = decoder_stamp(group);
+	if (stamp && !index_key_valid(group)) {
+		g_free(stamp);
+		stamp = NULL;
+	}
+
+	d = NULL;
+	failed = FALSE;
+	if (stamp && old_index && !decoder_is_loaded(module_name)) {
+		old_stamp = g_key_file_get_string(old_index, group, "stamp", NULL);
+		if (old_stamp && !strcmp(old_stamp, stamp)) {
+			failed = g_key_file_get_boolean(old_index, group,
+					"failed", NULL);
+			if (!failed)
+				d = index_decoder_get(old_index, group);
+		}
+		g_free(old_stamp);
+	}
+
+	if (failed) {
+		srd_dbg("Skipping %s, it failed to load before.", module_name);
+	} else if (d) {
+		if (!pd_deferred)
+			pd_deferred = g_hash_table_new_full(g_direct_hash,
+				g_direct_equal, NULL, g_free);
+		g_hash_table_insert(pd_deferred, d, g_strdup(module_name));
+		pd_list = g_slist_append(pd_list, d);
+	} else {
+		ret = decoder_load(module_name, &d);
+		failed = ret != SRD_OK;
+		if (stamp && (d || failed))
+			*changed = TRUE;
+	}
+
+	if (stamp && failed) {
+		g_key_file_set_string(new_index, group, "stamp", stamp);
+		g_key_file_set_boolean(new_index, group, "failed", TRUE);
+	} else if (stamp && d) {
+		index_decoder_set(new_index, group, stamp, d);
+	}
+
+	g_free(stamp);
+	g_free(group);
+}
+
 static void srd_decoder_load_all_zip_path(char *zip_path)
 {
 	PyObject *zipimport_mod, *zipimporter_class, *zipimporter;
@@ -1138,7 +1845,8 @@ err_out:
 	PyGILState_Release(gstate);
 }
 
-static void srd_decoder_load_all_path(char *path)
+static void srd_decoder_load_all_path(char *path, GKeyFile *old_index,
+		GKeyFile *new_index, gboolean *index_changed)
 {
 	GDir *dir;
 	const gchar *direntry;
@@ -1156,7 +1864,12 @@ static void srd_decoder_load_all_path(char *path)
 	 */
 	while ((direntry = g_dir_read_name(dir)) != NULL) {
 		/* The directory name is the module name (e.g. "i2c"). */
-		srd_decoder_load(direntry);
+		if (new_index) {
+			decoder_load_indexed(path, direntry, old_index,
+				new_index, index_changed);
+		} else {
+			srd_decoder_load(direntry);
+		}
 	}
 	g_dir_close(dir);
 }
@@ -1164,19 +1877,79 @@ static void srd_decoder_load_all_path(char *path)
 /**
  * Load all installed protocol decoders.
  *
+ * If a decoder index was set with srd_decoder_index_set(), decoders
+ * with an up to date index entry are loaded from the index, and the
+ * index is updated for all others.
+ *
  * @return SRD_OK upon success, a (negative) error code otherwise.
  *
  * @since 0.1.0
  */
 SRD_API int srd_decoder_load_all(void)
 {
+	GKeyFile *old_index, *new_index;
 	GSList *l;
+	gsize old_groups, new_groups;
+	gboolean index_changed;
 
 	if (!srd_check_init())
 		return SRD_ERR;
 
+	old_index = new_index = NULL;
+	index_changed = FALSE;
+	if (index_path) {
+		old_index = index_open();
+		new_index = index_new();
+	}
+
 	for (l = searchpaths; l; l = l->next)
-		srd_decoder_load_all_path(l->data);
+		srd_decoder_load_all_path(l->data, old_index, new_index,
+			&index_changed);
+
+	if (new_index) {
+		/* Also rewrite the index if entries went away. */
+		old_groups = new_groups = 0;
+		if (old_index)
+			g_strfreev(g_key_file_get_groups(old_index, &old_groups));
+		g_strfreev(g_key_file_get_groups(new_index, &new_groups));
+		if (index_changed || old_groups != new_groups)
+			index_save(new_index);
+		g_key_file_free(new_index);
+	}
+	if (old_index)
+		g_key_file_free(old_index);
+
+	return SRD_OK;
+}
+
+/**
+ * Set the file used as decoder metadata index by srd_decoder_load_all().
+ *
+ * The index holds the metadata (ID, channels, options, annotations, ...)
+ * of all decoders found in the search paths. When loading decoders
+ * from a directory which has an index entry matching the names, sizes
+ * and modification times of its .py files, struct srd_decoder is filled
+ * from the index, and the decoder's Python module is only imported when
+ * an instance of it is created (or its docstring is requested). Index
+ * entries are created or updated as needed, so the first call to
+ * srd_decoder_load_all() after setting the index writes it.
+ *
+ * Only a decoder's own directory is checked for changes. Decoders
+ * whose metadata depend on other modules should not be used with an
+ * index, or the index should be removed when those change. Decoders
+ * in zip files are never indexed.
+ *
+ * @param path The path of the index file, or NULL to not use an index.
+ *             The file and its directory are created as needed.
+ *
+ * @return SRD_OK upon success, a (negative) error code otherwise.
+ *
+ * @since 0.6.0
+ */
+SRD_API int srd_decoder_index_set(const char *path)
+{
+	g_free(index_path);
+	index_path = g_strdup(path);
 
 	return SRD_OK;
 }
@@ -1201,6 +1974,11 @@ SRD_API int srd_decoder_unload_all(void)
 	g_slist_free(pd_list);
 	pd_list = NULL;
 
+	if (pd_deferred) {
+		g_hash_table_destroy(pd_deferred);
+		pd_deferred = NULL;
+	}
+
 	return SRD_OK;
 }
 
@@ -19,6 +19,7 @@
 ##
 
 import sigrokdecode as srd
+from common.crc import CRC15_CAN
 
 class SamplerateError(Exception):
     pass
@@ -162,7 +163,13 @@ def is_stuff_bit(self):
         return True
 
     def is_valid_crc(self, crc_bits):
-        return True # TODO
+        # CAN FD's CRC-17/CRC-21 also cover the stuff bit count and the
+        # fixed stuff bits, which this decoder doesn't track (yet).
+        if self.fd:
+            return True # TODO
+        # CRC-15 over SOF, arbitration, control and data fields.
+        crc = CRC15_CAN.compute_bitseq(self.bits[:self.last_databit + 1])
+        return crc == int(''.join(str(d) for d in crc_bits), 2)
 
     def decode_error_frame(self, bits):
         pass # TODO
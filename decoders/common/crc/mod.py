@@ -0,0 +1,163 @@
+##
+## This file is part of the libsigrokdecode project.
+##
+## Copyright (C) 2026 The libsigrokdecode developers
+##
+## This program is free software; you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published by
+## the Free Software Foundation; either version 2 of the License, or
+## (at your option) any later version.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+## You should have received a copy of the GNU General Public License
+## along with this program; if not, see <http://www.gnu.org/licenses/>.
+##
+
+
+# Table-driven CRC engine, shared by the decoders which check CRCs.
+#
+# A CrcModel holds the parameters of a CRC (in the usual "Rocksoft" notation:
+# width, polynomial, initial value, input/output reflection, final XOR) and a
+# precalculated 256-entry table. Crc objects created from a model keep the
+# running register, and can be fed with bytes or with runs of bits as they
+# are received, so decoders don't need to collect a whole frame first.
+#
+# Bit runs are always passed in transmission order: MSB-first for models
+# which don't reflect their input, LSB-first for models which do (USB,
+# Modbus, 1-Wire, ...).
+
+def reflect(value, width):
+    r = 0
+    for i in range(width):
+        r = (r << 1) | ((value >> i) & 1)
+    return r
+
+class CrcModel:
+    def __init__(self, width, poly, init=0, refin=False, refout=False, xorout=0):
+        self.width, self.poly, self.init = width, poly, init
+        self.refin, self.refout, self.xorout = refin, refout, xorout
+        if refin:
+            # Reflected register, shifts towards the LSB.
+            self.shift = 0
+            self.regpoly = reflect(poly, width)
+        else:
+            # Registers narrower than 8 bits are kept left-aligned, so
+            # that a whole byte can be XORed into their top bits.
+            self.shift = max(8 - width, 0)
+            self.regpoly = poly << self.shift
+        self.regwidth = width + self.shift
+        self.regmask = (1 << self.regwidth) - 1
+        # Table entries: register contents after clocking one byte 'i'
+        # through an all-zeroes register (aligned to the shift direction).
+        s = 0 if refin else self.regwidth - 8
+        self.table = [self._step(i << s, 8) for i in range(256)]
+
+    # Plain bit-at-a-time update, only used to build the table and for
+    # bit runs which are shorter than a byte.
+    def _step(self, reg, count, value=0):
+        poly, mask = self.regpoly, self.regmask
+        if self.refin:
+            for i in range(count):
+                if (reg ^ (value >> i)) & 1:
+                    reg = (reg >> 1) ^ poly
+                else:
+                    reg >>= 1
+        else:
+            top = self.regwidth - 1
+            for i in range(count - 1, -1, -1):
+                bit = ((reg >> top) ^ (value >> i)) & 1
+                reg = (reg << 1) & mask
+                if bit:
+                    reg ^= poly
+        return reg
+
+    def new(self, init=None):
+        return Crc(self, init)
+
+    def compute(self, data, init=None):
+        crc = Crc(self, init)
+        crc.update(data)
+        return crc.value()
+
+    def compute_bits(self, value, count, init=None):
+        crc = Crc(self, init)
+        crc.update_bits(value, count)
+        return crc.value()
+
+    def compute_bitseq(self, bits, init=None):
+        crc = Crc(self, init)
+        crc.update_bitseq(bits)
+        return crc.value()
+
+class Crc:
+    def __init__(self, model, init=None):
+        self.model = model
+        if init is None:
+            init = model.init
+        self.reg = reflect(init, model.width) if model.refin else init << model.shift
+
+    def copy(self):
+        c = Crc(self.model)
+        c.reg = self.reg
+        return c
+
+    # Feed an iterable of byte values (bytes, bytearray, list of ints).
+    def update(self, data):
+        m = self.model
+        table, reg = m.table, self.reg
+        if m.refin:
+            for b in data:
+                reg = table[(reg ^ b) & 0xff] ^ (reg >> 8)
+        else:
+            s, mask = m.regwidth - 8, m.regmask
+            for b in data:
+                reg = table[((reg >> s) ^ b) & 0xff] ^ ((reg << 8) & mask)
+        self.reg = reg
+
+    # Feed the lowest 'count' bits of 'value', in transmission order.
+    # Whole bytes go through the table, only a trailing partial byte is
+    # clocked in bit by bit.
+    def update_bits(self, value, count):
+        m = self.model
+        nbytes, rest = divmod(count, 8)
+        if m.refin:
+            if nbytes:
+                mask = (1 << (nbytes * 8)) - 1
+                self.update((value & mask).to_bytes(nbytes, 'little'))
+                value >>= nbytes * 8
+        else:
+            if nbytes:
+                mask = (1 << (nbytes * 8)) - 1
+                self.update(((value >> rest) & mask).to_bytes(nbytes, 'big'))
+        if rest:
+            self.reg = m._step(self.reg, rest, value & ((1 << rest) - 1))
+
+    # Feed a sequence of bits in transmission order, either as a list of
+    # 0/1 integers or as a string of '0'/'1' characters.
+    def update_bitseq(self, bits):
+        if not len(bits):
+            return
+        s = bits if isinstance(bits, str) else ''.join(map(str, bits))
+        if self.model.refin:
+            s = s[::-1]
+        self.update_bits(int(s, 2), len(s))
+
+    def value(self):
+        m = self.model
+        crc = self.reg >> m.shift
+        if m.refin != m.refout:
+            crc = reflect(crc, m.width)
+        return crc ^ m.xorout
+
+# CRC models used by the protocol decoders.
+CRC5_USB = CrcModel(5, 0x05, 0x1f, True, True, 0x1f)
+CRC11_FLEXRAY = CrcModel(11, 0x385, 0x01a)
+CRC15_CAN = CrcModel(15, 0x4599)
+CRC16_MAXIM = CrcModel(16, 0x8005, 0x0000, True, True, 0xffff)
+CRC16_MODBUS = CrcModel(16, 0x8005, 0xffff, True, True, 0x0000)
+CRC16_USB = CrcModel(16, 0x8005, 0xffff, True, True, 0xffff)
+CRC24_FLEXRAY = CrcModel(24, 0x5d6dcb, 0xfedcba)
@@ -0,0 +1,273 @@
+##
+## This file is part of the libsigrokdecode project.
+##
+## Copyright (C) 2026 The libsigrokdecode developers
+##
+## This program is free software; you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published by
+## the Free Software Foundation; either version 2 of the License, or
+## (at your option) any later version.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+## You should have received a copy of the GNU General Public License
+## along with this program; if not, see <http://www.gnu.org/licenses/>.
+##
+
+# Address lookup tables built from an objdump disassembly (objdump -lSC),
+# shared by the trace decoders (arm_itm, arm_etmv3).
+#
+# Running objdump and parsing its output takes a while for big firmware
+# images, so the parsed tables are kept per process (all decoder instances
+# use the same copy, for the few most recently loaded files) and on disk in
+# the user's cache directory, keyed by the ELF file's path, size and
+# modification time and the objdump command. The cache files are JSON,
+# and get checked when read, so a corrupt or foreign file just gets
+# replaced.
+#
+# Instructions are stored as address-sorted arrays, an address is looked
+# up by bisecting them for the instruction which covers it. File, function
+# and source line strings are stored once and referenced by index.
+
+from array import array
+from bisect import bisect_right
+from collections import namedtuple, OrderedDict
+import hashlib
+import json
+import os
+import re
+import subprocess
+
+# Bump when the parser or the stored layout changes.
+CACHE_VERSION = 2
+
+# Number of disassemblies kept in memory.
+LOADED_MAX = 4
+
+Instruction = namedtuple('Instruction', 'file func source disasm next_n next_e')
+
+instpat = re.compile(r'\s*([0-9a-fA-F]+):\t+([0-9a-fA-F ]+)\t+([a-zA-Z][^;]+)\s*;?.*')
+branchpat = re.compile(r'(b|bl|b..|bl..|cbnz|cbz)(?:\.[wn])?\s+(?:r[0-9]+,\s*)?([0-9a-fA-F]+)')
+filepat = re.compile(r'[^\s]+[/\\]([a-zA-Z0-9._-]+:[0-9]+)(?:\s.*)?')
+funcpat = re.compile(r'[0-9a-fA-F]+\s*<([^>]+)>:.*')
+
+class Disassembly:
+    '''Per-instruction information, looked up by the address range which
+    the instruction covers.
+
+    next_n: Next PC addr in direct sequence.
+    next_e: Next PC addr if the instruction is a taken branch.
+    file, func: Current location and function name.
+    source: Source code line(s) preceding the instruction.
+    disasm: Instruction text.
+    '''
+
+    def __init__(self, text=''):
+        strings = {}
+        def intern(s):
+            i = strings.get(s)
+            if i is None:
+                i = strings[s] = len(strings)
+            return i
+
+        rows = {}
+        prev_src = intern('')
+        prev_file = intern('')
+        prev_func = intern('')
+
+        for line in text.split('\n'):
+            m = instpat.match(line)
+            if m:
+                addr = int(m.group(1), 16)
+                raw = m.group(2)
+                disas = m.group(3).strip().replace('\t', ' ')
+
+                # Next address in direct sequence.
+                ilen = len(raw.replace(' ', '')) // 2
+                next_n = addr + ilen
+
+                # Next address if branch is taken.
+                bm = branchpat.match(disas)
+                if bm:
+                    next_e = int(bm.group(2), 16)
+                else:
+                    next_e = next_n
+
+                # Later listings of the same address win (e.g. sections
+                # of relocatable objects which all start at zero).
+                rows[addr] = (prev_file, prev_func, prev_src, disas,
+                              next_n, next_e)
+            else:
+                m = funcpat.match(line)
+                if m:
+                    prev_func = intern(m.group(1))
+                    prev_src = intern(None)
+                else:
+                    m = filepat.match(line)
+                    if m:
+                        prev_file = intern(m.group(1))
+                        prev_src = intern(None)
+                    else:
+                        prev_src = intern(line.strip())
+
+        self.strings = list(strings)
+        self.addrs = array('Q', sorted(rows))
+        self.file = array('I')
+        self.func = array('I')
+        self.source = array('I')
+        self.next_n = array('Q')
+        self.next_e = array('Q')
+        self.disasm = []
+        for addr in self.addrs:
+            f, fn, src, disas, next_n, next_e = rows[addr]
+            self.file.append(f)
+            self.func.append(fn)
+            self.source.append(src)
+            self.disasm.append(disas)
+            self.next_n.append(next_n)
+            self.next_e.append(next_e)
+
+    def __len__(self):
+        return len(self.addrs)
+
+    def to_json(self):
+        return {
+            'version': CACHE_VERSION,
+            'strings': self.strings,
+            'addrs': self.addrs.tolist(),
+            'file': self.file.tolist(),
+            'func': self.func.tolist(),
+            'source': self.source.tolist(),
+            'next_n': self.next_n.tolist(),
+            'next_e': self.next_e.tolist(),
+            'disasm': self.disasm,
+        }
+
+    @classmethod
+    def from_json(cls, obj):
+        '''Return the Disassembly which to_json() described, or None when
+        obj doesn't hold a valid description.'''
+        if not isinstance(obj, dict) or obj.get('version') != CACHE_VERSION:
+            return None
+        d = cls()
+        try:
+            d.strings = obj['strings']
+            d.disasm = obj['disasm']
+            d.addrs = array('Q', obj['addrs'])
+            d.file = array('I', obj['file'])
+            d.func = array('I', obj['func'])
+            d.source = array('I', obj['source'])
+            d.next_n = array('Q', obj['next_n'])
+            d.next_e = array('Q', obj['next_e'])
+        except (KeyError, TypeError, ValueError, OverflowError):
+            return None
+        n = len(d.addrs)
+        if not isinstance(d.strings, list) or not isinstance(d.disasm, list):
+            return None
+        if not all(s is None or isinstance(s, str) for s in d.strings):
+            return None
+        if not all(isinstance(s, str) for s in d.disasm):
+            return None
+        if any(len(a) != n for a in (d.file, d.func, d.source, d.next_n,
+                                     d.next_e, d.disasm)):
+            return None
+        if any(max(a, default=0) >= max(len(d.strings), 1)
+               for a in (d.file, d.func, d.source)):
+            return None
+        if any(d.addrs[i] >= d.addrs[i + 1] for i in range(n - 1)):
+            return None
+        return d
+
+    def find(self, addr):
+        '''Return the table index of the instruction which covers addr,
+        or None. An instruction covers the addresses up to the next one
+        in the table, the last one up to its own end.'''
+        i = bisect_right(self.addrs, addr) - 1
+        if i < 0:
+            return None
+        if i + 1 < len(self.addrs):
+            return i
+        if addr < max(self.next_n[i], self.addrs[i] + 1):
+            return i
+        return None
+
+    def at(self, addr):
+        '''Return the Instruction which covers addr, or None.'''
+        i = self.find(addr)
+        if i is None:
+            return None
+        s = self.strings
+        return Instruction(s[self.file[i]], s[self.func[i]], s[self.source[i]],
+                           self.disasm[i], self.next_n[i], self.next_e[i])
+
+_loaded = OrderedDict()
+
+def cache_dir():
+    base = os.environ.get('XDG_CACHE_HOME') or \
+        os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'libsigrokdecode', 'objdump')
+
+def _cache_path(opts):
+    elffile = os.path.realpath(opts[-1])
+    st = os.stat(elffile)
+    key = repr((CACHE_VERSION, opts[:-1], elffile, st.st_size, st.st_mtime_ns))
+    return os.path.join(cache_dir(), hashlib.sha1(key.encode()).hexdigest())
+
+def _read_cache(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return Disassembly.from_json(json.load(f))
+    except (OSError, ValueError):
+        return None
+
+def _write_cache(path, disasm):
+    # Write to a temporary file first, so concurrent sessions never see
+    # a partial file. Failing to write the cache is not an error.
+    tmp = '%s.%d' % (path, os.getpid())
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(disasm.to_json(), f)
+        os.replace(tmp, path)
+    except OSError:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+
+def load(objdump, objdump_opts, elffile):
+    '''Return the Disassembly of elffile.
+
+    An empty Disassembly is returned when no ELF file is configured or
+    objdump fails, so lookups simply find nothing.
+    '''
+    if not (objdump and elffile):
+        return Disassembly()
+
+    opts = [objdump] + objdump_opts.split() + [elffile]
+    try:
+        path = _cache_path(opts)
+    except OSError:
+        return Disassembly()
+
+    disasm = _loaded.get(path)
+    if disasm is not None:
+        _loaded.move_to_end(path)
+        return disasm
+
+    disasm = _read_cache(path)
+    if disasm is None:
+        try:
+            text = subprocess.check_output(opts)
+        except (OSError, subprocess.CalledProcessError):
+            return Disassembly()
+        disasm = Disassembly(text.decode('utf-8', 'replace'))
+        _write_cache(path, disasm)
+
+    _loaded[path] = disasm
+    while len(_loaded) > LOADED_MAX:
+        _loaded.popitem(last=False)
+    return disasm
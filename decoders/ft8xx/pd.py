@@ -420,59 +420,58 @@ def decode_hostcmd (self, byte1: Int, byte2: Int, byte3: Int) -> None:
 
     #########################################################################
 
+    # Bit fields of the registers which have them, by register name.
+    _touch_xy = lambda u32: dict(x=u32[31:16], y=u32[15:0])
+    ramreg_fields = {
+        'REG_OUTBITS'   : lambda u32: dict(red=u32[8:6], green=u32[5:3], blue=u32[2:0]),
+        'REG_GPIO_DIR'  : lambda u32: dict(disp=u32[7], gpio1=u32[1], gpio0=u32[0]),
+        'REG_GPIO'      : lambda u32: dict(disp=u32[7], gpio=u32[6:5], lcd=u32[4],
+                                           spi=u32[3:2], gpio1=u32[1], gpio0=u32[0]),
+        'REG_GPIOX_DIR' : lambda u32: dict(disp=u32[15], gpio3=u32[3], gpio2=u32[2],
+                                                         gpio1=u32[1], gpio0=u32[0]),
+        'REG_GPIOX'     : lambda u32: dict(disp=u32[15], gpio=u32[14:13], lcd=u32[12],
+                                           spi=u32[11:10], gpio3=u32[3], gpio2=u32[2],
+                                                           gpio1=u32[1], gpio0=u32[0]),
+        'REG_TOUCH_RAW_XY'                          : _touch_xy,
+        'REG_TOUCH_SCREEN_XY'                       : _touch_xy,
+        'REG_TOUCH_TAG_XY'                          : _touch_xy,
+        'REG_CTOUCH_TOUCH0_XY'                      : _touch_xy,
+        'REG_CTOUCH_TOUCH1_XY'                      : _touch_xy,
+        'REG_CTOUCH_TOUCH2_XY'                      : _touch_xy,
+        'REG_CTOUCH_TOUCH3_XY'                      : _touch_xy,
+        'REG_CTOUCH_TAG_XY'                         : _touch_xy,
+        'REG_CTOUCH_TAG1_XY'                        : _touch_xy,
+        'REG_CTOUCH_TAG2_XY'                        : _touch_xy,
+        'REG_CTOUCH_TAG3_XY'                        : _touch_xy,
+        'REG_CTOUCH_TAG4_XY'                        : _touch_xy,
+        'REG_TOUCH_RAW_XY_REG_CTOUCH_TOUCH1_XY'     : _touch_xy,
+        'REG_TOUCH_SCREEN_XY_REG_CTOUCH_TOUCH0_XY'  : _touch_xy,
+        'REG_TOUCH_TAG_XY_REG_CTOUCH_TAG_XY'        : _touch_xy,
+        'REG_TOUCH_CONFIG'    : lambda u32: dict(touch=u32[15], host=u32[14],
+                                                 ignore_short_circuit=u32[12],
+                                                 low_power=u32[11], i2c_addr=u32[10:4],
+                                                 vendor=u32[3], suppress_300ms=u32[2],
+                                                 clocks=u32[1:0]),
+        'REG_CTOUCH_TOUCH4_X' : lambda u32: dict(x=u32[15:0]),
+        'REG_SPI_WIDTH'       : lambda u32: dict(extra_dummy=u32[2], width=u32[1:0]),
+        'REG_CTOUCH_TOUCH4_Y' : lambda u32: dict(y=u32[15:0]),
+        'REG_TOUCH_DIRECT_XY' : lambda u32: dict(touch=u32[31], adc_z1=u32[25:16],
+                                                 adc_z2=u32[9:0]),
+        'REG_TOUCH_DIRECT_XY_REG_CTOUCH_TOUCH2_XY':
+                                lambda u32: dict(touch=u32[31], adc_z1=u32[25:16],
+                                                 adc_z2=u32[9:0],
+                                                 x=u32[31:16], y=u32[15:0]),
+    }
+    del _touch_xy
+
     def decode_ramreg (self, u32: Int):
         '''Decode RAM Registers.'''
         Reg = ramreg.at(self.addr)
 
         if Reg:
-            name = Reg.__name__
-            if   name == 'REG_OUTBITS':
-                reg = Reg(*u32, red=u32[8:6], green=u32[5:3], blue=u32[2:0])
-            elif name == 'REG_GPIO_DIR':
-                reg = Reg(*u32, disp=u32[7], gpio1=u32[1], gpio0=u32[0])
-            elif name == 'REG_GPIO':
-                reg = Reg(*u32, disp=u32[7], gpio=u32[6:5], lcd=u32[4],
-                                spi=u32[3:2], gpio1=u32[1], gpio0=u32[0])
-            elif name == 'REG_GPIOX_DIR':
-                reg = Reg(*u32, disp=u32[15], gpio3=u32[3], gpio2=u32[2],
-                                              gpio1=u32[1], gpio0=u32[0])
-            elif name == 'REG_GPIOX':
-                reg = Reg(*u32, disp=u32[15], gpio=u32[14:13], lcd=u32[12],
-                                spi=u32[11:10], gpio3=u32[3], gpio2=u32[2],
-                                                gpio1=u32[1], gpio0=u32[0])
-            elif name in ('REG_TOUCH_RAW_XY',
-                          'REG_TOUCH_SCREEN_XY',
-                          'REG_TOUCH_TAG_XY',
-                          'REG_CTOUCH_TOUCH0_XY',
-                          'REG_CTOUCH_TOUCH1_XY',
-                          'REG_CTOUCH_TOUCH2_XY',
-                          'REG_CTOUCH_TOUCH3_XY',
-                          'REG_CTOUCH_TAG_XY',
-                          'REG_CTOUCH_TAG1_XY',
-                          'REG_CTOUCH_TAG2_XY',
-                          'REG_CTOUCH_TAG3_XY',
-                          'REG_CTOUCH_TAG4_XY',
-                          'REG_TOUCH_RAW_XY_REG_CTOUCH_TOUCH1_XY',
-                          'REG_TOUCH_SCREEN_XY_REG_CTOUCH_TOUCH0_XY',
-                          'REG_TOUCH_TAG_XY_REG_CTOUCH_TAG_XY'):
-                reg = Reg(*u32, x=u32[31:16], y=u32[15:0])
-            elif name == 'REG_TOUCH_CONFIG':
-                reg = Reg(*u32, touch=u32[15], host=u32[14],
-                                ignore_short_circuit=u32[12],
-                                low_power=u32[11], i2c_addr=u32[10:4],
-                                vendor=u32[3], suppress_300ms=u32[2],
-                                clocks=u32[1:0])
-            elif name == 'REG_CTOUCH_TOUCH4_X':
-                reg = Reg(*u32, x=u32[15:0])
-            elif name == 'REG_SPI_WIDTH':
-                reg = Reg(*u32, extra_dummy=u32[2], width=u32[1:0])
-            elif name == 'REG_CTOUCH_TOUCH4_Y':
-                reg = Reg(*u32, y=u32[15:0])
-            elif name == 'REG_TOUCH_DIRECT_XY':
-                reg = Reg(*u32, touch=u32[31], adc_z1=u32[25:16], adc_z2=u32[9:0])
-            elif name == 'REG_TOUCH_DIRECT_XY_REG_CTOUCH_TOUCH2_XY':
-                reg = Reg(*u32, touch=u32[31], adc_z1=u32[25:16], adc_z2=u32[9:0],
-                                x=u32[31:16], y=u32[15:0])
+            fields = self.ramreg_fields.get(Reg.__name__)
+            if fields:
+                reg = Reg(*u32, **fields(u32))
             else:
                 reg = Reg(*u32)
         else:
@@ -487,144 +486,121 @@ def decode_displist (self, u32: Int):
         '''Decode Display List commands.'''
         msb = u32[31:24]
 
-        if   msb == 0xff:
+        if msb == 0xff:
             # co-processor command
             return None
 
-        #-- Setting Graphics State -----------------------------------------#
-        elif msb == 0x09:
-            cmd = displist.ALPHA_FUNC(*u32, func=u32[10:8], ref=u32[7:0])
-        elif msb == 0x2e:
-            cmd = displist.BITMAP_EXT_FORMAT(*u32, format=u32[15:0])
-        elif msb == 0x05:
-            cmd = displist.BITMAP_HANDLE(*u32, handle=u32[4:0])
-        elif msb == 0x07:
-            cmd = displist.BITMAP_LAYOUT(*u32, format=u32[23:19], linestride=u32[18:9], height=u32[8:0])
-        elif msb == 0x28:
-            cmd = displist.BITMAP_LAYOUT_H(*u32, linestride=u32[3:2], height=u32[1:0])
-        elif msb == 0x08:
-            cmd = displist.BITMAP_SIZE(*u32, filter=u32[20], wrapx=u32[19], wrapy=u32[18], width=u32[17:9], height=u32[8:0])
-        elif msb == 0x29:
-            cmd = displist.BITMAP_SIZE_H(*u32, width=u32[3:2], height=u32[1:0])
-        elif msb == 0x01:
-            cmd = displist.BITMAP_SOURCE(*u32, addr=u32[23:0])
-        elif msb == 0x2f:
-            cmd = displist.BITMAP_SWIZZLE(*u32, r=u32[11:9], g=u32[8:6], b=u32[5:3], a=u32[2:0])
-        elif msb == 0x15:
-            cmd = displist.BITMAP_TRANSFORM_A(*u32, p=u32[17], v=u32[16:0])
-        elif msb == 0x16:
-            cmd = displist.BITMAP_TRANSFORM_B(*u32, p=u32[17], v=u32[16:0])
-        elif msb == 0x17:
-            cmd = displist.BITMAP_TRANSFORM_C(*u32, c=u32[23:0])
-        elif msb == 0x18:
-            cmd = displist.BITMAP_TRANSFORM_D(*u32, p=u32[17], v=u32[16:0])
-        elif msb == 0x19:
-            cmd = displist.BITMAP_TRANSFORM_E(*u32, p=u32[17], v=u32[16:0])
-        elif msb == 0x1a:
-            cmd = displist.BITMAP_TRANSFORM_F(*u32, f=u32[23:0])
-        elif msb == 0x0b:
-            cmd = displist.BLEND_FUNC(*u32, src=u32[5:4], dst=u32[2:0])
-        elif msb == 0x06:
-            cmd = displist.CELL(*u32, cell=u32[6:0])
-        elif msb == 0x26:
-            cmd = displist.CLEAR(*u32, c=u32[2], s=u32[1], t=u32[0])
-        elif msb == 0x0f:
-            cmd = displist.CLEAR_COLOR_A(*u32, alpha=u32[7:0])
-        elif msb == 0x02:
-            cmd = displist.CLEAR_COLOR_RGB(*u32, red=u32[23:16], blue=u32[15:8], green=u32[7:0])
-        elif msb == 0x11:
-            cmd = displist.CLEAR_STENCIL(*u32, s=u32[7:0])
-        elif msb == 0x12:
-            cmd = displist.CLEAR_TAG(*u32, t=u32[7:0])
-        elif msb == 0x10:
-            cmd = displist.COLOR_A(*u32, alpha=u32[4:0])
-        elif msb == 0x20:
-            cmd = displist.COLOR_MASK(*u32, r=u32[3], g=u32[2], b=u32[1], a=u32[0])
-        elif msb == 0x04:
-            cmd = displist.COLOR_RGB(*u32, u32[23:16], u32[15:8], u32[7:0])
-        elif msb == 0x0e:
-            cmd = displist.LINE_WIDTH(*u32, width=u32[11:0])
-        elif msb == 0x2a:
-            cmd = displist.PALETTE_SOURCE(*u32, addr=u32[21:0])
-        elif msb == 0x0d:
-            cmd = displist.POINT_SIZE(*u32, size=u32[12:0])
-        elif msb == 0x23:
-            cmd = displist.RESTORE_CONTEXT(*u32)
-            if self.context:
-                self.context -= 1
-            else:
-                self.out = warning.Message(u32.ss, u32.es, 'context underflow')
-        elif msb == 0x22:
-            cmd = displist.SAVE_CONTEXT(*u32)
-            if self.context < 4:
-                self.context += 1
-            else:
-                self.out = warning.Message(u32.ss, u32.es, 'context overflow')
-        elif msb == 0x1c:
-            cmd = displist.SCISSOR_SIZE(*u32, width=u32[23:12], height=u32[11:0],
-                                            FT80x_width=u32[19:10], FT80x_height=u32[9:0])
-        elif msb == 0x1b:
-            cmd = displist.SCISSOR_XY(*u32, x=u32[21:11], y=u32[10:0],
-                                          FT80x_x=u32[17:9], FT80x_y=u32[8:0])
-        elif msb == 0x0a:
-            cmd = displist.STENCIL_FUNC(*u32, func=u32[19:16], ref=u32[15:8], mask=u32[7:0])
-        elif msb == 0x13:
-            cmd = displist.STENCIL_MASK(*u32, mask=u32[7:0])
-        elif msb == 0x0c:
-            cmd = displist.STENCIL_OP(*u32, sfail=u32[5:3], spass=u32[2:0])
-        elif msb == 0x03:
-            cmd = displist.TAG(*u32, s=u32[7:0])
-        elif msb == 0x14:
-            cmd = displist.TAG_MASK(*u32, mask=u32[0])
-        elif msb == 0x27:
-            cmd = displist.VERTEX_FORMAT(*u32, frac=u32[2:0])
-        elif msb == 0x2b:
-            cmd = displist.VERTEX_TRANSLATE_X(*u32, x=u32[16:0])
-        elif msb == 0x2c:
-            cmd = displist.VERTEX_TRANSLATE_Y(*u32, y=u32[16:0])
+        decode = self.displist_ops.get(msb)
+        if decode:
+            cmd = decode(self, u32)
+        else:
+            cmd = warning.UnknownCommand(*u32)
 
-        #-- Drawing Actions ------------------------------------------------#
-        elif msb == 0x1f:
-            cmd = displist.BEGIN(*u32, prim=u32[3:0])
-        elif msb == 0x21:
-            cmd = displist.END(*u32)
-        elif msb == 0x01:
-            cmd = displist.VERTEX2F(*u32, x=u32[29:15], y=u32[14:0])
-        elif msb == 0x02:
-            cmd = displist.VERTEX2II(*u32, x=u32[29:21], y=u32[20:12], handle=u32[11:7], cell=u32[6:0])
+        self.addr = memmap.add(self.addr, 4)
+        return cmd
 
-        #-- Execution Control ----------------------------------------------#
-        elif msb == 0x2d:
-            cmd = displist.NOP(*u32)
-        elif msb == 0x1e:
-            cmd = displist.JUMP(*u32, dest=u32[15:0])
-            if not cmd.dest_is_valid():
-                self.out = w = warning.InvalidParameterValue(u32.ss, u32.es, cmd.dest, 'dest')
-        elif msb == 0x25:
-            cmd = displist.MACRO(*u32, m=u32[1])
-        elif msb == 0x1d:
-            cmd = displist.CALL(*u32, dest=u32[15:0])
-            if cmd.dest_is_valid():
-                if self.stack < 4:
-                    self.stack += 1
-                else:
-                    self.out = warning.Message(u32.ss, u32.es, 'stack overflow')
-        elif msb == 0x24:
-            cmd = displist.RETURN(*u32)
-            if self.stack:
-                self.stack -= 1
-            else:
-                self.out = warning.Message(u32.ss, u32.es, 'stack underflow')
-        elif msb == 0x00:
-            cmd = displist.DISPLAY(*u32)
+    def displist_RESTORE_CONTEXT (self, u32: Int):
+        cmd = displist.RESTORE_CONTEXT(*u32)
+        if self.context:
+            self.context -= 1
+        else:
+            self.out = warning.Message(u32.ss, u32.es, 'context underflow')
+        return cmd
 
-        #-------------------------------------------------------------------#
+    def displist_SAVE_CONTEXT (self, u32: Int):
+        cmd = displist.SAVE_CONTEXT(*u32)
+        if self.context < 4:
+            self.context += 1
         else:
-            cmd = warning.UnknownCommand(*u32)
+            self.out = warning.Message(u32.ss, u32.es, 'context overflow')
+        return cmd
 
-        self.addr = memmap.add(self.addr, 4)
+    def displist_JUMP (self, u32: Int):
+        cmd = displist.JUMP(*u32, dest=u32[15:0])
+        if not cmd.dest_is_valid():
+            self.out = w = warning.InvalidParameterValue(u32.ss, u32.es, cmd.dest, 'dest')
+        return cmd
+
+    def displist_CALL (self, u32: Int):
+        cmd = displist.CALL(*u32, dest=u32[15:0])
+        if cmd.dest_is_valid():
+            if self.stack < 4:
+                self.stack += 1
+            else:
+                self.out = warning.Message(u32.ss, u32.es, 'stack overflow')
         return cmd
 
+    def displist_RETURN (self, u32: Int):
+        cmd = displist.RETURN(*u32)
+        if self.stack:
+            self.stack -= 1
+        else:
+            self.out = warning.Message(u32.ss, u32.es, 'stack underflow')
+        return cmd
+
+    # Display List command decoders, by opcode (bits 31:24).
+    displist_ops = {
+        #-- Setting Graphics State -----------------------------------------#
+        0x09: lambda self, u32: displist.ALPHA_FUNC(*u32, func=u32[10:8], ref=u32[7:0]),
+        0x2e: lambda self, u32: displist.BITMAP_EXT_FORMAT(*u32, format=u32[15:0]),
+        0x05: lambda self, u32: displist.BITMAP_HANDLE(*u32, handle=u32[4:0]),
+        0x07: lambda self, u32: displist.BITMAP_LAYOUT(*u32, format=u32[23:19], linestride=u32[18:9], height=u32[8:0]),
+        0x28: lambda self, u32: displist.BITMAP_LAYOUT_H(*u32, linestride=u32[3:2], height=u32[1:0]),
+        0x08: lambda self, u32: displist.BITMAP_SIZE(*u32, filter=u32[20], wrapx=u32[19], wrapy=u32[18], width=u32[17:9], height=u32[8:0]),
+        0x29: lambda self, u32: displist.BITMAP_SIZE_H(*u32, width=u32[3:2], height=u32[1:0]),
+        0x01: lambda self, u32: displist.BITMAP_SOURCE(*u32, addr=u32[23:0]),
+        0x2f: lambda self, u32: displist.BITMAP_SWIZZLE(*u32, r=u32[11:9], g=u32[8:6], b=u32[5:3], a=u32[2:0]),
+        0x15: lambda self, u32: displist.BITMAP_TRANSFORM_A(*u32, p=u32[17], v=u32[16:0]),
+        0x16: lambda self, u32: displist.BITMAP_TRANSFORM_B(*u32, p=u32[17], v=u32[16:0]),
+        0x17: lambda self, u32: displist.BITMAP_TRANSFORM_C(*u32, c=u32[23:0]),
+        0x18: lambda self, u32: displist.BITMAP_TRANSFORM_D(*u32, p=u32[17], v=u32[16:0]),
+        0x19: lambda self, u32: displist.BITMAP_TRANSFORM_E(*u32, p=u32[17], v=u32[16:0]),
+        0x1a: lambda self, u32: displist.BITMAP_TRANSFORM_F(*u32, f=u32[23:0]),
+        0x0b: lambda self, u32: displist.BLEND_FUNC(*u32, src=u32[5:4], dst=u32[2:0]),
+        0x06: lambda self, u32: displist.CELL(*u32, cell=u32[6:0]),
+        0x26: lambda self, u32: displist.CLEAR(*u32, c=u32[2], s=u32[1], t=u32[0]),
+        0x0f: lambda self, u32: displist.CLEAR_COLOR_A(*u32, alpha=u32[7:0]),
+        0x02: lambda self, u32: displist.CLEAR_COLOR_RGB(*u32, red=u32[23:16], blue=u32[15:8], green=u32[7:0]),
+        0x11: lambda self, u32: displist.CLEAR_STENCIL(*u32, s=u32[7:0]),
+        0x12: lambda self, u32: displist.CLEAR_TAG(*u32, t=u32[7:0]),
+        0x10: lambda self, u32: displist.COLOR_A(*u32, alpha=u32[4:0]),
+        0x20: lambda self, u32: displist.COLOR_MASK(*u32, r=u32[3], g=u32[2], b=u32[1], a=u32[0]),
+        0x04: lambda self, u32: displist.COLOR_RGB(*u32, u32[23:16], u32[15:8], u32[7:0]),
+        0x0e: lambda self, u32: displist.LINE_WIDTH(*u32, width=u32[11:0]),
+        0x2a: lambda self, u32: displist.PALETTE_SOURCE(*u32, addr=u32[21:0]),
+        0x0d: lambda self, u32: displist.POINT_SIZE(*u32, size=u32[12:0]),
+        0x23: displist_RESTORE_CONTEXT,
+        0x22: displist_SAVE_CONTEXT,
+        0x1c: lambda self, u32: displist.SCISSOR_SIZE(*u32, width=u32[23:12], height=u32[11:0],
+                                                          FT80x_width=u32[19:10], FT80x_height=u32[9:0]),
+        0x1b: lambda self, u32: displist.SCISSOR_XY(*u32, x=u32[21:11], y=u32[10:0],
+                                                        FT80x_x=u32[17:9], FT80x_y=u32[8:0]),
+        0x0a: lambda self, u32: displist.STENCIL_FUNC(*u32, func=u32[19:16], ref=u32[15:8], mask=u32[7:0]),
+        0x13: lambda self, u32: displist.STENCIL_MASK(*u32, mask=u32[7:0]),
+        0x0c: lambda self, u32: displist.STENCIL_OP(*u32, sfail=u32[5:3], spass=u32[2:0]),
+        0x03: lambda self, u32: displist.TAG(*u32, s=u32[7:0]),
+        0x14: lambda self, u32: displist.TAG_MASK(*u32, mask=u32[0]),
+        0x27: lambda self, u32: displist.VERTEX_FORMAT(*u32, frac=u32[2:0]),
+        0x2b: lambda self, u32: displist.VERTEX_TRANSLATE_X(*u32, x=u32[16:0]),
+        0x2c: lambda self, u32: displist.VERTEX_TRANSLATE_Y(*u32, y=u32[16:0]),
+        #-- Drawing Actions ------------------------------------------------#
+        0x1f: lambda self, u32: displist.BEGIN(*u32, prim=u32[3:0]),
+        0x21: lambda self, u32: displist.END(*u32),
+        #-- Execution Control ----------------------------------------------#
+        0x2d: lambda self, u32: displist.NOP(*u32),
+        0x1e: displist_JUMP,
+        0x25: lambda self, u32: displist.MACRO(*u32, m=u32[1]),
+        0x1d: displist_CALL,
+        0x24: displist_RETURN,
+        0x00: lambda self, u32: displist.DISPLAY(*u32),
+    }
+
+    # VERTEX2F and VERTEX2II only use bits 31:30 as opcode.
+    displist_ops.update(dict.fromkeys(range(0x40, 0x80), lambda self, u32:
+        displist.VERTEX2F(*u32, x=u32[29:15], y=u32[14:0])))
+    displist_ops.update(dict.fromkeys(range(0x80, 0xc0), lambda self, u32:
+        displist.VERTEX2II(*u32, x=u32[29:21], y=u32[20:12], handle=u32[11:7], cell=u32[6:0])))
+
     #########################################################################
 
     def decode_coproc (self, u32: Int, line):
@@ -634,372 +610,468 @@ def decode_coproc (self, u32: Int, line):
         if u32[31:24] != 0xff:
             return None
 
+        cmd = self.coproc_simple.get(u32.val)
+        if cmd is not None:
+            cmd = cmd(*u32)
+        else:
+            decode = self.coproc_ops.get(u32.val)
+            if decode is None:
+                return warning.UnknownCommand(*u32)
+            cmd = (yield from decode(self, u32, line))
+
+        cmd.es_ = self.es[-1]
+        self.addr = memmap.add(self.addr, 4 + self.mosi_size - mosi_size)
+        if self.addr % 4:
+            self.out = (yield from self.read_DataPadding(line, self.addr))
+            self.addr = memmap.add(self.addr, self.size)
+        return cmd
+
+    coproc_simple = {
         #-- Commands to begin and finish the display list ------------------#
-        elif u32.val == 0xffffff00:
-            cmd = coproc.CMD_DLSTART(*u32)
-        elif u32.val == 0xffffff01:
-            cmd = coproc.CMD_SWAP(*u32)
+        0xffffff00: coproc.CMD_DLSTART,
+        0xffffff01: coproc.CMD_SWAP,
+
+        #-- Commands for setting the bitmap transform matrix ---------------#
+        0xffffff26: coproc.CMD_LOADIDENTITY,
+        0xffffff2a: coproc.CMD_SETMATRIX,
+
+        #-- Commands for video playback ------------------------------------#
+        0xffffff40: coproc.CMD_VIDEOSTART,
 
+        #-- Other commands -------------------------------------------------#
+        0xffffff32: coproc.CMD_COLDSTART,
+    }
+
+    def coproc_TEXT (self, u32: Int, line):
+        self.out = x    = (yield from self.read_Int16 (line))
+        self.out = y    = (yield from self.read_Int16 (line))
+        self.out = font = (yield from self.read_Int16 (line))
+        self.out = self.assert_font(font)
+        self.out = opts = (yield from self.read_UInt16(line))
+        self.out = s    = (yield from self.read_String(line))
+        args = []
+        for match in re.finditer(r"""%                  # character specifier
+                                     ([ 0+-]         )? # flags
+                                     ([1-9][0-9]*|\* )? # field width
+                                     (\.(?:[0-9]*|\*))? # precision
+                                     ([diuoxXcs%]    )  # conversion specifier
+                                  """, s.val, re.X):
+            (flags, width, prec, conv) = match.groups()
+            if width == '*':
+                arg = (yield from self.read_Int32(line))
+                self.out = arg
+                args.append(arg)
+            if prec == '*':
+                arg = (yield from self.read_Int32(line))
+                self.out = arg
+                args.append(arg)
+            if conv != '%':
+                arg = (yield from self.read_Int32(line))
+                self.out = arg
+                args.append(arg)
+        return coproc.CMD_TEXT(*u32, x, y, font, opts, s)
+
+    def coproc_BUTTON (self, u32: Int, line):
+        self.out = x    = (yield from self.read_Int16 (line))
+        self.out = y    = (yield from self.read_Int16 (line))
+        self.out = w    = (yield from self.read_Int16 (line))
+        self.out = h    = (yield from self.read_Int16 (line))
+        self.out = font = (yield from self.read_Int16 (line))
+        self.out = self.assert_font(font)
+        self.out = opts = (yield from self.read_UInt16(line))
+        self.out = s    = (yield from self.read_String(line))
+        return coproc.CMD_BUTTON(*u32, x, y, w, h, font, opts, s)
+
+    def coproc_CLOCK (self, u32: Int, line):
+        self.out = x    = (yield from self.read_Int16 (line))
+        self.out = y    = (yield from self.read_Int16 (line))
+        self.out = r    = (yield from self.read_Int16 (line))
+        self.out = opts = (yield from self.read_UInt16(line))
+        self.out = h    = (yield from self.read_UInt16(line))
+        self.out = m    = (yield from self.read_UInt16(line))
+        self.out = s    = (yield from self.read_UInt16(line))
+        self.out = ms   = (yield from self.read_UInt16(line))
+        return coproc.CMD_CLOCK(*u32, x, y, r, opts, h, m, s, ms)
+
+    def coproc_FGCOLOR (self, u32: Int, line):
+        self.out = c = (yield from self.read_UInt32(line))
+        return coproc.CMD_FGCOLOR(*u32, c)
+
+    def coproc_BGCOLOR (self, u32: Int, line):
+        self.out = c = (yield from self.read_UInt32(line))
+        return coproc.CMD_BGCOLOR(*u32, c)
+
+    def coproc_GRADCOLOR (self, u32: Int, line):
+        self.out = c = (yield from self.read_UInt32(line))
+        return coproc.CMD_GRADCOLOR(*u32, c)
+
+    def coproc_GAUGE (self, u32: Int, line):
+        self.out = x     = (yield from self.read_Int16 (line))
+        self.out = y     = (yield from self.read_Int16 (line))
+        self.out = r     = (yield from self.read_Int16 (line))
+        self.out = opts  = (yield from self.read_UInt16(line))
+        self.out = major = (yield from self.read_UInt16(line))
+        self.out = minor = (yield from self.read_UInt16(line))
+        self.out = val   = (yield from self.read_UInt16(line))
+        self.out = rang  = (yield from self.read_UInt16(line))
+        return coproc.CMD_GAUGE(*u32, x, y, r, opts, major, minor, val, rang)
+
+    def coproc_GRADIENT (self, u32: Int, line):
+        self.out = x0   = (yield from self.read_Int16 (line))
+        self.out = y0   = (yield from self.read_Int16 (line))
+        self.out = rgb0 = (yield from self.read_UInt32(line))
+        self.out = x1   = (yield from self.read_Int16 (line))
+        self.out = y1   = (yield from self.read_Int16 (line))
+        self.out = rgb1 = (yield from self.read_UInt32(line))
+        return coproc.CMD_GRADIENT(*u32, x0, y0, rgb0, x1, y1, rgb1)
+
+    def coproc_GRADIENTA (self, u32: Int, line):
+        self.out = x0    = (yield from self.read_Int16 (line))
+        self.out = y0    = (yield from self.read_Int16 (line))
+        self.out = argb0 = (yield from self.read_UInt32(line))
+        self.out = x1    = (yield from self.read_Int16 (line))
+        self.out = y1    = (yield from self.read_Int16 (line))
+        self.out = argb1 = (yield from self.read_UInt32(line))
+        return coproc.CMD_GRADIENTA(*u32, x0, y0, argb0, x1, y1, argb1)
+
+    def coproc_KEYS (self, u32: Int, line):
+        self.out = x    = (yield from self.read_Int16 (line))
+        self.out = y    = (yield from self.read_Int16 (line))
+        self.out = w    = (yield from self.read_Int16 (line))
+        self.out = h    = (yield from self.read_Int16 (line))
+        self.out = font = (yield from self.read_Int16 (line))
+        self.out = self.assert_font(font)
+        self.out = opts = (yield from self.read_UInt16(line))
+        self.out = s    = (yield from self.read_String(line))
+        return coproc.CMD_KEYS(*u32, x, y, w, h, font, opts, s)
+
+    def coproc_PROGRESS (self, u32: Int, line):
+        self.out = x    = (yield from self.read_Int16 (line))
+        self.out = y    = (yield from self.read_Int16 (line))
+        self.out = w    = (yield from self.read_Int16 (line))
+        self.out = h    = (yield from self.read_Int16 (line))
+        self.out = opts = (yield from self.read_UInt16(line))
+        self.out = val  = (yield from self.read_UInt16(line))
+        self.out = rang = (yield from self.read_UInt16(line))
+        return coproc.CMD_PROGRESS(*u32, x, y, w, h, opts, val, rang)
+
+    def coproc_SCROLLBAR (self, u32: Int, line):
+        self.out = x    = (yield from self.read_Int16 (line))
+        self.out = y    = (yield from self.read_Int16 (line))
+        self.out = w    = (yield from self.read_Int16 (line))
+        self.out = h    = (yield from self.read_Int16 (line))
+        self.out = opts = (yield from self.read_UInt16(line))
+        self.out = val  = (yield from self.read_UInt16(line))
+        self.out = size = (yield from self.read_UInt16(line))
+        self.out = rang = (yield from self.read_UInt16(line))
+        return coproc.CMD_SCROLLBAR(*u32, x, y, w, h, opts, val, size, rang)
+
+    def coproc_SLIDER (self, u32: Int, line):
+        self.out = x    = (yield from self.read_Int16 (line))
+        self.out = y    = (yield from self.read_Int16 (line))
+        self.out = w    = (yield from self.read_Int16 (line))
+        self.out = h    = (yield from self.read_Int16 (line))
+        self.out = opts = (yield from self.read_UInt16(line))
+        self.out = val  = (yield from self.read_UInt16(line))
+        self.out = rang = (yield from self.read_UInt16(line))
+        return coproc.CMD_SLIDER(*u32, x, y, w, h, opts, val, rang)
+
+    def coproc_DIAL (self, u32: Int, line):
+        self.out = x    = (yield from self.read_Int16 (line))
+        self.out = y    = (yield from self.read_Int16 (line))
+        self.out = r    = (yield from self.read_Int16 (line))
+        self.out = opts = (yield from self.read_UInt16(line))
+        self.out = val  = (yield from self.read_UInt16(line))
+        return coproc.CMD_DIAL(*u32, x, y, r, opts, val)
+
+    def coproc_TOGGLE (self, u32: Int, line):
+        self.out = x    = (yield from self.read_Int16 (line))
+        self.out = y    = (yield from self.read_Int16 (line))
+        self.out = w    = (yield from self.read_Int16 (line))
+        self.out = font = (yield from self.read_Int16 (line))
+        self.out = self.assert_font(font)
+        self.out = opts = (yield from self.read_UInt16(line))
+        self.out = state= (yield from self.read_UInt16(line))
+        self.out = s    = (yield from self.read_String(line))
+        return coproc.CMD_TOGGLE(*u32, x, y, w, font, opts, state, s)
+
+    def coproc_NUMBER (self, u32: Int, line):
+        self.out = x    = (yield from self.read_Int16 (line))
+        self.out = y    = (yield from self.read_Int16 (line))
+        self.out = font = (yield from self.read_Int16 (line))
+        self.out = self.assert_font(font)
+        self.out = opts = (yield from self.read_UInt16(line))
+        self.out = n    = (yield from self.read_Int32 (line))
+        return coproc.CMD_NUMBER(*u32, x, y, font, opts, n)
+
+    def coproc_SETBASE (self, u32: Int, line):
+        self.out = b = (yield from self.read_UInt32(line))
+        return coproc.CMD_SETBASE(*u32, b)
+
+    def coproc_FILLWIDTH (self, u32: Int, line):
+        self.out = s = (yield from self.read_UInt32(line))
+        return coproc.CMD_FILLWIDTH(*u32, s)
+
+    def coproc_MEMCRC (self, u32: Int, line):
+        self.out = dst    = (yield from self.read_UInt32(line))
+        self.out = self.assert_ram_g(dst)
+        self.out = num    = (yield from self.read_UInt32(line))
+        self.out = self.assert_ram_g_range(dst, num)
+        self.out = result = (yield from self.read_UInt32(line))
+        return coproc.CMD_MEMCRC(*u32, dst, num, result)
+
+    def coproc_MEMZERO (self, u32: Int, line):
+        self.out = ptr = (yield from self.read_UInt32(line))
+        self.out = self.assert_ram_g(ptr)
+        self.out = num = (yield from self.read_UInt32(line))
+        self.out = self.assert_ram_g_range(ptr, num)
+        return coproc.CMD_MEMZERO(*u32, ptr, num)
+
+    def coproc_MEMSET (self, u32: Int, line):
+        self.out = ptr   = (yield from self.read_UInt32(line))
+        self.out = self.assert_ram_g(ptr)
+        self.out = value = (yield from self.read_UInt32(line))
+        self.out = num   = (yield from self.read_UInt32(line))
+        self.out = self.assert_ram_g_range(ptr, num)
+        return coproc.CMD_MEMSET(*u32, ptr, value, num)
+
+    def coproc_MEMWRITE (self, u32: Int, line):
+        self.out = ptr  = (yield from self.read_UInt32   (line))
+        self.out = self.assert_ram_g(ptr)
+        self.out = num  = (yield from self.read_UInt32   (line))
+        self.out = self.assert_ram_g_range(ptr, num)
+        self.out = byte = (yield from self.read_DataBytes(line, num.val))
+        return coproc.CMD_MEMWRITE(*u32, ptr, num, byte)
+
+    def coproc_MEMCPY (self, u32: Int, line):
+        self.out = dst = (yield from self.read_UInt32(line))
+        self.out = self.assert_ram_g(dst)
+        self.out = src = (yield from self.read_UInt32(line))
+        self.out = self.assert_ram_g(src)
+        self.out = num = (yield from self.read_UInt32(line))
+        self.out = self.assert_ram_g_range(dst, num)
+        self.out = self.assert_ram_g_range(src, num)
+        return coproc.CMD_MEMCPY(*u32, dst, src, num)
+
+    def coproc_APPEND (self, u32: Int, line):
+        self.out = ptr  = (yield from self.read_UInt32(line))
+        self.out = self.assert_ram_g(ptr)
+        self.out = num  = (yield from self.read_UInt32(line))
+        self.out = self.assert_ram_g_range(ptr, num)
+        return coproc.CMD_APPEND(*u32, ptr, num)
+
+    def coproc_INFLATE (self, u32: Int, line):
+        self.out = ptr  = (yield from self.read_UInt32     (line))
+        self.out = self.assert_ram_g(ptr)
+        self.out = byte = (yield from self.read_DataBytes  (line, 10))
+        return coproc.CMD_INFLATE(*u32, ptr, byte)
+
+    def coproc_GETPTR (self, u32: Int, line):
+        self.out = result = (yield from self.read_UInt32(line))
+        return coproc.CMD_GETPTR(*u32, result)
+
+    def coproc_GETPROPS (self, u32: Int, line):
+        self.out = ptr    = (yield from self.read_UInt32(line))
+        self.out = width  = (yield from self.read_UInt32(line))
+        self.out = height = (yield from self.read_UInt32(line))
+        return coproc.CMD_GETPROPS(*u32, ptr, width, height)
+
+    def coproc_INFLATE2 (self, u32: Int, line):
+        self.out = ptr  = (yield from self.read_UInt32   (line))
+        self.out = self.assert_ram_g(ptr)
+        self.out = opts = (yield from self.read_UInt32   (line))
+        self.out = byte = (yield from self.read_DataBytes(line, 10, opts.val))
+        return coproc.CMD_INFLATE2(*u32, ptr, opts, byte)
+
+    def coproc_LOADIMAGE (self, u32: Int, line):
+        self.out = ptr  = (yield from self.read_UInt32(line))
+        self.out = self.assert_ram_g(ptr)
+        self.out = opts = (yield from self.read_UInt32(line))
+        self.out = byte = (yield from self.read_DataBytes(line, 69, opts.val))
+        return coproc.CMD_LOADIMAGE(*u32, ptr, opts, byte)
+
+    def coproc_MEDIAFIFO (self, u32: Int, line):
+        self.out = ptr  = (yield from self.read_UInt32(line))
+        self.out = self.assert_ram_g(ptr)
+        self.out = size = (yield from self.read_UInt32(line))
+        return coproc.CMD_MEDIAFIFO(*u32, ptr, size)
+
+    def coproc_TRANSLATE (self, u32: Int, line):
+        self.out = tx   = (yield from self.read_Int32(line))
+        self.out = ty   = (yield from self.read_Int32(line))
+        return coproc.CMD_TRANSLATE(*u32, tx, ty)
+
+    def coproc_SCALE (self, u32: Int, line):
+        self.out = sx   = (yield from self.read_Int32(line))
+        self.out = sy   = (yield from self.read_Int32(line))
+        return coproc.CMD_SCALE(*u32, sx, sy)
+
+    def coproc_ROTATE (self, u32: Int, line):
+        self.out = a    = (yield from self.read_Int32(line))
+        return coproc.CMD_ROTATE(*u32, a)
+
+    def coproc_ROTATEAROUND (self, u32: Int, line):
+        self.out = x    = (yield from self.read_Int32(line))
+        self.out = y    = (yield from self.read_Int32(line))
+        self.out = a    = (yield from self.read_Int32(line))
+        self.out = s    = (yield from self.read_Int32(line))
+        return coproc.CMD_ROTATEAROUND(*u32, x, y, a, s)
+
+    def coproc_GETMATRIX (self, u32: Int, line):
+        self.out = a    = (yield from self.read_Int32(line))
+        self.out = b    = (yield from self.read_Int32(line))
+        self.out = c    = (yield from self.read_Int32(line))
+        self.out = d    = (yield from self.read_Int32(line))
+        self.out = e    = (yield from self.read_Int32(line))
+        self.out = f    = (yield from self.read_Int32(line))
+        return coproc.CMD_GETMATRIX(*u32, a, b, c, d, e, f)
+
+    def coproc_VIDEOFRAME (self, u32: Int, line):
+        self.out = dst = (yield from self.read_UInt32(line))
+        self.out = self.assert_ram_g(dst)
+        self.out = ptr = (yield from self.read_UInt32(line))
+        self.out = self.assert_ram_g(ptr)
+        return coproc.CMD_VIDEOFRAME(*u32, dst, ptr)
+
+    def coproc_PLAYVIDEO (self, u32: Int, line):
+        self.out = opts = (yield from self.read_UInt32(line))
+        return coproc.CMD_PLAYVIDEO(*u32, opts)
+
+    def coproc_INTERRUPT (self, u32: Int, line):
+        self.out = ms = (yield from self.read_UInt32(line))
+        return coproc.CMD_INTERRUPT(*u32, ms)
+
+    def coproc_REGREAD (self, u32: Int, line):
+        self.out = ptr    = (yield from self.read_UInt32(line))
+        if not memmap.RAM_REG.contains(ptr.val):
+            self.out = warning.NotRamRegAddr(ptr.ss_, ptr.es_)
+        self.out = result = (yield from self.read_UInt32(line))
+        return coproc.CMD_REGREAD(*u32, ptr, result)
+
+    def coproc_CALIBRATE (self, u32: Int, line):
+        self.out = result = (yield from self.read_UInt32(line))
+        return coproc.CMD_CALIBRATE(*u32, result)
+
+    def coproc_ROMFONT (self, u32: Int, line):
+        self.out = font    = (yield from self.read_UInt32(line))
+        if not 0 <= font.val <= 31:
+            self.out = warning.OutOfRange(font.ss_, font.es_)
+        self.out = romslot = (yield from self.read_UInt32(line))
+        if not 0 <= romslot.val <= 31:
+            self.out = warning.OutOfRange(romslot.ss_, romslot.es_)
+        return coproc.CMD_ROMFONT(*u32, font, romslot)
+
+    def coproc_SETROTATE (self, u32: Int, line):
+        self.out = r = (yield from self.read_UInt32(line))
+        if not 0 <= r.val <= 7:
+            self.out = warning.OutOfRange(r.ss_, r.es_)
+        return coproc.CMD_SETROTATE(*u32, r)
+
+    def coproc_SETBITMAP (self, u32: Int, line):
+        self.out = source = (yield from self.read_UInt32(line))
+        if not memmap.RAM_REG.contains(source.val) and\
+           not memmap.FLASH  .contains(source.val):
+            self.out = warning.OutOfRange(source.ss_, source.es_)
+        self.out = fmt    = (yield from self.read_UInt16(line))
+        self.out = width  = (yield from self.read_UInt16(line))
+        self.out = height = (yield from self.read_UInt16(line))
+        return coproc.CMD_SETBITMAP(*u32, source, fmt, width, height)
+
+    def coproc_SPINNER (self, u32: Int, line):
+        self.out = x     = (yield from self.read_Int16 (line))
+        self.out = y     = (yield from self.read_Int16 (line))
+        self.out = style = (yield from self.read_UInt16(line))
+        if not 0 <= style.val <= 3:
+            self.out = warning.OutOfRange(style.ss_, style.es_)
+        self.out = scale = (yield from self.read_UInt16(line))
+        return coproc.CMD_SPINNER(*u32, x, y, style, scale)
+
+    coproc_ops = {
         #-- Commands to draw graphics objects ------------------------------#
-        elif u32.val == 0xffffff0c:
-            self.out = x    = (yield from self.read_Int16 (line))
-            self.out = y    = (yield from self.read_Int16 (line))
-            self.out = font = (yield from self.read_Int16 (line))
-            self.out = self.assert_font(font)
-            self.out = opts = (yield from self.read_UInt16(line))
-            self.out = s    = (yield from self.read_String(line))
-            args = []
-            for match in re.finditer(r"""%                  # character specifier
-                                         ([ 0+-]         )? # flags
-                                         ([1-9][0-9]*|\* )? # field width
-                                         (\.(?:[0-9]*|\*))? # precision
-                                         ([diuoxXcs%]    )  # conversion specifier
-                                      """, s.val, re.X):
-                (flags, width, prec, conv) = match.groups()
-                if width == '*':
-                    arg = (yield from self.read_Int32(line))
-                    self.out = arg
-                    args.append(arg)
-                if prec == '*':
-                    arg = (yield from self.read_Int32(line))
-                    self.out = arg
-                    args.append(arg)
-                if conv != '%':
-                    arg = (yield from self.read_Int32(line))
-                    self.out = arg
-                    args.append(arg)
-            cmd = coproc.CMD_TEXT(*u32, x, y, font, opts, s)
-        elif u32.val == 0xffffff0d:
-            self.out = x    = (yield from self.read_Int16 (line))
-            self.out = y    = (yield from self.read_Int16 (line))
-            self.out = w    = (yield from self.read_Int16 (line))
-            self.out = h    = (yield from self.read_Int16 (line))
-            self.out = font = (yield from self.read_Int16 (line))
-            self.out = self.assert_font(font)
-            self.out = opts = (yield from self.read_UInt16(line))
-            self.out = s    = (yield from self.read_String(line))
-            cmd = coproc.CMD_BUTTON(*u32, x, y, w, h, font, opts, s)
-        elif u32.val == 0xffffff14:
-            self.out = x    = (yield from self.read_Int16 (line))
-            self.out = y    = (yield from self.read_Int16 (line))
-            self.out = r    = (yield from self.read_Int16 (line))
-            self.out = opts = (yield from self.read_UInt16(line))
-            self.out = h    = (yield from self.read_UInt16(line))
-            self.out = m    = (yield from self.read_UInt16(line))
-            self.out = s    = (yield from self.read_UInt16(line))
-            self.out = ms   = (yield from self.read_UInt16(line))
-            cmd = coproc.CMD_CLOCK(*u32, x, y, r, opts, h, m, s, ms)
-        elif u32.val == 0xffffff0a:
-            self.out = c = (yield from self.read_UInt32(line))
-            cmd = coproc.CMD_FGCOLOR(*u32, c)
-        elif u32.val == 0xffffff09:
-            self.out = c = (yield from self.read_UInt32(line))
-            cmd = coproc.CMD_BGCOLOR(*u32, c)
-        elif u32.val == 0xffffff34:
-            self.out = c = (yield from self.read_UInt32(line))
-            cmd = coproc.CMD_GRADCOLOR(*u32, c)
-        elif u32.val == 0xffffff13:
-            self.out = x     = (yield from self.read_Int16 (line))
-            self.out = y     = (yield from self.read_Int16 (line))
-            self.out = r     = (yield from self.read_Int16 (line))
-            self.out = opts  = (yield from self.read_UInt16(line))
-            self.out = major = (yield from self.read_UInt16(line))
-            self.out = minor = (yield from self.read_UInt16(line))
-            self.out = val   = (yield from self.read_UInt16(line))
-            self.out = rang  = (yield from self.read_UInt16(line))
-            cmd = coproc.CMD_GAUGE(*u32, x, y, r, opts, major, minor, val, rang)
-        elif u32.val == 0xffffff0b:
-            self.out = x0   = (yield from self.read_Int16 (line))
-            self.out = y0   = (yield from self.read_Int16 (line))
-            self.out = rgb0 = (yield from self.read_UInt32(line))
-            self.out = x1   = (yield from self.read_Int16 (line))
-            self.out = y1   = (yield from self.read_Int16 (line))
-            self.out = rgb1 = (yield from self.read_UInt32(line))
-            cmd = coproc.CMD_GRADIENT(*u32, x0, y0, rgb0, x1, y1, rgb1)
-        elif u32.val == 0xffffff57:
-            self.out = x0    = (yield from self.read_Int16 (line))
-            self.out = y0    = (yield from self.read_Int16 (line))
-            self.out = argb0 = (yield from self.read_UInt32(line))
-            self.out = x1    = (yield from self.read_Int16 (line))
-            self.out = y1    = (yield from self.read_Int16 (line))
-            self.out = argb1 = (yield from self.read_UInt32(line))
-            cmd = coproc.CMD_GRADIENTA(*u32, x0, y0, argb0, x1, y1, argb1)
-        elif u32.val == 0xffffff0e:
-            self.out = x    = (yield from self.read_Int16 (line))
-            self.out = y    = (yield from self.read_Int16 (line))
-            self.out = w    = (yield from self.read_Int16 (line))
-            self.out = h    = (yield from self.read_Int16 (line))
-            self.out = font = (yield from self.read_Int16 (line))
-            self.out = self.assert_font(font)
-            self.out = opts = (yield from self.read_UInt16(line))
-            self.out = s    = (yield from self.read_String(line))
-            cmd = coproc.CMD_KEYS(*u32, x, y, w, h, font, opts, s)
-        elif u32.val == 0xffffff0f:
-            self.out = x    = (yield from self.read_Int16 (line))
-            self.out = y    = (yield from self.read_Int16 (line))
-            self.out = w    = (yield from self.read_Int16 (line))
-            self.out = h    = (yield from self.read_Int16 (line))
-            self.out = opts = (yield from self.read_UInt16(line))
-            self.out = val  = (yield from self.read_UInt16(line))
-            self.out = rang = (yield from self.read_UInt16(line))
-            cmd = coproc.CMD_PROGRESS(*u32, x, y, w, h, opts, val, rang)
-        elif u32.val == 0xffffff11:
-            self.out = x    = (yield from self.read_Int16 (line))
-            self.out = y    = (yield from self.read_Int16 (line))
-            self.out = w    = (yield from self.read_Int16 (line))
-            self.out = h    = (yield from self.read_Int16 (line))
-            self.out = opts = (yield from self.read_UInt16(line))
-            self.out = val  = (yield from self.read_UInt16(line))
-            self.out = size = (yield from self.read_UInt16(line))
-            self.out = rang = (yield from self.read_UInt16(line))
-            cmd = coproc.CMD_SCROLLBAR(*u32, x, y, w, h, opts, val, size, rang)
-        elif u32.val == 0xffffff10:
-            self.out = x    = (yield from self.read_Int16 (line))
-            self.out = y    = (yield from self.read_Int16 (line))
-            self.out = w    = (yield from self.read_Int16 (line))
-            self.out = h    = (yield from self.read_Int16 (line))
-            self.out = opts = (yield from self.read_UInt16(line))
-            self.out = val  = (yield from self.read_UInt16(line))
-            self.out = rang = (yield from self.read_UInt16(line))
-            cmd = coproc.CMD_SLIDER(*u32, x, y, w, h, opts, val, rang)
-        elif u32.val == 0xffffff2d:
-            self.out = x    = (yield from self.read_Int16 (line))
-            self.out = y    = (yield from self.read_Int16 (line))
-            self.out = r    = (yield from self.read_Int16 (line))
-            self.out = opts = (yield from self.read_UInt16(line))
-            self.out = val  = (yield from self.read_UInt16(line))
-            cmd = coproc.CMD_DIAL(*u32, x, y, r, opts, val)
-        elif u32.val == 0xffffff12:
-            self.out = x    = (yield from self.read_Int16 (line))
-            self.out = y    = (yield from self.read_Int16 (line))
-            self.out = w    = (yield from self.read_Int16 (line))
-            self.out = font = (yield from self.read_Int16 (line))
-            self.out = self.assert_font(font)
-            self.out = opts = (yield from self.read_UInt16(line))
-            self.out = state= (yield from self.read_UInt16(line))
-            self.out = s    = (yield from self.read_String(line))
-            cmd = coproc.CMD_TOGGLE(*u32, x, y, w, font, opts, state, s)
-        elif u32.val == 0xffffff2e:
-            self.out = x    = (yield from self.read_Int16 (line))
-            self.out = y    = (yield from self.read_Int16 (line))
-            self.out = font = (yield from self.read_Int16 (line))
-            self.out = self.assert_font(font)
-            self.out = opts = (yield from self.read_UInt16(line))
-            self.out = n    = (yield from self.read_Int32 (line))
-            cmd = coproc.CMD_NUMBER(*u32, x, y, font, opts, n)
-        elif u32.val == 0xffffff38:
-            self.out = b = (yield from self.read_UInt32(line))
-            cmd = coproc.CMD_SETBASE(*u32, b)
-        elif u32.val == 0xffffff58:
-            self.out = s = (yield from self.read_UInt32(line))
-            cmd = coproc.CMD_FILLWIDTH(*u32, s)
+        0xffffff0c: coproc_TEXT,
+        0xffffff0d: coproc_BUTTON,
+        0xffffff14: coproc_CLOCK,
+        0xffffff0a: coproc_FGCOLOR,
+        0xffffff09: coproc_BGCOLOR,
+        0xffffff34: coproc_GRADCOLOR,
+        0xffffff13: coproc_GAUGE,
+        0xffffff0b: coproc_GRADIENT,
+        0xffffff57: coproc_GRADIENTA,
+        0xffffff0e: coproc_KEYS,
+        0xffffff0f: coproc_PROGRESS,
+        0xffffff11: coproc_SCROLLBAR,
+        0xffffff10: coproc_SLIDER,
+        0xffffff2d: coproc_DIAL,
+        0xffffff12: coproc_TOGGLE,
+        0xffffff2e: coproc_NUMBER,
+        0xffffff38: coproc_SETBASE,
+        0xffffff58: coproc_FILLWIDTH,
 
         #-- Commands to operate on memory ----------------------------------#
-        elif u32.val == 0xffffff18:
-            self.out = dst    = (yield from self.read_UInt32(line))
-            self.out = self.assert_ram_g(dst)
-            self.out = num    = (yield from self.read_UInt32(line))
-            self.out = self.assert_ram_g_range(dst, num)
-            self.out = result = (yield from self.read_UInt32(line))
-            cmd = coproc.CMD_MEMCRC(*u32, dst, num, result)
-        elif u32.val == 0xffffff1c:
-            self.out = ptr = (yield from self.read_UInt32(line))
-            self.out = self.assert_ram_g(ptr)
-            self.out = num = (yield from self.read_UInt32(line))
-            self.out = self.assert_ram_g_range(ptr, num)
-            cmd = coproc.CMD_MEMZERO(*u32, ptr, num)
-        elif u32.val == 0xffffff1b:
-            self.out = ptr   = (yield from self.read_UInt32(line))
-            self.out = self.assert_ram_g(ptr)
-            self.out = value = (yield from self.read_UInt32(line))
-            self.out = num   = (yield from self.read_UInt32(line))
-            self.out = self.assert_ram_g_range(ptr, num)
-            cmd = coproc.CMD_MEMSET(*u32, ptr, value, num)
-        elif u32.val == 0xffffff1a:
-            self.out = ptr  = (yield from self.read_UInt32   (line))
-            self.out = self.assert_ram_g(ptr)
-            self.out = num  = (yield from self.read_UInt32   (line))
-            self.out = self.assert_ram_g_range(ptr, num)
-            self.out = byte = (yield from self.read_DataBytes(line, num.val))
-            cmd = coproc.CMD_MEMWRITE(*u32, ptr, num, byte)
-        elif u32.val == 0xffffff1d:
-            self.out = dst = (yield from self.read_UInt32(line))
-            self.out = self.assert_ram_g(dst)
-            self.out = src = (yield from self.read_UInt32(line))
-            self.out = self.assert_ram_g(src)
-            self.out = num = (yield from self.read_UInt32(line))
-            self.out = self.assert_ram_g_range(dst, num)
-            self.out = self.assert_ram_g_range(src, num)
-            cmd = coproc.CMD_MEMCPY(*u32, dst, src, num)
-        elif u32.val == 0xffffff1e:
-            self.out = ptr  = (yield from self.read_UInt32(line))
-            self.out = self.assert_ram_g(ptr)
-            self.out = num  = (yield from self.read_UInt32(line))
-            self.out = self.assert_ram_g_range(ptr, num)
-            cmd = coproc.CMD_APPEND(*u32, ptr, num)
+        0xffffff18: coproc_MEMCRC,
+        0xffffff1c: coproc_MEMZERO,
+        0xffffff1b: coproc_MEMSET,
+        0xffffff1a: coproc_MEMWRITE,
+        0xffffff1d: coproc_MEMCPY,
+        0xffffff1e: coproc_APPEND,
 
         #-- Commands for loading data into RAM_G ---------------------------#
-        elif u32.val == 0xffffff22:
-            self.out = ptr  = (yield from self.read_UInt32     (line))
-            self.out = self.assert_ram_g(ptr)
-            self.out = byte = (yield from self.read_DataBytes  (line, 10))
-            cmd = coproc.CMD_INFLATE(*u32, ptr, byte)
-        elif u32.val == 0xffffff23:
-            self.out = result = (yield from self.read_UInt32(line))
-            cmd = coproc.CMD_GETPTR(*u32, result)
-        elif u32.val == 0xffffff25:
-            self.out = ptr    = (yield from self.read_UInt32(line))
-            self.out = width  = (yield from self.read_UInt32(line))
-            self.out = height = (yield from self.read_UInt32(line))
-            cmd = coproc.CMD_GETPROPS(*u32, ptr, width, height)
-        elif u32.val == 0xffffff50:
-            self.out = ptr  = (yield from self.read_UInt32   (line))
-            self.out = self.assert_ram_g(ptr)
-            self.out = opts = (yield from self.read_UInt32   (line))
-            self.out = byte = (yield from self.read_DataBytes(line, 10, opts.val))
-            cmd = coproc.CMD_INFLATE2(*u32, ptr, opts, byte)
-        elif u32.val == 0xffffff24:
-            self.out = ptr  = (yield from self.read_UInt32(line))
-            self.out = self.assert_ram_g(ptr)
-            self.out = opts = (yield from self.read_UInt32(line))
-            self.out = byte = (yield from self.read_DataBytes(line, 69, opts.val))
-            cmd = coproc.CMD_LOADIMAGE(*u32, ptr, opts, byte)
-        elif u32.val == 0xffffff39:
-            self.out = ptr  = (yield from self.read_UInt32(line))
-            self.out = self.assert_ram_g(ptr)
-            self.out = size = (yield from self.read_UInt32(line))
-            cmd = coproc.CMD_MEDIAFIFO(*u32, ptr, size)
+        0xffffff22: coproc_INFLATE,
+        0xffffff23: coproc_GETPTR,
+        0xffffff25: coproc_GETPROPS,
+        0xffffff50: coproc_INFLATE2,
+        0xffffff24: coproc_LOADIMAGE,
+        0xffffff39: coproc_MEDIAFIFO,
 
         #-- Commands for setting the bitmap transform matrix ---------------#
-        elif u32.val == 0xffffff26:
-            cmd = coproc.CMD_LOADIDENTITY(*u32)
-        elif u32.val == 0xffffff27:
-            self.out = tx   = (yield from self.read_Int32(line))
-            self.out = ty   = (yield from self.read_Int32(line))
-            cmd = coproc.CMD_TRANSLATE(*u32, tx, ty)
-        elif u32.val == 0xffffff28:
-            self.out = sx   = (yield from self.read_Int32(line))
-            self.out = sy   = (yield from self.read_Int32(line))
-            cmd = coproc.CMD_SCALE(*u32, sx, sy)
-        elif u32.val == 0xffffff29:
-            self.out = a    = (yield from self.read_Int32(line))
-            cmd = coproc.CMD_ROTATE(*u32, a)
-        elif u32.val == 0xffffff51:
-            self.out = x    = (yield from self.read_Int32(line))
-            self.out = y    = (yield from self.read_Int32(line))
-            self.out = a    = (yield from self.read_Int32(line))
-            self.out = s    = (yield from self.read_Int32(line))
-            cmd = coproc.CMD_ROTATEAROUND(*u32, x, y, a, s)
-        elif u32.val == 0xffffff2a:
-            cmd = coproc.CMD_SETMATRIX(*u32)
-        elif u32.val == 0xffffff33:
-            self.out = a    = (yield from self.read_Int32(line))
-            self.out = b    = (yield from self.read_Int32(line))
-            self.out = c    = (yield from self.read_Int32(line))
-            self.out = d    = (yield from self.read_Int32(line))
-            self.out = e    = (yield from self.read_Int32(line))
-            self.out = f    = (yield from self.read_Int32(line))
-            cmd = coproc.CMD_GETMATRIX(*u32, a, b, c, d, e, f)
+        0xffffff27: coproc_TRANSLATE,
+        0xffffff28: coproc_SCALE,
+        0xffffff29: coproc_ROTATE,
+        0xffffff51: coproc_ROTATEAROUND,
+        0xffffff33: coproc_GETMATRIX,
 
         #-- Commands for flash operation -----------------------------------#
-            # CMD_FLASHERASE
-            # CMD_FLASHWRITE
-            # CMD_FLASHUPDATE
-            # CMD_FLASHDETACH
-            # CMD_FLASHATTACH
-            # CMD_FLASHFAST
-            # CMD_FLASHSPIDESEL
-            # CMD_FLASHTX
-            # CMD_FLASHRX
-            # CMD_CLEARCACHE
-            # CMD_FLASHSOURCE
-            # CMD_VIDEOSTARTF
-            # CMD_APPENDF
+        # CMD_FLASHERASE
+        # CMD_FLASHWRITE
+        # CMD_FLASHUPDATE
+        # CMD_FLASHDETACH
+        # CMD_FLASHATTACH
+        # CMD_FLASHFAST
+        # CMD_FLASHSPIDESEL
+        # CMD_FLASHTX
+        # CMD_FLASHRX
+        # CMD_CLEARCACHE
+        # CMD_FLASHSOURCE
+        # CMD_VIDEOSTARTF
+        # CMD_APPENDF
 
         #-- Commands for video playback ------------------------------------#
-        elif u32.val == 0xffffff40:
-            cmd = coproc.CMD_VIDEOSTART(*u32)
-            # CMD_VIDEOSTARTF
-        elif u32.val == 0xffffff41:
-            self.out = dst = (yield from self.read_UInt32(line))
-            self.out = self.assert_ram_g(dst)
-            self.out = ptr = (yield from self.read_UInt32(line))
-            self.out = self.assert_ram_g(ptr)
-            cmd = coproc.CMD_VIDEOFRAME(*u32, dst, ptr)
-        elif u32.val == 0xffffff3a:
-            self.out = opts = (yield from self.read_UInt32(line))
-            cmd = coproc.CMD_PLAYVIDEO(*u32, opts)
+        # CMD_VIDEOSTARTF
+        0xffffff41: coproc_VIDEOFRAME,
+        0xffffff3a: coproc_PLAYVIDEO,
 
         #-- Commands for animation -----------------------------------------#
-            # CMD_ANIMFRAME
-            # CMD_ANIMSTART
-            # CMD_ANIMSTOP
-            # CMD_ANIMXY
-            # CMD_ANIMDRAW
+        # CMD_ANIMFRAME
+        # CMD_ANIMSTART
+        # CMD_ANIMSTOP
+        # CMD_ANIMXY
+        # CMD_ANIMDRAW
 
         #-- Other commands -------------------------------------------------#
-        elif u32.val == 0xffffff32:
-            cmd = coproc.CMD_COLDSTART(*u32)
-        elif u32.val == 0xffffff02:
-            self.out = ms = (yield from self.read_UInt32(line))
-            cmd = coproc.CMD_INTERRUPT(*u32, ms)
-        elif u32.val == 0xffffff19:
-            self.out = ptr    = (yield from self.read_UInt32(line))
-            if not memmap.RAM_REG.contains(ptr.val):
-                self.out = warning.NotRamRegAddr(ptr.ss_, ptr.es_)
-            self.out = result = (yield from self.read_UInt32(line))
-            cmd = coproc.CMD_REGREAD(*u32, ptr, result)
-        elif u32.val == 0xffffff15:
-            self.out = result = (yield from self.read_UInt32(line))
-            cmd = coproc.CMD_CALIBRATE(*u32, result)
-        elif u32.val == 0xffffff3f:
-            self.out = font    = (yield from self.read_UInt32(line))
-            if not 0 <= font.val <= 31:
-                self.out = warning.OutOfRange(font.ss_, font.es_)
-            self.out = romslot = (yield from self.read_UInt32(line))
-            if not 0 <= romslot.val <= 31:
-                self.out = warning.OutOfRange(romslot.ss_, romslot.es_)
-            cmd = coproc.CMD_ROMFONT(*u32, font, romslot)
-        elif u32.val == 0xffffff36:
-            self.out = r = (yield from self.read_UInt32(line))
-            if not 0 <= r.val <= 7:
-                self.out = warning.OutOfRange(r.ss_, r.es_)
-            cmd = coproc.CMD_SETROTATE(*u32, r)
-        elif u32.val == 0xffffff43:
-            self.out = source = (yield from self.read_UInt32(line))
-            if not memmap.RAM_REG.contains(source.val) and\
-               not memmap.FLASH  .contains(source.val):
-                self.out = warning.OutOfRange(source.ss_, source.es_)
-            self.out = fmt    = (yield from self.read_UInt16(line))
-            self.out = width  = (yield from self.read_UInt16(line))
-            self.out = height = (yield from self.read_UInt16(line))
-            cmd = coproc.CMD_SETBITMAP(*u32, source, fmt, width, height)
-        elif u32.val == 0xffffff16:
-            self.out = x     = (yield from self.read_Int16 (line))
-            self.out = y     = (yield from self.read_Int16 (line))
-            self.out = style = (yield from self.read_UInt16(line))
-            if not 0 <= style.val <= 3:
-                self.out = warning.OutOfRange(style.ss_, style.es_)
-            self.out = scale = (yield from self.read_UInt16(line))
-            cmd = coproc.CMD_SPINNER(*u32, x, y, style, scale)
-            # CMD_STOP
-            # CMD_SCREENSAVER
-            # CMD_SKETCH
-            # CMD_SNAPSHOT
-            # CMD_SNAPSHOT2
-            # CMD_LOGO
-
-        #-------------------------------------------------------------------#
-        else:
-            cmd = warning.UnknownCommand(*u32)
-            return cmd
-
-        cmd.es_ = self.es[-1]
-        self.addr = memmap.add(self.addr, 4 + self.mosi_size - mosi_size)
-        if self.addr % 4:
-            self.out = (yield from self.read_DataPadding(line, self.addr))
-            self.addr = memmap.add(self.addr, self.size)
-        return cmd
+        0xffffff02: coproc_INTERRUPT,
+        0xffffff19: coproc_REGREAD,
+        0xffffff15: coproc_CALIBRATE,
+        0xffffff3f: coproc_ROMFONT,
+        0xffffff36: coproc_SETROTATE,
+        0xffffff43: coproc_SETBITMAP,
+        0xffffff16: coproc_SPINNER,
+        # CMD_STOP
+        # CMD_SCREENSAVER
+        # CMD_SKETCH
+        # CMD_SNAPSHOT
+        # CMD_SNAPSHOT2
+        # CMD_LOGO
+    }
 
 class Decoder (srd.Decoder):
     api_version = 3
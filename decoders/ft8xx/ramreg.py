@@ -71,16 +71,7 @@ def _transform_str (self) -> str:
 
 def at (addr: int) -> Reg:
     '''Find register name at the given address.'''
-    if not memmap.RAM_REG.contains(addr):
-        return None
-    if addr % 4:
-        return None
-
-    ramreg = __import__(__name__).__dict__['ramreg'].__dict__ # this module's objects
-    for reg in [obj for name,obj in  ramreg.items() if name.startswith('REG_')]:
-        if addr == reg.addr:
-            return reg
-    return None
+    return _at.get(addr)
 
 def _combine (Reg1, Reg2):
     '''Combine two registers that share the same address.'''
@@ -1219,3 +1210,15 @@ def val_str (self) -> str:
         elif self.val == 0b11: return 'full'
         else                 : return ''
 
+# ------------------------------------------------------------------------- #
+
+def _index () -> dict:
+    '''Index registers by address, first defined first served.'''
+    index = {}
+    for name, obj in globals().items():
+        if name.startswith('REG_') \
+        and memmap.RAM_REG.contains(obj.addr) and obj.addr % 4 == 0:
+            index.setdefault(obj.addr, obj)
+    return index
+
+_at = _index()
@@ -273,6 +273,8 @@ def decode(self):
                     self.handle_start(pins)
                 elif self.matched[2]:
                     self.handle_stop(pins)
+                    # The bus is idle, decoding can resume from here.
+                    self.checkpoint()
             elif self.state == 'FIND ACK':
                 # Wait for a data/ack bit: SCL = rising.
                 self.get_ack(self.wait({0: 'r'}))
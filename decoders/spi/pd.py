@@ -291,6 +291,10 @@ def find_clk_edge(self, miso, mosi, clk, cs, first):
             # Reset decoder state when CS# changes (and the CS# pin is used).
             self.reset_decoder_state()
 
+            # Decoding can resume after the end of a transfer.
+            if not first and not self.cs_asserted(cs):
+                self.checkpoint()
+
         # We only care about samples if CS# is asserted.
         if self.have_cs and not self.cs_asserted(cs):
             return
@@ -339,8 +343,10 @@ def decode(self):
         # process the very first sample before checking for edges. The
         # previous implementation did this by seeding old values with
         # None, which led to an immediate "change" in comparison.
-        (clk, miso, mosi, cs) = self.wait({})
-        self.find_clk_edge(miso, mosi, clk, cs, True)
+        # Decoding which resumes at a checkpoint has seen its sample.
+        if self.samplenum == 0:
+            (clk, miso, mosi, cs) = self.wait({})
+            self.find_clk_edge(miso, mosi, clk, cs, True)
 
         while True:
             (clk, miso, mosi, cs) = self.wait(wait_cond)
@@ -19,6 +19,7 @@
 ##
 
 import sigrokdecode as srd
+from common.crc import CRC5_USB, CRC16_USB
 
 '''
 OUTPUT_PYTHON format:
@@ -136,41 +137,10 @@ def ann_index(pidname):
         return 28
     return l.index(pidname) + 11
 
-def bitstr_to_num(bitstr):
-    if not bitstr:
-        return 0
-    l = list(bitstr)
-    l.reverse()
-    return int(''.join(l), 2)
-
-def reverse_number(num, count):
-    out = list(count * '0')
-    for i in range(0, count):
-        if num >> i & 1:
-            out[i] = '1'
-    return int(''.join(out), 2)
-
-def calc_crc5(bitstr):
-    poly5 = 0x25
-    crc5 = 0x1f
-    for bit in bitstr:
-        crc5 <<= 1
-        if int(bit) != (crc5 >> 5):
-            crc5 ^= poly5
-        crc5 &= 0x1f
-    crc5 ^= 0x1f
-    return reverse_number(crc5, 5)
-
-def calc_crc16(bitstr):
-    poly16 = 0x18005
-    crc16 = 0xffff
-    for bit in bitstr:
-        crc16 <<= 1
-        if int(bit) != (crc16 >> 16):
-            crc16 ^= poly16
-        crc16 &= 0xffff
-    crc16 ^= 0xffff
-    return reverse_number(crc16, 16)
+# Return 'count' bits of the packed integer 'value' (first bit on the wire
+# in the LSB) as a bitstring in wire order, e.g. for SYNC and PID fields.
+def num_to_bitstr(value, count):
+    return format(value & ((1 << count) - 1), '0%db' % count)[::-1]
 
 class Decoder(srd.Decoder):
     api_version = 3
@@ -226,11 +196,13 @@ def __init__(self):
         self.reset()
 
     def reset(self):
-        self.bits = []
+        self.bits = 0
+        self.bits_ss, self.bits_es = [], []
         self.packet = []
         self.packet_summary = ''
         self.ss = self.es = None
         self.ss_packet = self.es_packet = None
+        self.have_bits = False
         self.state = 'WAIT FOR SOP'
 
     def putpb(self, data):
@@ -250,17 +222,18 @@ def start(self):
         self.out_ann = self.register(srd.OUTPUT_ANN)
 
     def handle_packet(self):
-        packet = ''
-        for (bit, ss, es) in self.bits:
-            packet += bit
+        # The packet's bits are packed into an integer, the first bit on the
+        # wire in the LSB. The bits' sample numbers are kept separately.
+        packet, nbits = self.bits, len(self.bits_ss)
+        bits_ss, bits_es = self.bits_ss, self.bits_es
 
-        if len(packet) < 8:
+        if nbits < 8:
             self.putp([28, ['Invalid packet (shorter than 8 bits)']])
             return
 
         # Bits[0:7]: SYNC
-        sync = packet[:7 + 1]
-        self.ss, self.es = self.bits[0][1], self.bits[7][2]
+        sync = num_to_bitstr(packet, 8)
+        self.ss, self.es = bits_ss[0], bits_es[7]
         # The SYNC pattern for low-speed/full-speed is KJKJKJKK (00000001).
         if sync != '00000001':
             self.putpb(['SYNC ERROR', sync])
@@ -271,36 +244,36 @@ def handle_packet(self):
             self.putb([0, ['SYNC: %s' % sync, 'SYNC', 'S']])
         self.packet.append(sync)
 
-        if len(packet) < 16:
+        if nbits < 16:
             self.putp([28, ['Invalid packet (shorter than 16 bits)']])
             return
 
         # Bits[8:15]: PID
-        pid = packet[8:15 + 1]
+        pid = num_to_bitstr(packet >> 8, 8)
         pidname = pids.get(pid, ('UNKNOWN', 'Unknown PID'))[0]
-        self.ss, self.es = self.bits[8][1], self.bits[15][2]
+        self.ss, self.es = bits_ss[8], bits_es[15]
         self.putpb(['PID', pidname])
         self.putb([2, ['PID: %s' % pidname, pidname, pidname[0]]])
         self.packet.append(pid)
         self.packet_summary += pidname
 
         if pidname in ('OUT', 'IN', 'SOF', 'SETUP', 'PING'):
-            if len(packet) < 32:
+            if nbits < 32:
                 self.putp([28, ['Invalid packet (shorter than 32 bits)']])
                 return
 
             if pidname == 'SOF':
                 # Bits[16:26]: Framenum
-                framenum = bitstr_to_num(packet[16:26 + 1])
-                self.ss, self.es = self.bits[16][1], self.bits[26][2]
+                framenum = (packet >> 16) & 0x7ff
+                self.ss, self.es = bits_ss[16], bits_es[26]
                 self.putpb(['FRAMENUM', framenum])
                 self.putb([3, ['Frame: %d' % framenum, 'Frame', 'Fr', 'F']])
                 self.packet.append(framenum)
                 self.packet_summary += ' %d' % framenum
             else:
                 # Bits[16:22]: Addr
-                addr = bitstr_to_num(packet[16:22 + 1])
-                self.ss, self.es = self.bits[16][1], self.bits[22][2]
+                addr = (packet >> 16) & 0x7f
+                self.ss, self.es = bits_ss[16], bits_es[22]
                 self.putpb(['ADDR', addr])
                 self.putb([4, ['Address: %d' % addr, 'Addr: %d' % addr,
                                'Addr', 'A']])
@@ -308,17 +281,17 @@ def handle_packet(self):
                 self.packet_summary += ' ADDR %d' % addr
 
                 # Bits[23:26]: EP
-                ep = bitstr_to_num(packet[23:26 + 1])
-                self.ss, self.es = self.bits[23][1], self.bits[26][2]
+                ep = (packet >> 23) & 0xf
+                self.ss, self.es = bits_ss[23], bits_es[26]
                 self.putpb(['EP', ep])
                 self.putb([5, ['Endpoint: %d' % ep, 'EP: %d' % ep, 'EP', 'E']])
                 self.packet.append(ep)
                 self.packet_summary += ' EP %d' % ep
 
             # Bits[27:31]: CRC5
-            crc5 = bitstr_to_num(packet[27:31 + 1])
-            crc5_calc = calc_crc5(packet[16:27])
-            self.ss, self.es = self.bits[27][1], self.bits[31][2]
+            crc5 = (packet >> 27) & 0x1f
+            crc5_calc = CRC5_USB.compute_bits(packet >> 16, 11)
+            self.ss, self.es = bits_ss[27], bits_es[31]
             if crc5 == crc5_calc:
                 self.putpb(['CRC5', crc5])
                 self.putb([6, ['CRC5: 0x%02X' % crc5, 'CRC5', 'C']])
@@ -328,29 +301,29 @@ def handle_packet(self):
             self.packet.append(crc5)
         elif pidname in ('DATA0', 'DATA1', 'DATA2', 'MDATA'):
             # Bits[16:packetlen-16]: Data
-            data = packet[16:-16]
-            # TODO: len(data) must be a multiple of 8.
-            databytes = []
+            ndata = max(nbits - 32, 0)
+            data = (packet >> 16) & ((1 << ndata) - 1)
+            # TODO: ndata must be a multiple of 8.
+            databytes = list(data.to_bytes((ndata + 7) // 8, 'little'))
             self.packet_summary += ' ['
-            for i in range(0, len(data), 8):
-                db = bitstr_to_num(data[i:i + 8])
-                self.ss, self.es = self.bits[16 + i][1], self.bits[23 + i][2]
+            for i, db in enumerate(databytes):
+                self.ss = bits_ss[16 + 8 * i]
+                self.es = bits_es[23 + 8 * i]
                 self.putpb(['DATABYTE', db])
                 self.putb([8, ['Databyte: %02X' % db, 'Data: %02X' % db,
                                'DB: %02X' % db, '%02X' % db]])
-                databytes.append(db)
                 self.packet_summary += ' %02X' % db
             self.packet_summary += ' ]'
 
             # Convenience Python output (no annotation) for all bytes together.
-            self.ss, self.es = self.bits[16][1], self.bits[-16][2]
+            self.ss, self.es = bits_ss[16], bits_es[-16]
             self.putpb(['DATABYTES', databytes])
             self.packet.append(databytes)
 
             # Bits[packetlen-16:packetlen]: CRC16
-            crc16 = bitstr_to_num(packet[-16:])
-            crc16_calc = calc_crc16(packet[16:-16])
-            self.ss, self.es = self.bits[-16][1], self.bits[-1][2]
+            crc16 = (packet >> (nbits - 16)) & 0xffff
+            crc16_calc = CRC16_USB.compute_bits(data, ndata)
+            self.ss, self.es = bits_ss[-16], bits_es[-1]
             if crc16 == crc16_calc:
                 self.putpb(['CRC16', crc16])
                 self.putb([9, ['CRC16: 0x%04X' % crc16, 'CRC16', 'C']])
@@ -375,6 +348,16 @@ def handle_packet(self):
     def decode(self, ss, es, data):
         (ptype, pdata) = data
 
+        # usb_signalling passes all bits of a packet at once in 'BITS'.
+        # Take single bits from versions which only send 'BIT'.
+        if ptype == 'BIT' and self.have_bits:
+            return
+        if ptype == 'BITS':
+            self.have_bits = True
+            if self.state == 'GET BIT':
+                self.bits, _, self.bits_ss, self.bits_es = pdata
+            return
+
         # We only care about certain packet types for now.
         if ptype not in ('SOP', 'BIT', 'EOP', 'ERR'):
             return
@@ -387,11 +370,15 @@ def decode(self, ss, es, data):
             self.state = 'GET BIT'
         elif self.state == 'GET BIT':
             if ptype == 'BIT':
-                self.bits.append([pdata, ss, es])
+                if pdata == '1':
+                    self.bits |= 1 << len(self.bits_ss)
+                self.bits_ss.append(ss)
+                self.bits_es.append(es)
             elif ptype == 'EOP' or ptype == 'ERR':
                 self.es_packet = es
                 self.handle_packet()
                 self.packet, self.packet_summary = [], ''
-                self.bits, self.state = [], 'WAIT FOR SOP'
+                self.bits, self.bits_ss, self.bits_es = 0, [], []
+                self.state = 'WAIT FOR SOP'
             else:
                 pass # TODO: Error
@@ -32,6 +32,7 @@
  - 'SYM', <sym>
  - 'BIT', <bit>
  - 'STUFF BIT', None
+ - 'BITS', [<bits>, <bitcount>, <bits_ss>, <bits_es>]
  - 'EOP', None
  - 'ERR', None
  - 'KEEP ALIVE', None
@@ -43,6 +44,14 @@
 <bit>:
  - '0' or '1'
  - Note: Symbols like SE0, SE1, and the J that's part of EOP don't yield 'BIT'.
+
+<bits>, <bitcount>, <bits_ss>, <bits_es>:
+ - All bits of the packet (without stuff bits) in one integer, the first bit
+   on the wire in the LSB, and their number.
+ - Lists of the start and end sample numbers of the bits.
+ - Note: 'BITS' comes right before the 'EOP' or 'ERR' which ends a packet,
+   its bits also come one by one as 'BIT'. Decoders which want the whole
+   packet can ignore 'BIT'.
 '''
 
 # Low-/full-speed symbols.
@@ -153,7 +162,9 @@ def reset(self):
         self.samplenum_lastedge = 0
         self.edgepins = None
         self.consecutive_ones = 0
-        self.bits = None
+        self.bits = self.bitcount = None
+        self.pkt_bits, self.pkt_ss, self.pkt_es = 0, [], []
+        self.ss_packet = None
         self.state = St.IDLE
 
     def start(self):
@@ -195,6 +206,13 @@ def putb(self, data):
         s, e = self.samplenum_lastedge, self.samplenum_edge
         self.put(s, e, self.out_ann, data)
 
+    def putpbits(self):
+        # Pass on the packet's bits, before its end gets reported.
+        bits = [self.pkt_bits, len(self.pkt_ss), self.pkt_ss, self.pkt_es]
+        self.put(self.ss_packet, self.samplenum_edge, self.out_python,
+                 ['BITS', bits])
+        self.pkt_bits, self.pkt_ss, self.pkt_es = 0, [], []
+
     def set_new_target_samplenum(self):
         self.samplepos += self.bitwidth
         self.samplenum_target = int(self.samplepos)
@@ -206,30 +224,37 @@ def wait_for_sop(self, sym):
         if sym != 'K' or self.oldsym != 'J':
             return
         self.consecutive_ones = 0
-        self.bits = ''
+        self.bits = self.bitcount = 0
+        self.pkt_bits, self.pkt_ss, self.pkt_es = 0, [], []
         self.update_bitrate()
         self.samplepos = self.samplenum - (self.bitwidth / 2) + 0.5
         self.set_new_target_samplenum()
+        self.ss_packet = self.samplenum_edge
         self.putpx(['SOP', None])
         self.putx([4, ['SOP', 'S']])
         self.state = St.GET_BIT
 
     def handle_bit(self, b):
         if self.consecutive_ones == 6:
-            if b == '0':
+            if b == 0:
                 # Stuff bit.
                 self.putpb(['STUFF BIT', None])
                 self.putb([7, ['Stuff bit: 0', 'SB: 0', '0']])
                 self.consecutive_ones = 0
             else:
+                self.putpbits()
                 self.putpb(['ERR', None])
                 self.putb([8, ['Bit stuff error', 'BS ERR', 'B']])
                 self.state = St.IDLE
         else:
             # Normal bit (not a stuff bit).
-            self.putpb(['BIT', b])
-            self.putb([6, ['%s' % b]])
-            if b == '1':
+            if b == 1:
+                self.pkt_bits |= 1 << len(self.pkt_ss)
+            self.pkt_ss.append(self.samplenum_lastedge)
+            self.pkt_es.append(self.samplenum_edge)
+            self.putpb(['BIT', '%d' % b])
+            self.putb([6, ['%d' % b]])
+            if b == 1:
                 self.consecutive_ones += 1
             else:
                 self.consecutive_ones = 0
@@ -244,17 +269,19 @@ def get_eop(self, sym):
             pass
         elif sym == 'J':
             # Got an EOP.
+            self.putpbits()
             self.putpm(['EOP', None])
             self.putm([5, ['EOP', 'E']])
             self.state = St.WAIT_IDLE
         else:
+            self.putpbits()
             self.putpm(['ERR', None])
             self.putm([8, ['EOP Error', 'EErr', 'E']])
             self.state = St.IDLE
 
     def get_bit(self, sym):
         self.set_new_target_samplenum()
-        b = '0' if self.oldsym != sym else '1'
+        b = 0 if self.oldsym != sym else 1
         self.oldsym = sym
         if sym == 'SE0':
             # Start of an EOP. Change state, save edge
@@ -264,16 +291,19 @@ def get_bit(self, sym):
             self.handle_bit(b)
         self.putpb(['SYM', sym])
         self.putb(sym_annotation[sym])
-        if len(self.bits) <= 16:
-            self.bits += b
-        if len(self.bits) == 16 and self.bits == '0000000100111100':
+        # First bits of the packet, LSB = first bit on the wire.
+        if self.bitcount <= 16:
+            self.bits |= b << self.bitcount
+            self.bitcount += 1
+        if self.bitcount == 16 and self.bits == 0x3c80:
             # Sync and low-speed PREamble seen
+            self.putpbits()
             self.putpx(['EOP', None])
             self.state = St.IDLE
             self.signalling = 'low-speed-rp'
             self.update_bitrate()
             self.oldsym = 'J'
-        if b == '0':
+        if b == 0:
             edgesym = symbols[self.signalling][tuple(self.edgepins)]
             if edgesym not in ('SE0', 'SE1'):
                 if edgesym == sym:
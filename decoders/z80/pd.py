@@ -18,7 +18,6 @@
 ##
 
 import sigrokdecode as srd
-from functools import reduce
 from .tables import instr_table_by_prefix
 import string
 
@@ -54,11 +53,24 @@ def format_field(self, value, format_spec):
     Cycle.INTACK: Ann.IORD,
 }
 
-def reduce_bus(bus):
-    if 0xFF in bus:
-        return None # unassigned bus channels
-    else:
-        return reduce(lambda a, b: (a << 1) | b, reversed(bus))
+def bus_cycle(m1, rd, wr, mreq, iorq):
+    if mreq == 0:
+        if rd == 0:
+            return Cycle.FETCH if m1 == 0 else Cycle.MEMRD
+        elif wr == 0:
+            return Cycle.MEMWR
+    elif iorq == 0:
+        if m1 == 0:
+            return Cycle.INTACK
+        elif rd == 0:
+            return Cycle.IORD
+        elif wr == 0:
+            return Cycle.IOWR
+    return Cycle.NONE
+
+# Bus cycle by the control lines /M1, /RD, /WR, /MREQ, /IORQ (bits 0-4).
+cycle_table = tuple(bus_cycle(*((ctrl >> i) & 1 for i in range(5)))
+                    for ctrl in range(32))
 
 def signed_byte(byte):
     return byte if byte < 128 else byte - 256
@@ -134,34 +146,34 @@ def start(self):
         self.instr_len  = 0
 
     def decode(self):
+        # Only the control lines determine the bus cycle. While a cycle is
+        # active, also wake up on data bus changes to keep its last value.
+        ctrl_pins = [p for p in range(Pin.M1, Pin.IORQ + 1) if self.has_channel(p)]
+        cond_idle = [{p: 'e'} for p in ctrl_pins]
+        cond_busy = cond_idle + [{p: 'e'} for p in range(Pin.D0, Pin.D7 + 1)]
+        # A missing /MREQ reads as 0 (asserted), a missing /IORQ must
+        # read as 1 (not asserted).
+        ctrl_unused = 0 if self.has_channel(Pin.IORQ) else 1 << (Pin.IORQ - Pin.M1)
+        have_addr = all(self.has_channel(p) for p in range(Pin.A0, Pin.A15 + 1))
+
+        pins = self.wait(packed=True)
         while True:
-            # TODO: Come up with more appropriate self.wait() conditions.
-            pins = self.wait()
-            cycle = Cycle.NONE
-            if pins[Pin.MREQ] != 1: # default to asserted
-                if pins[Pin.RD] == 0:
-                    cycle = Cycle.FETCH if pins[Pin.M1] == 0 else Cycle.MEMRD
-                elif pins[Pin.WR] == 0:
-                    cycle = Cycle.MEMWR
-            elif pins[Pin.IORQ] == 0: # default to not asserted
-                if pins[Pin.M1] == 0:
-                    cycle = Cycle.INTACK
-                elif pins[Pin.RD] == 0:
-                    cycle = Cycle.IORD
-                elif pins[Pin.WR] == 0:
-                    cycle = Cycle.IOWR
+            cycle = cycle_table[((pins >> Pin.M1) & 0x1F) | ctrl_unused]
 
             if cycle != Cycle.NONE:
-                self.bus_data = reduce_bus(pins[Pin.D0:Pin.D7+1])
+                self.bus_data = (pins >> Pin.D0) & 0xFF
             if cycle != self.prev_cycle:
                 if self.prev_cycle == Cycle.NONE:
-                    self.on_cycle_begin(reduce_bus(pins[Pin.A0:Pin.A15+1]))
+                    self.on_cycle_begin((pins >> Pin.A0) & 0xFFFF if have_addr else None)
                 elif cycle == Cycle.NONE:
                     self.on_cycle_end()
                 else:
                     self.on_cycle_trans()
             self.prev_cycle = cycle
 
+            pins = self.wait(cond_idle if cycle == Cycle.NONE else cond_busy,
+                             packed=True)
+
     def on_cycle_begin(self, bus_addr):
         if self.pend_addr is not None:
             self.put_text(self.addr_start, Ann.ADDR,
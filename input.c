@@ -0,0 +1,582 @@
+/*
+ * This file is part of the libsigrokdecode project.
+ *
+ * Copyright (C) 2010 Uwe Hermann <uwe@hermann-uwe.de>
+ * Copyright (C) 2013 Bert Vermeulen <bert@biot.com>
+ *
+ * This program is free software: you can redistribute it and/or modify
+ * it under the terms of the GNU General Public License as published by
+ * the Free Software Foundation, either version 3 of the License, or
+ * (at your option) any later version.
+ *
+ * This program is distributed in the hope that it will be useful,
+ * but WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+ * GNU General Public License for more details.
+ *
+ * You should have received a copy of the GNU General Public License
+ * along with this program.  If not, see <http://www.gnu.org/licenses/>.
+ */
+
+#include <config.h>
+#include "libsigrokdecode-internal.h" /* First, so we avoid a _POSIX_C_SOURCE warning. */
+#include "libsigrokdecode.h"
+#include <inttypes.h>
+#include <glib.h>
+#include <glib/gstdio.h>
+#include <string.h>
+#include <errno.h>
+#include <fcntl.h>
+#ifdef G_OS_UNIX
+#include <sys/mman.h>
+#include <sys/stat.h>
+#include <unistd.h>
+#endif
+
+/**
+ * @file
+ *
+ * Passing sample data to a session.
+ */
+
+/**
+ * @addtogroup grp_session
+ *
+ * @{
+ */
+
+/** @cond PRIVATE */
+
+struct send_chunk {
+	uint64_t abs_start_samplenum;
+	uint64_t abs_end_samplenum;
+	GBytes *data;
+	uint64_t unitsize;
+};
+
+/* Default size of the windows of srd_session_send_fd() (bytes). */
+#define SEND_WINDOW_SIZE (16 * 1024 * 1024)
+
+/** @endcond */
+
+/**
+ * Wait until the chunks which are queued for the send thread are done.
+ *
+ * @private
+ */
+SRD_PRIV int send_queue_wait(struct srd_session *sess)
+{
+	int ret;
+
+	if (!sess->send_thread)
+		return SRD_OK;
+
+	g_mutex_lock(&sess->send_mutex);
+	while (!g_queue_is_empty(sess->send_queue) || sess->send_busy)
+		g_cond_wait(&sess->send_cond, &sess->send_mutex);
+	ret = sess->send_error;
+	sess->send_error = SRD_OK;
+	g_mutex_unlock(&sess->send_mutex);
+
+	return ret;
+}
+
+/* Decode the chunks which were coalesced so far. */
+static int coalesced_send(struct srd_session *sess)
+{
+	int ret;
+
+	if (!sess->coalesce_chunks)
+		return SRD_OK;
+
+	ret = session_send_chunk(sess, sess->coalesce_start,
+		sess->coalesce_end, sess->coalesce_buf->data,
+		sess->coalesce_buf->len, sess->coalesce_unitsize);
+	g_byte_array_set_size(sess->coalesce_buf, 0);
+	sess->coalesce_chunks = 0;
+
+	return ret;
+}
+
+/** @private */
+SRD_PRIV void coalesced_drop(struct srd_session *sess)
+{
+	if (sess->coalesce_buf)
+		g_byte_array_set_size(sess->coalesce_buf, 0);
+	sess->coalesce_chunks = 0;
+}
+
+/**
+ * Pass a chunk of the frontend on to the decoder stacks, or keep it
+ * until enough samples for a window have been coalesced.
+ *
+ * @private
+ */
+SRD_PRIV int session_send_input(struct srd_session *sess,
+		uint64_t abs_start_samplenum, uint64_t abs_end_samplenum,
+		const uint8_t *inbuf, uint64_t inbuflen, uint64_t unitsize)
+{
+	int ret;
+
+	sess->stats.input_chunks++;
+
+	/* Chunks which don't continue the coalesced samples end them. */
+	if (sess->coalesce_chunks &&
+	    (!sess->coalesce_size || !inbuf || !unitsize ||
+	     abs_start_samplenum != sess->coalesce_end ||
+	     unitsize != sess->coalesce_unitsize)) {
+		if ((ret = coalesced_send(sess)) != SRD_OK)
+			return ret;
+	}
+
+	if (!sess->coalesce_chunks && (!sess->coalesce_size || !inbuf ||
+	    !unitsize || inbuflen >= sess->coalesce_size))
+		return session_send_chunk(sess, abs_start_samplenum,
+			abs_end_samplenum, inbuf, inbuflen, unitsize);
+
+	if (!sess->coalesce_chunks) {
+		sess->coalesce_start = abs_start_samplenum;
+		sess->coalesce_unitsize = unitsize;
+	}
+	g_byte_array_append(sess->coalesce_buf, inbuf, inbuflen);
+	sess->coalesce_end = abs_end_samplenum;
+	sess->coalesce_chunks++;
+
+	if (sess->coalesce_buf->len >= sess->coalesce_size ||
+	    (sess->coalesce_max_chunks &&
+	     sess->coalesce_chunks >= sess->coalesce_max_chunks))
+		return coalesced_send(sess);
+
+	return SRD_OK;
+}
+
+static void send_chunk_free(struct send_chunk *chunk)
+{
+	g_bytes_unref(chunk->data);
+	g_free(chunk);
+}
+
+static gpointer send_thread(gpointer data)
+{
+	struct srd_session *sess;
+	struct send_chunk *chunk;
+	const uint8_t *inbuf;
+	gsize inbuflen;
+	int ret;
+
+	sess = data;
+
+	g_mutex_lock(&sess->send_mutex);
+	while (1) {
+		while (g_queue_is_empty(sess->send_queue) && !sess->send_quit)
+			g_cond_wait(&sess->send_cond, &sess->send_mutex);
+		if (!(chunk = g_queue_pop_head(sess->send_queue)))
+			break;
+		sess->send_busy = TRUE;
+		ret = sess->send_error;
+		/* There is room for another chunk now. */
+		g_cond_broadcast(&sess->send_cond);
+		g_mutex_unlock(&sess->send_mutex);
+
+		/* After an error, drop chunks until the caller has seen it. */
+		if (ret == SRD_OK) {
+			inbuf = g_bytes_get_data(chunk->data, &inbuflen);
+			ret = session_send_input(sess, chunk->abs_start_samplenum,
+				chunk->abs_end_samplenum, inbuf, inbuflen,
+				chunk->unitsize);
+		}
+		send_chunk_free(chunk);
+
+		g_mutex_lock(&sess->send_mutex);
+		sess->send_busy = FALSE;
+		if (sess->send_error == SRD_OK)
+			sess->send_error = ret;
+		g_cond_broadcast(&sess->send_cond);
+	}
+	g_mutex_unlock(&sess->send_mutex);
+
+	return NULL;
+}
+
+/**
+ * Stop the thread which processes queued chunks. Chunks which have not
+ * been started yet get dropped, the currently processed chunk completes.
+ *
+ * @private
+ */
+SRD_PRIV void send_thread_stop(struct srd_session *sess)
+{
+	struct send_chunk *chunk;
+
+	if (!sess->send_thread)
+		return;
+
+	g_mutex_lock(&sess->send_mutex);
+	while ((chunk = g_queue_pop_head(sess->send_queue)))
+		send_chunk_free(chunk);
+	sess->send_quit = TRUE;
+	g_cond_broadcast(&sess->send_cond);
+	g_mutex_unlock(&sess->send_mutex);
+
+	g_thread_join(sess->send_thread);
+	sess->send_thread = NULL;
+	sess->send_quit = FALSE;
+	sess->send_error = SRD_OK;
+}
+
+/**
+ * Queue a chunk of logic sample data for a running decoder session.
+ *
+ * This is the non-blocking variant of srd_session_send(). The chunk is
+ * decoded in a separate thread, such that the caller can acquire the
+ * next chunk meanwhile. The session keeps a reference to 'data' until
+ * the decoders are done with it, the caller must not modify the data.
+ *
+ * The call only blocks when the configured number of chunks is queued
+ * already, see srd_session_send_queue_set(). Use srd_session_flush() to
+ * wait until all queued chunks were decoded.
+ *
+ * Errors of queued chunks are reported once, by the next call to this
+ * routine, to srd_session_send() or to srd_session_flush(). Chunks which
+ * were queued after the failed chunk are dropped, queueing continues
+ * after the error has been reported.
+ *
+ * The same rules regarding sample numbers apply as for
+ * srd_session_send(). Queued chunks get decoded in the order of calls,
+ * calls to srd_session_send() flush the queue first.
+ *
+ * @param sess The session to use. Must not be NULL.
+ * @param abs_start_samplenum The absolute starting sample number for the
+ *              buffer's sample set, relative to the start of capture.
+ * @param abs_end_samplenum The absolute ending sample number for the
+ *              buffer's sample set, relative to the start of capture.
+ * @param data The sample data. Must not be NULL or empty.
+ * @param unitsize The number of bytes per sample. Must be > 0.
+ *
+ * @return SRD_OK upon success, a (negative) error code otherwise.
+ *
+ * @since 0.6.0
+ */
+SRD_API int srd_session_send_bytes(struct srd_session *sess,
+		uint64_t abs_start_samplenum, uint64_t abs_end_samplenum,
+		GBytes *data, uint64_t unitsize)
+{
+	struct send_chunk *chunk;
+	int ret;
+
+	if (!sess || !data || !g_bytes_get_size(data) || !unitsize)
+		return SRD_ERR_ARG;
+
+	g_mutex_lock(&sess->send_mutex);
+
+	if (!sess->send_thread)
+		sess->send_thread = g_thread_new("srd-send", send_thread, sess);
+
+	while (g_queue_get_length(sess->send_queue) >= sess->send_queue_max &&
+	    sess->send_error == SRD_OK)
+		g_cond_wait(&sess->send_cond, &sess->send_mutex);
+
+	if ((ret = sess->send_error) == SRD_OK) {
+		chunk = g_malloc(sizeof(*chunk));
+		chunk->abs_start_samplenum = abs_start_samplenum;
+		chunk->abs_end_samplenum = abs_end_samplenum;
+		chunk->data = g_bytes_ref(data);
+		chunk->unitsize = unitsize;
+		g_queue_push_tail(sess->send_queue, chunk);
+		g_cond_broadcast(&sess->send_cond);
+	} else {
+		/* Report the error once, drop the chunks which followed it. */
+		while (sess->send_busy)
+			g_cond_wait(&sess->send_cond, &sess->send_mutex);
+		while ((chunk = g_queue_pop_head(sess->send_queue)))
+			send_chunk_free(chunk);
+		sess->send_error = SRD_OK;
+	}
+
+	g_mutex_unlock(&sess->send_mutex);
+
+	return ret;
+}
+
+/**
+ * Decode logic samples from a file.
+ *
+ * The file holds samples of 'unitsize' bytes each, without a header,
+ * starting with sample 0. The session decodes the samples from
+ * 'abs_start_samplenum' to the end of the file, and maps one window of
+ * up to 'window_samples' samples of the file at a time. Each window is
+ * passed to the decoders like a chunk of srd_session_send(), directly
+ * from the mapping. Memory use thus stays bounded, also for captures
+ * which are larger than the system's memory.
+ *
+ * Decoding starts at sample 0 for a new capture, or at the sample which
+ * srd_session_seek() returned. The file can also be mapped as a whole
+ * and passed to srd_session_send_split().
+ *
+ * @param sess The session to use. Must not be NULL.
+ * @param fd A file descriptor of a regular file, opened for reading. The
+ *           file must support mmap(), the descriptor remains open.
+ * @param abs_start_samplenum The number of the first sample to decode.
+ *                            Must be before the end of the file.
+ * @param unitsize The number of bytes per sample. Must be > 0.
+ * @param window_samples The number of samples per window, or 0 for
+ *                       windows of about 16 MiB.
+ * @param advice How the system should page in the file, one of
+ *               enum srd_input_advice.
+ *
+ * @return SRD_OK upon success, a (negative) error code otherwise.
+ *
+ * @since 0.6.0
+ */
+SRD_API int srd_session_send_fd(struct srd_session *sess, int fd,
+		uint64_t abs_start_samplenum, uint64_t unitsize,
+		uint64_t window_samples, int advice)
+{
+#ifdef G_OS_UNIX
+	struct stat st;
+	uint64_t num_samples, start, end, offset, page_offset;
+	size_t map_len;
+	uint8_t *map;
+	int ret;
+
+	if (!sess || fd < 0 || !unitsize || advice < SRD_INPUT_NORMAL ||
+	    advice > SRD_INPUT_WILLNEED)
+		return SRD_ERR_ARG;
+
+	if (fstat(fd, &st) < 0) {
+		srd_err("Failed to get the size of the sample file: %s.",
+			g_strerror(errno));
+		return SRD_ERR;
+	}
+	if (!S_ISREG(st.st_mode)) {
+		srd_err("Sample data must come from a regular file.");
+		return SRD_ERR_ARG;
+	}
+	num_samples = st.st_size / unitsize;
+	if (abs_start_samplenum >= num_samples) {
+		srd_err("Sample %" PRIu64 " is beyond the end of the file "
+			"(%" PRIu64 " samples).", abs_start_samplenum,
+			num_samples);
+		return SRD_ERR_ARG;
+	}
+
+	if ((ret = srd_session_flush(sess)) != SRD_OK)
+		return ret;
+
+	if (!window_samples)
+		window_samples = MAX(SEND_WINDOW_SIZE / unitsize, 1);
+
+	srd_dbg("Decoding samples %" PRIu64 " to %" PRIu64 " of a file in "
+		"windows of %" PRIu64 " samples in session %d.",
+		abs_start_samplenum, num_samples, window_samples,
+		sess->session_id);
+
+#ifdef POSIX_FADV_SEQUENTIAL
+	/* Have the read-ahead run across the windows. */
+	if (advice == SRD_INPUT_SEQUENTIAL)
+		posix_fadvise(fd, 0, 0, POSIX_FADV_SEQUENTIAL);
+#endif
+
+	ret = SRD_OK;
+	for (start = abs_start_samplenum; start < num_samples; start = end) {
+		end = start + MIN(window_samples, num_samples - start);
+		offset = start * unitsize;
+		page_offset = offset % sysconf(_SC_PAGESIZE);
+		map_len = page_offset + (end - start) * unitsize;
+		map = mmap(NULL, map_len, PROT_READ, MAP_SHARED, fd,
+			offset - page_offset);
+		if (map == MAP_FAILED) {
+			srd_err("Failed to map the sample file: %s.",
+				g_strerror(errno));
+			return SRD_ERR;
+		}
+		if (advice == SRD_INPUT_SEQUENTIAL)
+			madvise(map, map_len, MADV_SEQUENTIAL);
+		else if (advice == SRD_INPUT_WILLNEED)
+			madvise(map, map_len, MADV_WILLNEED);
+
+		ret = session_send_chunk(sess, start, end, map + page_offset,
+			(end - start) * unitsize, unitsize);
+
+		/* Decoded windows don't stay resident. */
+		munmap(map, map_len);
+		if (ret != SRD_OK)
+			break;
+	}
+
+	return ret;
+#else
+	(void)fd;
+	(void)abs_start_samplenum;
+	(void)unitsize;
+	(void)window_samples;
+	(void)advice;
+
+	if (!sess)
+		return SRD_ERR_ARG;
+
+	srd_err("Mapping sample files is not supported on this system.");
+
+	return SRD_ERR;
+#endif
+}
+
+/**
+ * Decode logic samples from a file, given by its name.
+ *
+ * See srd_session_send_fd() for the file format and the parameters.
+ *
+ * @param sess The session to use. Must not be NULL.
+ * @param path The name of the file. Must not be NULL.
+ * @param abs_start_samplenum The number of the first sample to decode.
+ * @param unitsize The number of bytes per sample. Must be > 0.
+ * @param window_samples The number of samples per window, or 0 for
+ *                       windows of about 16 MiB.
+ * @param advice How the system should page in the file, one of
+ *               enum srd_input_advice.
+ *
+ * @return SRD_OK upon success, a (negative) error code otherwise.
+ *
+ * @since 0.6.0
+ */
+SRD_API int srd_session_send_file(struct srd_session *sess, const char *path,
+		uint64_t abs_start_samplenum, uint64_t unitsize,
+		uint64_t window_samples, int advice)
+{
+#ifdef G_OS_UNIX
+	int fd, ret;
+
+	if (!sess || !path)
+		return SRD_ERR_ARG;
+
+	if ((fd = g_open(path, O_RDONLY, 0)) < 0) {
+		srd_err("Failed to open sample file %s: %s.", path,
+			g_strerror(errno));
+		return SRD_ERR_ARG;
+	}
+	ret = srd_session_send_fd(sess, fd, abs_start_samplenum, unitsize,
+		window_samples, advice);
+	close(fd);
+
+	return ret;
+#else
+	(void)abs_start_samplenum;
+	(void)unitsize;
+	(void)window_samples;
+	(void)advice;
+
+	if (!sess || !path)
+		return SRD_ERR_ARG;
+
+	srd_err("Mapping sample files is not supported on this system.");
+
+	return SRD_ERR;
+#endif
+}
+
+/**
+ * Set the number of chunks which srd_session_send_bytes() can queue.
+ *
+ * @param sess The session to configure. Must not be NULL.
+ * @param max_chunks The maximum number of queued chunks, must be > 0.
+ *
+ * @return SRD_OK upon success, a (negative) error code otherwise.
+ *
+ * @since 0.6.0
+ */
+SRD_API int srd_session_send_queue_set(struct srd_session *sess,
+		unsigned int max_chunks)
+{
+	if (!sess || !max_chunks)
+		return SRD_ERR_ARG;
+
+	g_mutex_lock(&sess->send_mutex);
+	sess->send_queue_max = max_chunks;
+	g_cond_broadcast(&sess->send_cond);
+	g_mutex_unlock(&sess->send_mutex);
+
+	return SRD_OK;
+}
+
+/**
+ * Have a session coalesce small chunks of sample data into windows.
+ *
+ * Each chunk which the decoder stacks process has some overhead, which
+ * dominates with chunks of a few KiB. With coalescing enabled, chunks
+ * of srd_session_send() and srd_session_send_bytes() which continue
+ * the previous chunk are copied into a window, and the stacks process
+ * the window when it holds at least 'window_size' bytes, or
+ * 'max_chunks' chunks. Chunks which are larger than a window are passed
+ * on directly. The output of coalesced chunks thus reaches the frontend
+ * later, the number of chunks bounds the delay. srd_session_flush()
+ * has the stacks process an incomplete window.
+ *
+ * Errors of a window are reported by the call which completed the
+ * window. srd_session_stats_get() reports the number of chunks which
+ * the frontend sent, and the number and size of the windows.
+ *
+ * @param sess The session to configure. Must not be NULL.
+ * @param window_size The minimum number of bytes of a window, or 0 to
+ *                    process chunks as they are sent. Must not exceed
+ *                    4 GiB.
+ * @param max_chunks The maximum number of chunks in a window, or 0 for
+ *                   no limit.
+ *
+ * @return SRD_OK upon success, a (negative) error code otherwise.
+ *
+ * @since 0.6.0
+ */
+SRD_API int srd_session_send_coalesce_set(struct srd_session *sess,
+		uint64_t window_size, unsigned int max_chunks)
+{
+	int ret;
+
+	if (!sess || window_size > G_MAXUINT32)
+		return SRD_ERR_ARG;
+
+	srd_dbg("Coalescing chunks into %" PRIu64 " byte windows of at most "
+		"%u chunks in session %d.", window_size, max_chunks,
+		sess->session_id);
+
+	/* The window so far gets processed with the old settings. */
+	if ((ret = srd_session_flush(sess)) != SRD_OK)
+		return ret;
+
+	sess->coalesce_size = window_size;
+	sess->coalesce_max_chunks = max_chunks;
+	if (window_size && !sess->coalesce_buf)
+		sess->coalesce_buf = g_byte_array_new();
+
+	return SRD_OK;
+}
+
+/**
+ * Wait until all chunks queued by srd_session_send_bytes() were decoded.
+ *
+ * Chunks which are kept for coalescing (see srd_session_send_coalesce_set())
+ * get decoded as well.
+ *
+ * @param sess The session to use. Must not be NULL.
+ *
+ * @return SRD_OK upon success, a (negative) error code otherwise. The
+ *         error of a queued chunk is reported once.
+ *
+ * @since 0.6.0
+ */
+SRD_API int srd_session_flush(struct srd_session *sess)
+{
+	int ret;
+
+	if (!sess)
+		return SRD_ERR_ARG;
+
+	/* Chunks after an error get dropped, also coalesced ones. */
+	if ((ret = send_queue_wait(sess)) != SRD_OK) {
+		coalesced_drop(sess);
+		return ret;
+	}
+
+	return coalesced_send(sess);
+}
+
+/** @} */
@@ -25,11 +25,15 @@
 #include <inttypes.h>
 #include <stdlib.h>
 #include <stdint.h>
+#include <string.h>
 
 /** @cond PRIVATE */
 
 extern SRD_PRIV GSList *sessions;
 
+static void condition_cache_free(struct srd_decoder_inst *di);
+static void bin_blocks_flush(struct srd_decoder_inst *di);
+
 /** @endcond */
 
 /**
@@ -316,6 +320,9 @@ SRD_API int srd_inst_channel_set_all(struct srd_decoder_inst *di,
 	g_free(di->dec_channelmap);
 	di->dec_channelmap = new_channelmap;
 
+	/* Cached conditions were set up for the previous channel map. */
+	condition_cache_free(di);
+
 	return SRD_OK;
 }
 
@@ -352,6 +359,10 @@ SRD_API struct srd_decoder_inst *srd_inst_new(struct srd_session *sess,
 		return NULL;
 	}
 
+	/* Decoders loaded from the index are imported on first use. */
+	if (srd_decoder_import(dec) != SRD_OK)
+		return NULL;
+
 	di = g_malloc0(sizeof(struct srd_decoder_inst));
 
 	di->decoder = dec;
@@ -415,7 +426,18 @@ SRD_API struct srd_decoder_inst *srd_inst_new(struct srd_session *sess,
 		return NULL;
 	}
 
+	/* Let the Decoder methods find the instance. */
+	((srd_Decoder *)di->py_inst)->di = di;
+
 	di->condition_list = NULL;
+	di->cond_matcher = NULL;
+	di->cond_cache = NULL;
+	di->ann_batch = NULL;
+	di->bin_blocks = NULL;
+	di->py_decode = NULL;
+	di->py_batch = NULL;
+	memset(&di->stats, 0, sizeof(di->stats));
+	di->stats_py_since = 0;
 	di->match_array = NULL;
 	di->abs_start_samplenum = 0;
 	di->abs_end_samplenum = 0;
@@ -627,6 +649,31 @@ SRD_API struct srd_decoder_inst *srd_inst_find_by_id(struct srd_session *sess,
 	return di;
 }
 
+/**
+ * Get the performance counters of a decoder instance.
+ *
+ * The counters accumulate over the lifetime of the instance. They get
+ * updated while the instance decodes, read them between calls to
+ * srd_session_send() for consistent values.
+ *
+ * @param di The decoder instance to use. Must not be NULL.
+ * @param stats Receives the counters. Must not be NULL.
+ *
+ * @return SRD_OK upon success, a (negative) error code otherwise.
+ *
+ * @since 0.6.0
+ */
+SRD_API int srd_inst_stats_get(const struct srd_decoder_inst *di,
+		struct srd_inst_stats *stats)
+{
+	if (!di || !stats)
+		return SRD_ERR_ARG;
+
+	*stats = di->stats;
+
+	return SRD_OK;
+}
+
 /**
  * Set the list of initial (assumed) pin values.
  *
@@ -679,7 +726,8 @@ SRD_API int srd_inst_initial_pins_set_all(struct srd_decoder_inst *di, GArray *i
 /** @private */
 SRD_PRIV int srd_inst_start(struct srd_decoder_inst *di)
 {
-	PyObject *py_res, *py_samplenum;
+	PyObject *py_res, *py_old;
+	srd_Decoder *dec;
 	GSList *l;
 	struct srd_decoder_inst *next_di;
 	int ret;
@@ -699,12 +747,16 @@ SRD_PRIV int srd_inst_start(struct srd_decoder_inst *di)
 	Py_DECREF(py_res);
 
 	/* Set self.samplenum to 0. */
-	py_samplenum = PyLong_FromLong(0);
-	PyObject_SetAttrString(di->py_inst, "samplenum", py_samplenum);
-	Py_DECREF(py_samplenum);
+	dec = di->py_inst;
+	py_old = dec->samplenum;
+	dec->samplenum = PyLong_FromLong(0);
+	Py_XDECREF(py_old);
 
 	/* Set self.matched to None. */
-	PyObject_SetAttrString(di->py_inst, "matched", Py_None);
+	py_old = dec->matched;
+	Py_INCREF(Py_None);
+	dec->matched = Py_None;
+	Py_XDECREF(py_old);
 
 	PyGILState_Release(gstate);
 
@@ -787,24 +839,249 @@ SRD_PRIV void match_array_free(struct srd_decoder_inst *di)
 	di->match_array = NULL;
 }
 
-/** @private */
-SRD_PRIV void condition_list_free(struct srd_decoder_inst *di)
+/**
+ * Forget the conditions which matched, but keep the array for the next
+ * wait() call.
+ *
+ * @private
+ */
+SRD_PRIV void match_array_clear(struct srd_decoder_inst *di)
 {
-	GSList *l, *ll;
+	if (!di || !di->match_array)
+		return;
 
-	if (!di)
+	g_array_set_size(di->match_array, 0);
+}
+
+static void cond_matcher_free(struct srd_decoder_inst *di)
+{
+	if (!di || !di->cond_matcher)
 		return;
 
-	for (l = di->condition_list; l; l = l->next) {
+	g_free(di->cond_matcher->masks);
+	g_free(di->cond_matcher);
+	di->cond_matcher = NULL;
+}
+
+static void free_condition_list(GSList *condition_list)
+{
+	GSList *l, *ll;
+
+	for (l = condition_list; l; l = l->next) {
 		ll = l->data;
 		if (ll)
 			g_slist_free_full(ll, g_free);
 	}
 
-	g_slist_free(di->condition_list);
+	g_slist_free(condition_list);
+}
+
+/** @private */
+SRD_PRIV void condition_list_free(struct srd_decoder_inst *di)
+{
+	struct srd_cond_cache_entry *entry;
+
+	if (!di)
+		return;
+
+	/* Conditions which are owned by the cache just get detached. */
+	if (di->cond_cache && di->cond_cache->active) {
+		entry = di->cond_cache->active;
+		entry->matcher = di->cond_matcher;
+		di->cond_cache->active = NULL;
+		di->cond_matcher = NULL;
+		di->condition_list = NULL;
+		return;
+	}
+
+	cond_matcher_free(di);
+	free_condition_list(di->condition_list);
 	di->condition_list = NULL;
 }
 
+/* Upper limit for the number of condition lists kept per instance. */
+#define COND_CACHE_MAX_ENTRIES 64
+
+static guint cond_key_hash(gconstpointer key)
+{
+	const GArray *a;
+	guint i, hash;
+
+	a = key;
+	hash = 5381;
+	for (i = 0; i < a->len; i++)
+		hash = hash * 33 + (guint)g_array_index(a, int, i);
+
+	return hash;
+}
+
+static gboolean cond_key_equal(gconstpointer key1, gconstpointer key2)
+{
+	const GArray *a, *b;
+
+	a = key1;
+	b = key2;
+	if (a->len != b->len)
+		return FALSE;
+
+	return memcmp(a->data, b->data, a->len * sizeof(int)) == 0;
+}
+
+static void cond_key_free(gpointer key)
+{
+	g_array_free(key, TRUE);
+}
+
+static void cond_cache_entry_free(gpointer data)
+{
+	struct srd_cond_cache_entry *entry;
+
+	entry = data;
+	if (entry->matcher) {
+		g_free(entry->matcher->masks);
+		g_free(entry->matcher);
+	}
+	free_condition_list(entry->condition_list);
+	g_free(entry);
+}
+
+static void condition_cache_free(struct srd_decoder_inst *di)
+{
+	struct srd_cond_cache *cache;
+
+	if (!di || !di->cond_cache)
+		return;
+
+	condition_list_free(di);
+
+	cache = di->cond_cache;
+	g_hash_table_destroy(cache->entries);
+	g_array_free(cache->key, TRUE);
+	g_array_free(cache->skips, TRUE);
+	g_free(cache);
+	di->cond_cache = NULL;
+}
+
+/**
+ * Prepare the setup of a new condition list for a decoder instance.
+ *
+ * The caller appends the key and the SKIP counts of the new condition
+ * list to the returned cache's arrays (see struct srd_cond_cache), and
+ * then runs condition_cache_apply().
+ *
+ * @param di The decoder instance to use. Must not be NULL.
+ *
+ * @return The instance's condition cache, with empty key/skips arrays.
+ *
+ * @private
+ */
+SRD_PRIV struct srd_cond_cache *condition_cache_begin(struct srd_decoder_inst *di)
+{
+	struct srd_cond_cache *cache;
+
+	condition_list_free(di);
+
+	if (!di->cond_cache) {
+		cache = g_malloc0(sizeof(*cache));
+		cache->entries = g_hash_table_new_full(cond_key_hash,
+			cond_key_equal, cond_key_free, cond_cache_entry_free);
+		cache->key = g_array_new(FALSE, FALSE, sizeof(int));
+		cache->skips = g_array_new(FALSE, FALSE, sizeof(uint64_t));
+		di->cond_cache = cache;
+	}
+
+	cache = di->cond_cache;
+	g_array_set_size(cache->key, 0);
+	g_array_set_size(cache->skips, 0);
+
+	return cache;
+}
+
+/* Create a condition list from a key and SKIP counts. */
+static GSList *condition_list_from_key(const GArray *key, const GArray *skips)
+{
+	GSList *condition_list, *term_list;
+	struct srd_term *term;
+	const int *k;
+	guint pos, num_terms, t, skip_idx;
+
+	condition_list = NULL;
+	k = (const int *)key->data;
+	pos = 0;
+	skip_idx = 0;
+	while (pos < key->len) {
+		num_terms = k[pos++];
+		term_list = NULL;
+		for (t = 0; t < num_terms; t++) {
+			term = g_malloc0(sizeof(*term));
+			term->type = k[pos++];
+			term->channel = k[pos++];
+			if (term->type == SRD_TERM_SKIP)
+				term->num_samples_to_skip = g_array_index(skips,
+					uint64_t, skip_idx++);
+			term_list = g_slist_append(term_list, term);
+		}
+		condition_list = g_slist_append(condition_list, term_list);
+	}
+
+	return condition_list;
+}
+
+/**
+ * Set up the condition list which was described since the previous
+ * condition_cache_begin() call.
+ *
+ * A condition list which the decoder instance has used before is taken
+ * from the cache, including its precomputed bit masks. Only its SKIP
+ * terms get updated.
+ *
+ * @param di The decoder instance to use. Must not be NULL.
+ *
+ * @private
+ */
+SRD_PRIV void condition_cache_apply(struct srd_decoder_inst *di)
+{
+	struct srd_cond_cache *cache;
+	struct srd_cond_cache_entry *entry;
+	struct srd_term *term;
+	GSList *l, *ll;
+	guint skip_idx;
+
+	cache = di->cond_cache;
+	entry = g_hash_table_lookup(cache->entries, cache->key);
+	if (!entry) {
+		if (g_hash_table_size(cache->entries) >= COND_CACHE_MAX_ENTRIES) {
+			/* Don't grow without bounds, use a private copy. */
+			di->condition_list = condition_list_from_key(cache->key,
+				cache->skips);
+			return;
+		}
+		entry = g_malloc0(sizeof(*entry));
+		entry->condition_list = condition_list_from_key(cache->key,
+			cache->skips);
+		g_hash_table_insert(cache->entries,
+			g_array_append_vals(g_array_sized_new(FALSE, FALSE,
+				sizeof(int), cache->key->len),
+				cache->key->data, cache->key->len), entry);
+	} else {
+		skip_idx = 0;
+		for (l = entry->condition_list; l; l = l->next) {
+			for (ll = l->data; ll; ll = ll->next) {
+				term = ll->data;
+				if (term->type != SRD_TERM_SKIP)
+					continue;
+				term->num_samples_to_skip = g_array_index(
+					cache->skips, uint64_t, skip_idx++);
+				term->num_samples_already_skipped = 0;
+			}
+		}
+	}
+
+	cache->active = entry;
+	di->condition_list = entry->condition_list;
+	di->cond_matcher = entry->matcher;
+}
+
 static gboolean have_non_null_conds(const struct srd_decoder_inst *di)
 {
 	GSList *l, *cond;
@@ -877,9 +1154,14 @@ static gboolean term_matches(const struct srd_decoder_inst *di,
 		return sample_matches(0, 0, term);
 
 	ch = term->channel;
-	byte_offset = di->dec_channelmap[ch] / 8;
-	bit_offset = di->dec_channelmap[ch] % 8;
-	sample = *(sample_pos + byte_offset) & (1 << bit_offset) ? 1 : 0;
+	if (di->dec_channelmap[ch] == -1) {
+		/* Unused optional channels read as low, and never change. */
+		sample = 0;
+	} else {
+		byte_offset = di->dec_channelmap[ch] / 8;
+		bit_offset = di->dec_channelmap[ch] % 8;
+		sample = *(sample_pos + byte_offset) & (1 << bit_offset) ? 1 : 0;
+	}
 	old_sample = di->old_pins_array->data[ch];
 
 	return sample_matches(old_sample, sample, term);
@@ -919,11 +1201,493 @@ static gboolean at_least_one_condition_matched(
 	return FALSE;
 }
 
+/**
+ * Get the leading bytes of a sample as a word.
+ *
+ * The bytes are kept in memory order, such that masks which were created
+ * by the same means (see cond_bit()) can be applied regardless of the
+ * host's endianess.
+ */
+__attribute__((always_inline))
+static inline uint64_t sample_word(const uint8_t *sample_pos, unsigned int len)
+{
+	uint64_t word;
+
+	word = 0;
+	switch (len) {
+	case 1:
+		memcpy(&word, sample_pos, 1);
+		break;
+	case 2:
+		memcpy(&word, sample_pos, 2);
+		break;
+	case 4:
+		memcpy(&word, sample_pos, 4);
+		break;
+	case 8:
+		memcpy(&word, sample_pos, 8);
+		break;
+	default:
+		memcpy(&word, sample_pos, len);
+		break;
+	}
+
+	return word;
+}
+
+/* Get the sample word bit for an input channel, see sample_word(). */
+static uint64_t cond_bit(int channel)
+{
+	uint8_t bytes[sizeof(uint64_t)];
+	uint64_t word;
+
+	memset(bytes, 0, sizeof(bytes));
+	bytes[channel / 8] = 1 << (channel % 8);
+	memcpy(&word, bytes, sizeof(word));
+
+	return word;
+}
+
+/* Repeat the leading 'unitsize' bytes of a word over all of the word. */
+static uint64_t sample_word_repeat(uint64_t word, unsigned int unitsize)
+{
+	uint8_t bytes[sizeof(uint64_t)];
+	unsigned int i;
+
+	memcpy(bytes, &word, sizeof(bytes));
+	for (i = unitsize; i < sizeof(bytes); i++)
+		bytes[i] = bytes[i - unitsize];
+	memcpy(&word, bytes, sizeof(word));
+
+	return word;
+}
+
+/* Get the packed word bit of an input channel, or -1. */
+static int planes_bit(const struct srd_sample_planes *planes, int in_ch)
+{
+	unsigned int k;
+
+	for (k = 0; k < planes->num_channels; k++) {
+		if (planes->channels[k] == in_ch)
+			return k;
+	}
+
+	return -1;
+}
+
+/*
+ * Get the session's packed channels if they cover the current chunk.
+ * Only wide samples get packed, only instances which match conditions
+ * on the session's chunk have them built.
+ */
+static const struct srd_sample_planes *current_planes(const struct srd_decoder_inst *di)
+{
+	const struct srd_sample_planes *planes;
+
+	if (!di->sess || (uint64_t)di->data_unitsize <= sizeof(uint64_t) ||
+	    di->inbuf != di->sess->chunk_inbuf)
+		return NULL;
+	planes = srd_session_planes_get(di->sess);
+	if (!planes || !planes->valid || planes->inbuf != di->inbuf ||
+	    planes->abs_start_samplenum != di->abs_start_samplenum ||
+	    planes->unitsize != (uint64_t)di->data_unitsize)
+		return NULL;
+
+	return planes;
+}
+
+/**
+ * Translate the condition list into sample bit masks.
+ *
+ * Conditions which consist of a single SKIP term are kept as is, their
+ * match position is known in advance. Conditions which cannot be
+ * expressed as masks (SKIP terms combined with other terms, unused or
+ * shared input channels, channels beyond 64 bits) result in a matcher
+ * which is not usable, and find_match() uses the per-term code path.
+ *
+ * For samples which are wider than 64 bits, the masks apply to the
+ * session's packed channels instead of the sample data.
+ *
+ * @param di The decoder instance. Must not be NULL.
+ * @param planes The session's packed channels, or NULL.
+ *
+ * @return The new matcher, which the caller owns.
+ */
+static struct srd_cond_matcher *cond_matcher_new(const struct srd_decoder_inst *di,
+		const struct srd_sample_planes *planes)
+{
+	struct srd_cond_matcher *m;
+	struct srd_cond_mask *mask;
+	const GSList *l, *ll;
+	const struct srd_term *term;
+	uint64_t bit, seen, chan_bit[64];
+	int ch, in_ch, slot, max_ch;
+	unsigned int i;
+
+	m = g_malloc0(sizeof(*m));
+	m->unitsize = di->data_unitsize;
+	if (planes) {
+		m->packed = TRUE;
+		m->layout = planes->layout;
+	}
+	m->num_conditions = g_slist_length(di->condition_list);
+	m->masks = g_malloc0(m->num_conditions * sizeof(*m->masks));
+	m->edge_only = TRUE;
+
+	/* Remember which PD channel occupies which input bit. */
+	memset(chan_bit, 0, sizeof(chan_bit));
+	seen = 0;
+	max_ch = 0;
+
+	for (l = di->condition_list, i = 0; l; l = l->next, i++) {
+		mask = &m->masks[i];
+		if (!l->data)
+			mask->never = TRUE;
+		for (ll = l->data; ll; ll = ll->next) {
+			term = ll->data;
+			if (term->type == SRD_TERM_SKIP) {
+				if (ll != l->data || ll->next)
+					return m;
+				mask->skip = ll->data;
+				continue;
+			}
+			if (term->type == SRD_TERM_ALWAYS_FALSE) {
+				mask->never = TRUE;
+				continue;
+			}
+			ch = term->channel;
+			in_ch = di->dec_channelmap[ch];
+			if (planes) {
+				if ((slot = planes_bit(planes, in_ch)) < 0)
+					return m;
+				bit = (uint64_t)1 << slot;
+			} else {
+				if (in_ch < 0 || in_ch >= 64 ||
+				    in_ch >= di->data_unitsize * 8)
+					return m;
+				slot = in_ch;
+				bit = cond_bit(in_ch);
+			}
+			/* Several PD channels on one input bit: use terms. */
+			if ((seen & bit) && chan_bit[slot] != (uint64_t)ch + 1)
+				return m;
+			seen |= bit;
+			chan_bit[slot] = (uint64_t)ch + 1;
+			max_ch = MAX(max_ch, slot);
+
+			switch (term->type) {
+			case SRD_TERM_HIGH:
+				mask->level_mask |= bit;
+				mask->level_value |= bit;
+				break;
+			case SRD_TERM_LOW:
+				mask->level_mask |= bit;
+				break;
+			case SRD_TERM_RISING_EDGE:
+				mask->level_mask |= bit;
+				mask->level_value |= bit;
+				mask->edge_mask |= bit;
+				mask->edge_value |= bit;
+				break;
+			case SRD_TERM_FALLING_EDGE:
+				mask->level_mask |= bit;
+				mask->edge_mask |= bit;
+				mask->edge_value |= bit;
+				break;
+			case SRD_TERM_EITHER_EDGE:
+				mask->edge_mask |= bit;
+				mask->edge_value |= bit;
+				break;
+			case SRD_TERM_NO_EDGE:
+				mask->edge_mask |= bit;
+				break;
+			default:
+				return m;
+			}
+		}
+		if (mask->never || mask->skip)
+			continue;
+		m->used_mask |= mask->level_mask | mask->edge_mask;
+		m->edge_any_mask |= mask->edge_value;
+		if (!mask->edge_value)
+			m->edge_only = FALSE;
+	}
+
+	m->load_len = planes ? sizeof(uint64_t) : (unsigned int)max_ch / 8 + 1;
+	m->usable = TRUE;
+
+	return m;
+}
+
+/* Get the previous sample's pin values as a (packed) sample word. */
+static uint64_t old_pins_word(const struct srd_decoder_inst *di,
+		const struct srd_sample_planes *planes)
+{
+	uint64_t word;
+	int i, in_ch, slot;
+
+	word = 0;
+	for (i = 0; i < di->dec_num_channels; i++) {
+		in_ch = di->dec_channelmap[i];
+		if (di->old_pins_array->data[i] != 1)
+			continue;
+		if (planes) {
+			if ((slot = planes_bit(planes, in_ch)) >= 0)
+				word |= (uint64_t)1 << slot;
+		} else if (in_ch >= 0 && in_ch < 64) {
+			word |= cond_bit(in_ch);
+		}
+	}
+
+	return word;
+}
+
+/* Find the first entry of an edge list which is beyond 'offset'. */
+static guint edge_list_search(const GArray *edges, uint64_t offset)
+{
+	const uint32_t *e;
+	guint lo, hi, mid;
+
+	e = (const uint32_t *)edges->data;
+	lo = 0;
+	hi = edges->len;
+	while (lo < hi) {
+		mid = lo + (hi - lo) / 2;
+		if (e[mid] <= offset)
+			lo = mid + 1;
+		else
+			hi = mid;
+	}
+
+	return lo;
+}
+
+/*
+ * Check whether the session's transition index covers the current
+ * chunk and all of the channels which the matcher inspects. Prepare
+ * the lookup of the inspected channels' next edges.
+ */
+static gboolean edge_index_prepare(const struct srd_decoder_inst *di,
+		const struct srd_cond_matcher *m,
+		const struct srd_sample_planes *planes,
+		const struct srd_edge_index **out,
+		const GArray **lists, guint *cursors, unsigned int *num_lists)
+{
+	const struct srd_edge_index *idx;
+	uint64_t offset;
+	unsigned int ch, n;
+
+	/* The index gets built when the first instance gets here. */
+	if (!di->sess || di->inbuf != di->sess->chunk_inbuf)
+		return FALSE;
+	idx = srd_session_edge_index_get(di->sess);
+	if (!idx || !idx->valid || idx->inbuf != di->inbuf ||
+	    idx->abs_start_samplenum != di->abs_start_samplenum ||
+	    idx->unitsize != (uint64_t)di->data_unitsize ||
+	    idx->packed != !!planes)
+		return FALSE;
+
+	offset = di->abs_cur_samplenum - di->abs_start_samplenum;
+	n = 0;
+	for (ch = 0; ch < m->load_len * 8; ch++) {
+		if (!(m->used_mask & cond_bit(ch)))
+			continue;
+		if (!(idx->indexed_mask & ((uint64_t)1 << ch)))
+			return FALSE;
+		lists[n] = idx->edges[ch];
+		cursors[n] = edge_list_search(lists[n], offset);
+		n++;
+	}
+
+	*out = idx;
+	*num_lists = n;
+
+	return TRUE;
+}
+
+/*
+ * Get the chunk offset of the next change on any of the inspected
+ * channels after the given offset, or the chunk's size when there is
+ * none.
+ */
+static uint64_t edge_index_next(const struct srd_edge_index *idx,
+		const GArray **lists, guint *cursors, unsigned int num_lists,
+		uint64_t offset)
+{
+	const uint32_t *e;
+	uint64_t next;
+	unsigned int k;
+
+	next = idx->num_samples;
+	for (k = 0; k < num_lists; k++) {
+		e = (const uint32_t *)lists[k]->data;
+		while (cursors[k] < lists[k]->len && e[cursors[k]] <= offset)
+			cursors[k]++;
+		if (cursors[k] < lists[k]->len)
+			next = MIN(next, e[cursors[k]]);
+	}
+
+	return next;
+}
+
+/**
+ * Find the next sample which matches the compiled conditions.
+ *
+ * This is the equivalent of the per-term loop in find_match(). Each
+ * sample is checked against all conditions by means of two masked
+ * compares. When the session has a transition index for the chunk,
+ * the scan jumps from one change of the inspected channels to the next,
+ * since the conditions' results cannot change in between. Otherwise,
+ * when every condition requires an edge, runs of samples without any
+ * change on the respective bits get skipped a whole 64-bit word at a
+ * time. SKIP conditions limit the range of samples which need
+ * inspection.
+ *
+ * @param di The decoder instance. Must not be NULL.
+ * @param m The usable matcher for the decoder instance's conditions.
+ * @param planes The session's packed channels when the matcher uses them.
+ * @param num_samples_to_process Number of samples to inspect.
+ *
+ * @return TRUE when a sample matched, FALSE otherwise.
+ */
+static gboolean find_match_masked(struct srd_decoder_inst *di,
+		const struct srd_cond_matcher *m,
+		const struct srd_sample_planes *planes,
+		uint64_t num_samples_to_process)
+{
+	const struct srd_cond_mask *mask;
+	const struct srd_edge_index *idx;
+	const GArray *edge_lists[64];
+	guint edge_cursors[64];
+	const uint8_t *sample_pos, *last_pos;
+	uint64_t i, cur, old, changed, old_rep, edge_rep, base, next;
+	uint64_t skip_at, remaining, scan_end, processed;
+	unsigned int j, unitsize, per_word, load_len, num_lists;
+	gboolean matched, cond_matched, at_skip, use_index;
+
+	/* The size of one sample in the data which the masks apply to. */
+	unitsize = planes ? sizeof(uint64_t) : (unsigned int)di->data_unitsize;
+	load_len = m->load_len;
+	per_word = (unitsize == 1 || unitsize == 2 || unitsize == 4)
+		? sizeof(uint64_t) / unitsize : 0;
+	edge_rep = per_word ? sample_word_repeat(m->edge_any_mask, unitsize) : 0;
+	idx = NULL;
+	num_lists = 0;
+	use_index = edge_index_prepare(di, m, planes, &idx, edge_lists,
+		edge_cursors, &num_lists);
+	base = di->abs_cur_samplenum - di->abs_start_samplenum;
+
+	/* The earliest position where a SKIP condition will match. */
+	skip_at = num_samples_to_process;
+	for (j = 0; j < m->num_conditions; j++) {
+		mask = &m->masks[j];
+		if (!mask->skip)
+			continue;
+		remaining = mask->skip->num_samples_to_skip -
+			mask->skip->num_samples_already_skipped;
+		skip_at = MIN(skip_at, remaining);
+	}
+	scan_end = skip_at;
+	if (scan_end < num_samples_to_process)
+		scan_end++;
+
+	old = old_pins_word(di, planes);
+	if (planes)
+		sample_pos = (const uint8_t *)planes->words->data + base * unitsize;
+	else
+		sample_pos = di->inbuf + base * unitsize;
+	last_pos = NULL;
+	matched = FALSE;
+
+	for (i = 0; i < scan_end; ) {
+		/* Skip whole words of samples which cannot match. */
+		if (m->edge_only && per_word && !use_index) {
+			old_rep = sample_word_repeat(old, unitsize);
+			while (skip_at - i >= per_word) {
+				cur = sample_word(sample_pos, sizeof(uint64_t));
+				if ((cur ^ old_rep) & edge_rep)
+					break;
+				i += per_word;
+				di->abs_cur_samplenum += per_word;
+				sample_pos += per_word * unitsize;
+				last_pos = sample_pos - unitsize;
+			}
+			if (last_pos)
+				old = sample_word(last_pos, load_len);
+			if (i >= scan_end)
+				break;
+		}
+
+		cur = sample_word(sample_pos, load_len);
+		changed = cur ^ old;
+		at_skip = (i == skip_at);
+		if (at_skip || !m->edge_only || (changed & m->edge_any_mask)) {
+			for (j = 0; j < m->num_conditions; j++) {
+				mask = &m->masks[j];
+				if (mask->skip) {
+					cond_matched = at_skip &&
+						mask->skip->num_samples_to_skip -
+						mask->skip->num_samples_already_skipped == i;
+				} else {
+					cond_matched = !mask->never &&
+						(cur & mask->level_mask) == mask->level_value &&
+						(changed & mask->edge_mask) == mask->edge_value;
+				}
+				di->match_array->data[j] = cond_matched;
+				matched |= cond_matched;
+			}
+		}
+		last_pos = sample_pos;
+		if (matched)
+			break;
+		old = cur;
+		i++;
+		di->abs_cur_samplenum++;
+		sample_pos += unitsize;
+
+		/* Jump to the next change of the inspected channels. */
+		if (use_index && !(changed & m->used_mask)) {
+			next = edge_index_next(idx, edge_lists, edge_cursors,
+				num_lists, base + i - 1) - base;
+			next = MIN(next, skip_at);
+			if (next > i) {
+				di->abs_cur_samplenum += next - i;
+				sample_pos += (next - i) * unitsize;
+				i = next;
+				last_pos = sample_pos - unitsize;
+				old = sample_word(last_pos, load_len);
+			}
+		}
+	}
+
+	/* The pin values of the last inspected sample. */
+	if (last_pos) {
+		update_old_pins_array(di, di->inbuf + (di->abs_cur_samplenum -
+			di->abs_start_samplenum - (matched ? 0 : 1)) *
+			di->data_unitsize);
+	}
+
+	/* Account for the samples which the SKIP terms have seen. */
+	processed = matched ? i + 1 : i;
+	for (j = 0; j < m->num_conditions; j++) {
+		mask = &m->masks[j];
+		if (!mask->skip)
+			continue;
+		remaining = mask->skip->num_samples_to_skip -
+			mask->skip->num_samples_already_skipped;
+		mask->skip->num_samples_already_skipped += MIN(processed, remaining);
+	}
+
+	return matched;
+}
+
 static gboolean find_match(struct srd_decoder_inst *di)
 {
 	uint64_t i, j, num_samples_to_process;
 	GSList *l, *cond;
 	const uint8_t *sample_pos;
+	const struct srd_sample_planes *planes;
+	struct srd_cond_matcher *m;
 	unsigned int num_conditions;
 
 	/* Caller ensures di != NULL. */
@@ -943,14 +1707,34 @@ static gboolean find_match(struct srd_decoder_inst *di)
 	num_samples_to_process = di->abs_end_samplenum - di->abs_cur_samplenum;
 	num_conditions = g_slist_length(di->condition_list);
 
-	/* di->match_array is NULL here. Create a new GArray. */
-	di->match_array = g_array_sized_new(FALSE, TRUE, sizeof(gboolean), num_conditions);
+	/*
+	 * The array is kept across chunks and wait() calls. No condition
+	 * has matched yet when a wait() continues in the next chunk.
+	 */
+	if (!di->match_array)
+		di->match_array = g_array_sized_new(FALSE, TRUE, sizeof(gboolean), num_conditions);
 	g_array_set_size(di->match_array, num_conditions);
 
 	/* Sample 0: Set di->old_pins_array for SRD_INITIAL_PIN_SAME_AS_SAMPLE0 pins. */
 	if (di->abs_cur_samplenum == 0)
 		update_old_pins_array_initial_pins(di);
 
+	/*
+	 * Use the bit mask representation of the conditions if possible.
+	 * Samples wider than 64 bits get matched on the session's packed
+	 * channels.
+	 */
+	planes = current_planes(di);
+	m = di->cond_matcher;
+	if (m && (m->unitsize != di->data_unitsize || m->packed != !!planes ||
+	    (planes && m->layout != planes->layout)))
+		cond_matcher_free(di);
+	if (!di->cond_matcher)
+		di->cond_matcher = cond_matcher_new(di, planes);
+	if (di->cond_matcher->usable)
+		return find_match_masked(di, di->cond_matcher, planes,
+			num_samples_to_process);
+
 	for (i = 0; i < num_samples_to_process; i++, (di->abs_cur_samplenum)++) {
 
 		sample_pos = di->inbuf + ((di->abs_cur_samplenum - di->abs_start_samplenum) * di->data_unitsize);
@@ -975,6 +1759,207 @@ static gboolean find_match(struct srd_decoder_inst *di)
 	return FALSE;
 }
 
+/**
+ * Account the time since the decoder's Python code got control.
+ *
+ * @private
+ */
+SRD_PRIV void srd_inst_stats_python_stop(struct srd_decoder_inst *di)
+{
+	if (!di->stats_py_since)
+		return;
+
+	di->stats.python_time_us += g_get_monotonic_time() - di->stats_py_since;
+	di->stats_py_since = 0;
+}
+
+/**
+ * Have the decoder skip over samples of the current chunk, up to and
+ * including the specified one, without checking conditions.
+ *
+ * @param di The decoder instance to use. Must not be NULL.
+ * @param samplenum The absolute number of the last sample to skip. Must
+ *                  be within the current chunk.
+ *
+ * @private
+ */
+SRD_PRIV void srd_inst_samples_skip(struct srd_decoder_inst *di,
+		uint64_t samplenum)
+{
+	di->abs_cur_samplenum = samplenum;
+	update_old_pins_array(di, di->inbuf +
+		(samplenum - di->abs_start_samplenum) * di->data_unitsize);
+}
+
+/* Have stacked decoders process the batched output of lower ones. */
+static void py_batch_flush_stack(struct srd_decoder_inst *di)
+{
+	GSList *l;
+
+	for (l = di->next_di; l; l = l->next) {
+		srd_inst_py_batch_flush(l->data);
+		py_batch_flush_stack(l->data);
+	}
+}
+
+/**
+ * Record the current sample as a point from which the instance can
+ * resume decoding, see srd_session_seek().
+ *
+ * Checkpoints are only recorded when the session has a checkpoint
+ * interval, and are at least that many samples apart.
+ *
+ * @param di The decoder instance to use. Must not be NULL.
+ *
+ * @private
+ */
+SRD_PRIV void srd_inst_checkpoint_add(struct srd_decoder_inst *di)
+{
+	struct srd_checkpoint cp, *last;
+	uint64_t interval, base;
+
+	interval = di->sess ? di->sess->checkpoint_interval : 0;
+	if (!interval || !di->abs_cur_samplenum || !di->old_pins_array)
+		return;
+
+	if (!di->checkpoints) {
+		di->checkpoints = g_array_new(FALSE, FALSE,
+			sizeof(struct srd_checkpoint));
+	}
+
+	/* Sample 0 always is a checkpoint. */
+	base = 0;
+	if (di->checkpoints->len) {
+		last = &g_array_index(di->checkpoints, struct srd_checkpoint,
+			di->checkpoints->len - 1);
+		base = last->samplenum;
+	}
+	if (di->abs_cur_samplenum < base + interval)
+		return;
+
+	/* Output from before the checkpoint must not show up after it. */
+	py_batch_flush_stack(di);
+
+	cp.samplenum = di->abs_cur_samplenum;
+	cp.outputs = di->sess->num_outputs;
+	cp.pins = g_malloc0(di->dec_num_channels);
+	memcpy(cp.pins, di->old_pins_array->data, di->dec_num_channels);
+	g_array_append_val(di->checkpoints, cp);
+
+	srd_dbg("%s: Checkpoint at sample %" PRIu64 ".", di->inst_id,
+		cp.samplenum);
+}
+
+/** @private */
+SRD_PRIV void srd_inst_checkpoints_clear(struct srd_decoder_inst *di)
+{
+	guint i;
+
+	if (!di->checkpoints)
+		return;
+
+	for (i = 0; i < di->checkpoints->len; i++)
+		g_free(g_array_index(di->checkpoints, struct srd_checkpoint, i).pins);
+	g_array_free(di->checkpoints, TRUE);
+	di->checkpoints = NULL;
+}
+
+/* Move an instance which hasn't seen samples yet to a later sample. */
+static void inst_samplenum_set(struct srd_decoder_inst *di,
+		uint64_t samplenum)
+{
+	srd_Decoder *dec;
+	PyObject *py_old;
+	PyGILState_STATE gstate;
+
+	di->abs_cur_samplenum = samplenum;
+
+	gstate = PyGILState_Ensure();
+	dec = di->py_inst;
+	py_old = dec->samplenum;
+	dec->samplenum = PyLong_FromUnsignedLongLong(samplenum);
+	Py_XDECREF(py_old);
+	PyGILState_Release(gstate);
+}
+
+/**
+ * Have a (re)started instance continue from its last checkpoint at or
+ * before the specified sample.
+ *
+ * The instance must have been reset and started, and not have seen
+ * any samples since. Instances stacked on top of this one start from
+ * scratch, at the same sample.
+ *
+ * @param di The decoder instance to use. Must not be NULL.
+ * @param samplenum The absolute number of the sample to seek to.
+ *
+ * @return The absolute number of the first sample which the instance
+ *         needs, 0 if it has no checkpoint before samplenum.
+ *
+ * @private
+ */
+SRD_PRIV uint64_t srd_inst_resume(struct srd_decoder_inst *di,
+		uint64_t samplenum)
+{
+	struct srd_checkpoint *cp;
+	guint lo, hi, mid;
+
+	if (!di->checkpoints || !di->checkpoints->len)
+		return 0;
+
+	/* Find the last checkpoint at or before samplenum. */
+	lo = 0;
+	hi = di->checkpoints->len;
+	while (lo < hi) {
+		mid = lo + (hi - lo) / 2;
+		cp = &g_array_index(di->checkpoints, struct srd_checkpoint, mid);
+		if (cp->samplenum <= samplenum)
+			lo = mid + 1;
+		else
+			hi = mid;
+	}
+	if (!lo)
+		return 0;
+	cp = &g_array_index(di->checkpoints, struct srd_checkpoint, lo - 1);
+
+	srd_dbg("%s: Resuming at sample %" PRIu64 ".", di->inst_id,
+		cp->samplenum);
+
+	/* Pick up where the checkpoint's wait() left off. */
+	oldpins_array_seed(di);
+	if (cp->pins)
+		memcpy(di->old_pins_array->data, cp->pins, di->dec_num_channels);
+	inst_samplenum_set(di, cp->samplenum);
+
+	return cp->samplenum;
+}
+
+/**
+ * Have a started instance begin decoding at a later sample.
+ *
+ * The instance continues as if it had just returned from a wait() at
+ * that sample, without having seen any of the samples before it.
+ *
+ * @param di The decoder instance to use. Must not be NULL.
+ * @param samplenum The absolute number of the sample to start at.
+ * @param sample The data of that sample, in the layout of the samples
+ *               which the instance gets passed. Must not be NULL.
+ *
+ * @private
+ */
+SRD_PRIV void srd_inst_start_at(struct srd_decoder_inst *di,
+		uint64_t samplenum, const uint8_t *sample)
+{
+	if (!samplenum)
+		return;
+
+	srd_dbg("%s: Starting at sample %" PRIu64 ".", di->inst_id,
+		samplenum);
+
+	update_old_pins_array(di, sample);
+	inst_samplenum_set(di, samplenum);
+}
+
 /**
  * Process available samples and check if they match the defined conditions.
  *
@@ -994,6 +1979,9 @@ static gboolean find_match(struct srd_decoder_inst *di)
  */
 SRD_PRIV int process_samples_until_condition_match(struct srd_decoder_inst *di, gboolean *found_match)
 {
+	uint64_t start_samplenum;
+	gint64 start_time;
+
 	if (!di || !found_match)
 		return SRD_ERR_ARG;
 
@@ -1001,6 +1989,9 @@ SRD_PRIV int process_samples_until_condition_match(struct srd_decoder_inst *di,
 	if (di->want_wait_terminate)
 		return SRD_OK;
 
+	start_samplenum = di->abs_cur_samplenum;
+	start_time = g_get_monotonic_time();
+
 	/* Check if any of the current condition(s) match. */
 	while (TRUE) {
 		/* Feed the (next chunk of the) buffer to find_match(). */
@@ -1011,7 +2002,7 @@ SRD_PRIV int process_samples_until_condition_match(struct srd_decoder_inst *di,
 			srd_dbg("Done, handled all samples (abs cur %" PRIu64
 				" / abs end %" PRIu64 ").",
 				di->abs_cur_samplenum, di->abs_end_samplenum);
-			return SRD_OK;
+			break;
 		}
 
 		/* If we didn't find a match, continue looking. */
@@ -1019,9 +2010,13 @@ SRD_PRIV int process_samples_until_condition_match(struct srd_decoder_inst *di,
 			continue;
 
 		/* At least one condition matched, return. */
-		return SRD_OK;
+		break;
 	}
 
+	/* A matching sample gets accounted for by the next call. */
+	di->stats.samples_scanned += di->abs_cur_samplenum - start_samplenum;
+	di->stats.match_time_us += g_get_monotonic_time() - start_time;
+
 	return SRD_OK;
 }
 
@@ -1055,7 +2050,9 @@ static gpointer di_thread(gpointer data)
 	 */
 	Py_INCREF(di->py_inst);
 	srd_dbg("%s: Calling decode().", di->inst_id);
+	di->stats_py_since = g_get_monotonic_time();
 	py_res = PyObject_CallMethod(di->py_inst, "decode", NULL);
+	srd_inst_stats_python_stop(di);
 	srd_dbg("%s: decode() terminated.", di->inst_id);
 
 	if (!py_res)
@@ -1172,6 +2169,41 @@ static gpointer di_thread(gpointer data)
 SRD_PRIV int srd_inst_decode(struct srd_decoder_inst *di,
 		uint64_t abs_start_samplenum, uint64_t abs_end_samplenum,
 		const uint8_t *inbuf, uint64_t inbuflen, uint64_t unitsize)
+{
+	int ret;
+
+	ret = srd_inst_decode_start(di, abs_start_samplenum,
+		abs_end_samplenum, inbuf, inbuflen, unitsize);
+	if (ret != SRD_OK)
+		return ret;
+
+	return srd_inst_decode_wait(di);
+}
+
+/**
+ * Hand a chunk of samples to a decoder instance's worker thread.
+ *
+ * This is the first half of srd_inst_decode(), it returns without
+ * waiting for the decoder to process the samples. The caller must
+ * keep the buffer unmodified, and must call srd_inst_decode_wait()
+ * before passing the next chunk.
+ *
+ * @param di The decoder instance to call. Must not be NULL.
+ * @param abs_start_samplenum The absolute starting sample number for the
+ * 		buffer's sample set, relative to the start of capture.
+ * @param abs_end_samplenum The absolute ending sample number for the
+ * 		buffer's sample set, relative to the start of capture.
+ * @param inbuf The buffer to decode. Must not be NULL.
+ * @param inbuflen Length of the buffer. Must be > 0.
+ * @param unitsize The number of bytes per sample. Must be > 0.
+ *
+ * @return SRD_OK upon success, a (negative) error code otherwise.
+ *
+ * @private
+ */
+SRD_PRIV int srd_inst_decode_start(struct srd_decoder_inst *di,
+		uint64_t abs_start_samplenum, uint64_t abs_end_samplenum,
+		const uint8_t *inbuf, uint64_t inbuflen, uint64_t unitsize)
 {
 	/* Return an error upon unusable input. */
 	if (!di) {
@@ -1228,6 +2260,25 @@ SRD_PRIV int srd_inst_decode(struct srd_decoder_inst *di,
 	g_cond_signal(&di->got_new_samples_cond);
 	g_mutex_unlock(&di->data_mutex);
 
+	return SRD_OK;
+}
+
+/**
+ * Wait until a decoder instance has processed the current chunk.
+ *
+ * This is the second half of srd_inst_decode().
+ *
+ * @param di The decoder instance to wait for. Must not be NULL.
+ *
+ * @return SRD_OK upon success, a (negative) error code otherwise.
+ *
+ * @private
+ */
+SRD_PRIV int srd_inst_decode_wait(struct srd_decoder_inst *di)
+{
+	if (!di)
+		return SRD_ERR_ARG;
+
 	/* When all samples in this chunk were handled, return. */
 	g_mutex_lock(&di->data_mutex);
 	while (!di->handled_all_samples && !di->want_wait_terminate)
@@ -1277,6 +2328,9 @@ SRD_PRIV int srd_inst_terminate_reset(struct srd_decoder_inst *di)
 	 */
 	srd_dbg("Terminating instance %s", di->inst_id);
 	srd_inst_join_decode_thread(di);
+	srd_inst_py_batch_flush(di);
+	srd_inst_ann_batch_flush(di);
+	bin_blocks_flush(di);
 	srd_inst_reset_state(di);
 
 	/*
@@ -1304,6 +2358,252 @@ SRD_PRIV int srd_inst_terminate_reset(struct srd_decoder_inst *di)
 	return di->decoder_state;
 }
 
+static void ann_batch_free(struct srd_decoder_inst *di)
+{
+	struct srd_ann_batch *batch;
+	unsigned int i;
+
+	if (!(batch = di->ann_batch))
+		return;
+
+	for (i = 0; i < batch->count; i++)
+		g_strfreev(batch->pda[i].ann_text);
+	g_free(batch->pdata);
+	g_free(batch->pda);
+	g_free(batch);
+	di->ann_batch = NULL;
+}
+
+/**
+ * Queue an annotation of a decoder instance for the batch callback.
+ *
+ * The batch takes over the annotation's text.
+ *
+ * @param di The decoder instance which put() the annotation.
+ * @param pdata The converted annotation.
+ *
+ * @return TRUE when the batch is full and needs to be flushed.
+ *
+ * @private
+ */
+SRD_PRIV gboolean srd_inst_ann_batch_add(struct srd_decoder_inst *di,
+		const struct srd_proto_data *pdata)
+{
+	struct srd_ann_batch *batch;
+	unsigned int size;
+
+	size = di->sess->ann_batch_cb->max_count;
+	batch = di->ann_batch;
+	if (batch && !batch->count && batch->size != size)
+		ann_batch_free(di);
+	if (!(batch = di->ann_batch)) {
+		batch = g_malloc(sizeof(struct srd_ann_batch));
+		batch->count = 0;
+		batch->size = size;
+		batch->pdata = g_new(struct srd_proto_data, size);
+		batch->pda = g_new(struct srd_proto_data_annotation, size);
+		di->ann_batch = batch;
+	}
+
+	batch->pda[batch->count] = *(struct srd_proto_data_annotation *)pdata->data;
+	batch->pdata[batch->count] = *pdata;
+	batch->pdata[batch->count].data = &batch->pda[batch->count];
+	batch->count++;
+
+	return batch->count >= batch->size;
+}
+
+/**
+ * Deliver the queued annotations of a decoder instance.
+ *
+ * Must not run while the instance's decoder puts annotations.
+ *
+ * @private
+ */
+SRD_PRIV void srd_inst_ann_batch_flush(struct srd_decoder_inst *di)
+{
+	struct srd_ann_batch *batch;
+	struct srd_pd_batch_callback *cb;
+	unsigned int i;
+
+	if (!(batch = di->ann_batch) || !batch->count)
+		return;
+
+	if ((cb = di->sess->ann_batch_cb)) {
+		srd_pd_output_batch_callback_run(di->sess, cb, batch->pdata,
+			batch->count);
+	}
+	for (i = 0; i < batch->count; i++)
+		g_strfreev(batch->pda[i].ann_text);
+	batch->count = 0;
+}
+
+static void bin_block_free(struct srd_bin_block *block)
+{
+	g_byte_array_free(block->data, TRUE);
+	g_free(block);
+}
+
+static void bin_blocks_free(struct srd_decoder_inst *di)
+{
+	g_slist_free_full(di->bin_blocks, (GDestroyNotify)bin_block_free);
+	di->bin_blocks = NULL;
+}
+
+/**
+ * Append binary output of a decoder instance to the block of its output
+ * and binary class.
+ *
+ * The data gets copied.
+ *
+ * @param di The decoder instance which put() the binary data.
+ * @param pdata The converted binary data.
+ *
+ * @return NULL when the data was appended. The block when the data
+ *         doesn't fit, which needs to be flushed before the data can
+ *         be appended.
+ *
+ * @private
+ */
+SRD_PRIV struct srd_bin_block *srd_inst_bin_block_add(
+		struct srd_decoder_inst *di, const struct srd_proto_data *pdata)
+{
+	GSList *l;
+	struct srd_bin_block *block;
+	const struct srd_proto_data_binary *pdb;
+
+	pdb = pdata->data;
+	block = NULL;
+	for (l = di->bin_blocks; l; l = l->next) {
+		block = l->data;
+		if (block->pdo == pdata->pdo && block->bin_class == pdb->bin_class)
+			break;
+	}
+	if (!l) {
+		block = g_malloc(sizeof(struct srd_bin_block));
+		block->pdo = pdata->pdo;
+		block->bin_class = pdb->bin_class;
+		block->data = g_byte_array_sized_new(di->sess->bin_block_size);
+		di->bin_blocks = g_slist_append(di->bin_blocks, block);
+	}
+
+	if (!block->data->len) {
+		block->start_sample = pdata->start_sample;
+	} else if (block->data->len + pdb->size > di->sess->bin_block_size) {
+		/* Blocks of single large put() calls are passed in one piece. */
+		return block;
+	}
+	block->end_sample = pdata->end_sample;
+	g_byte_array_append(block->data, pdb->data, pdb->size);
+
+	return NULL;
+}
+
+/**
+ * Pass a block of coalesced binary output of a decoder instance to the
+ * frontend.
+ *
+ * Must not run while the instance's decoder puts binary data.
+ *
+ * @private
+ */
+SRD_PRIV void srd_inst_bin_block_flush(struct srd_decoder_inst *di,
+		struct srd_bin_block *block)
+{
+	struct srd_pd_callback *cb;
+	struct srd_proto_data pdata;
+	struct srd_proto_data_binary pdb;
+
+	if (!block->data->len)
+		return;
+
+	if ((cb = srd_pd_output_callback_find(di->sess, SRD_OUTPUT_BINARY))) {
+		pdb.bin_class = block->bin_class;
+		pdb.size = block->data->len;
+		pdb.data = block->data->data;
+		pdata.start_sample = block->start_sample;
+		pdata.end_sample = block->end_sample;
+		pdata.pdo = block->pdo;
+		pdata.data = &pdb;
+		srd_pd_output_callback_run(di->sess, cb, &pdata);
+	}
+	g_byte_array_set_size(block->data, 0);
+}
+
+static void bin_blocks_flush(struct srd_decoder_inst *di)
+{
+	GSList *l;
+
+	for (l = di->bin_blocks; l; l = l->next)
+		srd_inst_bin_block_flush(di, l->data);
+}
+
+/**
+ * Pass the collected output of lower decoders to the decode_batch()
+ * method of a decoder instance.
+ *
+ * @private
+ */
+SRD_PRIV void srd_inst_py_batch_flush(struct srd_decoder_inst *di)
+{
+	PyObject *py_items, *py_res;
+	PyGILState_STATE gstate;
+
+	if (!di->py_batch)
+		return;
+
+	gstate = PyGILState_Ensure();
+
+	if (PyList_Size(di->py_batch) > 0) {
+		/* Hand the list over, decode_batch() may keep it. */
+		py_items = di->py_batch;
+		if (!(di->py_batch = PyList_New(0))) {
+			srd_exception_catch("Failed to create %s batch",
+				di->inst_id);
+			di->py_batch = py_items;
+		} else {
+			di->stats_py_since = g_get_monotonic_time();
+			py_res = PyObject_CallFunctionObjArgs(di->py_decode,
+				py_items, NULL);
+			srd_inst_stats_python_stop(di);
+			if (!py_res) {
+				srd_exception_catch("Calling %s decode_batch() failed",
+					di->inst_id);
+			}
+			Py_XDECREF(py_res);
+			Py_DECREF(py_items);
+		}
+	}
+
+	PyGILState_Release(gstate);
+}
+
+static void output_flush_stack(struct srd_decoder_inst *di)
+{
+	GSList *l;
+
+	/* Stacked decoders' output of the batch gets flushed below. */
+	srd_inst_py_batch_flush(di);
+	srd_inst_ann_batch_flush(di);
+	bin_blocks_flush(di);
+	for (l = di->next_di; l; l = l->next)
+		output_flush_stack(l->data);
+}
+
+/**
+ * Deliver the batched and coalesced output of all decoder instances
+ * of a session.
+ *
+ * @private
+ */
+SRD_PRIV void srd_inst_output_flush_all(struct srd_session *sess)
+{
+	GSList *d;
+
+	for (d = sess->di_list; d; d = d->next)
+		output_flush_stack(d->data);
+}
+
 /** @private */
 SRD_PRIV void srd_inst_free(struct srd_decoder_inst *di)
 {
@@ -1316,8 +2616,18 @@ SRD_PRIV void srd_inst_free(struct srd_decoder_inst *di)
 	srd_inst_join_decode_thread(di);
 
 	srd_inst_reset_state(di);
+	srd_inst_checkpoints_clear(di);
+	condition_cache_free(di);
+	ann_batch_free(di);
+	bin_blocks_free(di);
 
 	gstate = PyGILState_Ensure();
+	((srd_Decoder *)di->py_inst)->di = NULL;
+	Py_CLEAR(((srd_Decoder *)di->py_inst)->samplenum);
+	Py_CLEAR(((srd_Decoder *)di->py_inst)->matched);
+	Py_CLEAR(((srd_Decoder *)di->py_inst)->term_types);
+	Py_XDECREF(di->py_batch);
+	Py_XDECREF(di->py_decode);
 	Py_DECREF(di->py_inst);
 	PyGILState_Release(gstate);
 
@@ -45,8 +45,83 @@ struct srd_term {
 	uint64_t num_samples_already_skipped;
 };
 
+/*
+ * Precomputed sample bit masks for one condition. A sample word matches
+ * when (sample & level_mask) == level_value and when
+ * ((sample ^ previous sample) & edge_mask) == edge_value.
+ */
+struct srd_cond_mask {
+	uint64_t level_mask;
+	uint64_t level_value;
+	uint64_t edge_mask;
+	uint64_t edge_value;
+	/* The condition is empty or contains an "always false" term. */
+	gboolean never;
+	/* The condition's only term is this SKIP term. */
+	struct srd_term *skip;
+};
+
+/* Compiled form of a decoder instance's condition list. */
+struct srd_cond_matcher {
+	/* FALSE when the conditions need the per-term code path. */
+	gboolean usable;
+	/* The unit size of the samples that the masks were created for. */
+	int unitsize;
+	/* The masks apply to the session's packed channels (of 'layout'). */
+	gboolean packed;
+	unsigned int layout;
+	/* Number of leading bytes of a sample which the masks cover. */
+	unsigned int load_len;
+	/* All sample bits which are inspected by any of the conditions. */
+	uint64_t used_mask;
+	/* All sample bits which any of the conditions wants to see change. */
+	uint64_t edge_any_mask;
+	/* Each mask condition requires at least one edge (or never matches). */
+	gboolean edge_only;
+	unsigned int num_conditions;
+	struct srd_cond_mask *masks;
+};
+
+/* A condition list which a decoder instance has used before. */
+struct srd_cond_cache_entry {
+	GSList *condition_list;
+	struct srd_cond_matcher *matcher;
+};
+
+/*
+ * Condition lists of a decoder instance, keyed by their content. The
+ * key is an array of int: each condition contributes its number of
+ * terms, followed by the type and channel of each of its terms. SKIP
+ * counts are not part of the key, they get assigned upon every use.
+ */
+struct srd_cond_cache {
+	/* Maps a key (GArray of int) to a struct srd_cond_cache_entry. */
+	GHashTable *entries;
+	/* The entry which currently provides the instance's conditions. */
+	struct srd_cond_cache_entry *active;
+	/* Key and SKIP counts (uint64_t) of the conditions being set up. */
+	GArray *key;
+	GArray *skips;
+};
+
 /* Custom Python types: */
 
+/*
+ * The sigrokdecode.Decoder base class. Protocol decoder instances refer
+ * to their decoder instance, such that the Decoder methods don't need
+ * to search for it. The self.samplenum and self.matched attributes,
+ * which wait() updates, are members of the object. The term strings
+ * of wait() conditions map to their term type in term_types, so that
+ * wait() needn't convert them upon every call.
+ */
+typedef struct {
+	PyObject_HEAD
+	struct srd_decoder_inst *di;
+	PyObject *samplenum;
+	PyObject *matched;
+	PyObject *term_types;
+} srd_Decoder;
+
 typedef struct {
 	PyObject_HEAD
 	struct srd_decoder_inst *di;
@@ -57,6 +132,121 @@ typedef struct {
 	PyObject *sample;
 } srd_logic;
 
+/*
+ * Per-channel transition index of the sample chunk which is currently
+ * being sent to a session's decoder instances.
+ */
+struct srd_edge_index {
+	/* The chunk which the index describes, valid during its decoding. */
+	gboolean valid;
+	const uint8_t *inbuf;
+	uint64_t abs_start_samplenum;
+	uint64_t num_samples;
+	uint64_t unitsize;
+	/* The index covers the session's packed channels (wide samples). */
+	gboolean packed;
+	/* Input channels (sample word bits) which have an edge list. */
+	uint64_t indexed_mask;
+	/*
+	 * Per input channel: chunk relative offsets (uint32_t) of the
+	 * samples where the channel differs from the previous sample.
+	 * Channels with frequent changes are not indexed.
+	 */
+	GArray *edges[64];
+};
+
+/*
+ * Compact copy of the sample chunk which is currently being sent to a
+ * session's decoder instances, for samples wider than 64 bits. All the
+ * input channels which any of the instances references get packed into
+ * one 64-bit word per sample (bit k holds channels[k]).
+ */
+struct srd_sample_planes {
+	/* The chunk which the words describe, valid during its decoding. */
+	gboolean valid;
+	const uint8_t *inbuf;
+	uint64_t abs_start_samplenum;
+	uint64_t unitsize;
+	/* Changes whenever the set of packed channels changes. */
+	unsigned int layout;
+	unsigned int num_channels;
+	int channels[64];
+	/* Per input byte which holds packed channels: byte value to bits. */
+	unsigned int num_bytes;
+	unsigned int byte_pos[64];
+	uint64_t *lut;
+	/* One word (uint64_t) per sample. */
+	GArray *words;
+};
+
+/*
+ * Annotations of a decoder instance which wait for delivery to the
+ * session's batch callback. pdata[i].data points to pda[i], the
+ * annotation texts are owned by the batch.
+ */
+struct srd_ann_batch {
+	unsigned int count;
+	unsigned int size;
+	struct srd_proto_data *pdata;
+	struct srd_proto_data_annotation *pda;
+};
+
+/*
+ * Binary output of a decoder instance which gets collected until it
+ * fills a block of the session's bin_block_size bytes. Holds the data
+ * of put() calls for one output and binary class.
+ */
+struct srd_bin_block {
+	struct srd_pd_output *pdo;
+	int bin_class;
+	uint64_t start_sample;
+	uint64_t end_sample;
+	GByteArray *data;
+};
+
+/*
+ * A sample where decoding can resume, as marked by the decoder's
+ * checkpoint() call, with the pin values seen at that sample.
+ */
+struct srd_checkpoint {
+	uint64_t samplenum;
+	uint8_t *pins;
+	/* The session's num_outputs when the checkpoint was recorded. */
+	uint64_t outputs;
+};
+
+/*
+ * A copy of a decoder output, which gets passed to a session's callbacks
+ * later on (see srd_session_send_split() and worker processes).
+ */
+struct split_output {
+	struct srd_proto_data pdata;
+	struct srd_proto_data_annotation pda;
+	struct srd_proto_data_binary pdb;
+};
+
+/* A checkpoint of a split segment, and its output up to there. */
+struct split_resync {
+	uint64_t samplenum;
+	uint64_t outputs;
+};
+
+/* The split segment which a worker process decodes. */
+struct worker_segment {
+	/* The sample at which the copy starts, and its value. */
+	uint64_t start;
+	const uint8_t *sample;
+	uint64_t unitsize;
+	/*
+	 * Receive the copy's output (struct split_output) and the
+	 * checkpoints of its bottom instance (struct split_resync).
+	 */
+	GArray *outputs;
+	GArray *checkpoints;
+};
+
+struct worker;
+
 struct srd_session {
 	int session_id;
 
@@ -65,6 +255,76 @@ struct srd_session {
 
 	/* List of frontend callbacks to receive decoder output. */
 	GSList *callbacks;
+
+	/* Frontend callback to receive annotations in batches. */
+	struct srd_pd_batch_callback *ann_batch_cb;
+
+	/* Size of coalesced binary output blocks, 0 when disabled. */
+	uint64_t bin_block_size;
+
+	/* Transition index of the current sample chunk. */
+	struct srd_edge_index *edge_index;
+
+	/* Packed channels of the current sample chunk (wide samples). */
+	struct srd_sample_planes *planes;
+
+	/*
+	 * The chunk which the decoder stacks currently process. The index
+	 * and the packed channels get built for it once the first decoder
+	 * instance needs them.
+	 */
+	const uint8_t *chunk_inbuf;
+	uint64_t chunk_abs_start_samplenum;
+	uint64_t chunk_inbuflen;
+	uint64_t chunk_unitsize;
+	gboolean edge_index_built;
+	gboolean planes_built;
+	GMutex chunk_mutex;
+
+	/* Performance counters. */
+	struct srd_session_stats stats;
+
+	/* Last samplerate set, passed on again by srd_session_seek(). */
+	uint64_t samplerate;
+
+	/* Minimum distance of decoder checkpoints, 0 when disabled. */
+	uint64_t checkpoint_interval;
+
+	/* Number of outputs which were passed to frontend callbacks. */
+	uint64_t num_outputs;
+
+	/* Decode a chunk in all stacks at the same time. */
+	gboolean parallel;
+
+	/* Coalescing of small chunks, see srd_session_send_coalesce_set(). */
+	uint64_t coalesce_size;
+	unsigned int coalesce_max_chunks;
+	/* The samples which were coalesced so far, of this many chunks. */
+	GByteArray *coalesce_buf;
+	unsigned int coalesce_chunks;
+	uint64_t coalesce_start;
+	uint64_t coalesce_end;
+	uint64_t coalesce_unitsize;
+
+	/* Decode the stacks in worker processes. */
+	gboolean isolation;
+	/* The worker processes, one per stack, once they got started. */
+	GSList *workers;
+
+	/* Serializes output callbacks of concurrently running stacks. */
+	GMutex callback_mutex;
+
+	/* Chunks of srd_session_send_bytes() which wait for decoding. */
+	GQueue *send_queue;
+	unsigned int send_queue_max;
+	/* Passes queued chunks to the decoder stacks. */
+	GThread *send_thread;
+	GMutex send_mutex;
+	GCond send_cond;
+	gboolean send_busy;
+	gboolean send_quit;
+	/* First error of queued decoding, reported by the next call. */
+	int send_error;
 };
 
 /* srd.c */
@@ -73,18 +333,89 @@ SRD_PRIV int srd_decoder_searchpath_add(const char *path);
 /* session.c */
 SRD_PRIV struct srd_pd_callback *srd_pd_output_callback_find(struct srd_session *sess,
 		int output_type);
+SRD_PRIV void srd_pd_output_callback_run(struct srd_session *sess,
+		struct srd_pd_callback *cb, struct srd_proto_data *pdata);
+SRD_PRIV void srd_pd_output_batch_callback_run(struct srd_session *sess,
+		struct srd_pd_batch_callback *cb, struct srd_proto_data *pdata,
+		unsigned int count);
+SRD_PRIV const struct srd_edge_index *srd_session_edge_index_get(
+		struct srd_session *sess);
+SRD_PRIV const struct srd_sample_planes *srd_session_planes_get(
+		struct srd_session *sess);
+SRD_PRIV int srd_inst_send_meta(struct srd_decoder_inst *di, int key,
+		GVariant *data);
+SRD_PRIV int session_send_chunk(struct srd_session *sess,
+		uint64_t abs_start_samplenum, uint64_t abs_end_samplenum,
+		const uint8_t *inbuf, uint64_t inbuflen, uint64_t unitsize);
+
+/* input.c */
+SRD_PRIV int send_queue_wait(struct srd_session *sess);
+SRD_PRIV void coalesced_drop(struct srd_session *sess);
+SRD_PRIV int session_send_input(struct srd_session *sess,
+		uint64_t abs_start_samplenum, uint64_t abs_end_samplenum,
+		const uint8_t *inbuf, uint64_t inbuflen, uint64_t unitsize);
+SRD_PRIV void send_thread_stop(struct srd_session *sess);
+
+/* split.c */
+SRD_PRIV void split_output_free(struct split_output *out);
+SRD_PRIV void split_output_replay(struct srd_session *sess,
+		struct srd_decoder_inst *di, struct split_output *out);
+
+/* worker.c */
+SRD_PRIV void workers_stop(struct srd_session *sess);
+SRD_PRIV int workers_send(struct srd_session *sess,
+		uint64_t abs_start_samplenum, uint64_t abs_end_samplenum,
+		const uint8_t *inbuf, uint64_t inbuflen, uint64_t unitsize);
+SRD_PRIV int workers_samplerate_set(struct srd_session *sess);
+SRD_PRIV int workers_reset(struct srd_session *sess);
+SRD_PRIV int worker_new(struct srd_session *sess, struct srd_decoder_inst *di,
+		const struct worker_segment *seg, struct worker **worker);
+SRD_PRIV void worker_free(struct worker *w);
+SRD_PRIV int worker_send(struct worker *w, uint64_t abs_start_samplenum,
+		const uint8_t *inbuf, uint64_t num_samples, uint64_t unitsize,
+		uint64_t *sent);
+SRD_PRIV gboolean worker_reply_run(struct srd_session *sess,
+		struct worker *w, int *ret);
+SRD_PRIV void worker_stats_add(const struct worker *w);
+/* Only for the sigrokdecode-worker program, not part of the API. */
+SRD_API int srd_worker_main(int argc, char **argv);
 
 /* instance.c */
 SRD_PRIV int srd_inst_start(struct srd_decoder_inst *di);
 SRD_PRIV void match_array_free(struct srd_decoder_inst *di);
+SRD_PRIV void match_array_clear(struct srd_decoder_inst *di);
 SRD_PRIV void condition_list_free(struct srd_decoder_inst *di);
+SRD_PRIV struct srd_cond_cache *condition_cache_begin(struct srd_decoder_inst *di);
+SRD_PRIV void condition_cache_apply(struct srd_decoder_inst *di);
 SRD_PRIV int srd_inst_decode(struct srd_decoder_inst *di,
 		uint64_t abs_start_samplenum, uint64_t abs_end_samplenum,
 		const uint8_t *inbuf, uint64_t inbuflen, uint64_t unitsize);
+SRD_PRIV int srd_inst_decode_start(struct srd_decoder_inst *di,
+		uint64_t abs_start_samplenum, uint64_t abs_end_samplenum,
+		const uint8_t *inbuf, uint64_t inbuflen, uint64_t unitsize);
+SRD_PRIV int srd_inst_decode_wait(struct srd_decoder_inst *di);
 SRD_PRIV int process_samples_until_condition_match(struct srd_decoder_inst *di, gboolean *found_match);
+SRD_PRIV void srd_inst_samples_skip(struct srd_decoder_inst *di,
+		uint64_t samplenum);
+SRD_PRIV void srd_inst_stats_python_stop(struct srd_decoder_inst *di);
+SRD_PRIV void srd_inst_checkpoint_add(struct srd_decoder_inst *di);
+SRD_PRIV void srd_inst_checkpoints_clear(struct srd_decoder_inst *di);
+SRD_PRIV uint64_t srd_inst_resume(struct srd_decoder_inst *di,
+		uint64_t samplenum);
+SRD_PRIV void srd_inst_start_at(struct srd_decoder_inst *di,
+		uint64_t samplenum, const uint8_t *sample);
 SRD_PRIV int srd_inst_terminate_reset(struct srd_decoder_inst *di);
 SRD_PRIV void srd_inst_free(struct srd_decoder_inst *di);
 SRD_PRIV void srd_inst_free_all(struct srd_session *sess);
+SRD_PRIV gboolean srd_inst_ann_batch_add(struct srd_decoder_inst *di,
+		const struct srd_proto_data *pdata);
+SRD_PRIV void srd_inst_ann_batch_flush(struct srd_decoder_inst *di);
+SRD_PRIV struct srd_bin_block *srd_inst_bin_block_add(
+		struct srd_decoder_inst *di, const struct srd_proto_data *pdata);
+SRD_PRIV void srd_inst_bin_block_flush(struct srd_decoder_inst *di,
+		struct srd_bin_block *block);
+SRD_PRIV void srd_inst_py_batch_flush(struct srd_decoder_inst *di);
+SRD_PRIV void srd_inst_output_flush_all(struct srd_session *sess);
 
 /* log.c */
 #if defined(G_OS_WIN32) && (__GNUC__ > 4 || (__GNUC__ == 4 && __GNUC_MINOR__ >= 4))
@@ -106,6 +437,7 @@ SRD_PRIV int srd_log(int loglevel, const char *format, ...) G_GNUC_PRINTF(2, 3);
 
 /* decoder.c */
 SRD_PRIV long srd_decoder_apiver(const struct srd_decoder *d);
+SRD_PRIV int srd_decoder_import(struct srd_decoder *dec);
 
 /* type_decoder.c */
 SRD_PRIV PyObject *srd_Decoder_type_new(void);
@@ -29,6 +29,9 @@ extern "C" {
 #endif
 
 struct srd_session;
+struct srd_cond_matcher;
+struct srd_cond_cache;
+struct srd_ann_batch;
 
 /**
  * @file
@@ -136,6 +139,16 @@ enum srd_configkey {
 	SRD_CONF_SAMPLERATE = 10000,
 };
 
+/** How the system should page in sample files, see srd_session_send_file(). */
+enum srd_input_advice {
+	/** No hints, the system's default read-ahead. */
+	SRD_INPUT_NORMAL,
+	/** The file gets read from start to end, read ahead aggressively. */
+	SRD_INPUT_SEQUENTIAL,
+	/** Page in each window completely before it gets decoded. */
+	SRD_INPUT_WILLNEED,
+};
+
 struct srd_decoder {
 	/** The decoder ID. Must be non-NULL and unique for all decoders. */
 	char *id;
@@ -232,6 +245,43 @@ struct srd_decoder_annotation_row {
 	GSList *ann_classes;
 };
 
+/** Counters of a decoder instance, see srd_inst_stats_get(). */
+struct srd_inst_stats {
+	/** Number of wait() and wait_block() calls. */
+	uint64_t wait_calls;
+	/** Number of wait() and wait_block() calls which returned. */
+	uint64_t matches;
+	/** Number of samples which were checked against conditions. */
+	uint64_t samples_scanned;
+	/** Number of put() calls, per output type (enum srd_output_type). */
+	uint64_t puts[SRD_OUTPUT_META + 1];
+	/** Number of bytes which put() passed on binary outputs. */
+	uint64_t binary_bytes;
+	/** Time spent checking samples against conditions (microseconds). */
+	uint64_t match_time_us;
+	/**
+	 * Time spent in the decoder's Python code, including output
+	 * callbacks and decoders stacked on top (microseconds).
+	 */
+	uint64_t python_time_us;
+};
+
+/** Counters of a session, see srd_session_stats_get(). */
+struct srd_session_stats {
+	/**
+	 * Number of chunks which the decoder stacks have processed.
+	 * samples / chunks is their average size.
+	 */
+	uint64_t chunks;
+	/** Number of samples in these chunks. */
+	uint64_t samples;
+	/**
+	 * Number of chunks which the frontend has sent, see
+	 * srd_session_send_coalesce_set().
+	 */
+	uint64_t input_chunks;
+};
+
 struct srd_decoder_inst {
 	struct srd_decoder *decoder;
 	struct srd_session *sess;
@@ -286,6 +336,38 @@ struct srd_decoder_inst {
 	GCond got_new_samples_cond;
 	GCond handled_all_samples_cond;
 	GMutex data_mutex;
+
+	/*
+	 * New members go below, so that the offsets of the ones above
+	 * stay the same for frontends built against older headers.
+	 */
+
+	/** Bound method which receives the output of lower decoders. */
+	void *py_decode;
+
+	/** Output of lower decoders which waits for decode_batch(). */
+	void *py_batch;
+
+	/** Bit mask representation of the condition list (if possible). */
+	struct srd_cond_matcher *cond_matcher;
+
+	/** Previously used condition lists, for reuse by wait(). */
+	struct srd_cond_cache *cond_cache;
+
+	/** Annotations which wait for the batch callback. */
+	struct srd_ann_batch *ann_batch;
+
+	/** Binary output which gets coalesced into larger blocks. */
+	GSList *bin_blocks;
+
+	/** Performance counters. */
+	struct srd_inst_stats stats;
+
+	/** When the decoder's Python code last got control (or 0). */
+	int64_t stats_py_since;
+
+	/** Points where decoding can resume, see srd_session_seek(). */
+	GArray *checkpoints;
 };
 
 struct srd_pd_output {
@@ -324,6 +406,16 @@ struct srd_pd_callback {
 	void *cb_data;
 };
 
+typedef void (*srd_pd_output_batch_callback)(struct srd_proto_data *pdata,
+					unsigned int count, void *cb_data);
+
+struct srd_pd_batch_callback {
+	int output_type;
+	srd_pd_output_batch_callback cb;
+	void *cb_data;
+	unsigned int max_count;
+};
+
 /* srd.c */
 SRD_API int srd_init(const char *path);
 SRD_API int srd_exit(void);
@@ -337,10 +429,42 @@ SRD_API int srd_session_metadata_set(struct srd_session *sess, int key,
 SRD_API int srd_session_send(struct srd_session *sess,
 		uint64_t abs_start_samplenum, uint64_t abs_end_samplenum,
 		const uint8_t *inbuf, uint64_t inbuflen, uint64_t unitsize);
+SRD_API int srd_session_send_bytes(struct srd_session *sess,
+		uint64_t abs_start_samplenum, uint64_t abs_end_samplenum,
+		GBytes *data, uint64_t unitsize);
+SRD_API int srd_session_send_fd(struct srd_session *sess, int fd,
+		uint64_t abs_start_samplenum, uint64_t unitsize,
+		uint64_t window_samples, int advice);
+SRD_API int srd_session_send_file(struct srd_session *sess, const char *path,
+		uint64_t abs_start_samplenum, uint64_t unitsize,
+		uint64_t window_samples, int advice);
+SRD_API int srd_session_send_queue_set(struct srd_session *sess,
+		unsigned int max_chunks);
+SRD_API int srd_session_send_coalesce_set(struct srd_session *sess,
+		uint64_t window_size, unsigned int max_chunks);
+SRD_API int srd_session_flush(struct srd_session *sess);
+SRD_API int srd_session_parallel_set(struct srd_session *sess,
+		gboolean parallel);
+SRD_API int srd_session_binary_coalesce_set(struct srd_session *sess,
+		uint64_t block_size);
+SRD_API int srd_session_isolation_set(struct srd_session *sess,
+		gboolean isolation);
+SRD_API int srd_session_stats_get(struct srd_session *sess,
+		struct srd_session_stats *stats);
+SRD_API int srd_session_checkpoint_interval_set(struct srd_session *sess,
+		uint64_t interval);
+SRD_API int srd_session_seek(struct srd_session *sess, uint64_t samplenum,
+		uint64_t *resume_samplenum);
+SRD_API int srd_session_send_split(struct srd_session *sess,
+		const uint8_t *inbuf, uint64_t inbuflen, uint64_t unitsize,
+		unsigned int num_segments);
 SRD_API int srd_session_terminate_reset(struct srd_session *sess);
 SRD_API int srd_session_destroy(struct srd_session *sess);
 SRD_API int srd_pd_output_callback_add(struct srd_session *sess,
 		int output_type, srd_pd_output_callback cb, void *cb_data);
+SRD_API int srd_pd_output_batch_callback_add(struct srd_session *sess,
+		int output_type, srd_pd_output_batch_callback cb, void *cb_data,
+		unsigned int max_count);
 
 /* decoder.c */
 SRD_API const GSList *srd_decoder_list(void);
@@ -350,6 +474,7 @@ SRD_API char *srd_decoder_doc_get(const struct srd_decoder *dec);
 SRD_API int srd_decoder_unload(struct srd_decoder *dec);
 SRD_API int srd_decoder_load_all(void);
 SRD_API int srd_decoder_unload_all(void);
+SRD_API int srd_decoder_index_set(const char *path);
 
 /* instance.c */
 SRD_API int srd_inst_option_set(struct srd_decoder_inst *di,
@@ -362,6 +487,8 @@ SRD_API int srd_inst_stack(struct srd_session *sess,
 		struct srd_decoder_inst *di_from, struct srd_decoder_inst *di_to);
 SRD_API struct srd_decoder_inst *srd_inst_find_by_id(struct srd_session *sess,
 		const char *inst_id);
+SRD_API int srd_inst_stats_get(const struct srd_decoder_inst *di,
+		struct srd_inst_stats *stats);
 SRD_API int srd_inst_initial_pins_set_all(struct srd_decoder_inst *di,
 		GArray *initial_pins);
 
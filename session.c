@@ -23,6 +23,7 @@
 #include "libsigrokdecode.h"
 #include <inttypes.h>
 #include <glib.h>
+#include <string.h>
 
 /**
  * @file
@@ -43,6 +44,12 @@
 SRD_PRIV GSList *sessions = NULL;
 SRD_PRIV int max_session_id = -1;
 
+/* Default number of chunks which srd_session_send_bytes() can queue. */
+#define SEND_QUEUE_MAX_DEFAULT 4
+
+/* Default number of annotations per batch of the batch callback. */
+#define ANN_BATCH_MAX_DEFAULT 256
+
 /** @endcond */
 
 /**
@@ -66,6 +73,32 @@ SRD_API int srd_session_new(struct srd_session **sess)
 	*sess = g_malloc(sizeof(struct srd_session));
 	(*sess)->session_id = ++max_session_id;
 	(*sess)->di_list = (*sess)->callbacks = NULL;
+	(*sess)->ann_batch_cb = NULL;
+	(*sess)->bin_block_size = 0;
+	memset(&(*sess)->stats, 0, sizeof((*sess)->stats));
+	(*sess)->edge_index = NULL;
+	(*sess)->planes = NULL;
+	(*sess)->chunk_inbuf = NULL;
+	g_mutex_init(&(*sess)->chunk_mutex);
+	(*sess)->samplerate = 0;
+	(*sess)->checkpoint_interval = 0;
+	(*sess)->num_outputs = 0;
+	(*sess)->parallel = FALSE;
+	(*sess)->coalesce_size = 0;
+	(*sess)->coalesce_max_chunks = 0;
+	(*sess)->coalesce_buf = NULL;
+	(*sess)->coalesce_chunks = 0;
+	(*sess)->isolation = FALSE;
+	(*sess)->workers = NULL;
+	g_mutex_init(&(*sess)->callback_mutex);
+	(*sess)->send_queue = g_queue_new();
+	(*sess)->send_queue_max = SEND_QUEUE_MAX_DEFAULT;
+	(*sess)->send_thread = NULL;
+	g_mutex_init(&(*sess)->send_mutex);
+	g_cond_init(&(*sess)->send_cond);
+	(*sess)->send_busy = FALSE;
+	(*sess)->send_quit = FALSE;
+	(*sess)->send_error = SRD_OK;
 
 	/* Keep a list of all sessions, so we can clean up as needed. */
 	sessions = g_slist_append(sessions, *sess);
@@ -109,7 +142,8 @@ SRD_API int srd_session_start(struct srd_session *sess)
 	return ret;
 }
 
-static int srd_inst_send_meta(struct srd_decoder_inst *di, int key,
+/** @private */
+SRD_PRIV int srd_inst_send_meta(struct srd_decoder_inst *di, int key,
 		GVariant *data)
 {
 	PyObject *py_ret;
@@ -189,18 +223,435 @@ SRD_API int srd_session_metadata_set(struct srd_session *sess, int key,
 
 	srd_dbg("Setting session %d samplerate to %"G_GUINT64_FORMAT".",
 			sess->session_id, g_variant_get_uint64(data));
+	sess->samplerate = g_variant_get_uint64(data);
 
 	ret = SRD_OK;
 	for (l = sess->di_list; l; l = l->next) {
 		if ((ret = srd_inst_send_meta(l->data, key, data)) != SRD_OK)
 			break;
 	}
+	if (ret == SRD_OK && sess->workers)
+		ret = workers_samplerate_set(sess);
 
 	g_variant_unref(data);
 
 	return ret;
 }
 
+/*
+ * Channels which change more often than once per this many samples
+ * don't get indexed, scanning their samples is cheaper.
+ */
+#define EDGE_INDEX_MIN_SPACING 8
+
+static void edge_index_free(struct srd_edge_index *idx)
+{
+	unsigned int ch;
+
+	if (!idx)
+		return;
+
+	for (ch = 0; ch < G_N_ELEMENTS(idx->edges); ch++) {
+		if (idx->edges[ch])
+			g_array_free(idx->edges[ch], TRUE);
+	}
+	g_free(idx);
+}
+
+/*
+ * Record the sample offsets of a chunk where any of the leading 64
+ * channels changes. Bits are numbered like the decoders' channel map
+ * (byte offset * 8 + bit offset). A chunk is scanned just once, all
+ * decoder instances of the session share the result. For wide samples
+ * the session's packed channels get indexed instead.
+ */
+static void edge_index_update(struct srd_session *sess,
+		uint64_t abs_start_samplenum, const uint8_t *inbuf,
+		uint64_t inbuflen, uint64_t unitsize)
+{
+	struct srd_edge_index *idx;
+	const uint8_t *data, *pos, *prev;
+	uint64_t num_samples, limit, bit, i, block, stride;
+	unsigned int num_bytes, num_channels, ch, k;
+	uint32_t offset;
+	uint8_t diff;
+
+	if (!sess->edge_index)
+		sess->edge_index = g_malloc0(sizeof(*sess->edge_index));
+	idx = sess->edge_index;
+	idx->valid = FALSE;
+
+	num_samples = inbuflen / unitsize;
+	if (num_samples < 2 || num_samples > G_MAXUINT32)
+		return;
+
+	if (sess->planes && sess->planes->valid) {
+		data = (const uint8_t *)sess->planes->words->data;
+		stride = sizeof(uint64_t);
+		idx->packed = TRUE;
+	} else {
+		data = inbuf;
+		stride = unitsize;
+		idx->packed = FALSE;
+	}
+
+	num_bytes = MIN(stride, sizeof(uint64_t));
+	num_channels = num_bytes * 8;
+	limit = num_samples / EDGE_INDEX_MIN_SPACING;
+
+	idx->inbuf = inbuf;
+	idx->abs_start_samplenum = abs_start_samplenum;
+	idx->num_samples = num_samples;
+	idx->unitsize = unitsize;
+	idx->indexed_mask = 0;
+	for (ch = 0; ch < num_channels; ch++) {
+		if (!idx->edges[ch])
+			idx->edges[ch] = g_array_new(FALSE, FALSE, sizeof(uint32_t));
+		g_array_set_size(idx->edges[ch], 0);
+		idx->indexed_mask |= (uint64_t)1 << ch;
+	}
+
+	/* Compare blocks of samples with their predecessors at once. */
+	block = stride <= 8 ? 64 / stride : 0;
+
+	for (i = 1; i < num_samples && idx->indexed_mask; i++) {
+		pos = data + i * stride;
+		prev = pos - stride;
+		if (block && num_samples - i >= block &&
+		    memcmp(pos, prev, block * stride) == 0) {
+			i += block - 1;
+			continue;
+		}
+		for (k = 0; k < num_bytes; k++) {
+			diff = pos[k] ^ prev[k];
+			while (diff) {
+				ch = k * 8 + g_bit_nth_lsf(diff, -1);
+				diff &= diff - 1;
+				bit = (uint64_t)1 << ch;
+				if (!(idx->indexed_mask & bit))
+					continue;
+				if (idx->edges[ch]->len >= limit) {
+					/* Too many changes, don't index. */
+					idx->indexed_mask &= ~bit;
+					continue;
+				}
+				offset = i;
+				g_array_append_val(idx->edges[ch], offset);
+			}
+		}
+	}
+
+	idx->valid = TRUE;
+}
+
+static void sample_planes_free(struct srd_sample_planes *planes)
+{
+	if (!planes)
+		return;
+
+	g_free(planes->lut);
+	if (planes->words)
+		g_array_free(planes->words, TRUE);
+	g_free(planes);
+}
+
+/*
+ * Collect the (sorted, unique) input channels which the session's
+ * decoder instances reference. Returns the number of channels, or -1
+ * when there are more than 64 of them.
+ */
+static int sample_planes_channels(const struct srd_session *sess,
+		uint64_t unitsize, int *channels)
+{
+	const struct srd_decoder_inst *di;
+	const GSList *l;
+	int i, k, n, in_ch;
+
+	n = 0;
+	for (l = sess->di_list; l; l = l->next) {
+		di = l->data;
+		for (i = 0; i < di->dec_num_channels; i++) {
+			in_ch = di->dec_channelmap[i];
+			if (in_ch < 0 || (uint64_t)in_ch >= unitsize * 8)
+				continue;
+			for (k = n; k > 0 && channels[k - 1] > in_ch; k--)
+				;
+			if (k > 0 && channels[k - 1] == in_ch)
+				continue;
+			if (n == 64)
+				return -1;
+			memmove(&channels[k + 1], &channels[k],
+				(n - k) * sizeof(channels[0]));
+			channels[k] = in_ch;
+			n++;
+		}
+	}
+
+	return n;
+}
+
+/* Setup the byte lookup tables for a new set of packed channels. */
+static void sample_planes_layout(struct srd_sample_planes *planes,
+		const int *channels, int num_channels)
+{
+	uint64_t *lut;
+	unsigned int b, v;
+	int k;
+
+	planes->layout++;
+	planes->num_channels = num_channels;
+	memcpy(planes->channels, channels, num_channels * sizeof(channels[0]));
+
+	planes->num_bytes = 0;
+	for (k = 0; k < num_channels; k++) {
+		b = channels[k] / 8;
+		if (planes->num_bytes && planes->byte_pos[planes->num_bytes - 1] == b)
+			continue;
+		planes->byte_pos[planes->num_bytes++] = b;
+	}
+
+	g_free(planes->lut);
+	planes->lut = g_malloc0(planes->num_bytes * 256 * sizeof(uint64_t));
+	for (b = 0, k = 0; b < planes->num_bytes; b++) {
+		lut = &planes->lut[b * 256];
+		for (; k < num_channels && channels[k] / 8 == (int)planes->byte_pos[b]; k++) {
+			for (v = 0; v < 256; v++) {
+				if (v & (1 << (channels[k] % 8)))
+					lut[v] |= (uint64_t)1 << k;
+			}
+		}
+	}
+}
+
+/*
+ * Pack the referenced channels of a chunk of wide samples into one word
+ * per sample. This extracts each channel just once, regardless of the
+ * number of decoder instances which use it. Narrower samples need no
+ * such step, decoders match on the sample data directly.
+ */
+static void sample_planes_update(struct srd_session *sess,
+		uint64_t abs_start_samplenum, const uint8_t *inbuf,
+		uint64_t inbuflen, uint64_t unitsize)
+{
+	struct srd_sample_planes *planes;
+	int channels[64], num_channels;
+	const uint8_t *pos;
+	uint64_t num_samples, i, word, *out;
+	unsigned int b;
+
+	if (sess->planes)
+		sess->planes->valid = FALSE;
+	if (unitsize <= sizeof(uint64_t))
+		return;
+
+	num_channels = sample_planes_channels(sess, unitsize, channels);
+	if (num_channels < 0)
+		return;
+
+	if (!sess->planes) {
+		sess->planes = g_malloc0(sizeof(*sess->planes));
+		sess->planes->words = g_array_new(FALSE, FALSE, sizeof(uint64_t));
+	}
+	planes = sess->planes;
+	if ((unsigned int)num_channels != planes->num_channels || !planes->lut ||
+	    memcmp(channels, planes->channels, num_channels * sizeof(channels[0])))
+		sample_planes_layout(planes, channels, num_channels);
+
+	num_samples = inbuflen / unitsize;
+	g_array_set_size(planes->words, num_samples);
+	out = (uint64_t *)planes->words->data;
+	pos = inbuf;
+	for (i = 0; i < num_samples; i++, pos += unitsize) {
+		word = 0;
+		for (b = 0; b < planes->num_bytes; b++)
+			word |= planes->lut[b * 256 + pos[planes->byte_pos[b]]];
+		out[i] = word;
+	}
+
+	planes->inbuf = inbuf;
+	planes->abs_start_samplenum = abs_start_samplenum;
+	planes->unitsize = unitsize;
+	planes->valid = TRUE;
+}
+
+/* Must be called with the chunk mutex held. */
+static void chunk_planes_build(struct srd_session *sess)
+{
+	if (sess->planes_built)
+		return;
+
+	sample_planes_update(sess, sess->chunk_abs_start_samplenum,
+		sess->chunk_inbuf, sess->chunk_inbuflen, sess->chunk_unitsize);
+	sess->planes_built = TRUE;
+}
+
+/**
+ * Get the packed channels of the chunk which the decoder stacks are
+ * processing, build them upon the first call for a chunk.
+ *
+ * Decoder instances of concurrently running stacks can call this.
+ *
+ * @param sess The session to use. Must not be NULL.
+ *
+ * @return The session's packed channels. Callers check whether they
+ *         are valid and cover their chunk, they are not for narrow
+ *         samples. NULL when there are none.
+ *
+ * @private
+ */
+SRD_PRIV const struct srd_sample_planes *srd_session_planes_get(
+		struct srd_session *sess)
+{
+	g_mutex_lock(&sess->chunk_mutex);
+	if (sess->chunk_inbuf)
+		chunk_planes_build(sess);
+	g_mutex_unlock(&sess->chunk_mutex);
+
+	return sess->planes;
+}
+
+/**
+ * Get the transition index of the chunk which the decoder stacks are
+ * processing, build it upon the first call for a chunk.
+ *
+ * Decoder instances of concurrently running stacks can call this.
+ *
+ * @param sess The session to use. Must not be NULL.
+ *
+ * @return The session's transition index. Callers check whether it is
+ *         valid and covers their chunk. NULL when there is none.
+ *
+ * @private
+ */
+SRD_PRIV const struct srd_edge_index *srd_session_edge_index_get(
+		struct srd_session *sess)
+{
+	g_mutex_lock(&sess->chunk_mutex);
+	if (sess->chunk_inbuf && !sess->edge_index_built) {
+		/* The index of wide samples covers their packed channels. */
+		chunk_planes_build(sess);
+		edge_index_update(sess, sess->chunk_abs_start_samplenum,
+			sess->chunk_inbuf, sess->chunk_inbuflen,
+			sess->chunk_unitsize);
+		sess->edge_index_built = TRUE;
+	}
+	g_mutex_unlock(&sess->chunk_mutex);
+
+	return sess->edge_index;
+}
+
+/*
+ * Instances which srd_session_seek() resumed from a checkpoint can be
+ * ahead of the chunk. Narrow the chunk down to the samples which the
+ * instance still needs, returns FALSE if it needs none of them.
+ */
+static gboolean inst_chunk_get(const struct srd_decoder_inst *di,
+		uint64_t *start, uint64_t end, const uint8_t **buf,
+		uint64_t *len, uint64_t unitsize)
+{
+	uint64_t skip;
+
+	if (di->abs_cur_samplenum <= *start || !*buf || !unitsize)
+		return TRUE;
+	if (di->abs_cur_samplenum >= end)
+		return FALSE;
+
+	skip = di->abs_cur_samplenum - *start;
+	*start += skip;
+	*buf += skip * unitsize;
+	*len -= skip * unitsize;
+
+	return TRUE;
+}
+
+/**
+ * Have the decoder stacks process one chunk, see srd_session_send().
+ *
+ * @private
+ */
+SRD_PRIV int session_send_chunk(struct srd_session *sess,
+		uint64_t abs_start_samplenum, uint64_t abs_end_samplenum,
+		const uint8_t *inbuf, uint64_t inbuflen, uint64_t unitsize)
+{
+	GSList *d, *l, *started;
+	const uint8_t *buf;
+	uint64_t start, len;
+	int ret, wait_ret;
+
+	if (sess->isolation) {
+		ret = workers_send(sess, abs_start_samplenum,
+			abs_end_samplenum, inbuf, inbuflen, unitsize);
+		sess->stats.chunks++;
+		sess->stats.samples += abs_end_samplenum - abs_start_samplenum;
+		srd_inst_output_flush_all(sess);
+		return ret;
+	}
+
+	/* The index and packed channels get built when instances need them. */
+	if (inbuf && unitsize) {
+		sess->chunk_inbuf = inbuf;
+		sess->chunk_abs_start_samplenum = abs_start_samplenum;
+		sess->chunk_inbuflen = inbuflen;
+		sess->chunk_unitsize = unitsize;
+		sess->edge_index_built = FALSE;
+		sess->planes_built = FALSE;
+	}
+
+	ret = SRD_OK;
+	if (sess->parallel) {
+		/* Have all stacks run, then wait for all of them. */
+		started = NULL;
+		for (d = sess->di_list; d; d = d->next) {
+			start = abs_start_samplenum;
+			buf = inbuf;
+			len = inbuflen;
+			if (!inst_chunk_get(d->data, &start, abs_end_samplenum,
+					&buf, &len, unitsize))
+				continue;
+			if ((ret = srd_inst_decode_start(d->data, start,
+					abs_end_samplenum, buf, len,
+					unitsize)) != SRD_OK)
+				break;
+			started = g_slist_prepend(started, d->data);
+		}
+		for (l = started; l; l = l->next) {
+			wait_ret = srd_inst_decode_wait(l->data);
+			if (ret == SRD_OK)
+				ret = wait_ret;
+		}
+		g_slist_free(started);
+	} else {
+		for (d = sess->di_list; d; d = d->next) {
+			start = abs_start_samplenum;
+			buf = inbuf;
+			len = inbuflen;
+			if (!inst_chunk_get(d->data, &start, abs_end_samplenum,
+					&buf, &len, unitsize))
+				continue;
+			if ((ret = srd_inst_decode(d->data, start,
+					abs_end_samplenum, buf, len,
+					unitsize)) != SRD_OK)
+				break;
+		}
+	}
+
+	sess->stats.chunks++;
+	sess->stats.samples += abs_end_samplenum - abs_start_samplenum;
+
+	/* Batched and coalesced output gets delivered after each chunk. */
+	srd_inst_output_flush_all(sess);
+
+	/* The index must not outlive the caller's sample data. */
+	sess->chunk_inbuf = NULL;
+	if (sess->edge_index)
+		sess->edge_index->valid = FALSE;
+	if (sess->planes)
+		sess->planes->valid = FALSE;
+
+	return ret;
+}
+
+
 /**
  * Send a chunk of logic sample data to a running decoder session.
  *
@@ -215,7 +666,8 @@ SRD_API int srd_session_metadata_set(struct srd_session *sess, int key,
  * The calls to this function must provide the samples that shall be
  * used by the protocol decoder
  *  - in the correct order ([...]5, 6, 4, 7, 8[...] is a bug),
- *  - starting from sample zero (2, 3, 4, 5, 6[...] is a bug),
+ *  - starting from sample zero (2, 3, 4, 5, 6[...] is a bug), or from the
+ *    sample returned by srd_session_seek(),
  *  - consecutively, with no gaps (0, 1, 2, 4, 5[...] is a bug).
  *
  * The start- and end-sample numbers are absolute sample numbers (relative
@@ -263,21 +715,130 @@ SRD_API int srd_session_send(struct srd_session *sess,
 		uint64_t abs_start_samplenum, uint64_t abs_end_samplenum,
 		const uint8_t *inbuf, uint64_t inbuflen, uint64_t unitsize)
 {
-	GSList *d;
 	int ret;
 
 	if (!sess)
 		return SRD_ERR_ARG;
 
-	for (d = sess->di_list; d; d = d->next) {
-		if ((ret = srd_inst_decode(d->data, abs_start_samplenum,
-				abs_end_samplenum, inbuf, inbuflen, unitsize)) != SRD_OK)
-			return ret;
-	}
+	/* Keep the order of previously queued chunks. */
+	if ((ret = send_queue_wait(sess)) != SRD_OK)
+		return ret;
+
+	return session_send_input(sess, abs_start_samplenum,
+		abs_end_samplenum, inbuf, inbuflen, unitsize);
+}
+
+
+/**
+ * Have the decoder stacks of a session process sample data in parallel.
+ *
+ * By default srd_session_send() passes a chunk of samples to one decoder
+ * stack after the other, and waits for each of them to finish. When
+ * parallel decoding is enabled, all stacks get the chunk at the same
+ * time, and srd_session_send() waits until all of them are done.
+ * Independent stacks can then overlap on hosts with multiple CPU cores.
+ * Decoders hold the Python interpreter lock while they execute Python
+ * code, but release it while they scan sample data for the conditions
+ * of their wait() calls.
+ *
+ * The output callbacks get invoked from the stacks' threads, never at
+ * the same time. Output of different stacks may interleave differently
+ * than with sequential decoding.
+ *
+ * This should be set before sending sample data to the session.
+ *
+ * @param sess The session to configure. Must not be NULL.
+ * @param parallel TRUE to enable parallel decoding, FALSE to disable it.
+ *
+ * @return SRD_OK upon success, a (negative) error code otherwise.
+ *
+ * @since 0.6.0
+ */
+SRD_API int srd_session_parallel_set(struct srd_session *sess,
+		gboolean parallel)
+{
+	if (!sess)
+		return SRD_ERR_ARG;
+
+	srd_dbg("%s parallel decoding in session %d.",
+		parallel ? "Enabling" : "Disabling", sess->session_id);
+
+	sess->parallel = parallel ? TRUE : FALSE;
+
+	return SRD_OK;
+}
+
+/**
+ * Have the binary output of a session's decoders coalesced into blocks.
+ *
+ * By default every put() of binary data by a decoder invokes the
+ * SRD_OUTPUT_BINARY callback. With coalescing enabled, the data of
+ * consecutive put() calls for the same output and binary class gets
+ * appended into a block of up to 'block_size' bytes, and the callback
+ * receives the block. The block spans the sample range from the first
+ * to the last of the put() calls. Single put() calls which are larger
+ * than a block are passed in one piece.
+ *
+ * Each decoder instance keeps one block per output and binary class.
+ * A block gets passed when it is full, at the end of each chunk which
+ * srd_session_send() processes, and when the session gets terminated.
+ * Within one output and binary class the data keeps its order. Across
+ * classes it doesn't: a block of one class can reach the frontend after
+ * blocks of other classes, which hold data that the decoder has put
+ * later (e.g. uart's RX and RXTX dumps). Coalesced binary data likewise
+ * reaches the frontend later than other output which the decoder has
+ * put after it.
+ *
+ * @param sess The session to configure. Must not be NULL.
+ * @param block_size The maximum number of bytes of a block, or 0 to
+ *                   pass binary data as it is put. Must not exceed
+ *                   4 GiB.
+ *
+ * @return SRD_OK upon success, a (negative) error code otherwise.
+ *
+ * @since 0.6.0
+ */
+SRD_API int srd_session_binary_coalesce_set(struct srd_session *sess,
+		uint64_t block_size)
+{
+	if (!sess || block_size > G_MAXUINT32)
+		return SRD_ERR_ARG;
+
+	srd_dbg("Coalescing binary output of session %d into %" PRIu64
+		" byte blocks.", sess->session_id, block_size);
+
+	sess->bin_block_size = block_size;
+
+	return SRD_OK;
+}
+
+/**
+ * Get the performance counters of a session.
+ *
+ * The counters get updated while chunks are decoded, read them between
+ * calls to srd_session_send() (or after srd_session_flush()) for
+ * consistent values. See srd_inst_stats_get() for the counters of the
+ * session's decoder instances.
+ *
+ * @param sess The session to use. Must not be NULL.
+ * @param stats Receives the counters. Must not be NULL.
+ *
+ * @return SRD_OK upon success, a (negative) error code otherwise.
+ *
+ * @since 0.6.0
+ */
+SRD_API int srd_session_stats_get(struct srd_session *sess,
+		struct srd_session_stats *stats)
+{
+	if (!sess || !stats)
+		return SRD_ERR_ARG;
+
+	*stats = sess->stats;
 
 	return SRD_OK;
 }
 
+
 /**
  * Terminate currently executing decoders in a session, reset internal state.
  *
@@ -308,10 +869,19 @@ SRD_API int srd_session_terminate_reset(struct srd_session *sess)
 	if (!sess)
 		return SRD_ERR_ARG;
 
+	/* Queued chunks belong to the input which is being abandoned. */
+	send_thread_stop(sess);
+	coalesced_drop(sess);
+
+	if (sess->workers && (ret = workers_reset(sess)) != SRD_OK)
+		return ret;
+
 	for (d = sess->di_list; d; d = d->next) {
 		ret = srd_inst_terminate_reset(d->data);
 		if (ret != SRD_OK)
 			return ret;
+		/* Checkpoints belong to the abandoned input, too. */
+		srd_inst_checkpoints_clear(d->data);
 	}
 
 	return SRD_OK;
@@ -336,10 +906,22 @@ SRD_API int srd_session_destroy(struct srd_session *sess)
 		return SRD_ERR_ARG;
 
 	session_id = sess->session_id;
+	send_thread_stop(sess);
+	workers_stop(sess);
+	if (sess->coalesce_buf)
+		g_byte_array_free(sess->coalesce_buf, TRUE);
+	g_queue_free(sess->send_queue);
+	g_mutex_clear(&sess->send_mutex);
+	g_cond_clear(&sess->send_cond);
 	if (sess->di_list)
 		srd_inst_free_all(sess);
 	if (sess->callbacks)
 		g_slist_free_full(sess->callbacks, g_free);
+	g_free(sess->ann_batch_cb);
+	edge_index_free(sess->edge_index);
+	sample_planes_free(sess->planes);
+	g_mutex_clear(&sess->chunk_mutex);
+	g_mutex_clear(&sess->callback_mutex);
 	sessions = g_slist_remove(sessions, sess);
 	g_free(sess);
 
@@ -384,6 +966,57 @@ SRD_API int srd_pd_output_callback_add(struct srd_session *sess,
 	return SRD_OK;
 }
 
+/**
+ * Register/add a decoder output callback function which receives
+ * annotations in batches.
+ *
+ * Instead of being passed one by one, the annotations of a decoder
+ * instance are collected and passed in an array. A batch gets passed
+ * when it holds 'max_count' annotations, and at the end of each chunk
+ * of samples which srd_session_send() processes. Within a batch, the
+ * annotations are in the order in which the decoder instance put them.
+ *
+ * The annotations and their texts are only valid during the call.
+ * Callbacks which have been registered with srd_pd_output_callback_add()
+ * keep receiving every annotation as it is put.
+ *
+ * @param sess The output session in which to register the callback.
+ *             Must not be NULL.
+ * @param output_type The output type this callback will receive. Only
+ *                    SRD_OUTPUT_ANN is supported. A callback which has
+ *                    been registered before gets replaced.
+ * @param cb The function to call. Must not be NULL.
+ * @param cb_data Private data for the callback function. Can be NULL.
+ * @param max_count The maximum number of annotations per batch,
+ *                  or 0 for the default.
+ *
+ * @return SRD_OK upon success, a (negative) error code otherwise.
+ *
+ * @since 0.6.0
+ */
+SRD_API int srd_pd_output_batch_callback_add(struct srd_session *sess,
+		int output_type, srd_pd_output_batch_callback cb, void *cb_data,
+		unsigned int max_count)
+{
+	struct srd_pd_batch_callback *pd_cb;
+
+	if (!sess || !cb || output_type != SRD_OUTPUT_ANN)
+		return SRD_ERR_ARG;
+
+	srd_dbg("Registering new batch callback for output type %s.",
+		output_type_name(output_type));
+
+	pd_cb = g_malloc(sizeof(struct srd_pd_batch_callback));
+	pd_cb->output_type = output_type;
+	pd_cb->cb = cb;
+	pd_cb->cb_data = cb_data;
+	pd_cb->max_count = max_count ? max_count : ANN_BATCH_MAX_DEFAULT;
+	g_free(sess->ann_batch_cb);
+	sess->ann_batch_cb = pd_cb;
+
+	return SRD_OK;
+}
+
 /** @private */
 SRD_PRIV struct srd_pd_callback *srd_pd_output_callback_find(
 		struct srd_session *sess, int output_type)
@@ -406,4 +1039,57 @@ SRD_PRIV struct srd_pd_callback *srd_pd_output_callback_find(
 	return pd_cb;
 }
 
+/**
+ * Pass decoder output to a frontend callback.
+ *
+ * Callbacks don't run concurrently, even when the session's decoder
+ * stacks run in parallel.
+ *
+ * Must be called without holding the Python GIL. The callback mutex is
+ * always taken first, and SRD_OUTPUT_PYTHON callbacks get the GIL after
+ * it, so that stacks which run in parallel can't deadlock.
+ *
+ * @private
+ */
+SRD_PRIV void srd_pd_output_callback_run(struct srd_session *sess,
+		struct srd_pd_callback *cb, struct srd_proto_data *pdata)
+{
+	PyGILState_STATE gstate;
+	gboolean serialize;
+
+	serialize = sess->parallel;
+	if (serialize)
+		g_mutex_lock(&sess->callback_mutex);
+	if (cb->output_type == SRD_OUTPUT_PYTHON) {
+		gstate = PyGILState_Ensure();
+		cb->cb(pdata, cb->cb_data);
+		PyGILState_Release(gstate);
+	} else {
+		cb->cb(pdata, cb->cb_data);
+	}
+	sess->num_outputs++;
+	if (serialize)
+		g_mutex_unlock(&sess->callback_mutex);
+}
+
+/**
+ * Pass a batch of decoder output to a frontend callback.
+ *
+ * @private
+ */
+SRD_PRIV void srd_pd_output_batch_callback_run(struct srd_session *sess,
+		struct srd_pd_batch_callback *cb, struct srd_proto_data *pdata,
+		unsigned int count)
+{
+	gboolean serialize;
+
+	serialize = sess->parallel;
+	if (serialize)
+		g_mutex_lock(&sess->callback_mutex);
+	cb->cb(pdata, count, cb->cb_data);
+	sess->num_outputs += count;
+	if (serialize)
+		g_mutex_unlock(&sess->callback_mutex);
+}
+
 /** @} */
@@ -0,0 +1,611 @@
+/*
+ * This file is part of the libsigrokdecode project.
+ *
+ * Copyright (C) 2010 Uwe Hermann <uwe@hermann-uwe.de>
+ * Copyright (C) 2013 Bert Vermeulen <bert@biot.com>
+ *
+ * This program is free software: you can redistribute it and/or modify
+ * it under the terms of the GNU General Public License as published by
+ * the Free Software Foundation, either version 3 of the License, or
+ * (at your option) any later version.
+ *
+ * This program is distributed in the hope that it will be useful,
+ * but WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+ * GNU General Public License for more details.
+ *
+ * You should have received a copy of the GNU General Public License
+ * along with this program.  If not, see <http://www.gnu.org/licenses/>.
+ */
+
+#include <config.h>
+#include "libsigrokdecode-internal.h" /* First, so we avoid a _POSIX_C_SOURCE warning. */
+#include "libsigrokdecode.h"
+#include <inttypes.h>
+#include <glib.h>
+#include <string.h>
+
+/**
+ * @file
+ *
+ * Checkpoints, seeking, and decoding captures in parallel segments.
+ */
+
+/**
+ * @addtogroup grp_session
+ *
+ * @{
+ */
+
+/** @cond PRIVATE */
+
+/* Samples per chunk which split segments decode past their end. */
+#define SPLIT_OVERLAP_CHUNK 16384
+
+struct split_segment {
+	int index;
+	/* The worker process which decodes the segment, and its setup. */
+	struct worker *worker;
+	struct worker_segment ws;
+	/* The segment's samples, and how far the worker got. */
+	uint64_t start;
+	uint64_t end;
+	uint64_t pos;
+	/* The samples which the worker decodes right now. */
+	uint64_t sending;
+	/* Whether the worker decodes past the end to find its successor. */
+	gboolean overlap;
+	/* Checkpoints from past the end which were looked up so far. */
+	guint scanned;
+	/* The later segment which the output continues with, or -1. */
+	int next;
+	uint64_t sync_outputs;
+	uint64_t next_outputs;
+};
+
+struct split {
+	struct srd_session *sess;
+	const uint8_t *inbuf;
+	uint64_t num_samples;
+	uint64_t unitsize;
+	struct split_segment *segs;
+	unsigned int num_segs;
+};
+
+/** @endcond */
+
+/**
+ * Have the decoders of a session record checkpoints.
+ *
+ * A checkpoint is a sample from which a decoder can resume decoding,
+ * e.g. where the bus is idle. Decoders mark these by calling their
+ * checkpoint() method after a wait(). The session records them for
+ * the decoder instances which receive the frontend's samples, at most
+ * one per 'interval' samples, and srd_session_seek() uses them.
+ *
+ * @param sess The session to configure. Must not be NULL.
+ * @param interval The minimum number of samples between two recorded
+ *                 checkpoints of an instance, or 0 to record none.
+ *
+ * @return SRD_OK upon success, a (negative) error code otherwise.
+ *
+ * @since 0.6.0
+ */
+SRD_API int srd_session_checkpoint_interval_set(struct srd_session *sess,
+		uint64_t interval)
+{
+	if (!sess)
+		return SRD_ERR_ARG;
+
+	srd_dbg("Recording checkpoints of session %d every %" PRIu64
+		" samples.", sess->session_id, interval);
+
+	sess->checkpoint_interval = interval;
+
+	return SRD_OK;
+}
+
+/**
+ * Prepare a session to continue decoding from a checkpoint.
+ *
+ * All decoder stacks get reset and started again, as if the session had
+ * been restarted with srd_session_terminate_reset(), srd_session_start()
+ * and the last samplerate. Each stack then resumes at the last checkpoint
+ * at or before 'samplenum' which its bottom instance recorded, or at
+ * sample 0 if there is none. Stacked decoders start from scratch there.
+ *
+ * The frontend continues with srd_session_send() at the returned sample
+ * number. Stacks which resume at a later sample ignore the samples before
+ * their checkpoint. Output from between the resume point and 'samplenum'
+ * gets passed again.
+ *
+ * Checkpoints stay valid until srd_session_terminate_reset(), so a
+ * frontend can seek back and forth within a capture which was decoded
+ * (up to some point) before.
+ *
+ * @param sess The session to use. Must not be NULL.
+ * @param samplenum The absolute number of the sample to seek to.
+ * @param resume_samplenum Receives the absolute number of the sample at
+ *                         which srd_session_send() has to continue. Must
+ *                         not be NULL.
+ *
+ * @return SRD_OK upon success, a (negative) error code otherwise.
+ *
+ * @since 0.6.0
+ */
+SRD_API int srd_session_seek(struct srd_session *sess, uint64_t samplenum,
+		uint64_t *resume_samplenum)
+{
+	struct srd_decoder_inst *di;
+	GVariant *samplerate;
+	GSList *d;
+	uint64_t resume;
+	int ret;
+
+	if (!sess || !resume_samplenum)
+		return SRD_ERR_ARG;
+
+	if (sess->isolation) {
+		srd_err("Can't seek with worker processes.");
+		return SRD_ERR_ARG;
+	}
+
+	srd_dbg("Seeking session %d to sample %" PRIu64 ".",
+		sess->session_id, samplenum);
+
+	/* Queued chunks belong to the old position. */
+	send_thread_stop(sess);
+	coalesced_drop(sess);
+
+	resume = samplenum;
+	for (d = sess->di_list; d; d = d->next) {
+		di = d->data;
+		if ((ret = srd_inst_terminate_reset(di)) != SRD_OK)
+			return ret;
+		if (sess->samplerate) {
+			samplerate = g_variant_ref_sink(
+				g_variant_new_uint64(sess->samplerate));
+			ret = srd_inst_send_meta(di, SRD_CONF_SAMPLERATE,
+				samplerate);
+			g_variant_unref(samplerate);
+			if (ret != SRD_OK)
+				return ret;
+		}
+		if ((ret = srd_inst_start(di)) != SRD_OK)
+			return ret;
+		resume = MIN(resume, srd_inst_resume(di, samplenum));
+	}
+	*resume_samplenum = resume;
+
+	return SRD_OK;
+}
+
+/**
+ * Release a copy of a decoder output. Must be called with the GIL held.
+ *
+ * @private
+ */
+SRD_PRIV void split_output_free(struct split_output *out)
+{
+	switch (out->pdata.pdo->output_type) {
+	case SRD_OUTPUT_ANN:
+		g_strfreev(out->pda.ann_text);
+		break;
+	case SRD_OUTPUT_BINARY:
+		g_free((unsigned char *)out->pdb.data);
+		break;
+	case SRD_OUTPUT_META:
+		g_variant_unref(out->pdata.data);
+		break;
+	case SRD_OUTPUT_PYTHON:
+		Py_DECREF((PyObject *)out->pdata.data);
+		break;
+	}
+}
+
+/*
+ * Pass the output of a copy of a decoder instance to the session's
+ * callbacks, the way Decoder.put() does for the session's instance 'di'
+ * which was copied.
+ *
+ * @private
+ */
+SRD_PRIV void split_output_replay(struct srd_session *sess,
+		struct srd_decoder_inst *di, struct split_output *out)
+{
+	struct srd_pd_output *pdo;
+	struct srd_pd_callback *cb;
+	struct srd_proto_data pdata;
+	struct srd_bin_block *block;
+
+	pdo = g_slist_nth_data(di->pd_output, out->pdata.pdo->pdo_id);
+	pdata = out->pdata;
+	pdata.pdo = pdo;
+
+	cb = srd_pd_output_callback_find(sess, pdo->output_type);
+	switch (pdo->output_type) {
+	case SRD_OUTPUT_ANN:
+		pdata.data = &out->pda;
+		if (cb)
+			srd_pd_output_callback_run(sess, cb, &pdata);
+		if (!sess->ann_batch_cb)
+			break;
+		/* The batch takes over the annotation. */
+		if (srd_inst_ann_batch_add(di, &pdata))
+			srd_inst_ann_batch_flush(di);
+		out->pda.ann_text = NULL;
+		break;
+	case SRD_OUTPUT_BINARY:
+		if (!cb)
+			break;
+		pdata.data = &out->pdb;
+		if (!sess->bin_block_size) {
+			srd_pd_output_callback_run(sess, cb, &pdata);
+		} else if ((block = srd_inst_bin_block_add(di, &pdata))) {
+			srd_inst_bin_block_flush(di, block);
+			srd_inst_bin_block_add(di, &pdata);
+		}
+		break;
+	case SRD_OUTPUT_META:
+		if (cb)
+			srd_pd_output_callback_run(sess, cb, &pdata);
+		break;
+	case SRD_OUTPUT_PYTHON:
+		if (cb)
+			srd_pd_output_callback_run(sess, cb, &pdata);
+		break;
+	}
+}
+
+/* Release the output of a segment's copy which was kept so far. */
+static void split_outputs_clear(struct split_segment *seg)
+{
+	guint i;
+	PyGILState_STATE gstate;
+
+	gstate = PyGILState_Ensure();
+	for (i = 0; i < seg->ws.outputs->len; i++) {
+		split_output_free(&g_array_index(seg->ws.outputs,
+			struct split_output, i));
+	}
+	PyGILState_Release(gstate);
+	g_array_set_size(seg->ws.outputs, 0);
+}
+
+/*
+ * Stop the worker of a segment, and add the counters of its copies to
+ * the session's instances if 'stats' is TRUE.
+ */
+static void split_segment_stop(struct split_segment *seg, gboolean stats)
+{
+	if (!seg->worker)
+		return;
+	if (stats)
+		worker_stats_add(seg->worker);
+	worker_free(seg->worker);
+	seg->worker = NULL;
+}
+
+static void split_segment_free(struct split_segment *seg)
+{
+	split_segment_stop(seg, FALSE);
+	if (seg->ws.outputs) {
+		split_outputs_clear(seg);
+		g_array_free(seg->ws.outputs, TRUE);
+	}
+	if (seg->ws.checkpoints)
+		g_array_free(seg->ws.checkpoints, TRUE);
+}
+
+/*
+ * Find the segment which recorded a checkpoint at the specified sample
+ * while decoding its own samples. Returns the segment's index, or -1.
+ */
+static int split_resync_find(const struct split *split, uint64_t samplenum,
+		uint64_t *outputs)
+{
+	const struct split_segment *seg;
+	const struct split_resync *r;
+	unsigned int k;
+	guint lo, hi, mid;
+
+	for (k = 0; k < split->num_segs; k++) {
+		seg = &split->segs[k];
+		if (samplenum < seg->start || samplenum >= seg->end)
+			continue;
+		/* Later checkpoints are from past the segment's end. */
+		lo = 0;
+		hi = seg->ws.checkpoints->len;
+		while (lo < hi) {
+			mid = lo + (hi - lo) / 2;
+			r = &g_array_index(seg->ws.checkpoints,
+				struct split_resync, mid);
+			if (r->samplenum == samplenum) {
+				*outputs = r->outputs;
+				return k;
+			}
+			if (r->samplenum < samplenum)
+				lo = mid + 1;
+			else
+				hi = mid;
+		}
+		break;
+	}
+
+	return -1;
+}
+
+/*
+ * Have the workers decode their next samples at the same time: the
+ * rest of their segment, or SPLIT_OVERLAP_CHUNK samples past its end
+ * while they look for their successor. Each gets as many samples as
+ * fit into its shared memory.
+ */
+static int split_round(struct split *split)
+{
+	struct split_segment *seg;
+	uint64_t end;
+	unsigned int k;
+	int ret, seg_ret;
+
+	ret = SRD_OK;
+	for (k = 0; k < split->num_segs; k++) {
+		seg = &split->segs[k];
+		seg->sending = 0;
+		if (!seg->worker || ret != SRD_OK)
+			continue;
+		end = seg->end;
+		if (seg->overlap) {
+			end = MIN(seg->pos + SPLIT_OVERLAP_CHUNK,
+				split->num_samples);
+		}
+		if (seg->pos >= end)
+			continue;
+		ret = worker_send(seg->worker, seg->pos,
+			split->inbuf + seg->pos * split->unitsize,
+			end - seg->pos, split->unitsize, &seg->sending);
+		if (ret != SRD_OK)
+			seg->sending = 0;
+	}
+
+	for (k = 0; k < split->num_segs; k++) {
+		seg = &split->segs[k];
+		if (!seg->sending)
+			continue;
+		if (!worker_reply_run(split->sess, seg->worker, &seg_ret)) {
+			srd_err("Lost the worker process of split segment %d.",
+				seg->index);
+			seg_ret = SRD_ERR;
+		}
+		if (ret == SRD_OK)
+			ret = seg_ret;
+		seg->pos += seg->sending;
+		split->sess->stats.chunks++;
+		split->sess->stats.samples += seg->sending;
+	}
+
+	return ret;
+}
+
+/*
+ * Look up the checkpoints which a segment's worker found past the end
+ * of the segment. Where a later segment has the same checkpoint, both
+ * decoders are in the same state, so the later segment's output takes
+ * over and the worker is done.
+ */
+static void split_overlap_check(struct split *split,
+		struct split_segment *seg)
+{
+	const struct split_resync *r;
+	int next;
+
+	for (; seg->scanned < seg->ws.checkpoints->len; seg->scanned++) {
+		r = &g_array_index(seg->ws.checkpoints, struct split_resync,
+			seg->scanned);
+		next = split_resync_find(split, r->samplenum,
+			&seg->next_outputs);
+		if (next < 0)
+			continue;
+		srd_dbg("Split segment %d continues with segment %d "
+			"at sample %" PRIu64 ".", seg->index, next,
+			r->samplenum);
+		seg->next = next;
+		seg->sync_outputs = r->outputs;
+		seg->overlap = FALSE;
+		split_segment_stop(seg, TRUE);
+		return;
+	}
+
+	/* The worker got to the end of the capture on its own. */
+	if (seg->pos >= split->num_samples) {
+		seg->overlap = FALSE;
+		split_segment_stop(seg, TRUE);
+	}
+}
+
+/* Split-decode the capture with one of the session's decoder stacks. */
+static int split_stack(struct split *split, struct srd_decoder_inst *di)
+{
+	struct srd_session *sess;
+	struct split_segment *seg;
+	struct split_output *out;
+	uint64_t from, to, i;
+	unsigned int k;
+	gboolean busy;
+	int ret, seg_ret;
+
+	sess = split->sess;
+	split->segs = g_new0(struct split_segment, split->num_segs);
+
+	/* The workers start at the same time, and report when ready. */
+	ret = SRD_OK;
+	for (k = 0; k < split->num_segs && ret == SRD_OK; k++) {
+		seg = &split->segs[k];
+		seg->index = k;
+		seg->start = split->num_samples * k / split->num_segs;
+		seg->end = split->num_samples * (k + 1) / split->num_segs;
+		seg->pos = seg->start;
+		seg->next = -1;
+		seg->ws.start = seg->start;
+		seg->ws.sample = split->inbuf + seg->start * split->unitsize;
+		seg->ws.unitsize = split->unitsize;
+		seg->ws.outputs = g_array_new(FALSE, FALSE,
+			sizeof(struct split_output));
+		seg->ws.checkpoints = g_array_new(FALSE, FALSE,
+			sizeof(struct split_resync));
+		ret = worker_new(sess, di, &seg->ws, &seg->worker);
+	}
+	for (k = 0; k < split->num_segs; k++) {
+		seg = &split->segs[k];
+		if (!seg->worker)
+			continue;
+		if (!worker_reply_run(sess, seg->worker, &seg_ret))
+			seg_ret = SRD_ERR;
+		if (ret == SRD_OK)
+			ret = seg_ret;
+	}
+	if (ret != SRD_OK)
+		goto out;
+
+	/* Decode all segments, then have them find their successors. */
+	do {
+		if ((ret = split_round(split)) != SRD_OK)
+			goto out;
+		busy = FALSE;
+		for (k = 0; k < split->num_segs; k++)
+			busy = busy || split->segs[k].pos < split->segs[k].end;
+	} while (busy);
+	for (k = 0; k < split->num_segs; k++) {
+		seg = &split->segs[k];
+		seg->scanned = seg->ws.checkpoints->len;
+		seg->overlap = k + 1 < split->num_segs;
+		if (!seg->overlap)
+			split_segment_stop(seg, TRUE);
+	}
+
+	/*
+	 * Pass on the output in sample order. A segment's output is
+	 * complete when it found its successor, pass it on and release
+	 * it while later segments are still looking for theirs.
+	 */
+	seg = &split->segs[0];
+	from = 0;
+	while (TRUE) {
+		if (seg->overlap) {
+			if ((ret = split_round(split)) != SRD_OK)
+				goto out;
+			for (k = 0; k < split->num_segs; k++) {
+				if (split->segs[k].overlap)
+					split_overlap_check(split,
+						&split->segs[k]);
+			}
+			continue;
+		}
+		to = seg->next >= 0 ? seg->sync_outputs : seg->ws.outputs->len;
+		for (i = from; i < to && i < seg->ws.outputs->len; i++) {
+			out = &g_array_index(seg->ws.outputs,
+				struct split_output, i);
+			split_output_replay(sess, out->pdata.pdo->di, out);
+		}
+		split_outputs_clear(seg);
+		if (seg->next < 0)
+			break;
+		from = seg->next_outputs;
+		seg = &split->segs[seg->next];
+	}
+	srd_inst_output_flush_all(sess);
+
+	/* Segments which the output skipped count, too. */
+	for (k = 0; k < split->num_segs; k++)
+		split_segment_stop(&split->segs[k], TRUE);
+
+out:
+	for (k = 0; k < split->num_segs; k++)
+		split_segment_free(&split->segs[k]);
+	g_free(split->segs);
+
+	return ret;
+}
+
+/**
+ * Decode a whole capture, in parallel segments.
+ *
+ * The capture gets cut into 'num_segments' segments of the same size.
+ * Each decoder stack of the session gets copied once per segment into
+ * a worker process (see srd_session_isolation_set()), and the copies
+ * decode their segments at the same time. Copies of later segments
+ * start in the middle of the capture, so their output is only
+ * used from the first checkpoint on which the copy of the previous
+ * segment also has. A copy decodes past the end of its segment until
+ * it gets to such a checkpoint, see srd_session_checkpoint_interval_set().
+ * Decoders are in the same state at a checkpoint, no matter where they
+ * started, so the output is the same as that of srd_session_send().
+ *
+ * Checkpoints are where decoders can resynchronize, e.g. when the bus is
+ * idle. Decoders which don't declare checkpoints get decoded as a whole
+ * by the copy of the first segment, just slower. So do captures with
+ * fewer checkpoints than segments, for the segments without one.
+ *
+ * The output gets passed to the session's callbacks in sample order,
+ * stack by stack. Instances stacked on top of each other restart at
+ * checkpoints, like after srd_session_seek().
+ *
+ * The copies' output is kept in memory until it gets passed on. The
+ * output of a segment gets passed on, and released, once the segment's
+ * copy got to a checkpoint of its successor. Until then the segments
+ * decode at the same time, so expect memory use in the order of the
+ * output of the whole capture by one stack (e.g. all the annotations
+ * of a stack). Upon errors, the output of the segments before the
+ * failed one may have been passed on already.
+ *
+ * The session must have been started, and its instances don't change.
+ * Their options, channel setup and the samplerate get passed to the
+ * worker processes, srd_inst_stats_get() then adds up the counters of
+ * all copies. Worker processes are only available on Unix systems.
+ *
+ * @param sess The session to use. Must not be NULL.
+ * @param inbuf Pointer to the samples of the whole capture. Must not
+ *              be NULL.
+ * @param inbuflen Length in bytes of the buffer. Must be > 0.
+ * @param unitsize The number of bytes per sample. Must be > 0.
+ * @param num_segments The number of segments to decode in parallel.
+ *                     Must be > 0.
+ *
+ * @return SRD_OK upon success, a (negative) error code otherwise.
+ *
+ * @since 0.6.0
+ */
+SRD_API int srd_session_send_split(struct srd_session *sess,
+		const uint8_t *inbuf, uint64_t inbuflen, uint64_t unitsize,
+		unsigned int num_segments)
+{
+	struct split split;
+	GSList *d;
+	int ret;
+
+	if (!sess || !inbuf || !unitsize || inbuflen < unitsize ||
+	    !num_segments)
+		return SRD_ERR_ARG;
+
+	if ((ret = srd_session_flush(sess)) != SRD_OK)
+		return ret;
+
+	split.sess = sess;
+	split.inbuf = inbuf;
+	split.unitsize = unitsize;
+	split.num_samples = inbuflen / unitsize;
+	split.num_segs = MIN(num_segments, split.num_samples);
+
+	srd_dbg("Decoding %" PRIu64 " samples in %u segments in session %d.",
+		split.num_samples, split.num_segs, sess->session_id);
+
+	ret = SRD_OK;
+	for (d = sess->di_list; d; d = d->next) {
+		if ((ret = split_stack(&split, d->data)) != SRD_OK)
+			break;
+	}
+
+	return ret;
+}
+
+/** @} */
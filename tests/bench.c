@@ -0,0 +1,1099 @@
+/*
+ * This file is part of the libsigrokdecode project.
+ *
+ * Copyright (C) 2026 The libsigrokdecode developers
+ *
+ * This program is free software; you can redistribute it and/or modify
+ * it under the terms of the GNU General Public License as published by
+ * the Free Software Foundation; either version 2 of the License, or
+ * (at your option) any later version.
+ *
+ * This program is distributed in the hope that it will be useful,
+ * but WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+ * GNU General Public License for more details.
+ *
+ * You should have received a copy of the GNU General Public License
+ * along with this program; if not, see <http://www.gnu.org/licenses/>.
+ */
+
+/*
+ * Benchmarks for the libsigrokdecode core, run on synthetic signals.
+ *
+ * Usage: bench [<benchmark> ...] [<decoder> ...]
+ *
+ * Runs all benchmarks when no arguments are given. Decoder IDs limit the
+ * "decoders" benchmark to these decoders, and run only that benchmark
+ * when no other is specified. Build with "make tests/bench",
+ * run from the top of the source tree.
+ *
+ * The "decoders" benchmark prints its results as CSV, one line per
+ * decoder, chunk size and sample layout. Stacks show up as "bottom>top".
+ */
+
+#include <config.h>
+#include <libsigrokdecode.h> /* First, to avoid compiler warning. */
+#include <stdint.h>
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+
+#define SAMPLERATE	1000000
+#define CHUNK_SAMPLES	(64 * 1024)
+
+struct bench {
+	const char *name;
+	const char *descr;
+	int (*run)(void);
+};
+
+static uint64_t num_annotations;
+
+static void cb_count(struct srd_proto_data *pdata, void *cb_data)
+{
+	(void)pdata;
+	(void)cb_data;
+
+	num_annotations++;
+}
+
+/*
+ * Generate 'num_samples' samples of UART traffic (8n1) on each of the
+ * 8 channels of a unitsize 1 capture, with 'spb' samples per bit.
+ * Channels transmit different data, with idle periods in between.
+ */
+static uint8_t *gen_uart(uint64_t num_samples, unsigned int spb)
+{
+	uint8_t *buf, byte[8];
+	uint64_t i;
+	unsigned int ch, bit[8], frame_bits;
+	int level;
+
+	buf = g_malloc0(num_samples);
+	frame_bits = 10 + 5;
+	for (ch = 0; ch < 8; ch++) {
+		byte[ch] = 0x55 + 17 * ch;
+		bit[ch] = ch;
+	}
+
+	for (i = 0; i < num_samples; i++) {
+		for (ch = 0; ch < 8; ch++) {
+			if (i % spb == 0 && i) {
+				if (++bit[ch] == frame_bits) {
+					bit[ch] = 0;
+					byte[ch] = byte[ch] * 5 + 1 + ch;
+				}
+			}
+			if (bit[ch] == 0)
+				level = 0;
+			else if (bit[ch] <= 8)
+				level = (byte[ch] >> (bit[ch] - 1)) & 1;
+			else
+				level = 1;
+			buf[i] |= level << ch;
+		}
+	}
+
+	return buf;
+}
+
+/*
+ * Generate 'num_samples' samples of unitsize 1, where channel N toggles
+ * every 'period' + N samples.
+ */
+static uint8_t *gen_clocks(uint64_t num_samples, unsigned int period)
+{
+	uint8_t *buf, level;
+	uint64_t i;
+	unsigned int ch;
+
+	buf = g_malloc0(num_samples);
+	level = 0;
+	for (i = 0; i < num_samples; i++) {
+		for (ch = 0; ch < 8; ch++) {
+			if (i % (period + ch) == 0)
+				level ^= 1 << ch;
+		}
+		buf[i] = level;
+	}
+
+	return buf;
+}
+
+/*
+ * Create a decoder instance with one channel and an optional integer
+ * option.
+ */
+static struct srd_decoder_inst *new_inst(struct srd_session *sess,
+		const char *decoder_id, const char *channel_id, int channel,
+		const char *option_id, int64_t option_value)
+{
+	struct srd_decoder_inst *di;
+	GHashTable *options, *channels;
+
+	options = g_hash_table_new_full(g_str_hash, g_str_equal, g_free,
+		(GDestroyNotify)g_variant_unref);
+	if (option_id) {
+		g_hash_table_insert(options, g_strdup(option_id),
+			g_variant_ref_sink(g_variant_new_int64(option_value)));
+	}
+	di = srd_inst_new(sess, decoder_id, options);
+	g_hash_table_destroy(options);
+	if (!di)
+		return NULL;
+
+	channels = g_hash_table_new_full(g_str_hash, g_str_equal, g_free,
+		(GDestroyNotify)g_variant_unref);
+	g_hash_table_insert(channels, g_strdup(channel_id),
+		g_variant_ref_sink(g_variant_new_int32(channel)));
+	if (srd_inst_channel_set_all(di, channels) != SRD_OK)
+		di = NULL;
+	g_hash_table_destroy(channels);
+
+	return di;
+}
+
+static struct srd_decoder_inst *new_uart(struct srd_session *sess,
+		int channel, unsigned int baudrate)
+{
+	return new_inst(sess, "uart", "rx", channel, "baudrate", baudrate);
+}
+
+/* Feed a capture to a session, return the elapsed time in seconds. */
+static double send_chunks(struct srd_session *sess, const uint8_t *buf,
+		uint64_t num_samples, unsigned int unitsize,
+		uint64_t chunk_samples)
+{
+	uint64_t pos, n;
+	gint64 start;
+
+	start = g_get_monotonic_time();
+	for (pos = 0; pos < num_samples; pos += n) {
+		n = MIN(num_samples - pos, chunk_samples);
+		if (srd_session_send(sess, pos, pos + n, buf + pos * unitsize,
+				n * unitsize, unitsize) != SRD_OK)
+			return -1;
+	}
+
+	return (g_get_monotonic_time() - start) / 1e6;
+}
+
+static double send_all(struct srd_session *sess, const uint8_t *buf,
+		uint64_t num_samples, unsigned int unitsize)
+{
+	return send_chunks(sess, buf, num_samples, unitsize, CHUNK_SAMPLES);
+}
+
+/*
+ * Decode independent UART streams, with 1/2/4/8 decoder stacks, one
+ * after the other and in parallel.
+ */
+static int bench_stacks(void)
+{
+	struct srd_session *sess;
+	uint8_t *buf;
+	uint64_t num_samples;
+	double secs, serial;
+	int num_stacks, i, parallel;
+
+	if (srd_decoder_load("uart") != SRD_OK)
+		return 1;
+
+	num_samples = 20 * 1000 * 1000;
+	buf = gen_uart(num_samples, 100);
+
+	printf("%-8s %-10s %10s %10s %8s\n",
+		"stacks", "mode", "seconds", "Msamples/s", "speedup");
+	for (num_stacks = 1; num_stacks <= 8; num_stacks *= 2) {
+		serial = 0;
+		for (parallel = 0; parallel <= 1; parallel++) {
+			srd_session_new(&sess);
+			for (i = 0; i < num_stacks; i++) {
+				if (!new_uart(sess, i, SAMPLERATE / 100))
+					return 1;
+			}
+			srd_pd_output_callback_add(sess, SRD_OUTPUT_ANN,
+				cb_count, NULL);
+			srd_session_metadata_set(sess, SRD_CONF_SAMPLERATE,
+				g_variant_new_uint64(SAMPLERATE));
+			srd_session_parallel_set(sess, parallel);
+			srd_session_start(sess);
+			secs = send_all(sess, buf, num_samples, 1);
+			srd_session_destroy(sess);
+			if (secs < 0)
+				return 1;
+			if (!parallel)
+				serial = secs;
+			printf("%-8d %-10s %10.3f %10.1f %7.2fx\n", num_stacks,
+				parallel ? "parallel" : "serial", secs,
+				num_samples / secs / 1e6, serial / secs);
+		}
+	}
+
+	g_free(buf);
+
+	return 0;
+}
+
+/*
+ * Have many decoder instances put() annotations at a high rate, and
+ * report the throughput of put() calls.
+ */
+static int bench_put(void)
+{
+	struct srd_session *sess;
+	uint8_t *buf;
+	uint64_t num_samples;
+	double secs;
+	int num_insts, i;
+
+	if (srd_decoder_load("counter") != SRD_OK)
+		return 1;
+
+	num_samples = 4 * 1000 * 1000;
+	buf = gen_clocks(num_samples, 20);
+
+	printf("%-10s %10s %12s %14s\n",
+		"instances", "seconds", "annotations", "puts/s");
+	for (num_insts = 1; num_insts <= 32; num_insts *= 2) {
+		srd_session_new(&sess);
+		for (i = 0; i < num_insts; i++) {
+			if (!new_inst(sess, "counter", "data", i % 8, NULL, 0))
+				return 1;
+		}
+		srd_pd_output_callback_add(sess, SRD_OUTPUT_ANN, cb_count, NULL);
+		srd_session_metadata_set(sess, SRD_CONF_SAMPLERATE,
+			g_variant_new_uint64(SAMPLERATE));
+		srd_session_start(sess);
+		num_annotations = 0;
+		secs = send_all(sess, buf, num_samples, 1);
+		srd_session_destroy(sess);
+		if (secs < 0)
+			return 1;
+		printf("%-10d %10.3f %12" G_GUINT64_FORMAT " %14.0f\n",
+			num_insts, secs, num_annotations,
+			num_annotations / secs);
+	}
+
+	g_free(buf);
+
+	return 0;
+}
+
+/*
+ * A synthetic signal of up to 8 lines, one byte per sample. Bit N holds
+ * the level of the Nth channel of the protocol's decoder.
+ */
+struct signal {
+	GByteArray *buf;
+	uint8_t level;
+	uint32_t seed;
+};
+
+/* Append samples with the current line levels. */
+static void sig_hold(struct signal *sig, unsigned int num_samples)
+{
+	while (num_samples--)
+		g_byte_array_append(sig->buf, &sig->level, 1);
+}
+
+static void sig_set(struct signal *sig, unsigned int line, int level)
+{
+	if (level)
+		sig->level |= 1 << line;
+	else
+		sig->level &= ~(1 << line);
+}
+
+/* Deterministic pseudo-random data bytes. */
+static uint8_t sig_random(struct signal *sig)
+{
+	sig->seed = sig->seed * 1103515245 + 12345;
+
+	return sig->seed >> 16;
+}
+
+/* UART (8n1) at 100 kbaud: a burst of bytes, then idle time. */
+static void gen_uart_frames(struct signal *sig)
+{
+	unsigned int i, bit;
+	uint8_t byte;
+
+	for (i = 0; i < 8; i++) {
+		byte = sig_random(sig);
+		sig_set(sig, 0, 0);
+		sig_hold(sig, 10);
+		for (bit = 0; bit < 8; bit++) {
+			sig_set(sig, 0, (byte >> bit) & 1);
+			sig_hold(sig, 10);
+		}
+		sig_set(sig, 0, 1);
+		sig_hold(sig, 10 + (byte & 7));
+	}
+	sig_hold(sig, 200);
+}
+
+/* SPI mode 0 (clk, mosi, miso, cs#): a transfer of 4 bytes. */
+static void gen_spi_transfer(struct signal *sig)
+{
+	unsigned int i, bit;
+	uint8_t mosi, miso;
+
+	sig_set(sig, 3, 0);
+	sig_hold(sig, 4);
+	for (i = 0; i < 4; i++) {
+		mosi = sig_random(sig);
+		miso = sig_random(sig);
+		for (bit = 0; bit < 8; bit++) {
+			sig_set(sig, 1, (mosi >> (7 - bit)) & 1);
+			sig_set(sig, 2, (miso >> (7 - bit)) & 1);
+			sig_hold(sig, 2);
+			sig_set(sig, 0, 1);
+			sig_hold(sig, 2);
+			sig_set(sig, 0, 0);
+		}
+	}
+	sig_hold(sig, 4);
+	sig_set(sig, 3, 1);
+	sig_hold(sig, 40);
+}
+
+/* I2C (scl, sda): a write of an address and two data bytes. */
+static void gen_i2c_transfer(struct signal *sig)
+{
+	uint8_t bytes[3];
+	unsigned int i, bit;
+
+	bytes[0] = 0x50 << 1;
+	bytes[1] = sig_random(sig);
+	bytes[2] = sig_random(sig);
+	sig_set(sig, 1, 0);
+	sig_hold(sig, 5);
+	for (i = 0; i < 3; i++) {
+		/* Eight data bits, MSB first, and an ACK. */
+		for (bit = 0; bit < 9; bit++) {
+			sig_set(sig, 0, 0);
+			sig_set(sig, 1, bit < 8 ? (bytes[i] >> (7 - bit)) & 1 : 0);
+			sig_hold(sig, 5);
+			sig_set(sig, 0, 1);
+			sig_hold(sig, 5);
+		}
+	}
+	sig_set(sig, 0, 0);
+	sig_set(sig, 1, 0);
+	sig_hold(sig, 5);
+	sig_set(sig, 0, 1);
+	sig_hold(sig, 5);
+	sig_set(sig, 1, 1);
+	sig_hold(sig, 50);
+}
+
+/* Append a CAN bit, with bit stuffing and CRC when 'crc' is set. */
+static void can_bit(struct signal *sig, int bit, unsigned int *run,
+		int *last, uint16_t *crc)
+{
+	if (crc) {
+		if (bit ^ ((*crc >> 14) & 1))
+			*crc = ((*crc << 1) ^ 0x4599) & 0x7fff;
+		else
+			*crc = (*crc << 1) & 0x7fff;
+	}
+	sig_set(sig, 0, bit);
+	sig_hold(sig, 8);
+	*run = bit == *last ? *run + 1 : 1;
+	*last = bit;
+	if (crc && *run == 5) {
+		/* Stuff bit. */
+		*last = !bit;
+		*run = 1;
+		sig_set(sig, 0, *last);
+		sig_hold(sig, 8);
+	}
+}
+
+/* CAN at 125 kbit/s (can_rx): a standard data frame of 4 bytes. */
+static void gen_can_frame(struct signal *sig)
+{
+	unsigned int i, run;
+	int last;
+	uint16_t crc, id, crc_out;
+	uint8_t data;
+
+	data = 0;
+	run = 0;
+	last = -1;
+	crc = 0;
+	id = (sig_random(sig) << 3 | 5) & 0x3ff;
+	/* SOF, ID, RTR, IDE, r0, DLC. */
+	can_bit(sig, 0, &run, &last, &crc);
+	for (i = 0; i < 11; i++)
+		can_bit(sig, (id >> (10 - i)) & 1, &run, &last, &crc);
+	for (i = 0; i < 3; i++)
+		can_bit(sig, 0, &run, &last, &crc);
+	for (i = 0; i < 4; i++)
+		can_bit(sig, (4 >> (3 - i)) & 1, &run, &last, &crc);
+	for (i = 0; i < 4 * 8; i++) {
+		if (i % 8 == 0)
+			data = sig_random(sig);
+		can_bit(sig, (data >> (7 - i % 8)) & 1, &run, &last, &crc);
+	}
+	crc_out = crc;
+	for (i = 0; i < 15; i++)
+		can_bit(sig, (crc_out >> (14 - i)) & 1, &run, &last, &crc);
+	/* CRC delimiter, ACK slot, ACK delimiter, EOF, intermission. */
+	can_bit(sig, 1, &run, &last, NULL);
+	can_bit(sig, 0, &run, &last, NULL);
+	for (i = 0; i < 1 + 7 + 3; i++)
+		can_bit(sig, 1, &run, &last, NULL);
+	sig_hold(sig, 80);
+}
+
+/*
+ * Append a full-speed USB bit (dp, dm) at 48 MHz, NRZI-coded: a 0 bit
+ * toggles between J and K.
+ */
+static void usb_bit(struct signal *sig, int bit, unsigned int *ones)
+{
+	if (!bit) {
+		sig->level ^= 3;
+		*ones = 0;
+	} else if (++*ones == 6) {
+		sig_hold(sig, 4);
+		/* Stuff bit. */
+		sig->level ^= 3;
+		*ones = 0;
+	}
+	sig_hold(sig, 4);
+}
+
+/*
+ * Append a full-speed USB packet: idle J, SYNC, the PID and 'len' - 1
+ * more bytes (LSB-first), EOP.
+ */
+static void usb_packet(struct signal *sig, const uint8_t *bytes,
+		unsigned int len)
+{
+	unsigned int i, bit, ones;
+
+	sig_set(sig, 0, 1);
+	sig_set(sig, 1, 0);
+	sig_hold(sig, 40);
+	ones = 0;
+	for (bit = 0; bit < 8; bit++)
+		usb_bit(sig, bit == 7, &ones);
+	for (i = 0; i < len; i++) {
+		for (bit = 0; bit < 8; bit++)
+			usb_bit(sig, (bytes[i] >> bit) & 1, &ones);
+	}
+	/* EOP: SE0 for two bits, then J. */
+	sig_set(sig, 0, 0);
+	sig_set(sig, 1, 0);
+	sig_hold(sig, 8);
+	sig_set(sig, 0, 1);
+	sig_hold(sig, 40);
+}
+
+/* USB full-speed (dp, dm): a DATA0 packet with 4 bytes. */
+static void gen_usb_packet(struct signal *sig)
+{
+	uint8_t bytes[5];
+	unsigned int i;
+
+	bytes[0] = 0xc3;
+	for (i = 1; i < 5; i++)
+		bytes[i] = sig_random(sig);
+	usb_packet(sig, bytes, 5);
+}
+
+/* USB CRC-5 over the 11 address and endpoint bits of a token. */
+static unsigned int usb_crc5(unsigned int value)
+{
+	unsigned int i, crc;
+
+	crc = 0x1f;
+	for (i = 0; i < 11; i++) {
+		if ((crc ^ (value >> i)) & 1)
+			crc = (crc >> 1) ^ 0x14;
+		else
+			crc >>= 1;
+	}
+
+	return crc ^ 0x1f;
+}
+
+/* USB CRC-16 over the data bytes of a data packet. */
+static unsigned int usb_crc16(const uint8_t *data, unsigned int len)
+{
+	unsigned int i, bit, crc;
+
+	crc = 0xffff;
+	for (i = 0; i < len; i++) {
+		crc ^= data[i];
+		for (bit = 0; bit < 8; bit++) {
+			if (crc & 1)
+				crc = (crc >> 1) ^ 0xa001;
+			else
+				crc >>= 1;
+		}
+	}
+
+	return crc ^ 0xffff;
+}
+
+/*
+ * USB full-speed bulk OUT transaction: an OUT token, a DATA0 or DATA1
+ * packet with 64 bytes, and the device's ACK.
+ */
+static void gen_usb_bulk(struct signal *sig)
+{
+	uint8_t bytes[1 + 64 + 2];
+	unsigned int i, token, crc;
+
+	/* OUT token to address 5, endpoint 2. */
+	token = 5 | 2 << 7;
+	token |= usb_crc5(token) << 11;
+	bytes[0] = 0xe1;
+	bytes[1] = token & 0xff;
+	bytes[2] = token >> 8;
+	usb_packet(sig, bytes, 3);
+
+	bytes[0] = (sig_random(sig) & 1) ? 0x4b : 0xc3;
+	for (i = 1; i <= 64; i++)
+		bytes[i] = sig_random(sig);
+	crc = usb_crc16(bytes + 1, 64);
+	bytes[65] = crc & 0xff;
+	bytes[66] = crc >> 8;
+	usb_packet(sig, bytes, 67);
+
+	bytes[0] = 0xd2;
+	usb_packet(sig, bytes, 1);
+}
+
+/* 1-Wire (owr) at normal speed: reset, presence and 2 bytes. */
+static void gen_onewire(struct signal *sig)
+{
+	unsigned int i, bit;
+	uint8_t byte;
+
+	sig_set(sig, 0, 0);
+	sig_hold(sig, 500);
+	sig_set(sig, 0, 1);
+	sig_hold(sig, 30);
+	sig_set(sig, 0, 0);
+	sig_hold(sig, 120);
+	sig_set(sig, 0, 1);
+	sig_hold(sig, 400);
+	for (i = 0; i < 2; i++) {
+		byte = sig_random(sig);
+		for (bit = 0; bit < 8; bit++) {
+			sig_set(sig, 0, 0);
+			sig_hold(sig, (byte >> bit) & 1 ? 5 : 65);
+			sig_set(sig, 0, 1);
+			sig_hold(sig, (byte >> bit) & 1 ? 65 : 5);
+		}
+	}
+	sig_hold(sig, 100);
+}
+
+/* Append a JTAG TCK cycle (tdi, tdo, tck, tms). */
+static void jtag_cycle(struct signal *sig, int tms, int tdi, int tdo)
+{
+	sig_set(sig, 0, tdi);
+	sig_set(sig, 1, tdo);
+	sig_set(sig, 3, tms);
+	sig_set(sig, 2, 0);
+	sig_hold(sig, 3);
+	sig_set(sig, 2, 1);
+	sig_hold(sig, 3);
+}
+
+/* JTAG: an IR scan of 4 bits and a DR scan of 32 bits. */
+static void gen_jtag_scan(struct signal *sig)
+{
+	uint32_t tdi, tdo;
+	unsigned int i;
+
+	/* Run-Test/Idle to Shift-IR, shift, to Run-Test/Idle. */
+	jtag_cycle(sig, 0, 0, 0);
+	jtag_cycle(sig, 1, 0, 0);
+	jtag_cycle(sig, 1, 0, 0);
+	jtag_cycle(sig, 0, 0, 0);
+	jtag_cycle(sig, 0, 0, 0);
+	for (i = 0; i < 4; i++)
+		jtag_cycle(sig, i == 3, (0xe >> i) & 1, i == 0);
+	jtag_cycle(sig, 1, 0, 0);
+	jtag_cycle(sig, 0, 0, 0);
+
+	/* To Shift-DR, shift, to Run-Test/Idle. */
+	tdi = sig_random(sig) << 24 | sig_random(sig) << 8;
+	tdo = sig_random(sig) << 16 | sig_random(sig);
+	jtag_cycle(sig, 1, 0, 0);
+	jtag_cycle(sig, 0, 0, 0);
+	jtag_cycle(sig, 0, 0, 0);
+	for (i = 0; i < 32; i++)
+		jtag_cycle(sig, i == 31, (tdi >> i) & 1, (tdo >> i) & 1);
+	jtag_cycle(sig, 1, 0, 0);
+	jtag_cycle(sig, 0, 0, 0);
+	sig_hold(sig, 20);
+}
+
+/* Append a SWD SWCLK cycle (swclk, swdio). SWDIO changes when SWCLK falls. */
+static void swd_cycle(struct signal *sig, int swdio)
+{
+	sig_set(sig, 0, 0);
+	sig_set(sig, 1, swdio);
+	sig_hold(sig, 3);
+	sig_set(sig, 0, 1);
+	sig_hold(sig, 3);
+}
+
+/* SWD: a line reset, then AP reads and writes. */
+static void gen_swd(struct signal *sig)
+{
+	unsigned int t, i, parity;
+	uint32_t data;
+	int rnw, addr, req[8];
+
+	for (i = 0; i < 56; i++)
+		swd_cycle(sig, 1);
+	for (i = 0; i < 4; i++)
+		swd_cycle(sig, 0);
+
+	for (t = 0; t < 16; t++) {
+		rnw = t & 1;
+		addr = (t >> 1) & 3;
+		req[0] = 1;
+		req[1] = 1;
+		req[2] = rnw;
+		req[3] = addr & 1;
+		req[4] = addr >> 1;
+		req[5] = (1 + rnw + (addr & 1) + (addr >> 1)) & 1;
+		req[6] = 0;
+		req[7] = 1;
+		for (i = 0; i < 8; i++)
+			swd_cycle(sig, req[i]);
+		/* Turnaround, ACK OK. */
+		swd_cycle(sig, 1);
+		swd_cycle(sig, 1);
+		swd_cycle(sig, 0);
+		swd_cycle(sig, 0);
+		if (!rnw) {
+			/* Turnaround back to the host. */
+			swd_cycle(sig, 0);
+		}
+		data = sig_random(sig) << 24 | sig_random(sig) << 8 | t;
+		parity = 0;
+		for (i = 0; i < 32; i++) {
+			swd_cycle(sig, (data >> i) & 1);
+			parity ^= (data >> i) & 1;
+		}
+		swd_cycle(sig, parity);
+		/* Turnaround after reads, idle cycles. */
+		for (i = 0; i < 3; i++)
+			swd_cycle(sig, 0);
+	}
+}
+
+struct proto {
+	const char *decoder_id;
+	const char *channels[4];
+	uint64_t samplerate;
+	uint64_t num_samples;
+	/* Appends one transfer or packet to the signal. */
+	void (*gen)(struct signal *sig);
+	/* An integer option, or NULL. */
+	const char *option_id;
+	int64_t option_value;
+	/* A decoder stacked on top, or NULL. */
+	const char *stack_id;
+};
+
+static const struct proto protos[] = {
+	{ "uart", { "rx" }, 1000000, 2000000, gen_uart_frames,
+		"baudrate", 100000, NULL },
+	{ "spi", { "clk", "mosi", "miso", "cs" }, 1000000, 2000000,
+		gen_spi_transfer, NULL, 0, NULL },
+	{ "i2c", { "scl", "sda" }, 1000000, 2000000, gen_i2c_transfer,
+		NULL, 0, NULL },
+	{ "can", { "can_rx" }, 1000000, 2000000, gen_can_frame,
+		"nominal_bitrate", 125000, NULL },
+	{ "usb_signalling", { "dp", "dm" }, 48000000, 2000000,
+		gen_usb_packet, NULL, 0, NULL },
+	{ "usb_signalling", { "dp", "dm" }, 48000000, 2000000,
+		gen_usb_bulk, NULL, 0, "usb_packet" },
+	{ "onewire_link", { "owr" }, 1000000, 16000000, gen_onewire,
+		NULL, 0, NULL },
+	{ "jtag", { "tdi", "tdo", "tck", "tms" }, 1000000, 2000000,
+		gen_jtag_scan, NULL, 0, NULL },
+	{ "swd", { "swclk", "swdio" }, 1000000, 2000000, gen_swd,
+		NULL, 0, NULL },
+};
+
+static const uint64_t chunk_sizes[] = { 4096, 64 * 1024, 1024 * 1024 };
+static const unsigned int unitsizes[] = { 1, 2, 4 };
+
+/* Decoder IDs from the command line, to limit the "decoders" benchmark. */
+static char **decoder_filter;
+
+static unsigned int proto_num_lines(const struct proto *proto)
+{
+	unsigned int n;
+
+	for (n = 0; n < G_N_ELEMENTS(proto->channels); n++) {
+		if (!proto->channels[n])
+			break;
+	}
+
+	return n;
+}
+
+/*
+ * Lay out a protocol's signal in samples of 'unitsize' bytes. Its lines
+ * go to the top channels. The other channels toggle, each at its own
+ * rate, like unrelated activity in a capture of many channels.
+ */
+static uint8_t *signal_layout(const GByteArray *lines, unsigned int num_lines,
+		unsigned int unitsize)
+{
+	uint8_t *buf, *sample;
+	uint64_t i;
+	unsigned int ch, base, bit, countdown[32];
+
+	base = unitsize * 8 - num_lines;
+	for (ch = 0; ch < base; ch++)
+		countdown[ch] = 1;
+	buf = g_malloc0((uint64_t)lines->len * unitsize);
+	for (i = 0; i < lines->len; i++) {
+		sample = buf + i * unitsize;
+		for (ch = 0; ch < base; ch++) {
+			if (--countdown[ch] == 0)
+				countdown[ch] = 2 * (16 + 16 * ch);
+			if (countdown[ch] > 16 + 16 * ch)
+				sample[ch / 8] |= 1 << (ch % 8);
+		}
+		for (bit = 0; bit < num_lines; bit++) {
+			ch = base + bit;
+			if (lines->data[i] & (1 << bit))
+				sample[ch / 8] |= 1 << (ch % 8);
+		}
+	}
+
+	return buf;
+}
+
+static struct srd_decoder_inst *new_proto_inst(struct srd_session *sess,
+		const struct proto *proto, unsigned int base)
+{
+	struct srd_decoder_inst *di;
+	GHashTable *options, *channels;
+	unsigned int i;
+
+	options = g_hash_table_new_full(g_str_hash, g_str_equal, g_free,
+		(GDestroyNotify)g_variant_unref);
+	if (proto->option_id) {
+		g_hash_table_insert(options, g_strdup(proto->option_id),
+			g_variant_ref_sink(g_variant_new_int64(proto->option_value)));
+	}
+	di = srd_inst_new(sess, proto->decoder_id, options);
+	g_hash_table_destroy(options);
+	if (!di)
+		return NULL;
+
+	channels = g_hash_table_new_full(g_str_hash, g_str_equal, g_free,
+		(GDestroyNotify)g_variant_unref);
+	for (i = 0; i < proto_num_lines(proto); i++) {
+		g_hash_table_insert(channels, g_strdup(proto->channels[i]),
+			g_variant_ref_sink(g_variant_new_int32(base + i)));
+	}
+	if (srd_inst_channel_set_all(di, channels) != SRD_OK)
+		di = NULL;
+	g_hash_table_destroy(channels);
+
+	return di;
+}
+
+/*
+ * Peak resident set size in KiB since the last peak_rss_reset(), or
+ * -1 where the system doesn't tell.
+ */
+static long peak_rss_kib(void)
+{
+	char line[128];
+	long kib;
+	FILE *f;
+
+	kib = -1;
+	if (!(f = fopen("/proc/self/status", "r")))
+		return kib;
+	while (fgets(line, sizeof(line), f)) {
+		if (sscanf(line, "VmHWM: %ld", &kib) == 1)
+			break;
+	}
+	fclose(f);
+
+	return kib;
+}
+
+static void peak_rss_reset(void)
+{
+	FILE *f;
+
+	if (!(f = fopen("/proc/self/clear_refs", "w")))
+		return;
+	fputs("5", f);
+	fclose(f);
+}
+
+static gboolean proto_selected(const struct proto *proto)
+{
+	char **id;
+
+	if (!decoder_filter || !*decoder_filter)
+		return TRUE;
+	for (id = decoder_filter; *id; id++) {
+		if (!strcmp(*id, proto->decoder_id))
+			return TRUE;
+		if (proto->stack_id && !strcmp(*id, proto->stack_id))
+			return TRUE;
+	}
+
+	return FALSE;
+}
+
+/*
+ * Decode synthetic signals of the common bottom-level protocols, at
+ * several chunk sizes and sample layouts.
+ */
+static int bench_decoders(void)
+{
+	const struct proto *proto;
+	struct srd_session *sess;
+	struct srd_decoder_inst *di, *di_top;
+	struct signal sig;
+	uint8_t *buf;
+	unsigned int p, c, u, num_lines, unitsize;
+	char name[64];
+	double secs;
+
+	printf("decoder,chunk_samples,unitsize,channels,samples,seconds,"
+		"samples_per_s,annotations,annotations_per_s,peak_rss_kib\n");
+	for (p = 0; p < G_N_ELEMENTS(protos); p++) {
+		proto = &protos[p];
+		if (!proto_selected(proto))
+			continue;
+		if (srd_decoder_load(proto->decoder_id) != SRD_OK)
+			return 1;
+		if (proto->stack_id && srd_decoder_load(proto->stack_id) != SRD_OK)
+			return 1;
+		snprintf(name, sizeof(name), "%s%s%s", proto->decoder_id,
+			proto->stack_id ? ">" : "",
+			proto->stack_id ? proto->stack_id : "");
+
+		/* Start out with all lines high (idle). */
+		num_lines = proto_num_lines(proto);
+		sig.buf = g_byte_array_new();
+		sig.level = (1 << num_lines) - 1;
+		sig.seed = 1;
+		sig_hold(&sig, 100);
+		while (sig.buf->len < proto->num_samples)
+			proto->gen(&sig);
+		g_byte_array_set_size(sig.buf, proto->num_samples);
+
+		for (u = 0; u < G_N_ELEMENTS(unitsizes); u++) {
+			unitsize = unitsizes[u];
+			buf = signal_layout(sig.buf, num_lines, unitsize);
+			for (c = 0; c < G_N_ELEMENTS(chunk_sizes); c++) {
+				srd_session_new(&sess);
+				di = new_proto_inst(sess, proto,
+					unitsize * 8 - num_lines);
+				if (!di)
+					return 1;
+				if (proto->stack_id) {
+					di_top = srd_inst_new(sess,
+						proto->stack_id, NULL);
+					if (!di_top || srd_inst_stack(sess,
+							di, di_top) != SRD_OK)
+						return 1;
+				}
+				srd_pd_output_callback_add(sess,
+					SRD_OUTPUT_ANN, cb_count, NULL);
+				srd_session_metadata_set(sess,
+					SRD_CONF_SAMPLERATE,
+					g_variant_new_uint64(proto->samplerate));
+				srd_session_start(sess);
+				num_annotations = 0;
+				peak_rss_reset();
+				secs = send_chunks(sess, buf,
+					proto->num_samples, unitsize,
+					chunk_sizes[c]);
+				srd_session_destroy(sess);
+				if (secs < 0)
+					return 1;
+				printf("%s,%" G_GUINT64_FORMAT ",%u,%u,%"
+					G_GUINT64_FORMAT ",%.3f,%.0f,%"
+					G_GUINT64_FORMAT ",%.0f,%ld\n",
+					name, chunk_sizes[c],
+					unitsize, unitsize * 8,
+					proto->num_samples, secs,
+					proto->num_samples / secs,
+					num_annotations,
+					num_annotations / secs,
+					peak_rss_kib());
+				fflush(stdout);
+			}
+			g_free(buf);
+		}
+		g_byte_array_free(sig.buf, TRUE);
+	}
+
+	return 0;
+}
+
+static struct srd_session *split_session_new(const struct proto *proto)
+{
+	struct srd_session *sess;
+
+	srd_session_new(&sess);
+	if (!new_proto_inst(sess, proto, 0))
+		return NULL;
+	srd_pd_output_callback_add(sess, SRD_OUTPUT_ANN, cb_count, NULL);
+	srd_session_metadata_set(sess, SRD_CONF_SAMPLERATE,
+		g_variant_new_uint64(proto->samplerate));
+	srd_session_start(sess);
+
+	return sess;
+}
+
+/*
+ * Decode a long I2C capture with srd_session_send_split() in 1/2/4/8
+ * segments, and serially with srd_session_send(). The segments decode
+ * in worker processes, so the speedup is bounded by the number of CPUs.
+ */
+static int bench_split(void)
+{
+	const struct proto *proto;
+	struct srd_session *sess;
+	struct signal sig;
+	uint64_t num_samples, serial_annotations;
+	unsigned int p, num_segs;
+	double secs, serial;
+	gint64 start;
+	int ret;
+
+	for (p = 0; p < G_N_ELEMENTS(protos); p++) {
+		if (!strcmp(protos[p].decoder_id, "i2c"))
+			break;
+	}
+	proto = &protos[p];
+	if (srd_decoder_load(proto->decoder_id) != SRD_OK)
+		return 1;
+
+	num_samples = 20 * 1000 * 1000;
+	sig.buf = g_byte_array_new();
+	sig.level = 3;
+	sig.seed = 1;
+	sig_hold(&sig, 100);
+	while (sig.buf->len < num_samples)
+		gen_i2c_transfer(&sig);
+	g_byte_array_set_size(sig.buf, num_samples);
+
+	printf("%u CPUs\n", g_get_num_processors());
+	printf("%-8s %10s %10s %12s %8s\n",
+		"segments", "seconds", "Msamples/s", "annotations", "speedup");
+
+	if (!(sess = split_session_new(proto)))
+		return 1;
+	num_annotations = 0;
+	serial = send_all(sess, sig.buf->data, num_samples, 1);
+	srd_session_destroy(sess);
+	if (serial < 0)
+		return 1;
+	serial_annotations = num_annotations;
+	printf("%-8s %10.3f %10.1f %12" G_GUINT64_FORMAT " %7.2fx\n",
+		"serial", serial, num_samples / serial / 1e6,
+		num_annotations, 1.0);
+
+	for (num_segs = 1; num_segs <= 8; num_segs *= 2) {
+		if (!(sess = split_session_new(proto)))
+			return 1;
+		num_annotations = 0;
+		start = g_get_monotonic_time();
+		ret = srd_session_send_split(sess, sig.buf->data, num_samples,
+			1, num_segs);
+		secs = (g_get_monotonic_time() - start) / 1e6;
+		srd_session_destroy(sess);
+		if (ret != SRD_OK || num_annotations != serial_annotations)
+			return 1;
+		printf("%-8u %10.3f %10.1f %12" G_GUINT64_FORMAT " %7.2fx\n",
+			num_segs, secs, num_samples / secs / 1e6,
+			num_annotations, serial / secs);
+		fflush(stdout);
+	}
+
+	g_byte_array_free(sig.buf, TRUE);
+
+	return 0;
+}
+
+static const struct bench benchmarks[] = {
+	{ "stacks", "independent decoder stacks, serial vs. parallel",
+		bench_stacks },
+	{ "put", "put() throughput with up to 32 decoder instances",
+		bench_put },
+	{ "decoders", "bottom-level decoders on synthetic signals",
+		bench_decoders },
+	{ "split", "a long capture in parallel segments vs. serial",
+		bench_split },
+};
+
+int main(int argc, char **argv)
+{
+	unsigned int i, j;
+	int a, ret;
+	gboolean run;
+
+#ifdef WORKER_TESTPATH
+	/* Worker processes run the worker program of the build tree. */
+	if (!g_getenv("SIGROKDECODE_WORKER"))
+		g_setenv("SIGROKDECODE_WORKER", WORKER_TESTPATH, TRUE);
+#endif
+
+	if (srd_init(DECODERS_TESTDIR) != SRD_OK)
+		return EXIT_FAILURE;
+	srd_log_loglevel_set(SRD_LOG_WARN);
+
+	/* Arguments which aren't benchmarks select decoders. */
+	decoder_filter = g_new0(char *, argc);
+	for (a = 1, j = 0; a < argc; a++) {
+		for (i = 0; i < G_N_ELEMENTS(benchmarks); i++) {
+			if (!strcmp(argv[a], benchmarks[i].name))
+				break;
+		}
+		if (i == G_N_ELEMENTS(benchmarks))
+			decoder_filter[j++] = argv[a];
+	}
+
+	ret = 0;
+	for (i = 0; i < G_N_ELEMENTS(benchmarks); i++) {
+		/* Only decoder IDs given: run just the decoders benchmark. */
+		run = argc < 2 || (j == (unsigned int)argc - 1 &&
+			benchmarks[i].run == bench_decoders);
+		for (a = 1; a < argc; a++) {
+			if (!strcmp(argv[a], benchmarks[i].name))
+				run = TRUE;
+		}
+		if (!run)
+			continue;
+		printf("== %s: %s\n", benchmarks[i].name, benchmarks[i].descr);
+		if (benchmarks[i].run() != 0) {
+			fprintf(stderr, "Benchmark %s failed.\n",
+				benchmarks[i].name);
+			ret = 1;
+		}
+	}
+
+	srd_exit();
+	g_free(decoder_filter);
+
+	return ret ? EXIT_FAILURE : EXIT_SUCCESS;
+}
@@ -20,6 +20,8 @@
 #include <config.h>
 #include <libsigrokdecode.h> /* First, to avoid compiler warning. */
 #include <stdlib.h>
+#include <string.h>
+#include <unistd.h>
 #include <check.h>
 #include "lib.h"
 
@@ -38,6 +40,54 @@ START_TEST(test_load_all)
 }
 END_TEST
 
+/*
+ * Check whether srd_decoder_load_all() with an index works.
+ * The second load must find the same decoders without importing them,
+ * and creating an instance must import the decoder.
+ */
+START_TEST(test_load_all_index)
+{
+	const char *path = "test-decoder-index";
+	struct srd_session *sess;
+	struct srd_decoder *dec;
+	struct srd_decoder_inst *di;
+	struct srd_decoder_annotation_row *row;
+	guint num_decoders;
+	int ret;
+
+	unlink(path);
+	srd_decoder_index_set(path);
+
+	srd_init(DECODERS_TESTDIR);
+	ret = srd_decoder_load_all();
+	fail_unless(ret == SRD_OK, "srd_decoder_load_all() failed: %d.", ret);
+	num_decoders = g_slist_length((GSList *)srd_decoder_list());
+	fail_unless(access(path, R_OK) == 0, "Index was not written.");
+	srd_exit();
+
+	srd_init(DECODERS_TESTDIR);
+	ret = srd_decoder_load_all();
+	fail_unless(ret == SRD_OK, "srd_decoder_load_all() failed: %d.", ret);
+	fail_unless(g_slist_length((GSList *)srd_decoder_list()) == num_decoders);
+	dec = srd_decoder_get_by_id("uart");
+	fail_unless(dec != NULL);
+	fail_unless(dec->py_mod == NULL, "Decoder was imported.");
+	fail_unless(!strcmp(dec->name, "UART"));
+	fail_unless(g_slist_length(dec->opt_channels) == 2);
+	fail_unless(g_slist_length(dec->options) > 0);
+	row = g_slist_nth_data(dec->annotation_rows, 0);
+	fail_unless(row != NULL && g_slist_length(row->ann_classes) > 0);
+	srd_session_new(&sess);
+	di = srd_inst_new(sess, "uart", NULL);
+	fail_unless(di != NULL, "srd_inst_new() failed.");
+	fail_unless(dec->py_mod != NULL, "Decoder was not imported.");
+	srd_exit();
+
+	srd_decoder_index_set(NULL);
+	unlink(path);
+}
+END_TEST
+
 /*
  * Check whether srd_decoder_load_all() fails without prior srd_init().
  * If it returns != SRD_OK (or segfaults) this test will fail.
@@ -432,6 +482,7 @@ Suite *suite_decoder(void)
 	tcase_set_timeout(tc, 0);
 	tcase_add_checked_fixture(tc, srdtest_setup, srdtest_teardown);
 	tcase_add_test(tc, test_load_all);
+	tcase_add_test(tc, test_load_all_index);
 	tcase_add_test(tc, test_load_all_no_init);
 	tcase_add_test(tc, test_load);
 	tcase_add_test(tc, test_load_bogus);
@@ -0,0 +1,146 @@
+##
+## This file is part of the libsigrokdecode project.
+##
+## Copyright (C) 2026 The libsigrokdecode developers
+##
+## This program is free software; you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published by
+## the Free Software Foundation; either version 2 of the License, or
+## (at your option) any later version.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+## You should have received a copy of the GNU General Public License
+## along with this program; if not, see <http://www.gnu.org/licenses/>.
+##
+
+import sigrokdecode as srd
+
+NUM_CHANNELS = 4
+
+# The condition lists which the decoder waits for, in turn. Channel 3 is
+# optional and left unassigned by the tests, channel 5 doesn't exist.
+CONDITIONS = (
+    [{0: 'e'}],
+    [{0: 'r', 1: 'h'}, {2: 'f'}],
+    [{1: 'l', 'skip': 3}],
+    [{1: 'l', 'skip': 3}],
+    [{'skip': 5, 0: 'h'}],
+    [{'skip': 7}, {2: 'e', 0: 'l'}],
+    [{3: 'l', 1: 'r'}, {3: 'e'}, {0: 'f'}],
+    [{3: 'h'}, {3: 'n'}, {2: 'r'}],
+    [{0: 'n', 1: 'e'}],
+    [{0: 'h', 1: 'h', 2: 'h'}, {0: 'l', 1: 'l', 2: 'l'}],
+    [{}, {0: 'r'}],
+    [{5: 'h'}, {1: 'f'}],
+    [{'skip': 0}, {0: 'e'}],
+    [{'skip': 40}],
+)
+
+class Decoder(srd.Decoder):
+    api_version = 3
+    id = 'testmatch'
+    name = 'Test match'
+    longname = 'Test wait() condition matching'
+    desc = 'Report where wait() conditions match.'
+    license = 'gplv2+'
+    inputs = ['logic']
+    outputs = []
+    tags = ['Util']
+    channels = tuple({'id': 'd%d' % i, 'name': 'D%d' % i, 'desc': 'Data line'}
+        for i in range(NUM_CHANNELS - 1))
+    optional_channels = (
+        {'id': 'd3', 'name': 'D3', 'desc': 'Optional data line'},
+    )
+    annotations = (
+        ('match', 'Match'),
+    )
+    options = (
+        {'id': 'mode', 'desc': 'Who checks the conditions', 'default': 'wait',
+            'values': ('wait', 'ref')},
+    )
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        pass
+
+    def start(self):
+        self.out_ann = self.register(srd.OUTPUT_ANN)
+
+    def report(self, samplenum, pins, matched):
+        text = '%d:%s:%s' % (samplenum, ','.join('%d' % p for p in pins),
+                             ''.join('1' if m else '0' for m in matched))
+        self.put(samplenum, samplenum, self.out_ann, [0, [text]])
+
+    def decode_wait(self):
+        i = 0
+        while True:
+            pins = self.wait(CONDITIONS[i % len(CONDITIONS)])
+            self.report(self.samplenum, pins, self.matched)
+            i += 1
+
+    def samples(self):
+        while True:
+            first, data, unitsize, chmap = self.wait_block()
+            for s in range(len(data) // unitsize):
+                pos = s * unitsize
+                yield first + s, tuple(None if ch < 0 else
+                    data[pos + ch // 8] >> (ch % 8) & 1 for ch in chmap)
+
+    def term_matches(self, term, pins, old):
+        key, value = term[0], term[1]
+        if isinstance(key, str):
+            # The number of samples skipped so far is kept in the term.
+            if value < 0:
+                return False
+            if term[2] == value:
+                return True
+            term[2] += 1
+            return False
+        if key < 0 or key >= NUM_CHANNELS:
+            return False
+        # Unused optional channels read as low, and never change.
+        s, o = pins[key] or 0, old[key]
+        return {
+            'h': s == 1,
+            'l': s == 0,
+            'r': o == 0 and s == 1,
+            'f': o == 1 and s == 0,
+            'e': o is not None and o != s,
+            'n': o == s,
+        }[value]
+
+    def decode_ref(self):
+        # Like the library up to version 0.5: all conditions get checked
+        # on each sample, the terms of a condition until one fails.
+        samples = self.samples()
+        samplenum, pins = next(samples)
+        old = list(pins)
+        i = 0
+        while True:
+            conds = [[[k, v, 0] for k, v in c.items()]
+                     for c in CONDITIONS[i % len(CONDITIONS)]]
+            while True:
+                matched = []
+                for terms in conds:
+                    m = bool(terms)
+                    for term in terms:
+                        if not self.term_matches(term, pins, old):
+                            m = False
+                            break
+                    matched.append(m)
+                old = [o if p is None else p for o, p in zip(old, pins)]
+                if any(matched):
+                    break
+                samplenum, pins = next(samples)
+            self.report(samplenum, [0xff if p is None else p for p in pins],
+                        matched)
+            i += 1
+
+    def decode(self):
+        getattr(self, 'decode_' + self.options['mode'])()
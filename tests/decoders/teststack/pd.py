@@ -0,0 +1,57 @@
+##
+## This file is part of the libsigrokdecode project.
+##
+## Copyright (C) 2026 The libsigrokdecode developers
+##
+## This program is free software; you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published by
+## the Free Software Foundation; either version 2 of the License, or
+## (at your option) any later version.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+## You should have received a copy of the GNU General Public License
+## along with this program; if not, see <http://www.gnu.org/licenses/>.
+##
+
+import sigrokdecode as srd
+
+class Decoder(srd.Decoder):
+    api_version = 3
+    id = 'teststack'
+    name = 'Test stack'
+    longname = 'Test stacked decoding'
+    desc = 'Report the Python output of a lower decoder.'
+    license = 'gplv2+'
+    inputs = ['testwait']
+    outputs = []
+    tags = ['Util']
+    annotations = (
+        ('item', 'Item'),
+    )
+    options = (
+        {'id': 'batch', 'desc': 'Use decode_batch()', 'default': 'no',
+            'values': ('no', 'yes')},
+    )
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        pass
+
+    def start(self):
+        self.out_ann = self.register(srd.OUTPUT_ANN)
+        # The library looks for decode_batch() upon the first input.
+        if self.options['batch'] == 'yes':
+            self.decode_batch = self.decode_items
+
+    def decode(self, ss, es, data):
+        self.put(ss, es, self.out_ann, [0, ['%d:%d' % (ss, data)]])
+
+    def decode_items(self, items):
+        for ss, es, data in items:
+            self.decode(ss, es, data)
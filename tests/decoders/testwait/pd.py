@@ -0,0 +1,94 @@
+##
+## This file is part of the libsigrokdecode project.
+##
+## Copyright (C) 2026 The libsigrokdecode developers
+##
+## This program is free software; you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published by
+## the Free Software Foundation; either version 2 of the License, or
+## (at your option) any later version.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+## You should have received a copy of the GNU General Public License
+## along with this program; if not, see <http://www.gnu.org/licenses/>.
+##
+
+import sigrokdecode as srd
+
+NUM_CHANNELS = 3
+
+class Decoder(srd.Decoder):
+    api_version = 3
+    id = 'testwait'
+    name = 'Test wait'
+    longname = 'Test wait() modes'
+    desc = 'Report pin changes through the different wait() variants.'
+    license = 'gplv2+'
+    inputs = ['logic']
+    outputs = ['testwait']
+    tags = ['Util']
+    channels = tuple({'id': 'd%d' % i, 'name': 'D%d' % i, 'desc': 'Data line'}
+        for i in range(NUM_CHANNELS))
+    annotations = (
+        ('change', 'Pin change'),
+    )
+    options = (
+        {'id': 'mode', 'desc': 'wait() variant', 'default': 'wait',
+            'values': ('wait', 'packed', 'block')},
+    )
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        pass
+
+    def start(self):
+        self.out_ann = self.register(srd.OUTPUT_ANN)
+        self.out_python = self.register(srd.OUTPUT_PYTHON)
+
+    def report(self, samplenum, pins, matched):
+        text = '%d:%d:%s' % (samplenum, pins, matched)
+        self.put(samplenum, samplenum, self.out_ann, [0, [text]])
+        self.put(samplenum, samplenum, self.out_python, pins)
+
+    def decode_wait(self):
+        conds = [{i: 'e'} for i in range(NUM_CHANNELS)]
+        pins = self.wait()
+        self.report(self.samplenum, sum(p << i for i, p in enumerate(pins)),
+                    None)
+        while True:
+            pins = self.wait(conds)
+            self.report(self.samplenum,
+                        sum(p << i for i, p in enumerate(pins)),
+                        sum(m << i for i, m in enumerate(self.matched)))
+
+    def decode_packed(self):
+        conds = [{i: 'e'} for i in range(NUM_CHANNELS)]
+        pins = self.wait(packed=True)
+        self.report(self.samplenum, pins, None)
+        while True:
+            pins = self.wait(conds, packed=True)
+            self.report(self.samplenum, pins, self.matched)
+
+    def decode_block(self):
+        prev = None
+        while True:
+            first, data, unitsize, chmap = self.wait_block()
+            for s in range(len(data) // unitsize):
+                pins = 0
+                for i, ch in enumerate(chmap):
+                    if ch >= 0 and data[s * unitsize + ch // 8] & (1 << (ch % 8)):
+                        pins |= 1 << i
+                if prev is None:
+                    self.report(first + s, pins, None)
+                elif pins != prev:
+                    self.report(first + s, pins, pins ^ prev)
+                prev = pins
+
+    def decode(self):
+        getattr(self, 'decode_' + self.options['mode'])()
@@ -39,6 +39,11 @@ int main(void)
 	Suite *s;
 	SRunner *srunner;
 
+#ifdef WORKER_TESTPATH
+	/* Worker processes run the worker program of the build tree. */
+	g_setenv("SIGROKDECODE_WORKER", WORKER_TESTPATH, TRUE);
+#endif
+
 	s = suite_create("mastersuite");
 	srunner = srunner_create(s);
 
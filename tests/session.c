@@ -20,8 +20,12 @@
 #include <config.h>
 #include <libsigrokdecode-internal.h> /* First, to avoid compiler warning. */
 #include <libsigrokdecode.h>
+#include <inttypes.h>
 #include <stdint.h>
+#include <stdio.h>
 #include <stdlib.h>
+#include <string.h>
+#include <unistd.h>
 #include <check.h>
 #include "lib.h"
 
@@ -260,6 +264,1236 @@ START_TEST(test_session_reset_nodata)
 }
 END_TEST
 
+/*
+ * Check whether srd_session_parallel_set() works, and fails for bogus
+ * sessions.
+ */
+START_TEST(test_session_parallel_set)
+{
+	int ret;
+	struct srd_session *sess;
+
+	srd_init(NULL);
+	srd_session_new(&sess);
+	ret = srd_session_parallel_set(sess, TRUE);
+	fail_unless(ret == SRD_OK, "srd_session_parallel_set() failed: %d.", ret);
+	fail_unless(sess->parallel);
+	ret = srd_session_parallel_set(sess, FALSE);
+	fail_unless(ret == SRD_OK, "srd_session_parallel_set() failed: %d.", ret);
+	fail_unless(!sess->parallel);
+	ret = srd_session_parallel_set(NULL, TRUE);
+	fail_unless(ret != SRD_OK, "srd_session_parallel_set(NULL) worked.");
+	srd_session_destroy(sess);
+	srd_exit();
+}
+END_TEST
+
+/*
+ * Check whether queued sending works on a session without decoders,
+ * and whether it fails for bogus parameters.
+ */
+START_TEST(test_session_send_bytes)
+{
+	int ret;
+	struct srd_session *sess;
+	GBytes *data;
+	static const uint8_t samples[16];
+
+	srd_init(NULL);
+	srd_session_new(&sess);
+	data = g_bytes_new_static(samples, sizeof(samples));
+
+	ret = srd_session_send_queue_set(sess, 2);
+	fail_unless(ret == SRD_OK, "srd_session_send_queue_set() failed: %d.", ret);
+	ret = srd_session_send_bytes(sess, 0, 16, data, 1);
+	fail_unless(ret == SRD_OK, "srd_session_send_bytes() failed: %d.", ret);
+	ret = srd_session_send_bytes(sess, 16, 32, data, 1);
+	fail_unless(ret == SRD_OK, "srd_session_send_bytes() failed: %d.", ret);
+	ret = srd_session_send_bytes(sess, 32, 48, data, 1);
+	fail_unless(ret == SRD_OK, "srd_session_send_bytes() failed: %d.", ret);
+	ret = srd_session_flush(sess);
+	fail_unless(ret == SRD_OK, "srd_session_flush() failed: %d.", ret);
+
+	ret = srd_session_send_queue_set(sess, 0);
+	fail_unless(ret != SRD_OK, "srd_session_send_queue_set(0) worked.");
+	ret = srd_session_send_queue_set(NULL, 1);
+	fail_unless(ret != SRD_OK, "srd_session_send_queue_set(NULL) worked.");
+	ret = srd_session_send_bytes(NULL, 0, 16, data, 1);
+	fail_unless(ret != SRD_OK, "srd_session_send_bytes(NULL) worked.");
+	ret = srd_session_send_bytes(sess, 0, 16, NULL, 1);
+	fail_unless(ret != SRD_OK, "srd_session_send_bytes() w/o data worked.");
+	ret = srd_session_send_bytes(sess, 0, 16, data, 0);
+	fail_unless(ret != SRD_OK, "srd_session_send_bytes() w/ unitsize 0 worked.");
+	ret = srd_session_flush(NULL);
+	fail_unless(ret != SRD_OK, "srd_session_flush(NULL) worked.");
+
+	g_bytes_unref(data);
+	srd_session_destroy(sess);
+	srd_exit();
+}
+END_TEST
+
+/*
+ * Check whether the error of a queued chunk is reported once, and
+ * whether queueing continues after it.
+ */
+START_TEST(test_session_send_bytes_error)
+{
+	int ret;
+	struct srd_session *sess;
+	struct srd_decoder_inst *di;
+	GHashTable *options, *channels;
+	GBytes *data;
+	static const uint8_t samples[16];
+
+	srd_init(DECODERS_TESTDIR);
+	srd_decoder_load("counter");
+	srd_session_new(&sess);
+	options = g_hash_table_new(g_str_hash, g_str_equal);
+	di = srd_inst_new(sess, "counter", options);
+	g_hash_table_destroy(options);
+	fail_unless(di != NULL, "srd_inst_new() failed.");
+	channels = g_hash_table_new_full(g_str_hash, g_str_equal, g_free,
+		(GDestroyNotify)g_variant_unref);
+	g_hash_table_insert(channels, g_strdup("data"),
+		g_variant_ref_sink(g_variant_new_int32(0)));
+	ret = srd_inst_channel_set_all(di, channels);
+	g_hash_table_destroy(channels);
+	fail_unless(ret == SRD_OK, "srd_inst_channel_set_all() failed: %d.", ret);
+	data = g_bytes_new_static(samples, sizeof(samples));
+
+	srd_session_start(sess);
+	ret = srd_session_send_queue_set(sess, 1);
+	fail_unless(ret == SRD_OK, "srd_session_send_queue_set() failed: %d.", ret);
+	ret = srd_session_send_bytes(sess, 0, 16, data, 1);
+	fail_unless(ret == SRD_OK, "srd_session_send_bytes() failed: %d.", ret);
+	/* Leave a gap, the chunk fails. Later chunks get dropped. */
+	ret = srd_session_send_bytes(sess, 100, 116, data, 1);
+	fail_unless(ret == SRD_OK, "srd_session_send_bytes() failed: %d.", ret);
+	while ((ret = srd_session_send_bytes(sess, 16, 32, data, 1)) == SRD_OK)
+		;
+	ret = srd_session_send_bytes(sess, 16, 32, data, 1);
+	fail_unless(ret == SRD_OK, "Error was reported again: %d.", ret);
+	ret = srd_session_send_bytes(sess, 32, 48, data, 1);
+	fail_unless(ret == SRD_OK, "srd_session_send_bytes() failed: %d.", ret);
+	ret = srd_session_flush(sess);
+	fail_unless(ret == SRD_OK, "srd_session_flush() failed: %d.", ret);
+
+	g_bytes_unref(data);
+	srd_session_destroy(sess);
+	srd_exit();
+}
+END_TEST
+
+static unsigned int num_anns, num_batched, num_batches, max_batch;
+
+static void cb_ann(struct srd_proto_data *pdata, void *cb_data)
+{
+	(void)pdata;
+	(void)cb_data;
+
+	num_anns++;
+}
+
+static void cb_ann_batch(struct srd_proto_data *pdata, unsigned int count,
+		void *cb_data)
+{
+	struct srd_proto_data_annotation *pda;
+	unsigned int i;
+
+	(void)cb_data;
+
+	for (i = 0; i < count; i++) {
+		pda = pdata[i].data;
+		fail_unless(pda && pda->ann_text && pda->ann_text[0],
+			"Batched annotation %u has no text.", i);
+	}
+	num_batched += count;
+	num_batches++;
+	max_batch = MAX(max_batch, count);
+}
+
+/*
+ * Check whether the batch callback receives the same annotations as
+ * the per-annotation callback, in batches of the requested size.
+ */
+START_TEST(test_session_batch_callback)
+{
+	int ret;
+	struct srd_session *sess;
+	struct srd_decoder_inst *di;
+	GHashTable *options, *channels;
+	uint8_t samples[1000];
+	unsigned int i;
+
+	srd_init(DECODERS_TESTDIR);
+	srd_decoder_load("counter");
+	srd_session_new(&sess);
+
+	ret = srd_pd_output_batch_callback_add(NULL, SRD_OUTPUT_ANN,
+		cb_ann_batch, NULL, 0);
+	fail_unless(ret != SRD_OK, "Batch callback w/o session worked.");
+	ret = srd_pd_output_batch_callback_add(sess, SRD_OUTPUT_ANN,
+		NULL, NULL, 0);
+	fail_unless(ret != SRD_OK, "Batch callback w/o function worked.");
+	ret = srd_pd_output_batch_callback_add(sess, SRD_OUTPUT_BINARY,
+		cb_ann_batch, NULL, 0);
+	fail_unless(ret != SRD_OK, "Batch callback for binary output worked.");
+
+	options = g_hash_table_new(g_str_hash, g_str_equal);
+	di = srd_inst_new(sess, "counter", options);
+	g_hash_table_destroy(options);
+	fail_unless(di != NULL, "srd_inst_new() failed.");
+	channels = g_hash_table_new_full(g_str_hash, g_str_equal, g_free,
+		(GDestroyNotify)g_variant_unref);
+	g_hash_table_insert(channels, g_strdup("data"),
+		g_variant_ref_sink(g_variant_new_int32(0)));
+	ret = srd_inst_channel_set_all(di, channels);
+	g_hash_table_destroy(channels);
+	fail_unless(ret == SRD_OK, "srd_inst_channel_set_all() failed: %d.", ret);
+
+	ret = srd_pd_output_callback_add(sess, SRD_OUTPUT_ANN, cb_ann, NULL);
+	fail_unless(ret == SRD_OK, "srd_pd_output_callback_add() failed: %d.", ret);
+	ret = srd_pd_output_batch_callback_add(sess, SRD_OUTPUT_ANN,
+		cb_ann_batch, NULL, 7);
+	fail_unless(ret == SRD_OK, "Batch callback failed: %d.", ret);
+
+	for (i = 0; i < sizeof(samples); i++)
+		samples[i] = (i / 5) & 1;
+	num_anns = num_batched = num_batches = max_batch = 0;
+	srd_session_start(sess);
+	ret = srd_session_send(sess, 0, 500, samples, 500, 1);
+	fail_unless(ret == SRD_OK, "srd_session_send() failed: %d.", ret);
+	fail_unless(num_batched == num_anns, "Batched %u of %u annotations.",
+		num_batched, num_anns);
+	ret = srd_session_send(sess, 500, 1000, samples + 500, 500, 1);
+	fail_unless(ret == SRD_OK, "srd_session_send() failed: %d.", ret);
+	fail_unless(num_anns > 0, "No annotations.");
+	fail_unless(num_batched == num_anns, "Batched %u of %u annotations.",
+		num_batched, num_anns);
+	fail_unless(max_batch == 7, "Largest batch holds %u annotations.",
+		max_batch);
+	fail_unless(num_batches > num_anns / 7, "Only %u batches.", num_batches);
+
+	srd_session_destroy(sess);
+	srd_exit();
+}
+END_TEST
+
+static GByteArray *bin_rx;
+static unsigned int num_bins;
+
+static void cb_bin(struct srd_proto_data *pdata, void *cb_data)
+{
+	struct srd_proto_data_binary *pdb;
+
+	(void)cb_data;
+
+	pdb = pdata->data;
+	if (pdb->bin_class == 0)
+		g_byte_array_append(bin_rx, pdb->data, pdb->size);
+	num_bins++;
+}
+
+/* Decode 8n1 UART data at 10 samples per bit, collect the RX dump. */
+static void decode_uart_bin(uint64_t block_size, const uint8_t *bytes,
+		unsigned int num_bytes)
+{
+	int ret;
+	struct srd_session *sess;
+	struct srd_decoder_inst *di;
+	GHashTable *options, *channels;
+	uint8_t *samples;
+	unsigned int num_samples, i, bit;
+
+	num_samples = (num_bytes + 2) * 10 * 10;
+	samples = g_malloc(num_samples);
+	for (i = 0; i < num_samples; i++) {
+		/* Idle before the first and after the last frame. */
+		bit = i / 10 % 10;
+		if (i < 100 || i / 100 > num_bytes || bit == 9)
+			samples[i] = 1;
+		else if (bit == 0)
+			samples[i] = 0;
+		else
+			samples[i] = (bytes[i / 100 - 1] >> (bit - 1)) & 1;
+	}
+
+	srd_session_new(&sess);
+	options = g_hash_table_new_full(g_str_hash, g_str_equal, g_free,
+		(GDestroyNotify)g_variant_unref);
+	g_hash_table_insert(options, g_strdup("baudrate"),
+		g_variant_ref_sink(g_variant_new_int64(100000)));
+	di = srd_inst_new(sess, "uart", options);
+	g_hash_table_destroy(options);
+	fail_unless(di != NULL, "srd_inst_new() failed.");
+	channels = g_hash_table_new_full(g_str_hash, g_str_equal, g_free,
+		(GDestroyNotify)g_variant_unref);
+	g_hash_table_insert(channels, g_strdup("rx"),
+		g_variant_ref_sink(g_variant_new_int32(0)));
+	ret = srd_inst_channel_set_all(di, channels);
+	g_hash_table_destroy(channels);
+	fail_unless(ret == SRD_OK, "srd_inst_channel_set_all() failed: %d.", ret);
+
+	srd_pd_output_callback_add(sess, SRD_OUTPUT_BINARY, cb_bin, NULL);
+	ret = srd_session_binary_coalesce_set(sess, block_size);
+	fail_unless(ret == SRD_OK, "srd_session_binary_coalesce_set() failed: %d.", ret);
+	srd_session_metadata_set(sess, SRD_CONF_SAMPLERATE,
+		g_variant_new_uint64(1000000));
+	srd_session_start(sess);
+	ret = srd_session_send(sess, 0, num_samples / 2, samples,
+		num_samples / 2, 1);
+	fail_unless(ret == SRD_OK, "srd_session_send() failed: %d.", ret);
+	ret = srd_session_send(sess, num_samples / 2, num_samples,
+		samples + num_samples / 2, num_samples - num_samples / 2, 1);
+	fail_unless(ret == SRD_OK, "srd_session_send() failed: %d.", ret);
+	srd_session_destroy(sess);
+	g_free(samples);
+}
+
+/*
+ * Check whether coalesced binary output holds the same data as binary
+ * output which is passed as it is put, in fewer callbacks.
+ */
+START_TEST(test_session_binary_coalesce)
+{
+	int ret;
+	struct srd_session *sess;
+	uint8_t bytes[64];
+	unsigned int i, num_plain;
+
+	srd_init(DECODERS_TESTDIR);
+	srd_decoder_load("uart");
+
+	srd_session_new(&sess);
+	ret = srd_session_binary_coalesce_set(NULL, 16);
+	fail_unless(ret != SRD_OK, "Coalescing w/o session worked.");
+	ret = srd_session_binary_coalesce_set(sess, G_MAXUINT32 + 1ULL);
+	fail_unless(ret != SRD_OK, "Coalescing into 4 GiB blocks worked.");
+	srd_session_destroy(sess);
+
+	for (i = 0; i < sizeof(bytes); i++)
+		bytes[i] = i * 37 + 11;
+
+	bin_rx = g_byte_array_new();
+	num_bins = 0;
+	decode_uart_bin(0, bytes, sizeof(bytes));
+	fail_unless(bin_rx->len == sizeof(bytes), "Got %u bytes.", bin_rx->len);
+	fail_unless(!memcmp(bin_rx->data, bytes, sizeof(bytes)),
+		"Wrong RX dump.");
+	num_plain = num_bins;
+
+	g_byte_array_set_size(bin_rx, 0);
+	num_bins = 0;
+	decode_uart_bin(16, bytes, sizeof(bytes));
+	fail_unless(bin_rx->len == sizeof(bytes), "Got %u coalesced bytes.",
+		bin_rx->len);
+	fail_unless(!memcmp(bin_rx->data, bytes, sizeof(bytes)),
+		"Wrong coalesced RX dump.");
+	fail_unless(num_bins * 8 <= num_plain, "%u of %u callbacks.",
+		num_bins, num_plain);
+
+	g_byte_array_free(bin_rx, TRUE);
+	srd_exit();
+}
+END_TEST
+
+/*
+ * Check whether the instance and session counters account for the
+ * decoded samples and the decoder's output.
+ */
+START_TEST(test_session_stats)
+{
+	int ret;
+	struct srd_session *sess;
+	struct srd_decoder_inst *di;
+	struct srd_inst_stats st;
+	struct srd_session_stats sst;
+	GHashTable *options, *channels;
+	uint8_t samples[1000];
+	unsigned int i;
+
+	srd_init(DECODERS_TESTDIR);
+	srd_decoder_load("counter");
+	srd_session_new(&sess);
+
+	options = g_hash_table_new(g_str_hash, g_str_equal);
+	di = srd_inst_new(sess, "counter", options);
+	g_hash_table_destroy(options);
+	fail_unless(di != NULL, "srd_inst_new() failed.");
+	channels = g_hash_table_new_full(g_str_hash, g_str_equal, g_free,
+		(GDestroyNotify)g_variant_unref);
+	g_hash_table_insert(channels, g_strdup("data"),
+		g_variant_ref_sink(g_variant_new_int32(0)));
+	ret = srd_inst_channel_set_all(di, channels);
+	g_hash_table_destroy(channels);
+	fail_unless(ret == SRD_OK, "srd_inst_channel_set_all() failed: %d.", ret);
+
+	ret = srd_inst_stats_get(NULL, &st);
+	fail_unless(ret != SRD_OK, "srd_inst_stats_get(NULL) worked.");
+	ret = srd_inst_stats_get(di, NULL);
+	fail_unless(ret != SRD_OK, "srd_inst_stats_get() w/o stats worked.");
+	ret = srd_session_stats_get(NULL, &sst);
+	fail_unless(ret != SRD_OK, "srd_session_stats_get(NULL) worked.");
+
+	srd_pd_output_callback_add(sess, SRD_OUTPUT_ANN, cb_ann, NULL);
+	for (i = 0; i < sizeof(samples); i++)
+		samples[i] = (i / 5) & 1;
+	num_anns = 0;
+	srd_session_start(sess);
+	ret = srd_session_send(sess, 0, 500, samples, 500, 1);
+	fail_unless(ret == SRD_OK, "srd_session_send() failed: %d.", ret);
+	ret = srd_session_send(sess, 500, 1000, samples + 500, 500, 1);
+	fail_unless(ret == SRD_OK, "srd_session_send() failed: %d.", ret);
+
+	ret = srd_inst_stats_get(di, &st);
+	fail_unless(ret == SRD_OK, "srd_inst_stats_get() failed: %d.", ret);
+	fail_unless(st.wait_calls > 0, "No wait() calls counted.");
+	fail_unless(st.matches + 1 == st.wait_calls, "%" PRIu64 " matches"
+		" of %" PRIu64 " wait() calls.", st.matches, st.wait_calls);
+	fail_unless(st.puts[SRD_OUTPUT_ANN] == num_anns, "%" PRIu64
+		" of %u annotations counted.", st.puts[SRD_OUTPUT_ANN], num_anns);
+	fail_unless(st.samples_scanned == 1000, "%" PRIu64 " samples scanned.",
+		st.samples_scanned);
+
+	ret = srd_session_stats_get(sess, &sst);
+	fail_unless(ret == SRD_OK, "srd_session_stats_get() failed: %d.", ret);
+	fail_unless(sst.chunks == 2 && sst.samples == 1000,
+		"%" PRIu64 " chunks, %" PRIu64 " samples.", sst.chunks, sst.samples);
+
+	srd_session_destroy(sess);
+	srd_exit();
+}
+END_TEST
+
+/*
+ * Check that self.has_channel() returns new references to True/False.
+ * The z80 decoder queries all of its optional channels.
+ */
+START_TEST(test_session_has_channel)
+{
+	int ret;
+	struct srd_session *sess;
+	struct srd_decoder_inst *di;
+	GHashTable *options, *channels;
+	Py_ssize_t refs_true, refs_false;
+	uint16_t samples[1000];
+	unsigned int i;
+
+	srd_init(DECODERS_TESTDIR);
+	srd_decoder_load("z80");
+	srd_session_new(&sess);
+
+	options = g_hash_table_new(g_str_hash, g_str_equal);
+	di = srd_inst_new(sess, "z80", options);
+	g_hash_table_destroy(options);
+	fail_unless(di != NULL, "srd_inst_new() failed.");
+	channels = g_hash_table_new_full(g_str_hash, g_str_equal, g_free,
+		(GDestroyNotify)g_variant_unref);
+	for (i = 0; i < 8; i++)
+		g_hash_table_insert(channels, g_strdup_printf("d%u", i),
+			g_variant_ref_sink(g_variant_new_int32(i)));
+	g_hash_table_insert(channels, g_strdup("m1"),
+		g_variant_ref_sink(g_variant_new_int32(8)));
+	g_hash_table_insert(channels, g_strdup("rd"),
+		g_variant_ref_sink(g_variant_new_int32(9)));
+	g_hash_table_insert(channels, g_strdup("wr"),
+		g_variant_ref_sink(g_variant_new_int32(10)));
+	ret = srd_inst_channel_set_all(di, channels);
+	g_hash_table_destroy(channels);
+	fail_unless(ret == SRD_OK, "srd_inst_channel_set_all() failed: %d.", ret);
+
+	/* Memory reads (/RD low) of incrementing bytes. */
+	for (i = 0; i < G_N_ELEMENTS(samples); i++)
+		samples[i] = 0x700 | ((i / 10) & 0xff) | (((i / 5) & 1) << 9);
+
+	refs_true = Py_REFCNT(Py_True);
+	refs_false = Py_REFCNT(Py_False);
+	srd_session_start(sess);
+	ret = srd_session_send(sess, 0, G_N_ELEMENTS(samples),
+		(const uint8_t *)samples, sizeof(samples), 2);
+	fail_unless(ret == SRD_OK, "srd_session_send() failed: %d.", ret);
+	srd_session_destroy(sess);
+
+	fail_unless(Py_REFCNT(Py_True) >= refs_true, "True lost %zd refs.",
+		refs_true - Py_REFCNT(Py_True));
+	fail_unless(Py_REFCNT(Py_False) >= refs_false, "False lost %zd refs.",
+		refs_false - Py_REFCNT(Py_False));
+
+	srd_exit();
+}
+END_TEST
+
+static GPtrArray *ann_log;
+/* Only log the annotations of this instance, if set. */
+static struct srd_decoder_inst *ann_log_di;
+
+static void cb_ann_log(struct srd_proto_data *pdata, void *cb_data)
+{
+	struct srd_proto_data_annotation *pda;
+
+	(void)cb_data;
+
+	if (ann_log_di && pdata->pdo->di != ann_log_di)
+		return;
+	pda = pdata->data;
+	g_ptr_array_add(ann_log, g_strdup_printf("%" PRIu64 "-%" PRIu64
+		" %d %s", pdata->start_sample, pdata->end_sample,
+		pda->ann_class, pda->ann_text[0]));
+}
+
+/* Append samples with the given I2C SCL and SDA levels. */
+static void i2c_put(GByteArray *buf, int scl, int sda, unsigned int count)
+{
+	uint8_t sample;
+
+	sample = scl | (sda << 1);
+	while (count--)
+		g_byte_array_append(buf, &sample, 1);
+}
+
+/* Generate I2C write transfers of an address and two data bytes. */
+static GByteArray *gen_i2c(unsigned int num_transfers)
+{
+	GByteArray *buf;
+	uint8_t bytes[3];
+	unsigned int t, b, bit;
+	int sda;
+
+	buf = g_byte_array_new();
+	i2c_put(buf, 1, 1, 20);
+	for (t = 0; t < num_transfers; t++) {
+		i2c_put(buf, 1, 0, 5);
+		bytes[0] = 0x50 << 1;
+		bytes[1] = t;
+		bytes[2] = t * 7;
+		for (b = 0; b < sizeof(bytes); b++) {
+			/* Eight data bits, MSB first, and an ACK. */
+			for (bit = 0; bit < 9; bit++) {
+				sda = bit < 8 ? (bytes[b] >> (7 - bit)) & 1 : 0;
+				i2c_put(buf, 0, sda, 5);
+				i2c_put(buf, 1, sda, 5);
+			}
+		}
+		i2c_put(buf, 0, 0, 5);
+		i2c_put(buf, 1, 0, 5);
+		i2c_put(buf, 1, 1, 20);
+	}
+
+	return buf;
+}
+
+static void send_i2c(struct srd_session *sess, const GByteArray *buf,
+		uint64_t start)
+{
+	uint64_t end;
+	int ret;
+
+	for (; start < buf->len; start = end) {
+		end = MIN(start + 777, buf->len);
+		ret = srd_session_send(sess, start, end, buf->data + start,
+			end - start, 1);
+		fail_unless(ret == SRD_OK, "srd_session_send() failed: %d.", ret);
+	}
+}
+
+/* Create a session with an i2c instance which logs its annotations. */
+static struct srd_session *i2c_session_new(void)
+{
+	int ret;
+	struct srd_session *sess;
+	struct srd_decoder_inst *di;
+	GHashTable *options, *channels;
+
+	srd_session_new(&sess);
+
+	options = g_hash_table_new(g_str_hash, g_str_equal);
+	di = srd_inst_new(sess, "i2c", options);
+	g_hash_table_destroy(options);
+	fail_unless(di != NULL, "srd_inst_new() failed.");
+	channels = g_hash_table_new_full(g_str_hash, g_str_equal, g_free,
+		(GDestroyNotify)g_variant_unref);
+	g_hash_table_insert(channels, g_strdup("scl"),
+		g_variant_ref_sink(g_variant_new_int32(0)));
+	g_hash_table_insert(channels, g_strdup("sda"),
+		g_variant_ref_sink(g_variant_new_int32(1)));
+	ret = srd_inst_channel_set_all(di, channels);
+	g_hash_table_destroy(channels);
+	fail_unless(ret == SRD_OK, "srd_inst_channel_set_all() failed: %d.", ret);
+
+	srd_pd_output_callback_add(sess, SRD_OUTPUT_ANN, cb_ann_log, NULL);
+	srd_session_metadata_set(sess, SRD_CONF_SAMPLERATE,
+		g_variant_new_uint64(1000000));
+
+	return sess;
+}
+
+/*
+ * Check whether decoding which resumes at a checkpoint produces the
+ * same output as decoding the whole capture.
+ */
+START_TEST(test_session_seek)
+{
+	int ret;
+	struct srd_session *sess;
+	GByteArray *buf;
+	GPtrArray *full;
+	uint64_t target, resume, ss;
+	unsigned int i, j;
+
+	srd_init(DECODERS_TESTDIR);
+	srd_decoder_load("i2c");
+	sess = i2c_session_new();
+
+	ret = srd_session_checkpoint_interval_set(NULL, 1000);
+	fail_unless(ret != SRD_OK, "Interval set for NULL session.");
+	ret = srd_session_checkpoint_interval_set(sess, 1000);
+	fail_unless(ret == SRD_OK, "srd_session_checkpoint_interval_set() "
+		"failed: %d.", ret);
+
+	buf = gen_i2c(40);
+	full = g_ptr_array_new_with_free_func(g_free);
+	ann_log = full;
+	srd_session_start(sess);
+	send_i2c(sess, buf, 0);
+	fail_unless(full->len > 40 * 5, "Got %u annotations.", full->len);
+
+	/* Before the first checkpoint, decoding starts over. */
+	ret = srd_session_seek(sess, 100, &resume);
+	fail_unless(ret == SRD_OK, "srd_session_seek() failed: %d.", ret);
+	fail_unless(resume == 0, "Resuming at %" PRIu64 ".", resume);
+
+	target = buf->len * 2 / 3;
+	ret = srd_session_seek(sess, target, &resume);
+	fail_unless(ret == SRD_OK, "srd_session_seek() failed: %d.", ret);
+	fail_unless(resume > 0 && resume <= target && target - resume < 2000,
+		"Resuming at %" PRIu64 " for %" PRIu64 ".", resume, target);
+
+	ann_log = g_ptr_array_new_with_free_func(g_free);
+	send_i2c(sess, buf, resume);
+
+	/* The output must be the tail of the full decode. */
+	for (i = 0; i < full->len; i++) {
+		ss = g_ascii_strtoull(full->pdata[i], NULL, 10);
+		if (ss > resume)
+			break;
+	}
+	fail_unless(full->len - i == ann_log->len, "Got %u of %u annotations.",
+		ann_log->len, full->len - i);
+	for (j = 0; j < ann_log->len; i++, j++) {
+		fail_unless(!strcmp(full->pdata[i], ann_log->pdata[j]),
+			"Got '%s' instead of '%s'.", (char *)ann_log->pdata[j],
+			(char *)full->pdata[i]);
+	}
+
+	g_ptr_array_free(ann_log, TRUE);
+	g_ptr_array_free(full, TRUE);
+	g_byte_array_free(buf, TRUE);
+	srd_session_destroy(sess);
+	srd_exit();
+}
+END_TEST
+
+/*
+ * Check whether decoding a capture in parallel segments produces the
+ * same output as decoding it in one go, also with segments which are
+ * too short to have a checkpoint.
+ */
+START_TEST(test_session_send_split)
+{
+	int ret;
+	struct srd_session *sess;
+	GByteArray *buf;
+	GPtrArray *full;
+	unsigned int i, j;
+	static const unsigned int num_segments[] = { 1, 4, 7, 64 };
+
+	srd_init(DECODERS_TESTDIR);
+	srd_decoder_load("i2c");
+	buf = gen_i2c(40);
+
+	sess = i2c_session_new();
+	full = g_ptr_array_new_with_free_func(g_free);
+	ann_log = full;
+	srd_session_start(sess);
+	send_i2c(sess, buf, 0);
+	srd_session_destroy(sess);
+
+	sess = i2c_session_new();
+	ret = srd_session_send_split(sess, buf->data, buf->len, 1, 0);
+	fail_unless(ret != SRD_OK, "Split into 0 segments.");
+	ret = srd_session_send_split(NULL, buf->data, buf->len, 1, 4);
+	fail_unless(ret != SRD_OK, "Split with NULL session.");
+	srd_session_start(sess);
+	for (i = 0; i < G_N_ELEMENTS(num_segments); i++) {
+		ann_log = g_ptr_array_new_with_free_func(g_free);
+		ret = srd_session_send_split(sess, buf->data, buf->len, 1,
+			num_segments[i]);
+		fail_unless(ret == SRD_OK, "srd_session_send_split() "
+			"failed: %d.", ret);
+		fail_unless(ann_log->len == full->len, "Got %u of %u "
+			"annotations in %u segments.", ann_log->len, full->len,
+			num_segments[i]);
+		for (j = 0; j < full->len; j++) {
+			fail_unless(!strcmp(full->pdata[j], ann_log->pdata[j]),
+				"Got '%s' instead of '%s' in %u segments.",
+				(char *)ann_log->pdata[j], (char *)full->pdata[j],
+				num_segments[i]);
+		}
+		g_ptr_array_free(ann_log, TRUE);
+	}
+
+	g_ptr_array_free(full, TRUE);
+	g_byte_array_free(buf, TRUE);
+	srd_session_destroy(sess);
+	srd_exit();
+}
+END_TEST
+
+/*
+ * Check whether decoding a sample file in windows produces the same
+ * output as sending the samples.
+ */
+START_TEST(test_session_send_file)
+{
+	int ret;
+	struct srd_session *sess;
+	GByteArray *buf;
+	GPtrArray *full;
+	char *path;
+	unsigned int i, j;
+	int fds[2];
+	static const uint64_t window_samples[] = { 0, 1, 333, 4096 };
+
+	srd_init(DECODERS_TESTDIR);
+	srd_decoder_load("i2c");
+	buf = gen_i2c(40);
+	path = g_build_filename(g_get_tmp_dir(), "srd-test-send-file.bin",
+		NULL);
+	fail_unless(g_file_set_contents(path, (const gchar *)buf->data,
+		buf->len, NULL), "Failed to write %s.", path);
+
+	sess = i2c_session_new();
+	full = g_ptr_array_new_with_free_func(g_free);
+	ann_log = full;
+	srd_session_start(sess);
+	send_i2c(sess, buf, 0);
+	srd_session_destroy(sess);
+
+	sess = i2c_session_new();
+	ret = srd_session_send_file(NULL, path, 0, 1, 0, SRD_INPUT_NORMAL);
+	fail_unless(ret != SRD_OK, "Sent file to NULL session.");
+	ret = srd_session_send_file(sess, path, 0, 0, 0, SRD_INPUT_NORMAL);
+	fail_unless(ret != SRD_OK, "Sent file with unitsize 0.");
+	ret = srd_session_send_file(sess, path, 0, 1, 0, -1);
+	fail_unless(ret != SRD_OK, "Sent file with bogus advice.");
+	ret = srd_session_send_fd(sess, -1, 0, 1, 0, SRD_INPUT_NORMAL);
+	fail_unless(ret != SRD_OK, "Sent bogus file descriptor.");
+	ret = srd_session_send_file(sess, "/nonexistent/file", 0, 1, 0,
+		SRD_INPUT_NORMAL);
+	fail_unless(ret != SRD_OK, "Sent nonexistent file.");
+
+	srd_session_start(sess);
+	for (i = 0; i < G_N_ELEMENTS(window_samples); i++) {
+		ann_log = g_ptr_array_new_with_free_func(g_free);
+		ret = srd_session_send_file(sess, path, 0, 1,
+			window_samples[i], i % 3);
+		fail_unless(ret == SRD_OK, "srd_session_send_file() "
+			"failed: %d.", ret);
+		fail_unless(ann_log->len == full->len, "Got %u of %u "
+			"annotations in windows of %" PRIu64 ".", ann_log->len,
+			full->len, window_samples[i]);
+		for (j = 0; j < full->len; j++) {
+			fail_unless(!strcmp(full->pdata[j], ann_log->pdata[j]),
+				"Got '%s' instead of '%s'.",
+				(char *)ann_log->pdata[j], (char *)full->pdata[j]);
+		}
+		g_ptr_array_free(ann_log, TRUE);
+		ann_log = NULL;
+		srd_session_terminate_reset(sess);
+		srd_session_start(sess);
+	}
+
+	/* Starting at or past the end of the file is an error. */
+	ann_log = g_ptr_array_new_with_free_func(g_free);
+	ret = srd_session_send_file(sess, path, buf->len, 1, 0,
+		SRD_INPUT_NORMAL);
+	fail_unless(ret == SRD_ERR_ARG && ann_log->len == 0, "Decoded past "
+		"the end of the file.");
+	ret = srd_session_send_file(sess, path, buf->len + 1, 1, 0,
+		SRD_INPUT_NORMAL);
+	fail_unless(ret == SRD_ERR_ARG, "Decoded past the end of the file.");
+
+	/* Pipes and the like have no size, they can't be mapped. */
+	fail_unless(pipe(fds) == 0);
+	ret = srd_session_send_fd(sess, fds[0], 0, 1, 0, SRD_INPUT_NORMAL);
+	fail_unless(ret == SRD_ERR_ARG, "Sent a pipe.");
+	close(fds[0]);
+	close(fds[1]);
+
+	g_ptr_array_free(ann_log, TRUE);
+	remove(path);
+	g_free(path);
+	g_ptr_array_free(full, TRUE);
+	g_byte_array_free(buf, TRUE);
+	srd_session_destroy(sess);
+	srd_exit();
+}
+END_TEST
+
+/*
+ * Check whether coalesced chunks produce the same output, and whether
+ * the windows have the configured size.
+ */
+START_TEST(test_session_send_coalesce)
+{
+	int ret;
+	struct srd_session *sess;
+	struct srd_session_stats sst;
+	GByteArray *buf;
+	GPtrArray *full;
+	uint64_t num_chunks;
+	unsigned int i, j;
+	static const unsigned int max_chunks[] = { 0, 2 };
+
+	srd_init(DECODERS_TESTDIR);
+	srd_decoder_load("i2c");
+	buf = gen_i2c(40);
+	num_chunks = (buf->len + 776) / 777;
+
+	sess = i2c_session_new();
+	full = g_ptr_array_new_with_free_func(g_free);
+	ann_log = full;
+	srd_session_start(sess);
+	send_i2c(sess, buf, 0);
+	srd_session_destroy(sess);
+
+	ret = srd_session_send_coalesce_set(NULL, 4096, 0);
+	fail_unless(ret != SRD_OK, "Coalescing set for NULL session.");
+
+	for (i = 0; i < G_N_ELEMENTS(max_chunks); i++) {
+		sess = i2c_session_new();
+		ret = srd_session_send_coalesce_set(sess, 4096, max_chunks[i]);
+		fail_unless(ret == SRD_OK, "srd_session_send_coalesce_set() "
+			"failed: %d.", ret);
+		ann_log = g_ptr_array_new_with_free_func(g_free);
+		srd_session_start(sess);
+		send_i2c(sess, buf, 0);
+		if (!max_chunks[i]) {
+			fail_unless(ann_log->len < full->len, "The last window "
+				"got decoded before srd_session_flush().");
+		}
+		ret = srd_session_flush(sess);
+		fail_unless(ret == SRD_OK, "srd_session_flush() failed: %d.",
+			ret);
+
+		fail_unless(ann_log->len == full->len, "Got %u of %u "
+			"annotations.", ann_log->len, full->len);
+		for (j = 0; j < full->len; j++) {
+			fail_unless(!strcmp(full->pdata[j], ann_log->pdata[j]),
+				"Got '%s' instead of '%s'.",
+				(char *)ann_log->pdata[j], (char *)full->pdata[j]);
+		}
+
+		srd_session_stats_get(sess, &sst);
+		fail_unless(sst.input_chunks == num_chunks, "%" PRIu64
+			" chunks sent.", sst.input_chunks);
+		j = max_chunks[i] ? max_chunks[i] : (4096 + 776) / 777;
+		fail_unless(sst.chunks == (num_chunks + j - 1) / j &&
+			sst.samples == buf->len, "%" PRIu64 " windows of %"
+			PRIu64 " samples.", sst.chunks, sst.samples);
+
+		g_ptr_array_free(ann_log, TRUE);
+		ann_log = NULL;
+		srd_session_destroy(sess);
+	}
+
+	g_ptr_array_free(full, TRUE);
+	g_byte_array_free(buf, TRUE);
+	srd_exit();
+}
+END_TEST
+
+static struct srd_decoder_inst *testpd_new(struct srd_session *sess,
+		const char *id, const char *option, const char *value)
+{
+	struct srd_decoder_inst *di;
+	GHashTable *options;
+
+	options = g_hash_table_new_full(g_str_hash, g_str_equal, g_free,
+		(GDestroyNotify)g_variant_unref);
+	g_hash_table_insert(options, g_strdup(option),
+		g_variant_ref_sink(g_variant_new_string(value)));
+	di = srd_inst_new(sess, id, options);
+	g_hash_table_destroy(options);
+	fail_unless(di != NULL, "srd_inst_new() failed.");
+
+	return di;
+}
+
+/*
+ * Run the testwait decoder in the given mode on pseudo random samples,
+ * stack teststack on top of it if 'batch' is set. Returns the log of
+ * the top instance's annotations.
+ */
+static GPtrArray *testpd_run(const char *mode, const char *batch)
+{
+	int ret;
+	struct srd_session *sess;
+	struct srd_decoder_inst *di, *di_top;
+	GHashTable *channels;
+	GPtrArray *log;
+	uint8_t samples[5000];
+	uint32_t rnd;
+	uint64_t start, end;
+	unsigned int i;
+
+	srd_session_new(&sess);
+	di = testpd_new(sess, "testwait", "mode", mode);
+	/* Channels in a different order than the input bits. */
+	channels = g_hash_table_new_full(g_str_hash, g_str_equal, g_free,
+		(GDestroyNotify)g_variant_unref);
+	g_hash_table_insert(channels, g_strdup("d0"),
+		g_variant_ref_sink(g_variant_new_int32(10)));
+	g_hash_table_insert(channels, g_strdup("d1"),
+		g_variant_ref_sink(g_variant_new_int32(0)));
+	g_hash_table_insert(channels, g_strdup("d2"),
+		g_variant_ref_sink(g_variant_new_int32(5)));
+	ret = srd_inst_channel_set_all(di, channels);
+	g_hash_table_destroy(channels);
+	fail_unless(ret == SRD_OK, "srd_inst_channel_set_all() failed: %d.", ret);
+	di_top = di;
+	if (batch) {
+		di_top = testpd_new(sess, "teststack", "batch", batch);
+		ret = srd_inst_stack(sess, di, di_top);
+		fail_unless(ret == SRD_OK, "srd_inst_stack() failed: %d.", ret);
+	}
+
+	/* Two bytes per sample, levels which hold for a few samples. */
+	rnd = 1;
+	for (i = 0; i < sizeof(samples); i += 2) {
+		if (i % 16 == 0)
+			rnd = rnd * 1103515245 + 12345;
+		samples[i] = rnd >> (16 + i % 16);
+		samples[i + 1] = rnd >> 24;
+	}
+
+	log = g_ptr_array_new_with_free_func(g_free);
+	ann_log = log;
+	ann_log_di = di_top;
+	srd_pd_output_callback_add(sess, SRD_OUTPUT_ANN, cb_ann_log, NULL);
+	srd_session_start(sess);
+	for (start = 0; start < sizeof(samples) / 2; start = end) {
+		end = MIN(start + 333, sizeof(samples) / 2);
+		ret = srd_session_send(sess, start, end, samples + start * 2,
+			(end - start) * 2, 2);
+		fail_unless(ret == SRD_OK, "srd_session_send() failed: %d.", ret);
+	}
+	srd_session_destroy(sess);
+	ann_log = NULL;
+	ann_log_di = NULL;
+
+	return log;
+}
+
+static void logs_compare(const GPtrArray *a, const GPtrArray *b)
+{
+	unsigned int i;
+
+	fail_unless(a->len == b->len, "Got %u and %u annotations.",
+		a->len, b->len);
+	for (i = 0; i < a->len; i++) {
+		fail_unless(!strcmp(a->pdata[i], b->pdata[i]),
+			"Annotation %u differs: %s, %s.", i,
+			(const char *)a->pdata[i], (const char *)b->pdata[i]);
+	}
+}
+
+/*
+ * Check whether wait(packed=True) and wait_block() see the same pin
+ * changes as plain wait() calls.
+ */
+START_TEST(test_session_wait_modes)
+{
+	GPtrArray *plain, *packed, *block;
+
+	srd_init(TESTPD_DIR);
+	srd_decoder_load("testwait");
+
+	plain = testpd_run("wait", NULL);
+	fail_unless(plain->len > 100, "Got %u annotations.", plain->len);
+	packed = testpd_run("packed", NULL);
+	logs_compare(plain, packed);
+	block = testpd_run("block", NULL);
+	logs_compare(plain, block);
+
+	g_ptr_array_free(plain, TRUE);
+	g_ptr_array_free(packed, TRUE);
+	g_ptr_array_free(block, TRUE);
+	srd_exit();
+}
+END_TEST
+
+/*
+ * Check whether decode_batch() receives the same Python output of
+ * lower decoders as decode().
+ */
+START_TEST(test_session_decode_batch)
+{
+	GPtrArray *single, *batched;
+
+	srd_init(TESTPD_DIR);
+	srd_decoder_load("testwait");
+	srd_decoder_load("teststack");
+
+	single = testpd_run("wait", "no");
+	fail_unless(single->len > 100, "Got %u annotations.", single->len);
+	batched = testpd_run("wait", "yes");
+	logs_compare(single, batched);
+
+	g_ptr_array_free(single, TRUE);
+	g_ptr_array_free(batched, TRUE);
+	srd_exit();
+}
+END_TEST
+
+/*
+ * Run the testmatch decoder in the given mode on pseudo random samples
+ * of 'unitsize' bytes, with its channels on the input bits in 'chmap'.
+ * The samples get sent in chunks of 1 to 'max_chunk' samples. Returns
+ * the log of the decoder's annotations.
+ */
+static GPtrArray *testmatch_run(const char *mode, unsigned int unitsize,
+		const int *chmap, unsigned int max_chunk)
+{
+	int ret;
+	struct srd_session *sess;
+	struct srd_decoder_inst *di;
+	GHashTable *channels;
+	GPtrArray *log;
+	uint8_t *samples, *sample;
+	uint32_t rnd;
+	uint64_t start, end, num_samples;
+	unsigned int i, ch, levels;
+	char id[8];
+
+	srd_session_new(&sess);
+	di = testpd_new(sess, "testmatch", "mode", mode);
+	channels = g_hash_table_new_full(g_str_hash, g_str_equal, g_free,
+		(GDestroyNotify)g_variant_unref);
+	for (ch = 0; ch < 3; ch++) {
+		snprintf(id, sizeof(id), "d%u", ch);
+		g_hash_table_insert(channels, g_strdup(id),
+			g_variant_ref_sink(g_variant_new_int32(chmap[ch])));
+	}
+	ret = srd_inst_channel_set_all(di, channels);
+	g_hash_table_destroy(channels);
+	fail_unless(ret == SRD_OK, "srd_inst_channel_set_all() failed: %d.", ret);
+
+	/*
+	 * The decoder's channels hold their levels for a few samples, all
+	 * other input bits change randomly.
+	 */
+	num_samples = 3000;
+	samples = g_malloc(num_samples * unitsize);
+	rnd = 1;
+	levels = 0;
+	for (i = 0; i < num_samples; i++) {
+		sample = samples + i * unitsize;
+		for (ch = 0; ch < unitsize; ch++) {
+			rnd = rnd * 1103515245 + 12345;
+			sample[ch] = rnd >> 16;
+		}
+		if ((rnd >> 24) % 4 == 0)
+			levels = rnd >> 8;
+		for (ch = 0; ch < 3; ch++) {
+			if (levels & (1 << ch))
+				sample[chmap[ch] / 8] |= 1 << (chmap[ch] % 8);
+			else
+				sample[chmap[ch] / 8] &= ~(1 << (chmap[ch] % 8));
+		}
+	}
+
+	log = g_ptr_array_new_with_free_func(g_free);
+	ann_log = log;
+	ann_log_di = di;
+	srd_pd_output_callback_add(sess, SRD_OUTPUT_ANN, cb_ann_log, NULL);
+	srd_session_start(sess);
+	for (start = 0, i = 0; start < num_samples; start = end, i++) {
+		end = MIN(start + 1 + i % max_chunk, num_samples);
+		ret = srd_session_send(sess, start, end,
+			samples + start * unitsize, (end - start) * unitsize,
+			unitsize);
+		fail_unless(ret == SRD_OK, "srd_session_send() failed: %d.", ret);
+	}
+	srd_session_destroy(sess);
+	ann_log = NULL;
+	ann_log_di = NULL;
+	g_free(samples);
+
+	return log;
+}
+
+/*
+ * Check whether wait() matches conditions like the decoder does when it
+ * checks them term by term on each sample: SKIP terms along with other
+ * terms, several conditions of several terms, unused optional channels,
+ * samples wider than 64 bits, and matches which are pending across
+ * chunks of all sizes.
+ */
+START_TEST(test_session_wait_match)
+{
+	GPtrArray *ref, *got;
+	unsigned int i, j;
+	static const struct {
+		unsigned int unitsize;
+		int chmap[3];
+	} layouts[] = {
+		{ 1, { 7, 3, 0 } },
+		{ 2, { 10, 0, 5 } },
+		{ 3, { 1, 17, 16 } },
+		{ 8, { 63, 33, 2 } },
+		{ 10, { 70, 3, 77 } },
+		{ 16, { 127, 64, 63 } },
+	};
+	static const unsigned int max_chunk[] = { 1, 7, 3000 };
+
+	srd_init(TESTPD_DIR);
+	srd_decoder_load("testmatch");
+
+	for (i = 0; i < G_N_ELEMENTS(layouts); i++) {
+		for (j = 0; j < G_N_ELEMENTS(max_chunk); j++) {
+			ref = testmatch_run("ref", layouts[i].unitsize,
+				layouts[i].chmap, max_chunk[j]);
+			fail_unless(ref->len > 100, "Got %u annotations.",
+				ref->len);
+			got = testmatch_run("wait", layouts[i].unitsize,
+				layouts[i].chmap, max_chunk[j]);
+			logs_compare(ref, got);
+			g_ptr_array_free(ref, TRUE);
+			g_ptr_array_free(got, TRUE);
+		}
+	}
+
+	srd_exit();
+}
+END_TEST
+
+static GMutex block_mutex;
+
+static gpointer block_thread(gpointer data)
+{
+	g_mutex_lock(&block_mutex);
+	g_mutex_unlock(&block_mutex);
+
+	return data;
+}
+
+/*
+ * Check whether decoding in a worker process produces the same output
+ * and counters as decoding in the calling process, also after a reset
+ * and while other threads run, and that it fails without the worker
+ * program.
+ */
+START_TEST(test_session_isolation)
+{
+	int ret;
+	struct srd_session *sess;
+	struct srd_decoder_inst *di;
+	struct srd_inst_stats st;
+	GByteArray *buf;
+	GPtrArray *full;
+	GThread *thread;
+	uint64_t resume;
+	unsigned int i, j;
+	char *worker;
+
+	srd_init(DECODERS_TESTDIR);
+	srd_decoder_load("i2c");
+	buf = gen_i2c(40);
+
+	sess = i2c_session_new();
+	full = g_ptr_array_new_with_free_func(g_free);
+	ann_log = full;
+	srd_session_start(sess);
+	send_i2c(sess, buf, 0);
+	srd_session_destroy(sess);
+
+	ret = srd_session_isolation_set(NULL, TRUE);
+	fail_unless(ret != SRD_OK, "Isolation set for NULL session.");
+
+	sess = i2c_session_new();
+	ret = srd_session_isolation_set(sess, TRUE);
+	fail_unless(ret == SRD_OK, "srd_session_isolation_set() failed: %d.",
+		ret);
+	srd_session_start(sess);
+	di = sess->di_list->data;
+	for (i = 0; i < 2; i++) {
+		ann_log = g_ptr_array_new_with_free_func(g_free);
+		send_i2c(sess, buf, 0);
+		fail_unless(ann_log->len == full->len, "Got %u of %u "
+			"annotations.", ann_log->len, full->len);
+		for (j = 0; j < full->len; j++) {
+			fail_unless(!strcmp(full->pdata[j], ann_log->pdata[j]),
+				"Got '%s' instead of '%s'.",
+				(char *)ann_log->pdata[j], (char *)full->pdata[j]);
+		}
+		g_ptr_array_free(ann_log, TRUE);
+		ann_log = NULL;
+
+		srd_inst_stats_get(di, &st);
+		fail_unless(st.puts[SRD_OUTPUT_ANN] == (i + 1) * full->len,
+			"%" PRIu64 " annotations counted.",
+			st.puts[SRD_OUTPUT_ANN]);
+
+		ret = srd_session_terminate_reset(sess);
+		fail_unless(ret == SRD_OK, "srd_session_terminate_reset() "
+			"failed: %d.", ret);
+	}
+	ret = srd_session_seek(sess, 0, &resume);
+	fail_unless(ret != SRD_OK, "Seeking with worker processes.");
+	srd_session_destroy(sess);
+
+	/* Workers are new processes, other threads don't get in the way. */
+	sess = i2c_session_new();
+	srd_session_isolation_set(sess, TRUE);
+	srd_session_start(sess);
+	ann_log = g_ptr_array_new_with_free_func(g_free);
+	g_mutex_lock(&block_mutex);
+	thread = g_thread_new("block", block_thread, NULL);
+	ret = srd_session_send(sess, 0, buf->len, buf->data, buf->len, 1);
+	g_mutex_unlock(&block_mutex);
+	g_thread_join(thread);
+	fail_unless(ret == SRD_OK, "Worker processes failed next to "
+		"another thread: %d.", ret);
+	fail_unless(ann_log->len == full->len, "Got %u of %u annotations "
+		"next to another thread.", ann_log->len, full->len);
+	g_ptr_array_free(ann_log, TRUE);
+	ann_log = NULL;
+	srd_session_destroy(sess);
+
+	worker = g_strdup(g_getenv("SIGROKDECODE_WORKER"));
+	g_setenv("SIGROKDECODE_WORKER", "/nonexistent/sigrokdecode-worker",
+		TRUE);
+	sess = i2c_session_new();
+	srd_session_isolation_set(sess, TRUE);
+	srd_session_start(sess);
+	ret = srd_session_send(sess, 0, buf->len, buf->data, buf->len, 1);
+	fail_unless(ret != SRD_OK, "Worker processes without the worker "
+		"program.");
+	if (worker)
+		g_setenv("SIGROKDECODE_WORKER", worker, TRUE);
+	else
+		g_unsetenv("SIGROKDECODE_WORKER");
+	g_free(worker);
+
+	g_ptr_array_free(full, TRUE);
+	g_byte_array_free(buf, TRUE);
+	srd_session_destroy(sess);
+	srd_exit();
+}
+END_TEST
+
 Suite *suite_session(void)
 {
 	Suite *s;
@@ -280,6 +1514,25 @@ Suite *suite_session(void)
 	tcase_add_checked_fixture(tc, srdtest_setup, srdtest_teardown);
 	tcase_add_test(tc, test_session_metadata_set);
 	tcase_add_test(tc, test_session_metadata_set_bogus);
+	tcase_add_test(tc, test_session_parallel_set);
+	suite_add_tcase(s, tc);
+
+	tc = tcase_create("send");
+	tcase_add_checked_fixture(tc, srdtest_setup, srdtest_teardown);
+	tcase_add_test(tc, test_session_send_bytes);
+	tcase_add_test(tc, test_session_send_bytes_error);
+	tcase_add_test(tc, test_session_batch_callback);
+	tcase_add_test(tc, test_session_binary_coalesce);
+	tcase_add_test(tc, test_session_stats);
+	tcase_add_test(tc, test_session_has_channel);
+	tcase_add_test(tc, test_session_seek);
+	tcase_add_test(tc, test_session_send_split);
+	tcase_add_test(tc, test_session_send_file);
+	tcase_add_test(tc, test_session_send_coalesce);
+	tcase_add_test(tc, test_session_wait_modes);
+	tcase_add_test(tc, test_session_wait_match);
+	tcase_add_test(tc, test_session_decode_batch);
+	tcase_add_test(tc, test_session_isolation);
 	suite_add_tcase(s, tc);
 
 	tc = tcase_create("reset");
@@ -21,14 +21,7 @@
 #include "libsigrokdecode-internal.h" /* First, so we avoid a _POSIX_C_SOURCE warning. */
 #include "libsigrokdecode.h"
 #include <inttypes.h>
-
-/** @cond PRIVATE */
-extern SRD_PRIV GSList *sessions;
-/** @endcond */
-
-typedef struct {
-        PyObject_HEAD
-} srd_Decoder;
+#include <structmember.h>
 
 /* This is only used for nicer srd_dbg() output. */
 SRD_PRIV const char *output_type_name(unsigned int idx)
@@ -123,15 +116,22 @@ err:
 	return SRD_ERR_PYTHON;
 }
 
-static void release_binary(struct srd_proto_data_binary *pdb)
+static void release_binary(PyObject *py_bytes)
 {
-	if (!pdb)
-		return;
-	g_free((void *)pdb->data);
+	PyGILState_STATE gstate;
+
+	gstate = PyGILState_Ensure();
+	Py_XDECREF(py_bytes);
+	PyGILState_Release(gstate);
 }
 
+/*
+ * The binary data is not copied, it points into the decoder's bytes
+ * object. A reference to that object is returned in 'py_bytes', to keep
+ * the data around until release_binary().
+ */
 static int convert_binary(struct srd_decoder_inst *di, PyObject *obj,
-		struct srd_proto_data *pdata)
+		struct srd_proto_data *pdata, PyObject **py_bytes)
 {
 	struct srd_proto_data_binary *pdb;
 	PyObject *py_tmp;
@@ -189,14 +189,15 @@ static int convert_binary(struct srd_decoder_inst *di, PyObject *obj,
 	if (PyBytes_AsStringAndSize(py_tmp, &buf, &size) == -1)
 		goto err;
 
+	Py_INCREF(py_tmp);
+	*py_bytes = py_tmp;
+
 	PyGILState_Release(gstate);
 
 	pdb = pdata->data;
 	pdb->bin_class = bin_class;
 	pdb->size = size;
-	if (!(pdb->data = g_try_malloc(pdb->size)))
-		return SRD_ERR_MALLOC;
-	memcpy((void *)pdb->data, (const void *)buf, pdb->size);
+	pdb->data = (const unsigned char *)buf;
 
 	return SRD_OK;
 
@@ -206,63 +207,23 @@ err:
 	return SRD_ERR_PYTHON;
 }
 
-static inline struct srd_decoder_inst *srd_sess_inst_find_by_obj(
-	struct srd_session *sess, const GSList *stack, const PyObject *obj)
-{
-	const GSList *l;
-	struct srd_decoder_inst *tmp, *di;
-
-	if (!sess)
-		return NULL;
-
-	di = NULL;
-	for (l = stack ? stack : sess->di_list; di == NULL && l != NULL; l = l->next) {
-		tmp = l->data;
-		if (tmp->py_inst == obj)
-			di = tmp;
-		else if (tmp->next_di)
-			di = srd_sess_inst_find_by_obj(sess, tmp->next_di, obj);
-	}
-
-	return di;
-}
-
 /**
  * Find a decoder instance by its Python object.
  *
  * I.e. find that instance's instantiation of the sigrokdecode.Decoder class.
- * This will recurse to find the instance anywhere in the stack tree of all
- * sessions.
+ * The decoder instance is stored in the object when the instance gets
+ * created, the lookup does not depend on the number of sessions and
+ * instances.
  *
- * @param stack Pointer to a GSList of struct srd_decoder_inst, indicating the
- *              stack to search. To start searching at the bottom level of
- *              decoder instances, pass NULL.
  * @param obj The Python class instantiation.
  *
  * @return Pointer to struct srd_decoder_inst, or NULL if not found.
  *
  * @since 0.1.0
  */
-static inline struct srd_decoder_inst *srd_inst_find_by_obj(
-		const GSList *stack, const PyObject *obj)
+static inline struct srd_decoder_inst *srd_inst_find_by_obj(PyObject *obj)
 {
-	struct srd_decoder_inst *di;
-	struct srd_session *sess;
-	GSList *l;
-
-	/* Performance shortcut: Handle the most common case first. */
-	sess = sessions->data;
-	di = sess->di_list->data;
-	if (di->py_inst == obj)
-		return di;
-
-	di = NULL;
-	for (l = sessions; di == NULL && l != NULL; l = l->next) {
-		sess = l->data;
-		di = srd_sess_inst_find_by_obj(sess, stack, obj);
-	}
-
-	return di;
+	return ((srd_Decoder *)obj)->di;
 }
 
 static int convert_meta(struct srd_proto_data *pdata, PyObject *obj)
@@ -312,10 +273,59 @@ static void release_meta(GVariant *gvar)
 	g_variant_unref(gvar);
 }
 
+/* Maximum number of items which decode_batch() receives at once. */
+#define STACKED_BATCH_MAX 1024
+
+/*
+ * Look up the method which receives the Python output of lower decoders,
+ * once per instance. Decoders which implement decode_batch(items) get
+ * lists of (ss, es, data) tuples, at the end of each chunk or when
+ * STACKED_BATCH_MAX items have accumulated. All others get decode() calls
+ * as the lower decoders put their output.
+ */
+static int stacked_decode_init(struct srd_decoder_inst *di)
+{
+	PyObject *py_meth;
+
+	if (PyObject_HasAttrString(di->py_inst, "decode_batch")) {
+		if (!(py_meth = PyObject_GetAttrString(di->py_inst, "decode_batch")))
+			return SRD_ERR_PYTHON;
+		if (!(di->py_batch = PyList_New(0))) {
+			Py_DECREF(py_meth);
+			return SRD_ERR_PYTHON;
+		}
+	} else if (!(py_meth = PyObject_GetAttrString(di->py_inst, "decode"))) {
+		return SRD_ERR_PYTHON;
+	}
+	di->py_decode = py_meth;
+
+	return SRD_OK;
+}
+
+static void stacked_batch_add(struct srd_decoder_inst *di, PyObject *py_ss,
+		PyObject *py_es, PyObject *py_data)
+{
+	PyObject *py_item;
+
+	if (!(py_item = PyTuple_Pack(3, py_ss, py_es, py_data))) {
+		srd_exception_catch("Failed to queue output for %s",
+			di->inst_id);
+		return;
+	}
+	if (PyList_Append(di->py_batch, py_item) < 0) {
+		srd_exception_catch("Failed to queue output for %s",
+			di->inst_id);
+	}
+	Py_DECREF(py_item);
+
+	if (PyList_Size(di->py_batch) >= STACKED_BATCH_MAX)
+		srd_inst_py_batch_flush(di);
+}
+
 static PyObject *Decoder_put(PyObject *self, PyObject *args)
 {
 	GSList *l;
-	PyObject *py_data, *py_res;
+	PyObject *py_data, *py_res, *py_bytes, *py_ss, *py_es;
 	struct srd_decoder_inst *di, *next_di;
 	struct srd_pd_output *pdo;
 	struct srd_proto_data pdata;
@@ -324,13 +334,14 @@ static PyObject *Decoder_put(PyObject *self, PyObject *args)
 	uint64_t start_sample, end_sample;
 	int output_id;
 	struct srd_pd_callback *cb;
+	struct srd_bin_block *block;
 	PyGILState_STATE gstate;
 
 	py_data = NULL;
 
 	gstate = PyGILState_Ensure();
 
-	if (!(di = srd_inst_find_by_obj(NULL, self))) {
+	if (!(di = srd_inst_find_by_obj(self))) {
 		/* Shouldn't happen. */
 		srd_dbg("put(): self instance not found.");
 		goto err;
@@ -352,6 +363,8 @@ static PyObject *Decoder_put(PyObject *self, PyObject *args)
 		goto err;
 	}
 	pdo = l->data;
+	if (pdo->output_type >= 0 && pdo->output_type <= SRD_OUTPUT_META)
+		di->stats.puts[pdo->output_type]++;
 
 	/* Upon SRD_OUTPUT_PYTHON for stacked PDs, we have a nicer log message later. */
 	if (pdo->output_type != SRD_OUTPUT_PYTHON && di->next_di != NULL) {
@@ -369,20 +382,43 @@ static PyObject *Decoder_put(PyObject *self, PyObject *args)
 	switch (pdo->output_type) {
 	case SRD_OUTPUT_ANN:
 		/* Annotations are only fed to callbacks. */
-		if ((cb = srd_pd_output_callback_find(di->sess, pdo->output_type))) {
+		cb = srd_pd_output_callback_find(di->sess, pdo->output_type);
+		if (cb || di->sess->ann_batch_cb) {
 			pdata.data = &pda;
 			/* Convert from PyDict to srd_proto_data_annotation. */
 			if (convert_annotation(di, py_data, &pdata) != SRD_OK) {
 				/* An error was already logged. */
 				break;
 			}
-			Py_BEGIN_ALLOW_THREADS
-			cb->cb(&pdata, cb->cb_data);
-			Py_END_ALLOW_THREADS
-			release_annotation(pdata.data);
+			if (cb) {
+				Py_BEGIN_ALLOW_THREADS
+				srd_pd_output_callback_run(di->sess, cb, &pdata);
+				Py_END_ALLOW_THREADS
+			}
+			if (!di->sess->ann_batch_cb) {
+				release_annotation(pdata.data);
+				break;
+			}
+			/* The batch takes over the annotation. */
+			if (srd_inst_ann_batch_add(di, &pdata)) {
+				Py_BEGIN_ALLOW_THREADS
+				srd_inst_ann_batch_flush(di);
+				Py_END_ALLOW_THREADS
+			}
 		}
 		break;
 	case SRD_OUTPUT_PYTHON:
+		py_ss = py_es = NULL;
+		if (di->next_di) {
+			py_ss = PyLong_FromUnsignedLongLong(start_sample);
+			py_es = PyLong_FromUnsignedLongLong(end_sample);
+			if (!py_ss || !py_es) {
+				srd_exception_catch("Failed to convert sample numbers");
+				Py_XDECREF(py_ss);
+				Py_XDECREF(py_es);
+				break;
+			}
+		}
 		for (l = di->next_di; l; l = l->next) {
 			next_di = l->data;
 			srd_spew("Instance %s put %" PRIu64 "-%" PRIu64 " %s "
@@ -390,35 +426,58 @@ static PyObject *Decoder_put(PyObject *self, PyObject *args)
 				 start_sample,
 				 end_sample, output_type_name(pdo->output_type),
 				 output_id, pdo->proto_id, next_di->inst_id);
-			if (!(py_res = PyObject_CallMethod(
-				next_di->py_inst, "decode", "KKO", start_sample,
-				end_sample, py_data))) {
+			if (!next_di->py_decode && stacked_decode_init(next_di) != SRD_OK) {
+				srd_exception_catch("Cannot find %s decode()",
+							next_di->inst_id);
+				continue;
+			}
+			if (next_di->py_batch) {
+				stacked_batch_add(next_di, py_ss, py_es, py_data);
+				continue;
+			}
+			next_di->stats_py_since = g_get_monotonic_time();
+			if (!(py_res = PyObject_CallFunctionObjArgs(
+				next_di->py_decode, py_ss, py_es, py_data, NULL))) {
 				srd_exception_catch("Calling %s decode() failed",
 							next_di->inst_id);
 			}
+			srd_inst_stats_python_stop(next_di);
 			Py_XDECREF(py_res);
 		}
+		Py_XDECREF(py_ss);
+		Py_XDECREF(py_es);
 		if ((cb = srd_pd_output_callback_find(di->sess, pdo->output_type))) {
 			/*
 			 * Frontends aren't really supposed to get Python
 			 * callbacks, but it's useful for testing.
 			 */
 			pdata.data = py_data;
-			cb->cb(&pdata, cb->cb_data);
+			Py_BEGIN_ALLOW_THREADS
+			srd_pd_output_callback_run(di->sess, cb, &pdata);
+			Py_END_ALLOW_THREADS
 		}
 		break;
 	case SRD_OUTPUT_BINARY:
 		if ((cb = srd_pd_output_callback_find(di->sess, pdo->output_type))) {
 			pdata.data = &pdb;
 			/* Convert from PyDict to srd_proto_data_binary. */
-			if (convert_binary(di, py_data, &pdata) != SRD_OK) {
+			if (convert_binary(di, py_data, &pdata, &py_bytes) != SRD_OK) {
 				/* An error was already logged. */
 				break;
 			}
-			Py_BEGIN_ALLOW_THREADS
-			cb->cb(&pdata, cb->cb_data);
-			Py_END_ALLOW_THREADS
-			release_binary(pdata.data);
+			di->stats.binary_bytes += pdb.size;
+			if (!di->sess->bin_block_size) {
+				Py_BEGIN_ALLOW_THREADS
+				srd_pd_output_callback_run(di->sess, cb, &pdata);
+				Py_END_ALLOW_THREADS
+			} else if ((block = srd_inst_bin_block_add(di, &pdata))) {
+				/* Pass the full block, start a new one. */
+				Py_BEGIN_ALLOW_THREADS
+				srd_inst_bin_block_flush(di, block);
+				Py_END_ALLOW_THREADS
+				srd_inst_bin_block_add(di, &pdata);
+			}
+			release_binary(py_bytes);
 		}
 		break;
 	case SRD_OUTPUT_META:
@@ -429,7 +488,7 @@ static PyObject *Decoder_put(PyObject *self, PyObject *args)
 				break;
 			}
 			Py_BEGIN_ALLOW_THREADS
-			cb->cb(&pdata, cb->cb_data);
+			srd_pd_output_callback_run(di->sess, cb, &pdata);
 			Py_END_ALLOW_THREADS
 			release_meta(pdata.data);
 		}
@@ -472,7 +531,7 @@ static PyObject *Decoder_register(PyObject *self, PyObject *args,
 	meta_type_gv = NULL;
 	meta_name = meta_descr = NULL;
 
-	if (!(di = srd_inst_find_by_obj(NULL, self))) {
+	if (!(di = srd_inst_find_by_obj(self))) {
 		PyErr_SetString(PyExc_Exception, "decoder instance not found");
 		goto err;
 	}
@@ -620,33 +679,162 @@ static PyObject *get_current_pinvalues(const struct srd_decoder_inst *di)
 	return py_pinvalues;
 }
 
+/*
+ * Convert a bit set of 'num_words' 64-bit words (least significant
+ * word first) to a Python integer.
+ */
+static PyObject *bits_to_pylong(const uint64_t *words, unsigned int num_words)
+{
+	PyObject *py_val, *py_tmp, *py_word, *py_shift;
+	unsigned int i;
+
+	if (num_words <= 1)
+		return PyLong_FromUnsignedLongLong(num_words ? words[0] : 0);
+
+	if (!(py_shift = PyLong_FromLong(64)))
+		return NULL;
+	py_val = PyLong_FromUnsignedLongLong(words[num_words - 1]);
+	for (i = num_words - 1; py_val && i-- > 0; ) {
+		py_tmp = PyNumber_Lshift(py_val, py_shift);
+		Py_DECREF(py_val);
+		py_val = NULL;
+		if (!py_tmp)
+			goto out;
+		if (!(py_word = PyLong_FromUnsignedLongLong(words[i]))) {
+			Py_DECREF(py_tmp);
+			goto out;
+		}
+		py_val = PyNumber_Or(py_tmp, py_word);
+		Py_DECREF(py_tmp);
+		Py_DECREF(py_word);
+	}
+
+out:
+	Py_DECREF(py_shift);
+
+	return py_val;
+}
+
+/*
+ * Like get_current_pinvalues(), but return the pins as one integer,
+ * bit N holding the value of the decoder's channel N. Unused optional
+ * channels read as 0.
+ */
+static PyObject *get_current_pinvalues_packed(const struct srd_decoder_inst *di)
+{
+	const uint8_t *sample_pos;
+	uint64_t word, *words;
+	unsigned int num_words;
+	int i, ch;
+	PyObject *py_pinvalues;
+
+	num_words = (di->dec_num_channels + 63) / 64;
+	word = 0;
+	words = (num_words > 1) ? g_new0(uint64_t, num_words) : &word;
+
+	sample_pos = di->inbuf + ((di->abs_cur_samplenum - di->abs_start_samplenum) * di->data_unitsize);
+	for (i = 0; i < di->dec_num_channels; i++) {
+		if ((ch = di->dec_channelmap[i]) == -1)
+			continue;
+		if (sample_pos[ch / 8] & (1 << (ch % 8)))
+			words[i / 64] |= (uint64_t)1 << (i % 64);
+	}
+
+	py_pinvalues = bits_to_pylong(words, num_words);
+	if (words != &word)
+		g_free(words);
+
+	return py_pinvalues;
+}
+
+/* Return the matched conditions as one integer, bit N for condition N. */
+static PyObject *get_matched_packed(const struct srd_decoder_inst *di)
+{
+	uint64_t word, *words;
+	unsigned int num_words, i;
+	PyObject *py_matched;
+
+	num_words = (di->match_array->len + 63) / 64;
+	word = 0;
+	words = (num_words > 1) ? g_new0(uint64_t, num_words) : &word;
+
+	for (i = 0; i < di->match_array->len; i++) {
+		if (di->match_array->data[i])
+			words[i / 64] |= (uint64_t)1 << (i % 64);
+	}
+
+	py_matched = bits_to_pylong(words, num_words);
+	if (words != &word)
+		g_free(words);
+
+	return py_matched;
+}
+
+/* Upper limit for the number of term strings kept per instance. */
+#define TERM_TYPES_MAX 64
+
+/*
+ * Get the term type of a condition's value string. Strings which were
+ * seen before are looked up, only new ones get converted.
+ */
+static int term_type_get(srd_Decoder *dec, PyObject *py_value, int *type)
+{
+	PyObject *py_type, *py_bytes;
+
+	if (dec->term_types &&
+	    (py_type = PyDict_GetItem(dec->term_types, py_value))) {
+		*type = PyLong_AsLong(py_type);
+		return SRD_OK;
+	}
+
+	if (!(py_bytes = PyUnicode_AsUTF8String(py_value)))
+		return SRD_ERR;
+	*type = get_term_type(PyBytes_AsString(py_bytes));
+	Py_DECREF(py_bytes);
+
+	/* Failing to remember the type is not an error. */
+	if (!dec->term_types)
+		dec->term_types = PyDict_New();
+	if (dec->term_types && PyDict_Size(dec->term_types) < TERM_TYPES_MAX &&
+	    (py_type = PyLong_FromLong(*type))) {
+		PyDict_SetItem(dec->term_types, py_value, py_type);
+		Py_DECREF(py_type);
+	}
+	PyErr_Clear();
+
+	return SRD_OK;
+}
+
 /**
- * Create a list of terms in the specified condition.
+ * Describe the terms of the specified condition in the instance's
+ * condition cache key.
  *
- * If there are no terms in the condition, 'term_list' will be NULL.
+ * If there are no terms in the condition, it will be a NULL term list.
  *
  * @param di The decoder instance to use. Must not be NULL.
  * @param py_dict A Python dict containing terms. Must not be NULL.
- * @param term_list Pointer to a GSList which will be set to the newly
- *                  created list of terms. Must not be NULL.
+ * @param cache The condition cache to fill in. Must not be NULL.
  *
  * @return SRD_OK upon success, a negative error code otherwise.
  */
 static int create_term_list(struct srd_decoder_inst *di,
-	PyObject *py_dict, GSList **term_list)
+	PyObject *py_dict, struct srd_cond_cache *cache)
 {
 	Py_ssize_t pos = 0;
 	PyObject *py_key, *py_value;
-	struct srd_term *term;
+	int type, channel, num_terms;
+	guint count_pos;
 	int64_t num_samples_to_skip;
-	char *term_str;
+	uint64_t skip;
 	PyGILState_STATE gstate;
 
-	if (!py_dict || !term_list)
+	if (!py_dict || !cache)
 		return SRD_ERR_ARG;
 
-	/* "Create" an empty GSList of terms. */
-	*term_list = NULL;
+	/* The number of terms precedes the terms, fill it in later. */
+	num_terms = 0;
+	count_pos = cache->key->len;
+	g_array_append_val(cache->key, num_terms);
 
 	gstate = PyGILState_Ensure();
 
@@ -655,39 +843,44 @@ static int create_term_list(struct srd_decoder_inst *di,
 		/* Check whether the current key is a string or a number. */
 		if (PyLong_Check(py_key)) {
 			/* The key is a number. */
-			/* Get the value string. */
-			if ((py_pydictitem_as_str(py_dict, py_key, &term_str)) != SRD_OK) {
+			/* Get the value string's term type. */
+			if (!PyUnicode_Check(py_value) ||
+			    term_type_get(di->py_inst, py_value, &type) != SRD_OK) {
 				srd_err("Failed to get the value.");
 				goto err;
 			}
-			term = g_malloc(sizeof(struct srd_term));
-			term->type = get_term_type(term_str);
-			term->channel = PyLong_AsLong(py_key);
-			if (term->channel < 0 || term->channel >= di->dec_num_channels)
-				term->type = SRD_TERM_ALWAYS_FALSE;
-			g_free(term_str);
+			channel = PyLong_AsLong(py_key);
+			if (channel < 0 || channel >= di->dec_num_channels)
+				type = SRD_TERM_ALWAYS_FALSE;
 		} else if (PyUnicode_Check(py_key)) {
 			/* The key is a string. */
 			/* TODO: Check if the key is "skip". */
-			if ((py_pydictitem_as_long(py_dict, py_key, &num_samples_to_skip)) != SRD_OK) {
+			if (!PyLong_Check(py_value)) {
 				srd_err("Failed to get number of samples to skip.");
 				goto err;
 			}
-			term = g_malloc(sizeof(struct srd_term));
-			term->type = SRD_TERM_SKIP;
-			term->num_samples_to_skip = num_samples_to_skip;
-			term->num_samples_already_skipped = 0;
-			if (num_samples_to_skip < 0)
-				term->type = SRD_TERM_ALWAYS_FALSE;
+			num_samples_to_skip = PyLong_AsLongLong(py_value);
+			type = SRD_TERM_SKIP;
+			channel = 0;
+			if (num_samples_to_skip < 0) {
+				type = SRD_TERM_ALWAYS_FALSE;
+			} else {
+				skip = num_samples_to_skip;
+				g_array_append_val(cache->skips, skip);
+			}
 		} else {
 			srd_err("Term key is neither a string nor a number.");
 			goto err;
 		}
 
 		/* Add the term to the list of terms. */
-		*term_list = g_slist_append(*term_list, term);
+		g_array_append_val(cache->key, type);
+		g_array_append_val(cache->key, channel);
+		num_terms++;
 	}
 
+	g_array_index(cache->key, int, count_pos) = num_terms;
+
 	PyGILState_Release(gstate);
 
 	return SRD_OK;
@@ -701,6 +894,9 @@ err:
 /**
  * Replace the current condition list with the new one.
  *
+ * Condition lists which the instance has used before are taken from
+ * the instance's condition cache, only new ones get allocated.
+ *
  * @param self TODO. Must not be NULL.
  * @param args TODO. Must not be NULL.
  *
@@ -712,8 +908,8 @@ err:
 static int set_new_condition_list(PyObject *self, PyObject *args)
 {
 	struct srd_decoder_inst *di;
-	GSList *term_list;
-	PyObject *py_conditionlist, *py_conds, *py_dict;
+	struct srd_cond_cache *cache;
+	PyObject *py_conds, *py_dict;
 	int i, num_conditions, ret;
 	PyGILState_STATE gstate;
 
@@ -723,7 +919,7 @@ static int set_new_condition_list(PyObject *self, PyObject *args)
 	gstate = PyGILState_Ensure();
 
 	/* Get the decoder instance. */
-	if (!(di = srd_inst_find_by_obj(NULL, self))) {
+	if (!(di = srd_inst_find_by_obj(self))) {
 		PyErr_SetString(PyExc_Exception, "decoder instance not found");
 		goto err;
 	}
@@ -754,49 +950,45 @@ static int set_new_condition_list(PyObject *self, PyObject *args)
 		goto ret_9999;
 	} else if (PyList_Check(py_conds)) {
 		/* 'py_conds' is a list. */
-		py_conditionlist = py_conds;
-		num_conditions = PyList_Size(py_conditionlist);
+		num_conditions = PyList_Size(py_conds);
 		if (num_conditions == 0)
 			goto ret_9999; /* The PD invoked self.wait([]). */
-		Py_INCREF(py_conditionlist);
 	} else if (PyDict_Check(py_conds)) {
 		/* 'py_conds' is a dict. */
 		if (PyDict_Size(py_conds) == 0)
 			goto ret_9999; /* The PD invoked self.wait({}). */
-		/* Make a list and put the dict in there for convenience. */
-		py_conditionlist = PyList_New(1);
-		Py_INCREF(py_conds);
-		PyList_SetItem(py_conditionlist, 0, py_conds);
 		num_conditions = 1;
 	} else {
 		srd_err("Condition list is neither a list nor a dict.");
 		goto err;
 	}
 
-	/* Free the old condition list. */
-	condition_list_free(di);
+	/* Release the old condition list, start describing the new one. */
+	cache = condition_cache_begin(di);
 
 	ret = SRD_OK;
 
-	/* Iterate over the conditions, set di->condition_list accordingly. */
+	/* Iterate over the conditions, describe them in the cache key. */
 	for (i = 0; i < num_conditions; i++) {
 		/* Get a condition (dict) from the condition list. */
-		py_dict = PyList_GetItem(py_conditionlist, i);
+		if (PyDict_Check(py_conds))
+			py_dict = py_conds;
+		else
+			py_dict = PyList_GetItem(py_conds, i);
 		if (!PyDict_Check(py_dict)) {
 			srd_err("Condition is not a dict.");
 			ret = SRD_ERR;
 			break;
 		}
 
-		/* Create the list of terms in this condition. */
-		if ((ret = create_term_list(di, py_dict, &term_list)) < 0)
+		/* Describe the terms in this condition. */
+		if ((ret = create_term_list(di, py_dict, cache)) < 0)
 			break;
-
-		/* Add the new condition to the PD instance's condition list. */
-		di->condition_list = g_slist_append(di->condition_list, term_list);
 	}
 
-	Py_DecRef(py_conditionlist);
+	/* Set di->condition_list accordingly. */
+	if (ret == SRD_OK)
+		condition_cache_apply(di);
 
 	PyGILState_Release(gstate);
 
@@ -834,28 +1026,27 @@ ret_9999:
  */
 static int set_skip_condition(struct srd_decoder_inst *di, uint64_t count)
 {
-	struct srd_term *term;
-	GSList *term_list;
+	struct srd_cond_cache *cache;
+	const int key[] = { 1, SRD_TERM_SKIP, 0 };
 
-	condition_list_free(di);
-	term = g_malloc(sizeof(*term));
-	term->type = SRD_TERM_SKIP;
-	term->num_samples_to_skip = count;
-	term->num_samples_already_skipped = 0;
-	term_list = g_slist_append(NULL, term);
-	di->condition_list = g_slist_append(di->condition_list, term_list);
+	cache = condition_cache_begin(di);
+	g_array_append_vals(cache->key, key, G_N_ELEMENTS(key));
+	g_array_append_val(cache->skips, count);
+	condition_cache_apply(di);
 
 	return SRD_OK;
 }
 
-static PyObject *Decoder_wait(PyObject *self, PyObject *args)
+static PyObject *Decoder_wait(PyObject *self, PyObject *args,
+		PyObject *kwargs)
 {
-	int ret;
+	int ret, packed;
 	uint64_t skip_count;
 	unsigned int i;
 	gboolean found_match;
 	struct srd_decoder_inst *di;
-	PyObject *py_pinvalues, *py_matched, *py_samplenum;
+	srd_Decoder *dec;
+	PyObject *py_pinvalues, *py_matched, *py_packed, *py_old;
 	PyGILState_STATE gstate;
 
 	if (!self || !args)
@@ -863,11 +1054,30 @@ static PyObject *Decoder_wait(PyObject *self, PyObject *args)
 
 	gstate = PyGILState_Ensure();
 
-	if (!(di = srd_inst_find_by_obj(NULL, self))) {
+	if (!(di = srd_inst_find_by_obj(self))) {
 		PyErr_SetString(PyExc_Exception, "decoder instance not found");
 		PyGILState_Release(gstate);
 		Py_RETURN_NONE;
 	}
+	dec = (srd_Decoder *)self;
+	di->stats.wait_calls++;
+	srd_inst_stats_python_stop(di);
+
+	/*
+	 * With packed=True, return the pins as one integer, and have
+	 * self.matched hold an integer with one bit per condition.
+	 */
+	packed = 0;
+	if (kwargs && PyDict_Size(kwargs) > 0) {
+		py_packed = PyDict_GetItemString(kwargs, "packed");
+		if (!py_packed || PyDict_Size(kwargs) > 1) {
+			PyErr_SetString(PyExc_TypeError,
+				"wait() only accepts the 'packed' keyword");
+			goto err;
+		}
+		if ((packed = PyObject_IsTrue(py_packed)) < 0)
+			goto err;
+	}
 
 	ret = set_new_condition_list(self, args);
 	if (ret < 0) {
@@ -922,25 +1132,37 @@ static PyObject *Decoder_wait(PyObject *self, PyObject *args)
 		/* If there's a match, set self.samplenum etc. and return. */
 		if (found_match) {
 			/* Set self.samplenum to the (absolute) sample number that matched. */
-			py_samplenum = PyLong_FromLong(di->abs_cur_samplenum);
-			PyObject_SetAttrString(di->py_inst, "samplenum", py_samplenum);
-			Py_DECREF(py_samplenum);
+			py_old = dec->samplenum;
+			dec->samplenum = PyLong_FromUnsignedLongLong(di->abs_cur_samplenum);
+			Py_XDECREF(py_old);
 
 			if (di->match_array && di->match_array->len > 0) {
-				py_matched = PyTuple_New(di->match_array->len);
-				for (i = 0; i < di->match_array->len; i++)
-					PyTuple_SetItem(py_matched, i, PyBool_FromLong(di->match_array->data[i]));
-				PyObject_SetAttrString(di->py_inst, "matched", py_matched);
-				Py_DECREF(py_matched);
-				match_array_free(di);
+				if (packed) {
+					py_matched = get_matched_packed(di);
+				} else {
+					py_matched = PyTuple_New(di->match_array->len);
+					for (i = 0; i < di->match_array->len; i++)
+						PyTuple_SetItem(py_matched, i, PyBool_FromLong(di->match_array->data[i]));
+				}
+				match_array_clear(di);
 			} else {
-				PyObject_SetAttrString(di->py_inst, "matched", Py_None);
+				Py_INCREF(Py_None);
+				py_matched = Py_None;
 			}
+			py_old = dec->matched;
+			dec->matched = py_matched;
+			Py_XDECREF(py_old);
 
-			py_pinvalues = get_current_pinvalues(di);
+			if (packed)
+				py_pinvalues = get_current_pinvalues_packed(di);
+			else
+				py_pinvalues = get_current_pinvalues(di);
 
 			g_mutex_unlock(&di->data_mutex);
 
+			di->stats.matches++;
+			di->stats_py_since = g_get_monotonic_time();
+
 			PyGILState_Release(gstate);
 
 			return py_pinvalues;
@@ -981,6 +1203,173 @@ err:
 	return NULL;
 }
 
+/*
+ * Return the remaining samples of the current chunk at once, blocking
+ * until samples are available. The result is a tuple of the absolute
+ * number of the first sample, the samples as bytes, the unitsize, and
+ * a tuple with the input bit of each of the decoder's channels (-1 for
+ * unused optional channels). Afterwards self.samplenum holds the number
+ * of the last sample of the block.
+ *
+ * This allows decoders to process samples in bulk. Mixing with wait()
+ * is fine, the next wait() continues after the block. The limited Python
+ * API which we build against doesn't allow memory views of C buffers,
+ * so the samples get copied, once per chunk.
+ */
+static PyObject *Decoder_wait_block(PyObject *self, PyObject *args)
+{
+	uint64_t first, last, skip_count;
+	int i;
+	gboolean found_match;
+	struct srd_decoder_inst *di;
+	srd_Decoder *dec;
+	PyObject *py_block, *py_data, *py_chmap, *py_old;
+	PyGILState_STATE gstate;
+
+	(void)args;
+
+	gstate = PyGILState_Ensure();
+
+	if (!(di = srd_inst_find_by_obj(self))) {
+		PyErr_SetString(PyExc_Exception, "decoder instance not found");
+		goto err;
+	}
+	dec = (srd_Decoder *)self;
+	di->stats.wait_calls++;
+	srd_inst_stats_python_stop(di);
+
+	if (di->want_wait_terminate)
+		goto err;
+
+	/* Find the next sample like wait() without conditions does. */
+	if (di->abs_cur_samplenum)
+		skip_count = 1;
+	else if (!di->condition_list)
+		skip_count = 0;
+	else
+		skip_count = 1;
+	set_skip_condition(di, skip_count);
+
+	while (1) {
+		Py_BEGIN_ALLOW_THREADS
+
+		/* Wait for new samples to process, or termination request. */
+		g_mutex_lock(&di->data_mutex);
+		while (!di->got_new_samples && !di->want_wait_terminate)
+			g_cond_wait(&di->got_new_samples_cond, &di->data_mutex);
+
+		found_match = FALSE;
+		(void)process_samples_until_condition_match(di, &found_match);
+
+		Py_END_ALLOW_THREADS
+
+		/* Return the samples up to the end of the chunk. */
+		if (found_match) {
+			match_array_clear(di);
+			first = di->abs_cur_samplenum;
+			last = di->abs_end_samplenum - 1;
+			py_data = PyBytes_FromStringAndSize((const char *)di->inbuf +
+				(first - di->abs_start_samplenum) * di->data_unitsize,
+				(last - first + 1) * di->data_unitsize);
+			py_chmap = PyTuple_New(di->dec_num_channels);
+			for (i = 0; py_chmap && i < di->dec_num_channels; i++) {
+				PyTuple_SetItem(py_chmap, i,
+					PyLong_FromLong(di->dec_channelmap[i]));
+			}
+			py_block = NULL;
+			if (py_data && py_chmap) {
+				py_block = Py_BuildValue("KOiO", first, py_data,
+					di->data_unitsize, py_chmap);
+			}
+			Py_XDECREF(py_data);
+			Py_XDECREF(py_chmap);
+			if (!py_block) {
+				g_mutex_unlock(&di->data_mutex);
+				goto err;
+			}
+
+			srd_inst_samples_skip(di, last);
+
+			py_old = dec->samplenum;
+			dec->samplenum = PyLong_FromUnsignedLongLong(last);
+			Py_XDECREF(py_old);
+			py_old = dec->matched;
+			Py_INCREF(Py_None);
+			dec->matched = Py_None;
+			Py_XDECREF(py_old);
+
+			g_mutex_unlock(&di->data_mutex);
+
+			di->stats.matches++;
+			di->stats_py_since = g_get_monotonic_time();
+
+			PyGILState_Release(gstate);
+
+			return py_block;
+		}
+
+		/* No samples left, reset state for the next chunk. */
+		di->got_new_samples = FALSE;
+		di->handled_all_samples = TRUE;
+		di->abs_start_samplenum = 0;
+		di->abs_end_samplenum = 0;
+		di->inbuf = NULL;
+		di->inbuflen = 0;
+
+		/* Signal the main thread that we handled all samples. */
+		g_cond_signal(&di->handled_all_samples_cond);
+
+		if (di->want_wait_terminate) {
+			srd_dbg("%s: %s: Will return from wait_block().",
+				di->inst_id, __func__);
+			g_mutex_unlock(&di->data_mutex);
+			goto err;
+		}
+
+		g_mutex_unlock(&di->data_mutex);
+	}
+
+err:
+	PyGILState_Release(gstate);
+
+	return NULL;
+}
+
+/**
+ * Mark the current sample as a checkpoint, from which decoding can resume.
+ *
+ * Decoders call this after a wait(), where decode() could start over
+ * from the top with no state from earlier samples (e.g. the bus is idle).
+ * See srd_session_seek().
+ *
+ * @param self The Decoder instance. Must not be NULL.
+ * @param args Unused.
+ *
+ * @retval Py_None Always (checkpoints are only recorded when enabled).
+ * @retval NULL An error occurred.
+ */
+static PyObject *Decoder_checkpoint(PyObject *self, PyObject *args)
+{
+	struct srd_decoder_inst *di;
+	PyGILState_STATE gstate;
+
+	(void)args;
+
+	gstate = PyGILState_Ensure();
+
+	if (!(di = srd_inst_find_by_obj(self))) {
+		PyErr_SetString(PyExc_Exception, "decoder instance not found");
+		PyGILState_Release(gstate);
+		return NULL;
+	}
+
+	srd_inst_checkpoint_add(di);
+
+	PyGILState_Release(gstate);
+
+	Py_RETURN_NONE;
+}
+
 /**
  * Return whether the specified channel was supplied to the decoder.
  *
@@ -996,13 +1385,14 @@ static PyObject *Decoder_has_channel(PyObject *self, PyObject *args)
 	int idx, count;
 	struct srd_decoder_inst *di;
 	PyGILState_STATE gstate;
+	PyObject *ret;
 
 	if (!self || !args)
 		return NULL;
 
 	gstate = PyGILState_Ensure();
 
-	if (!(di = srd_inst_find_by_obj(NULL, self))) {
+	if (!(di = srd_inst_find_by_obj(self))) {
 		PyErr_SetString(PyExc_Exception, "decoder instance not found");
 		goto err;
 	}
@@ -1024,9 +1414,11 @@ static PyObject *Decoder_has_channel(PyObject *self, PyObject *args)
 		goto err;
 	}
 
+	ret = PyBool_FromLong(di->dec_channelmap[idx] != -1);
+
 	PyGILState_Release(gstate);
 
-	return (di->dec_channelmap[idx] == -1) ? Py_False : Py_True;
+	return ret;
 
 err:
 	PyGILState_Release(gstate);
@@ -1034,13 +1426,62 @@ err:
 	return NULL;
 }
 
+/*
+ * Return the performance counters of the decoder instance, see
+ * struct srd_inst_stats.
+ */
+static PyObject *Decoder_stats_get(PyObject *self, void *closure)
+{
+	struct srd_decoder_inst *di;
+	struct srd_inst_stats *st;
+
+	(void)closure;
+
+	if (!(di = srd_inst_find_by_obj(self))) {
+		PyErr_SetString(PyExc_Exception, "decoder instance not found");
+		return NULL;
+	}
+	st = &di->stats;
+
+	return Py_BuildValue("{sKsKsKs{sKsKsKsK}sKsKsK}",
+		"wait_calls", st->wait_calls,
+		"matches", st->matches,
+		"samples_scanned", st->samples_scanned,
+		"puts",
+			"ann", st->puts[SRD_OUTPUT_ANN],
+			"python", st->puts[SRD_OUTPUT_PYTHON],
+			"binary", st->puts[SRD_OUTPUT_BINARY],
+			"meta", st->puts[SRD_OUTPUT_META],
+		"binary_bytes", st->binary_bytes,
+		"match_time_us", st->match_time_us,
+		"python_time_us", st->python_time_us);
+}
+
+static PyGetSetDef Decoder_getset[] = {
+	{ "stats", Decoder_stats_get, NULL,
+			"Performance counters of the decoder instance", NULL },
+	{NULL, NULL, NULL, NULL, NULL}
+};
+
+static PyMemberDef Decoder_members[] = {
+	{ "samplenum", T_OBJECT_EX, offsetof(srd_Decoder, samplenum), 0,
+			"Number of the sample which matched in wait()" },
+	{ "matched", T_OBJECT_EX, offsetof(srd_Decoder, matched), 0,
+			"Conditions which matched in wait()" },
+	{NULL, 0, 0, 0, NULL}
+};
+
 static PyMethodDef Decoder_methods[] = {
 	{ "put", Decoder_put, METH_VARARGS,
 	  "Accepts a dictionary with the following keys: startsample, endsample, data" },
 	{ "register", (PyCFunction)Decoder_register, METH_VARARGS|METH_KEYWORDS,
 			"Register a new output stream" },
-	{ "wait", Decoder_wait, METH_VARARGS,
+	{ "wait", (PyCFunction)Decoder_wait, METH_VARARGS|METH_KEYWORDS,
 			"Wait for one or more conditions to occur" },
+	{ "wait_block", Decoder_wait_block, METH_NOARGS,
+			"Wait for samples, return the rest of the current chunk" },
+	{ "checkpoint", Decoder_checkpoint, METH_NOARGS,
+			"Mark the current sample as a point to resume decoding from" },
 	{ "has_channel", Decoder_has_channel, METH_VARARGS,
 			"Report whether a channel was supplied" },
 	{NULL, NULL, 0, NULL}
@@ -1059,6 +1500,8 @@ SRD_PRIV PyObject *srd_Decoder_type_new(void)
 	PyType_Slot slots[] = {
 		{ Py_tp_doc, "sigrok Decoder base class" },
 		{ Py_tp_methods, Decoder_methods },
+		{ Py_tp_members, Decoder_members },
+		{ Py_tp_getset, Decoder_getset },
 		{ Py_tp_new, (void *)&PyType_GenericNew },
 		{ 0, NULL }
 	};
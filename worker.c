@@ -0,0 +1,1411 @@
+/*
+ * This file is part of the libsigrokdecode project.
+ *
+ * Copyright (C) 2010 Uwe Hermann <uwe@hermann-uwe.de>
+ * Copyright (C) 2013 Bert Vermeulen <bert@biot.com>
+ *
+ * This program is free software: you can redistribute it and/or modify
+ * it under the terms of the GNU General Public License as published by
+ * the Free Software Foundation, either version 3 of the License, or
+ * (at your option) any later version.
+ *
+ * This program is distributed in the hope that it will be useful,
+ * but WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+ * GNU General Public License for more details.
+ *
+ * You should have received a copy of the GNU General Public License
+ * along with this program.  If not, see <http://www.gnu.org/licenses/>.
+ */
+#include <config.h>
+#include "libsigrokdecode-internal.h" /* First, so we avoid a _POSIX_C_SOURCE warning. */
+#include "libsigrokdecode.h"
+#include <inttypes.h>
+#include <glib.h>
+#include <stdlib.h>
+#include <string.h>
+#include <errno.h>
+#ifdef G_OS_UNIX
+#include <fcntl.h>
+#include <sys/mman.h>
+#include <sys/socket.h>
+#include <sys/types.h>
+#include <sys/wait.h>
+#include <unistd.h>
+#endif
+
+/**
+ * @file
+ *
+ * Decoding in worker processes.
+ */
+
+/**
+ * @addtogroup grp_session
+ *
+ * @{
+ */
+
+/** @cond PRIVATE */
+
+/* Size of the memory which passes sample data to a worker process. */
+#define WORKER_SHM_SIZE (4 * 1024 * 1024)
+
+/*
+ * Type of the description of a decoder stack, from which a worker
+ * process builds its copy: the decoder search paths (the first added
+ * first), the log level, the output types which the session passes on
+ * (a bit mask), the samplerate, the checkpoint interval, the sample at
+ * which the bottom instance starts and its value (empty for sample 0),
+ * and the instances of the stack depth first. Each instance has its
+ * decoder ID, instance ID, options, channel map, initial pins, and the
+ * index of the instance below it (or -1).
+ */
+#define WORKER_STACK_TYPE "(asiitttaya(ssa{sv}aiayi))"
+
+/* Commands of a session to its worker processes. */
+enum {
+	WORKER_CMD_SEND,
+	WORKER_CMD_SAMPLERATE,
+	WORKER_CMD_RESET,
+};
+
+struct worker_cmd {
+	int type;
+	uint64_t abs_start_samplenum;
+	uint64_t abs_end_samplenum;
+	/* The samples are in the worker's shared memory. */
+	uint64_t inbuflen;
+	uint64_t unitsize;
+	uint64_t samplerate;
+};
+
+/* Type of the last record of a worker process' reply. */
+#define WORKER_REC_DONE -1
+/* Type of the records which pass on log messages. */
+#define WORKER_REC_LOG -2
+/* Type of the records which pass on checkpoints of the bottom instance. */
+#define WORKER_REC_CHECKPOINT -3
+
+/*
+ * A record of a worker process' reply to a command, followed by 'size'
+ * bytes of data. Output records have the output type, and as data the
+ * annotation texts (each with NUL), binary data, the type string (with
+ * NUL) and serialized value of a GVariant, or a pickled Python object.
+ * Log records have the log level, and the message (with NUL) as data.
+ * Checkpoint records have the sample number as start sample, and the
+ * number of outputs before the checkpoint as end sample. The last record
+ * has the command's result, and the counters of the stack's instances
+ * as data.
+ */
+struct worker_rec {
+	int type;
+	/* Index of the instance in the stack, depth first. */
+	unsigned int inst;
+	int pdo_id;
+	/* Annotation or binary class, log level, or the command's result. */
+	int arg;
+	uint64_t start_sample;
+	uint64_t end_sample;
+	uint64_t size;
+};
+
+/* A worker process of a session, which decodes one stack. */
+struct worker {
+	/* The session's instances of the stack, depth first. */
+	GPtrArray *insts;
+	int fd;
+	GPid pid;
+	/* Memory which passes sample chunks to the worker process. */
+	uint8_t *shm;
+	/* The split segment which the worker decodes, or NULL. */
+	const struct worker_segment *segment;
+	/* The counters of the copies, as of the last reply. */
+	struct srd_inst_stats *stats;
+};
+
+/* State of the worker process itself. */
+struct worker_child {
+	/* The session with the copy of the stack. */
+	struct srd_session *sess;
+	/* The copied instances, depth first, and their indices plus 1. */
+	GPtrArray *insts;
+	GHashTable *inst_index;
+	/* The reply to the current command. */
+	GByteArray *reply;
+	/* Checkpoints of the bottom instance which were passed on. */
+	guint checkpoints_sent;
+	PyObject *py_dumps;
+};
+
+#ifdef G_OS_UNIX
+/* Sending to a worker which has exited fails, rather than raise SIGPIPE. */
+#ifndef MSG_NOSIGNAL
+#define MSG_NOSIGNAL 0
+#endif
+#endif
+
+/** @endcond */
+
+#ifdef G_OS_UNIX
+
+static gboolean worker_write(int fd, const void *buf, uint64_t len)
+{
+	const uint8_t *p;
+	ssize_t n;
+
+	for (p = buf; len; p += n, len -= n) {
+		n = send(fd, p, MIN(len, G_MAXINT32), MSG_NOSIGNAL);
+		if (n < 0 && errno == EINTR)
+			n = 0;
+		else if (n <= 0)
+			return FALSE;
+	}
+
+	return TRUE;
+}
+
+static gboolean worker_read(int fd, void *buf, uint64_t len)
+{
+	uint8_t *p;
+	ssize_t n;
+
+	for (p = buf; len; p += n, len -= n) {
+		n = recv(fd, p, MIN(len, G_MAXINT32), 0);
+		if (n < 0 && errno == EINTR)
+			n = 0;
+		else if (n <= 0)
+			return FALSE;
+	}
+
+	return TRUE;
+}
+
+/* Append a decoder stack's instances to 'insts', depth first. */
+static void worker_insts_add(GPtrArray *insts, struct srd_decoder_inst *di)
+{
+	GSList *l;
+
+	g_ptr_array_add(insts, di);
+	for (l = di->next_di; l; l = l->next)
+		worker_insts_add(insts, l->data);
+}
+
+/* Add an output of the worker process' stack to its reply. */
+static void worker_output_cb(struct srd_proto_data *pdata, void *cb_data)
+{
+	struct worker_child *child;
+	const struct srd_proto_data_annotation *pda;
+	const struct srd_proto_data_binary *pdb;
+	struct worker_rec rec;
+	const char *type;
+	char **text, *py_buf;
+	Py_ssize_t py_len;
+	PyObject *py_bytes;
+	uint8_t *data;
+
+	child = cb_data;
+	memset(&rec, 0, sizeof(rec));
+	rec.type = pdata->pdo->output_type;
+	rec.inst = GPOINTER_TO_UINT(g_hash_table_lookup(child->inst_index,
+		pdata->pdo->di)) - 1;
+	rec.pdo_id = pdata->pdo->pdo_id;
+	rec.start_sample = pdata->start_sample;
+	rec.end_sample = pdata->end_sample;
+
+	switch (rec.type) {
+	case SRD_OUTPUT_ANN:
+		pda = pdata->data;
+		rec.arg = pda->ann_class;
+		for (text = pda->ann_text; *text; text++)
+			rec.size += strlen(*text) + 1;
+		g_byte_array_append(child->reply, (const guint8 *)&rec,
+			sizeof(rec));
+		for (text = pda->ann_text; *text; text++) {
+			g_byte_array_append(child->reply,
+				(const guint8 *)*text, strlen(*text) + 1);
+		}
+		break;
+	case SRD_OUTPUT_BINARY:
+		pdb = pdata->data;
+		rec.arg = pdb->bin_class;
+		rec.size = pdb->size;
+		g_byte_array_append(child->reply, (const guint8 *)&rec,
+			sizeof(rec));
+		g_byte_array_append(child->reply, pdb->data, pdb->size);
+		break;
+	case SRD_OUTPUT_META:
+		type = g_variant_get_type_string(pdata->data);
+		rec.size = strlen(type) + 1 + g_variant_get_size(pdata->data);
+		data = g_malloc(g_variant_get_size(pdata->data));
+		g_variant_store(pdata->data, data);
+		g_byte_array_append(child->reply, (const guint8 *)&rec,
+			sizeof(rec));
+		g_byte_array_append(child->reply, (const guint8 *)type,
+			strlen(type) + 1);
+		g_byte_array_append(child->reply, data,
+			g_variant_get_size(pdata->data));
+		g_free(data);
+		break;
+	case SRD_OUTPUT_PYTHON:
+		/* Python output callbacks run with the GIL held. */
+		py_bytes = NULL;
+		if (child->py_dumps) {
+			py_bytes = PyObject_CallFunctionObjArgs(child->py_dumps,
+				(PyObject *)pdata->data, NULL);
+		}
+		if (!py_bytes || PyBytes_AsStringAndSize(py_bytes, &py_buf,
+				&py_len) < 0) {
+			srd_exception_catch("Cannot pass Python output of "
+				"instance %s", pdata->pdo->di->inst_id);
+			Py_XDECREF(py_bytes);
+			break;
+		}
+		rec.size = py_len;
+		g_byte_array_append(child->reply, (const guint8 *)&rec,
+			sizeof(rec));
+		g_byte_array_append(child->reply, (const guint8 *)py_buf,
+			py_len);
+		Py_DECREF(py_bytes);
+		break;
+	}
+}
+
+/* Add a log message of the worker process to its reply. */
+static int worker_log_cb(void *cb_data, int loglevel, const char *format,
+		va_list args)
+{
+	struct worker_child *child;
+	struct worker_rec rec;
+	char *msg;
+
+	child = cb_data;
+	msg = g_strdup_vprintf(format, args);
+	memset(&rec, 0, sizeof(rec));
+	rec.type = WORKER_REC_LOG;
+	rec.arg = loglevel;
+	rec.size = strlen(msg) + 1;
+	g_byte_array_append(child->reply, (const guint8 *)&rec, sizeof(rec));
+	g_byte_array_append(child->reply, (const guint8 *)msg, rec.size);
+	g_free(msg);
+
+	return SRD_OK;
+}
+
+/*
+ * Complete the reply to a command with the new checkpoints and the
+ * result, and send it.
+ */
+static gboolean worker_reply_send(struct worker_child *child, int fd,
+		int ret)
+{
+	struct worker_rec rec;
+	struct srd_inst_stats stats;
+	const struct srd_decoder_inst *di;
+	const struct srd_checkpoint *cp;
+	uint64_t size;
+	unsigned int i;
+	gboolean sent;
+
+	memset(&rec, 0, sizeof(rec));
+	di = child->insts->len ? g_ptr_array_index(child->insts, 0) : NULL;
+	rec.type = WORKER_REC_CHECKPOINT;
+	for (; di && di->checkpoints &&
+			child->checkpoints_sent < di->checkpoints->len;
+			child->checkpoints_sent++) {
+		cp = &g_array_index(di->checkpoints, struct srd_checkpoint,
+			child->checkpoints_sent);
+		rec.start_sample = cp->samplenum;
+		rec.end_sample = cp->outputs;
+		g_byte_array_append(child->reply, (const guint8 *)&rec,
+			sizeof(rec));
+	}
+
+	memset(&rec, 0, sizeof(rec));
+	rec.type = WORKER_REC_DONE;
+	rec.arg = ret;
+	rec.size = child->insts->len * sizeof(stats);
+	g_byte_array_append(child->reply, (const guint8 *)&rec, sizeof(rec));
+	for (i = 0; i < child->insts->len; i++) {
+		srd_inst_stats_get(g_ptr_array_index(child->insts, i), &stats);
+		g_byte_array_append(child->reply, (const guint8 *)&stats,
+			sizeof(stats));
+	}
+
+	size = child->reply->len;
+	sent = worker_write(fd, &size, sizeof(size)) &&
+		worker_write(fd, child->reply->data, size);
+	g_byte_array_set_size(child->reply, 0);
+
+	return sent;
+}
+
+/* Create an instance of the worker process' copy of the stack. */
+static int worker_inst_new(struct worker_child *child, const char *dec_id,
+		const char *inst_id, GVariant *options, GVariant *channels,
+		GVariant *pins, int parent)
+{
+	struct srd_decoder_inst *di;
+	GHashTable *opts;
+	GVariantIter iter;
+	GVariant *value;
+	const int32_t *map;
+	const uint8_t *pin_data;
+	gsize num_map, num_pins, i;
+	char *key;
+	int ret;
+
+	if ((ret = srd_decoder_load(dec_id)) != SRD_OK)
+		return ret;
+
+	opts = g_hash_table_new_full(g_str_hash, g_str_equal, g_free,
+		(GDestroyNotify)g_variant_unref);
+	g_variant_iter_init(&iter, options);
+	while (g_variant_iter_next(&iter, "{sv}", &key, &value))
+		g_hash_table_insert(opts, key, value);
+	di = srd_inst_new(child->sess, dec_id, opts);
+	g_hash_table_destroy(opts);
+	if (!di)
+		return SRD_ERR_ARG;
+
+	g_free(di->inst_id);
+	di->inst_id = g_strdup(inst_id);
+	map = g_variant_get_fixed_array(channels, &num_map, sizeof(int32_t));
+	pin_data = g_variant_get_fixed_array(pins, &num_pins, 1);
+	if (num_map != (gsize)di->dec_num_channels) {
+		srd_err("Instance %s has %d channels, not %" G_GSIZE_FORMAT ".",
+			inst_id, di->dec_num_channels, num_map);
+		return SRD_ERR_ARG;
+	}
+	for (i = 0; i < num_map; i++)
+		di->dec_channelmap[i] = map[i];
+	if (di->old_pins_array && num_pins == di->old_pins_array->len)
+		memcpy(di->old_pins_array->data, pin_data, num_pins);
+
+	if (parent >= 0) {
+		if ((guint)parent >= child->insts->len)
+			return SRD_ERR_ARG;
+		ret = srd_inst_stack(child->sess,
+			g_ptr_array_index(child->insts, parent), di);
+		if (ret != SRD_OK)
+			return ret;
+	}
+	g_ptr_array_add(child->insts, di);
+	g_hash_table_insert(child->inst_index, di,
+		GUINT_TO_POINTER(child->insts->len));
+
+	return SRD_OK;
+}
+
+/* Build the worker process' copy of the stack, see WORKER_STACK_TYPE. */
+static int worker_stack_new(struct worker_child *child, GVariant *stack)
+{
+	GVariantIter *paths, *insts;
+	GVariant *sample, *options, *channels, *pins;
+	GSList *known;
+	PyObject *py_mod;
+	PyGILState_STATE gstate;
+	const char *path, *dec_id, *inst_id;
+	uint64_t samplerate, interval, start;
+	gsize unitsize;
+	int loglevel, output_types, parent, type, ret;
+
+	g_variant_get(stack, WORKER_STACK_TYPE, &paths, &loglevel,
+		&output_types, &samplerate, &interval, &start, NULL, &insts);
+	sample = g_variant_get_child_value(stack, 6);
+
+	/* Decoders come from the same directories as the session's. */
+	known = srd_searchpaths_get();
+	ret = SRD_OK;
+	while (ret == SRD_OK && g_variant_iter_next(paths, "&s", &path)) {
+		if (!g_slist_find_custom(known, path, (GCompareFunc)strcmp))
+			ret = srd_decoder_searchpath_add(path);
+	}
+	g_slist_free_full(known, g_free);
+	g_variant_iter_free(paths);
+
+	if (ret == SRD_OK && (ret = srd_session_new(&child->sess)) == SRD_OK)
+		child->sess->checkpoint_interval = interval;
+	for (type = 0; ret == SRD_OK && type <= SRD_OUTPUT_META; type++) {
+		if (!(output_types & (1 << type)))
+			continue;
+		ret = srd_pd_output_callback_add(child->sess, type,
+			worker_output_cb, child);
+	}
+	while (ret == SRD_OK && g_variant_iter_next(insts,
+			"(&s&s@a{sv}@ai@ayi)", &dec_id, &inst_id, &options,
+			&channels, &pins, &parent)) {
+		ret = worker_inst_new(child, dec_id, inst_id, options,
+			channels, pins, parent);
+		g_variant_unref(options);
+		g_variant_unref(channels);
+		g_variant_unref(pins);
+	}
+	g_variant_iter_free(insts);
+
+	if (ret == SRD_OK && samplerate) {
+		ret = srd_session_metadata_set(child->sess, SRD_CONF_SAMPLERATE,
+			g_variant_new_uint64(samplerate));
+	}
+	if (ret == SRD_OK)
+		ret = srd_session_start(child->sess);
+
+	/* Split segments start in the middle of the capture. */
+	if (ret == SRD_OK && start && child->insts->len) {
+		srd_inst_start_at(g_ptr_array_index(child->insts, 0), start,
+			g_variant_get_fixed_array(sample, &unitsize, 1));
+	}
+	g_variant_unref(sample);
+
+	gstate = PyGILState_Ensure();
+	if ((py_mod = PyImport_ImportModule("pickle"))) {
+		child->py_dumps = PyObject_GetAttrString(py_mod, "dumps");
+		Py_DECREF(py_mod);
+	}
+	PyErr_Clear();
+	PyGILState_Release(gstate);
+
+	return ret;
+}
+
+/*
+ * The worker process: Decode with the copy of the stack as the session
+ * commands, and reply with the output.
+ */
+static void worker_run(struct worker_child *child, int fd,
+		const uint8_t *shm)
+{
+	struct worker_cmd cmd;
+	int ret;
+
+	while (worker_read(fd, &cmd, sizeof(cmd))) {
+		switch (cmd.type) {
+		case WORKER_CMD_SEND:
+			ret = srd_session_send(child->sess,
+				cmd.abs_start_samplenum, cmd.abs_end_samplenum,
+				cmd.inbuflen ? shm : NULL, cmd.inbuflen,
+				cmd.unitsize);
+			break;
+		case WORKER_CMD_SAMPLERATE:
+			ret = srd_session_metadata_set(child->sess,
+				SRD_CONF_SAMPLERATE,
+				g_variant_new_uint64(cmd.samplerate));
+			break;
+		case WORKER_CMD_RESET:
+			ret = srd_session_terminate_reset(child->sess);
+			child->checkpoints_sent = 0;
+			break;
+		default:
+			ret = SRD_ERR_BUG;
+			break;
+		}
+		if (!worker_reply_send(child, fd, ret))
+			break;
+	}
+}
+
+/*
+ * Turn an output record of a worker process into an output of the
+ * session's instance which the worker's copy stands for. Returns that
+ * instance, or NULL if the output can't be passed on.
+ */
+static struct srd_decoder_inst *worker_output_get(const struct worker *w,
+		const struct worker_rec *rec, const uint8_t *data,
+		struct split_output *out)
+{
+	struct srd_decoder_inst *di;
+	PyObject *py_mod, *py_bytes;
+	PyGILState_STATE gstate;
+	const char *type;
+	uint8_t *value;
+	uint64_t pos;
+	unsigned int i, n;
+
+	if (rec->inst >= w->insts->len)
+		return NULL;
+	di = g_ptr_array_index(w->insts, rec->inst);
+	memset(out, 0, sizeof(*out));
+	out->pdata.start_sample = rec->start_sample;
+	out->pdata.end_sample = rec->end_sample;
+	if (!(out->pdata.pdo = g_slist_nth_data(di->pd_output, rec->pdo_id)))
+		return NULL;
+
+	switch (rec->type) {
+	case SRD_OUTPUT_ANN:
+		out->pda.ann_class = rec->arg;
+		for (pos = 0, n = 0; pos < rec->size; n++)
+			pos += strlen((const char *)data + pos) + 1;
+		out->pda.ann_text = g_new0(char *, n + 1);
+		for (pos = 0, i = 0; i < n; i++) {
+			out->pda.ann_text[i] = g_strdup((const char *)data + pos);
+			pos += strlen(out->pda.ann_text[i]) + 1;
+		}
+		break;
+	case SRD_OUTPUT_BINARY:
+		value = g_malloc(rec->size);
+		memcpy(value, data, rec->size);
+		out->pdb.bin_class = rec->arg;
+		out->pdb.size = rec->size;
+		out->pdb.data = value;
+		break;
+	case SRD_OUTPUT_META:
+		type = (const char *)data;
+		pos = strlen(type) + 1;
+		value = g_malloc(rec->size - pos);
+		memcpy(value, data + pos, rec->size - pos);
+		out->pdata.data = g_variant_ref_sink(g_variant_new_from_data(
+			G_VARIANT_TYPE(type), value, rec->size - pos, FALSE,
+			g_free, value));
+		break;
+	case SRD_OUTPUT_PYTHON:
+		gstate = PyGILState_Ensure();
+		py_bytes = PyBytes_FromStringAndSize((const char *)data,
+			rec->size);
+		if (py_bytes && (py_mod = PyImport_ImportModule("pickle"))) {
+			out->pdata.data = PyObject_CallMethod(py_mod, "loads",
+				"O", py_bytes);
+			Py_DECREF(py_mod);
+		}
+		Py_XDECREF(py_bytes);
+		if (!out->pdata.data) {
+			srd_exception_catch("Cannot pass Python output of "
+				"instance %s", di->inst_id);
+			PyGILState_Release(gstate);
+			return NULL;
+		}
+		PyGILState_Release(gstate);
+		break;
+	default:
+		return NULL;
+	}
+
+	return di;
+}
+
+/* Pass an output of a worker process to the session's callbacks. */
+static void worker_output_replay(struct srd_session *sess,
+		const struct worker *w, const struct worker_rec *rec,
+		const uint8_t *data)
+{
+	struct srd_decoder_inst *di;
+	struct split_output out;
+	PyGILState_STATE gstate;
+
+	if (!(di = worker_output_get(w, rec, data, &out)))
+		return;
+
+	split_output_replay(sess, di, &out);
+	if (rec->type == SRD_OUTPUT_PYTHON) {
+		gstate = PyGILState_Ensure();
+		split_output_free(&out);
+		PyGILState_Release(gstate);
+	} else {
+		split_output_free(&out);
+	}
+}
+
+/**
+ * Pass the output and log messages in a worker process' reply on, and
+ * get its result. Workers of split segments keep their output and
+ * checkpoints in the segment instead.
+ *
+ * @return FALSE if the worker process can't be reached.
+ *
+ * @private
+ */
+SRD_PRIV gboolean worker_reply_run(struct srd_session *sess,
+		struct worker *w, int *ret)
+{
+	struct worker_rec rec;
+	struct srd_decoder_inst *di;
+	struct split_output out;
+	struct split_resync r;
+	uint8_t *reply, *p;
+	uint64_t size;
+	unsigned int i;
+
+	if (!worker_read(w->fd, &size, sizeof(size)))
+		return FALSE;
+	reply = g_malloc(size);
+	if (!worker_read(w->fd, reply, size)) {
+		g_free(reply);
+		return FALSE;
+	}
+
+	*ret = SRD_ERR_BUG;
+	for (p = reply; p + sizeof(rec) <= reply + size;
+			p += sizeof(rec) + rec.size) {
+		memcpy(&rec, p, sizeof(rec));
+		if (rec.type == WORKER_REC_LOG) {
+			srd_log(rec.arg, "%s", (const char *)p + sizeof(rec));
+			continue;
+		}
+		if (rec.type == WORKER_REC_CHECKPOINT) {
+			if (!w->segment)
+				continue;
+			r.samplenum = rec.start_sample;
+			r.outputs = rec.end_sample;
+			g_array_append_val(w->segment->checkpoints, r);
+			continue;
+		}
+		if (rec.type != WORKER_REC_DONE) {
+			if (!w->segment)
+				worker_output_replay(sess, w, &rec, p + sizeof(rec));
+			else if (worker_output_get(w, &rec, p + sizeof(rec), &out))
+				g_array_append_val(w->segment->outputs, out);
+			continue;
+		}
+		*ret = rec.arg;
+		if (rec.size != w->insts->len * sizeof(*w->stats))
+			break;
+		memcpy(w->stats, p + sizeof(rec), rec.size);
+		/* The copies' counters stand for the session's instances. */
+		for (i = 0; i < w->insts->len && !w->segment; i++) {
+			di = g_ptr_array_index(w->insts, i);
+			di->stats = w->stats[i];
+		}
+		break;
+	}
+	g_free(reply);
+
+	return TRUE;
+}
+
+/* Describe an instance and the ones stacked on it, see WORKER_STACK_TYPE. */
+static gboolean worker_stack_inst_add(GVariantBuilder *insts,
+		struct srd_decoder_inst *di, int parent, int *index)
+{
+	GVariantBuilder options;
+	GVariant *value;
+	GSList *l;
+	PyObject *py_options, *py_key, *py_value;
+	PyGILState_STATE gstate;
+	Py_ssize_t pos;
+	char *key;
+	gboolean ok;
+	int self;
+
+	/* Options set for the instance live in an instance attribute. */
+	g_variant_builder_init(&options, G_VARIANT_TYPE("a{sv}"));
+	ok = TRUE;
+	gstate = PyGILState_Ensure();
+	py_options = NULL;
+	if (PyObject_HasAttrString(di->py_inst, "options"))
+		py_options = PyObject_GetAttrString(di->py_inst, "options");
+	pos = 0;
+	while (ok && py_options && PyDict_Check(py_options) &&
+			PyDict_Next(py_options, &pos, &py_key, &py_value)) {
+		if (py_str_as_str(py_key, &key) != SRD_OK) {
+			ok = FALSE;
+			break;
+		}
+		if ((value = py_obj_to_variant(py_value)))
+			g_variant_builder_add(&options, "{sv}", key, value);
+		else
+			ok = FALSE;
+		g_free(key);
+	}
+	Py_XDECREF(py_options);
+	PyGILState_Release(gstate);
+	if (!ok) {
+		srd_err("Cannot pass the options of instance %s to a worker "
+			"process.", di->inst_id);
+		g_variant_builder_clear(&options);
+		return FALSE;
+	}
+
+	g_variant_builder_add(insts, "(ss@a{sv}@ai@ayi)", di->decoder->id,
+		di->inst_id, g_variant_builder_end(&options),
+		g_variant_new_fixed_array(G_VARIANT_TYPE_INT32,
+			di->dec_channelmap, di->dec_num_channels,
+			sizeof(int32_t)),
+		g_variant_new_fixed_array(G_VARIANT_TYPE_BYTE,
+			di->old_pins_array ? di->old_pins_array->data : NULL,
+			di->old_pins_array ? di->old_pins_array->len : 0, 1),
+		parent);
+
+	self = (*index)++;
+	for (l = di->next_di; l; l = l->next) {
+		if (!worker_stack_inst_add(insts, l->data, self, index))
+			return FALSE;
+	}
+
+	return TRUE;
+}
+
+/*
+ * Describe the stack 'di' for a worker process, which decodes the split
+ * segment 'seg' if not NULL, see WORKER_STACK_TYPE.
+ */
+static GVariant *worker_stack_describe(struct srd_session *sess,
+		struct srd_decoder_inst *di, const struct worker_segment *seg)
+{
+	GVariantBuilder paths, insts;
+	GVariant *sample;
+	GSList *searchpaths, *l;
+	uint64_t interval, start;
+	int output_types, type, index;
+
+	/* The search paths are listed with the last added one first. */
+	g_variant_builder_init(&paths, G_VARIANT_TYPE_STRING_ARRAY);
+	searchpaths = g_slist_reverse(srd_searchpaths_get());
+	for (l = searchpaths; l; l = l->next)
+		g_variant_builder_add(&paths, "s", l->data);
+	g_slist_free_full(searchpaths, g_free);
+
+	output_types = 0;
+	for (type = 0; type <= SRD_OUTPUT_META; type++) {
+		if (srd_pd_output_callback_find(sess, type) ||
+		    (type == SRD_OUTPUT_ANN && sess->ann_batch_cb))
+			output_types |= 1 << type;
+	}
+
+	g_variant_builder_init(&insts, G_VARIANT_TYPE("a(ssa{sv}aiayi)"));
+	index = 0;
+	if (!worker_stack_inst_add(&insts, di, -1, &index)) {
+		g_variant_builder_clear(&paths);
+		g_variant_builder_clear(&insts);
+		return NULL;
+	}
+
+	/* Every checkpoint of a segment can be where its output starts. */
+	interval = seg ? 1 : 0;
+	start = seg ? seg->start : 0;
+	sample = g_variant_new_fixed_array(G_VARIANT_TYPE_BYTE,
+		start ? seg->sample : NULL, start ? seg->unitsize : 0, 1);
+
+	return g_variant_ref_sink(g_variant_new("(asiittt@aya(ssa{sv}aiayi))",
+		&paths,
+		srd_log_loglevel_get(), output_types,
+		(guint64)sess->samplerate, (guint64)interval, (guint64)start,
+		sample, &insts));
+}
+
+/* The program which runs worker processes. */
+static const char *worker_program(void)
+{
+	const char *path;
+
+	/* The environment variable helps running from the build tree. */
+	if ((path = g_getenv("SIGROKDECODE_WORKER")))
+		return path;
+#ifdef WORKER_PATH
+	return WORKER_PATH;
+#else
+	return NULL;
+#endif
+}
+
+/*
+ * Create memory which the session shares with a worker process. The
+ * name is removed right away, the worker process inherits the file
+ * descriptor.
+ */
+static int worker_shm_open(void)
+{
+	static gint count;
+	char *name;
+	int fd;
+
+	name = g_strdup_printf("/sigrokdecode-%ld-%d", (long)getpid(),
+		g_atomic_int_add(&count, 1));
+	fd = shm_open(name, O_RDWR | O_CREAT | O_EXCL, 0600);
+	if (fd >= 0)
+		shm_unlink(name);
+	g_free(name);
+	if (fd < 0 || ftruncate(fd, WORKER_SHM_SIZE) < 0) {
+		srd_err("Failed to create shared memory: %s.",
+			g_strerror(errno));
+		if (fd >= 0)
+			close(fd);
+		return -1;
+	}
+
+	return fd;
+}
+
+/*
+ * Runs in the new process right before the worker program. All other
+ * file descriptors get closed, keep the worker's ones open.
+ */
+static void worker_child_setup(gpointer data)
+{
+	const int *fds;
+
+	fds = data;
+	fcntl(fds[0], F_SETFD, 0);
+	fcntl(fds[1], F_SETFD, 0);
+}
+
+/** @private */
+SRD_PRIV void worker_free(struct worker *w)
+{
+	/* Worker processes exit when the session closes its socket. */
+	if (w->fd >= 0)
+		close(w->fd);
+	if (w->pid > 0) {
+		while (waitpid(w->pid, NULL, 0) < 0 && errno == EINTR)
+			;
+		g_spawn_close_pid(w->pid);
+	}
+	if (w->shm)
+		munmap(w->shm, WORKER_SHM_SIZE);
+	g_ptr_array_free(w->insts, TRUE);
+	g_free(w->stats);
+	g_free(w);
+}
+
+/**
+ * Start a worker process, which decodes with a copy of the stack 'di',
+ * or only the split segment 'seg' if not NULL.
+ *
+ * The worker program gets the ends of a socket and of the shared memory,
+ * and the description of the stack from the socket. It replies whether
+ * it could set up its copy, see worker_reply_run(), so that several
+ * workers can start at the same time.
+ *
+ * @private
+ */
+SRD_PRIV int worker_new(struct srd_session *sess, struct srd_decoder_inst *di,
+		const struct worker_segment *seg, struct worker **worker)
+{
+	struct worker *w;
+	GVariant *stack;
+	GError *error;
+	const char *program;
+	char *argv[4];
+	uint64_t size;
+	int fds[2], child_fds[2], shm_fd, ret;
+	gboolean started;
+#ifdef SO_NOSIGPIPE
+	int one;
+#endif
+
+	if (!(program = worker_program())) {
+		srd_err("Worker processes are not available.");
+		return SRD_ERR;
+	}
+	if (!(stack = worker_stack_describe(sess, di, seg)))
+		return SRD_ERR_ARG;
+
+	w = g_malloc0(sizeof(*w));
+	w->fd = -1;
+	w->insts = g_ptr_array_new();
+	worker_insts_add(w->insts, di);
+	w->segment = seg;
+	w->stats = g_new0(struct srd_inst_stats, w->insts->len);
+
+	ret = SRD_ERR;
+	if (socketpair(AF_UNIX, SOCK_STREAM, 0, fds) < 0) {
+		srd_err("Failed to create socket pair: %s.", g_strerror(errno));
+		goto out;
+	}
+	w->fd = fds[0];
+	fcntl(fds[0], F_SETFD, FD_CLOEXEC);
+	fcntl(fds[1], F_SETFD, FD_CLOEXEC);
+#ifdef SO_NOSIGPIPE
+	one = 1;
+	setsockopt(fds[0], SOL_SOCKET, SO_NOSIGPIPE, &one, sizeof(one));
+	setsockopt(fds[1], SOL_SOCKET, SO_NOSIGPIPE, &one, sizeof(one));
+#endif
+	if ((shm_fd = worker_shm_open()) < 0) {
+		close(fds[1]);
+		goto out;
+	}
+	w->shm = mmap(NULL, WORKER_SHM_SIZE, PROT_READ | PROT_WRITE,
+		MAP_SHARED, shm_fd, 0);
+	if (w->shm == MAP_FAILED) {
+		srd_err("Failed to map shared memory: %s.", g_strerror(errno));
+		w->shm = NULL;
+		close(fds[1]);
+		close(shm_fd);
+		goto out;
+	}
+
+	argv[0] = (char *)program;
+	argv[1] = g_strdup_printf("%d", fds[1]);
+	argv[2] = g_strdup_printf("%d", shm_fd);
+	argv[3] = NULL;
+	child_fds[0] = fds[1];
+	child_fds[1] = shm_fd;
+	error = NULL;
+	started = g_spawn_async(NULL, argv, NULL, G_SPAWN_DO_NOT_REAP_CHILD,
+		worker_child_setup, child_fds, &w->pid, &error);
+	g_free(argv[1]);
+	g_free(argv[2]);
+	close(fds[1]);
+	close(shm_fd);
+	if (!started) {
+		srd_err("Failed to start worker program %s: %s.", program,
+			error->message);
+		g_error_free(error);
+		goto out;
+	}
+	srd_dbg("Started worker process %ld for instance %s.", (long)w->pid,
+		di->inst_id);
+
+	size = g_variant_get_size(stack);
+	ret = SRD_OK;
+	if (!worker_write(w->fd, &size, sizeof(size)) ||
+	    !worker_write(w->fd, g_variant_get_data(stack), size)) {
+		srd_err("Lost the worker process of instance %s.", di->inst_id);
+		ret = SRD_ERR;
+	}
+
+out:
+	g_variant_unref(stack);
+	if (ret != SRD_OK) {
+		worker_free(w);
+		return ret;
+	}
+	*worker = w;
+
+	return SRD_OK;
+}
+
+/** @private */
+SRD_PRIV void workers_stop(struct srd_session *sess)
+{
+	g_slist_free_full(sess->workers, (GDestroyNotify)worker_free);
+	sess->workers = NULL;
+}
+
+static int workers_start(struct srd_session *sess)
+{
+	struct worker *w;
+	GSList *d, *l;
+	int ret, w_ret;
+
+	ret = SRD_OK;
+	for (d = sess->di_list; d && ret == SRD_OK; d = d->next) {
+		if ((ret = worker_new(sess, d->data, NULL, &w)) == SRD_OK)
+			sess->workers = g_slist_append(sess->workers, w);
+	}
+	for (l = sess->workers; l; l = l->next) {
+		if (!worker_reply_run(sess, l->data, &w_ret))
+			w_ret = SRD_ERR;
+		if (ret == SRD_OK)
+			ret = w_ret;
+	}
+	if (ret != SRD_OK)
+		workers_stop(sess);
+
+	return ret;
+}
+
+/*
+ * Have all worker processes run a command at the same time, then pass
+ * their output on, in the order of the stacks like without workers.
+ */
+static int workers_command(struct srd_session *sess,
+		const struct worker_cmd *cmd)
+{
+	GSList *l;
+	gboolean lost;
+	int ret, w_ret;
+
+	lost = FALSE;
+	for (l = sess->workers; l && !lost; l = l->next) {
+		lost = !worker_write(((struct worker *)l->data)->fd, cmd,
+			sizeof(*cmd));
+	}
+
+	/*
+	 * Workers which got the command before one was lost can't be
+	 * kept in step with the others, so they get stopped, too.
+	 */
+	ret = SRD_OK;
+	for (l = sess->workers; l && !lost; l = l->next) {
+		lost = !worker_reply_run(sess, l->data, &w_ret);
+		if (!lost && ret == SRD_OK)
+			ret = w_ret;
+	}
+	if (lost || !sess->workers) {
+		srd_err("Lost a worker process of session %d.",
+			sess->session_id);
+		workers_stop(sess);
+		return SRD_ERR;
+	}
+
+	return ret;
+}
+
+/**
+ * Have the worker processes decode a chunk, see srd_session_send().
+ *
+ * @private
+ */
+SRD_PRIV int workers_send(struct srd_session *sess,
+		uint64_t abs_start_samplenum, uint64_t abs_end_samplenum,
+		const uint8_t *inbuf, uint64_t inbuflen, uint64_t unitsize)
+{
+	struct worker_cmd cmd;
+	GSList *l;
+	uint64_t len;
+	int ret;
+
+	if (!sess->di_list)
+		return SRD_OK;
+	if (inbuf && unitsize > WORKER_SHM_SIZE)
+		return SRD_ERR_ARG;
+	if (!sess->workers && (ret = workers_start(sess)) != SRD_OK)
+		return ret;
+
+	memset(&cmd, 0, sizeof(cmd));
+	cmd.type = WORKER_CMD_SEND;
+	cmd.abs_start_samplenum = abs_start_samplenum;
+	cmd.unitsize = unitsize;
+
+	/* Chunks which don't fit into the shared memory go in pieces. */
+	do {
+		len = 0;
+		if (inbuf && unitsize)
+			len = MIN(inbuflen, WORKER_SHM_SIZE / unitsize * unitsize);
+		cmd.abs_end_samplenum = len < inbuflen ?
+			cmd.abs_start_samplenum + len / unitsize :
+			abs_end_samplenum;
+		cmd.inbuflen = len;
+		for (l = sess->workers; l && len; l = l->next)
+			memcpy(((struct worker *)l->data)->shm, inbuf, len);
+		if ((ret = workers_command(sess, &cmd)) != SRD_OK)
+			return ret;
+		cmd.abs_start_samplenum = cmd.abs_end_samplenum;
+		if (len) {
+			inbuf += len;
+			inbuflen -= len;
+		}
+	} while (len && inbuflen);
+
+	return SRD_OK;
+}
+
+/**
+ * Have a worker process decode the samples from 'abs_start_samplenum'
+ * on, as many as fit into its shared memory. The reply has to be read
+ * with worker_reply_run(), so that several workers can decode at the
+ * same time.
+ *
+ * @param w The worker to use.
+ * @param abs_start_samplenum The number of the first sample.
+ * @param inbuf The samples.
+ * @param num_samples The number of samples in 'inbuf'. Must be > 0.
+ * @param unitsize The number of bytes per sample.
+ * @param sent Receives the number of samples which were sent.
+ *
+ * @return SRD_OK upon success, a (negative) error code otherwise.
+ *
+ * @private
+ */
+SRD_PRIV int worker_send(struct worker *w, uint64_t abs_start_samplenum,
+		const uint8_t *inbuf, uint64_t num_samples, uint64_t unitsize,
+		uint64_t *sent)
+{
+	struct worker_cmd cmd;
+
+	if (!unitsize || unitsize > WORKER_SHM_SIZE)
+		return SRD_ERR_ARG;
+
+	*sent = MIN(num_samples, WORKER_SHM_SIZE / unitsize);
+	memset(&cmd, 0, sizeof(cmd));
+	cmd.type = WORKER_CMD_SEND;
+	cmd.abs_start_samplenum = abs_start_samplenum;
+	cmd.abs_end_samplenum = abs_start_samplenum + *sent;
+	cmd.inbuflen = *sent * unitsize;
+	cmd.unitsize = unitsize;
+	memcpy(w->shm, inbuf, cmd.inbuflen);
+	if (!worker_write(w->fd, &cmd, sizeof(cmd)))
+		return SRD_ERR;
+
+	return SRD_OK;
+}
+
+/**
+ * Add the counters of a worker's copies to those of the session's
+ * instances.
+ *
+ * @private
+ */
+SRD_PRIV void worker_stats_add(const struct worker *w)
+{
+	struct srd_decoder_inst *di;
+	const struct srd_inst_stats *st;
+	unsigned int i, j;
+
+	for (i = 0; i < w->insts->len; i++) {
+		di = g_ptr_array_index(w->insts, i);
+		st = &w->stats[i];
+		di->stats.wait_calls += st->wait_calls;
+		di->stats.matches += st->matches;
+		di->stats.samples_scanned += st->samples_scanned;
+		for (j = 0; j < G_N_ELEMENTS(di->stats.puts); j++)
+			di->stats.puts[j] += st->puts[j];
+		di->stats.binary_bytes += st->binary_bytes;
+		di->stats.match_time_us += st->match_time_us;
+		di->stats.python_time_us += st->python_time_us;
+	}
+}
+
+/**
+ * Run a worker process, see srd_session_isolation_set().
+ *
+ * This is the main function of the sigrokdecode-worker program. The
+ * arguments are the file descriptors of the socket and of the shared
+ * memory which the session passed on.
+ *
+ * @private
+ */
+SRD_API int srd_worker_main(int argc, char **argv)
+{
+	struct worker_child child;
+	PyGILState_STATE gstate;
+	GVariant *stack;
+	uint8_t *data, *shm;
+	uint64_t size;
+	int fd, shm_fd, loglevel, ret;
+
+	if (argc != 3) {
+		g_printerr("%s is started by libsigrokdecode sessions.\n",
+			argv[0]);
+		return 1;
+	}
+	fd = atoi(argv[1]);
+	shm_fd = atoi(argv[2]);
+	shm = mmap(NULL, WORKER_SHM_SIZE, PROT_READ, MAP_SHARED, shm_fd, 0);
+	close(shm_fd);
+	if (shm == MAP_FAILED || !worker_read(fd, &size, sizeof(size)))
+		return 1;
+	data = g_malloc(size);
+	if (!worker_read(fd, data, size)) {
+		g_free(data);
+		return 1;
+	}
+	stack = g_variant_ref_sink(g_variant_new_from_data(
+		G_VARIANT_TYPE(WORKER_STACK_TYPE), data, size, FALSE,
+		g_free, data));
+
+	memset(&child, 0, sizeof(child));
+	child.insts = g_ptr_array_new();
+	child.inst_index = g_hash_table_new(g_direct_hash, g_direct_equal);
+	child.reply = g_byte_array_new();
+
+	/* Log messages go to the session, along with the output. */
+	g_variant_get_child(stack, 1, "i", &loglevel);
+	srd_log_loglevel_set(loglevel);
+	srd_log_callback_set(worker_log_cb, &child);
+
+	if ((ret = srd_init(NULL)) == SRD_OK) {
+		ret = worker_stack_new(&child, stack);
+		if (worker_reply_send(&child, fd, ret) && ret == SRD_OK)
+			worker_run(&child, fd, shm);
+		gstate = PyGILState_Ensure();
+		Py_XDECREF(child.py_dumps);
+		PyGILState_Release(gstate);
+		srd_exit();
+	} else {
+		worker_reply_send(&child, fd, ret);
+	}
+	srd_log_callback_set_default();
+
+	g_ptr_array_free(child.insts, TRUE);
+	g_hash_table_destroy(child.inst_index);
+	g_byte_array_free(child.reply, TRUE);
+	g_variant_unref(stack);
+	munmap(shm, WORKER_SHM_SIZE);
+	close(fd);
+
+	return ret == SRD_OK ? 0 : 1;
+}
+
+#else
+
+/** @private */
+SRD_PRIV void workers_stop(struct srd_session *sess)
+{
+	(void)sess;
+}
+
+static int workers_command(struct srd_session *sess,
+		const struct worker_cmd *cmd)
+{
+	(void)sess;
+	(void)cmd;
+
+	return SRD_OK;
+}
+
+/** @private */
+SRD_PRIV int workers_send(struct srd_session *sess,
+		uint64_t abs_start_samplenum, uint64_t abs_end_samplenum,
+		const uint8_t *inbuf, uint64_t inbuflen, uint64_t unitsize)
+{
+	(void)sess;
+	(void)abs_start_samplenum;
+	(void)abs_end_samplenum;
+	(void)inbuf;
+	(void)inbuflen;
+	(void)unitsize;
+
+	return SRD_ERR;
+}
+
+/** @private */
+SRD_PRIV int worker_new(struct srd_session *sess, struct srd_decoder_inst *di,
+		const struct worker_segment *seg, struct worker **worker)
+{
+	(void)sess;
+	(void)di;
+	(void)seg;
+	(void)worker;
+
+	srd_err("Worker processes are not supported on this system.");
+
+	return SRD_ERR;
+}
+
+/** @private */
+SRD_PRIV void worker_free(struct worker *w)
+{
+	(void)w;
+}
+
+/** @private */
+SRD_PRIV int worker_send(struct worker *w, uint64_t abs_start_samplenum,
+		const uint8_t *inbuf, uint64_t num_samples, uint64_t unitsize,
+		uint64_t *sent)
+{
+	(void)w;
+	(void)abs_start_samplenum;
+	(void)inbuf;
+	(void)num_samples;
+	(void)unitsize;
+	(void)sent;
+
+	return SRD_ERR;
+}
+
+/** @private */
+SRD_PRIV gboolean worker_reply_run(struct srd_session *sess,
+		struct worker *w, int *ret)
+{
+	(void)sess;
+	(void)w;
+	(void)ret;
+
+	return FALSE;
+}
+
+/** @private */
+SRD_PRIV void worker_stats_add(const struct worker *w)
+{
+	(void)w;
+}
+
+/** @private */
+SRD_API int srd_worker_main(int argc, char **argv)
+{
+	(void)argc;
+	(void)argv;
+
+	return 1;
+}
+
+#endif
+
+/**
+ * Pass a new samplerate of the session on to its worker processes.
+ *
+ * @private
+ */
+SRD_PRIV int workers_samplerate_set(struct srd_session *sess)
+{
+	struct worker_cmd cmd;
+
+	memset(&cmd, 0, sizeof(cmd));
+	cmd.type = WORKER_CMD_SAMPLERATE;
+	cmd.samplerate = sess->samplerate;
+
+	return workers_command(sess, &cmd);
+}
+
+/**
+ * Have the worker processes reset their decoders, see
+ * srd_session_terminate_reset().
+ *
+ * @private
+ */
+SRD_PRIV int workers_reset(struct srd_session *sess)
+{
+	struct worker_cmd cmd;
+
+	memset(&cmd, 0, sizeof(cmd));
+	cmd.type = WORKER_CMD_RESET;
+
+	return workers_command(sess, &cmd);
+}
+
+/**
+ * Have the decoder stacks of a session run in worker processes.
+ *
+ * Decoders hold the Python interpreter lock while they execute Python
+ * code, so stacks which decode in parallel (see srd_session_parallel_set())
+ * mostly take turns. With isolation enabled, each stack which receives
+ * the frontend's samples runs in a process of its own, with a copy of
+ * the decoder instances. srd_session_send() passes the samples to all
+ * worker processes through shared memory, and the stacks decode them
+ * at the same time. The workers' output is passed to the session's
+ * callbacks in the process which called srd_session_send(), in the
+ * same order as without isolation. Python objects which go to the
+ * SRD_OUTPUT_PYTHON callback get copied with the pickle module.
+ *
+ * The worker processes start with the first chunk of samples, and get
+ * the instances' options, channel setup and samplerate at that time.
+ * srd_inst_stats_get() then returns the counters of the workers'
+ * copies. srd_session_seek() is not available with isolation.
+ *
+ * Each worker is a new process of the sigrokdecode-worker program,
+ * which gets installed along with the library (the SIGROKDECODE_WORKER
+ * environment variable names another path). It loads the decoders from
+ * the same search paths, and builds its copy of the stack from a
+ * description which the session sends. Nothing of the calling process
+ * is copied otherwise, so other threads may keep running. Its log
+ * messages go to the log callback of the calling process. Worker
+ * processes are only available on Unix systems.
+ *
+ * This should be set before sending sample data to the session.
+ *
+ * @param sess The session to configure. Must not be NULL.
+ * @param isolation TRUE to decode in worker processes, FALSE to decode
+ *                  in the calling process.
+ *
+ * @return SRD_OK upon success, a (negative) error code otherwise.
+ *
+ * @since 0.6.0
+ */
+SRD_API int srd_session_isolation_set(struct srd_session *sess,
+		gboolean isolation)
+{
+	int ret;
+
+	if (!sess)
+		return SRD_ERR_ARG;
+
+#ifndef G_OS_UNIX
+	if (isolation) {
+		srd_err("Worker processes are not supported on this system.");
+		return SRD_ERR;
+	}
+#endif
+
+	srd_dbg("%s worker processes in session %d.",
+		isolation ? "Enabling" : "Disabling", sess->session_id);
+
+	if ((ret = srd_session_flush(sess)) != SRD_OK)
+		return ret;
+	if (!isolation)
+		workers_stop(sess);
+	sess->isolation = isolation ? TRUE : FALSE;
+
+	return SRD_OK;
+}
+
+/** @} */